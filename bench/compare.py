@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+对比两次基准测试结果，超过阈值的退化返回非零退出码
+
+用法: python3 bench/compare.py <baseline.json> <current.json> [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# (指标路径, 越大越好)
+METRICS = [
+    (('docs_per_min',), True),
+    (('pages_per_sec',), True),
+    (('latency', 'p50'), False),
+    (('latency', 'p95'), False),
+    (('latency', 'p99'), False),
+    (('loop_lag_ms', 'p99'), False),
+    (('peak_rss_mb',), False),
+    (('max_open_sockets',), False),
+]
+
+
+def lookup(data: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> Tuple[List[List[str]], List[str]]:
+    """返回 (表格行, 退化项)"""
+    rows = []
+    regressions = []
+
+    for scenario, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(scenario)
+        if old is None:
+            rows.append([scenario, '(新场景)', '', '', ''])
+            continue
+
+        metrics = list(METRICS) + [(('stages', stage, 'p95'), False) for stage in new.get('stages', {})]
+        for path, higher_is_better in metrics:
+            before, after = lookup(old, path), lookup(new, path)
+            if before is None or after is None:
+                continue
+
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '❌'
+                regressions.append(f"{scenario} {'.'.join(path)}: {before} → {after} ({change:+.1%})")
+            elif worse < -threshold:
+                flag = '✅'
+
+            rows.append([scenario, '.'.join(path), str(before), str(after), f"{change:+.1%} {flag}"])
+
+    return rows, regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对比两次基准测试结果')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10, help='退化阈值（默认10%%）')
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    print(f"基线: {baseline.get('commit')} ({baseline.get('timestamp')})")
+    print(f"当前: {current.get('commit')} ({current.get('timestamp')})\n")
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    header = ['场景', '指标', '基线', '当前', '变化']
+    widths = [max(len(r[i]) for r in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项退化超过 {args.threshold:.0%}:")
+        for item in regressions:
+            print(f"  - {item}")
+        sys.exit(1)
+
+    print(f"\n✅ 无超过 {args.threshold:.0%} 的退化")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+基准测试语料生成（确定性，可复现）
+- small: 大量小PDF
+- huge: 少量超过600页、需要拆分的PDF
+- mixed: PDF / PPTX / DOCX / 图片混合
+"""
+import random
+from pathlib import Path
+from typing import List
+
+from PyPDF2 import PdfWriter
+from pptx import Presentation
+from docx import Document
+
+# 1x1 PNG
+PNG_PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+
+
+def make_pdf(path: Path, pages: int) -> str:
+    """生成指定页数的空白PDF"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+
+def make_pptx(path: Path, slides: int) -> str:
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i + 1}"
+    prs.save(str(path))
+    return str(path)
+
+
+def make_docx(path: Path, paragraphs: int) -> str:
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Paragraph {i + 1}")
+    doc.save(str(path))
+    return str(path)
+
+
+def build_corpus(kind: str, root: Path, count: int = 0, seed: int = 42) -> List[str]:
+    """
+    生成语料
+
+    Args:
+        kind: small / huge / mixed
+        root: 输出目录
+        count: 文件数（0 为默认：small=50, huge=2, mixed=20）
+        seed: 随机种子
+
+    Returns:
+        文件路径列表
+    """
+    rng = random.Random(seed)
+    root = Path(root) / kind
+    root.mkdir(parents=True, exist_ok=True)
+
+    if kind == 'small':
+        return [make_pdf(root / f"small_{i:04d}.pdf", rng.randint(1, 5)) for i in range(count or 50)]
+
+    if kind == 'huge':
+        return [make_pdf(root / f"huge_{i:02d}.pdf", rng.randint(1300, 1800)) for i in range(count or 2)]
+
+    if kind == 'mixed':
+        files = []
+        for i in range(count or 20):
+            fmt = ('pdf', 'pptx', 'docx', 'png')[i % 4]
+            path = root / f"mixed_{i:03d}.{fmt}"
+            if fmt == 'pdf':
+                files.append(make_pdf(path, rng.randint(1, 30)))
+            elif fmt == 'pptx':
+                files.append(make_pptx(path, rng.randint(1, 10)))
+            elif fmt == 'docx':
+                files.append(make_docx(path, rng.randint(5, 50)))
+            else:
+                path.write_bytes(PNG_PIXEL)
+                files.append(str(path))
+        return files
+
+    raise ValueError(f"未知语料类型: {kind}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+PPTX/DOCX 页数统计基准测试：OOXML 元数据读取 vs python-pptx/python-docx 对象模型
+
+语料（确定性生成）：
+- deck       大型演示文稿（--slides 张，每张标题+正文）
+- report     长报告（--paragraphs 段，带手动分页），python-docx 生成：app.xml 中是模板旧值，走 document.xml 估算
+- report_app 同一份报告，app.xml 写入 Word 保存时的统计（Pages/Words），直接读取
+
+用法: python3 bench/page_count.py [--slides 1000] [--paragraphs 20000] [--repeat 5]
+"""
+import argparse
+import json
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from pptx import Presentation
+
+from mineru_ooxml import page_count
+
+SENTENCE = "MinerU converts documents to Markdown with layout, tables and formulas preserved. "
+
+
+def make_deck(path: Path, slides: int) -> int:
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.placeholders[1].text = SENTENCE * 3
+    prs.save(str(path))
+    return slides
+
+
+def make_report(path: Path, paragraphs: int, per_page: int = 15) -> int:
+    """每 per_page 段插入一次手动分页，返回手动分页数+1"""
+    doc = Document()
+    for i in range(paragraphs):
+        paragraph = doc.add_paragraph(SENTENCE if i % 3 else SENTENCE * 2)
+        if i and i % per_page == 0:
+            paragraph.runs[0].add_break(WD_BREAK.PAGE)
+    doc.save(str(path))
+    return (paragraphs - 1) // per_page + 1
+
+
+def with_app_stats(source: Path, path: Path, pages: int, words: int):
+    """复制DOCX，把 app.xml 改为 Word 保存时写入的统计"""
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == 'docProps/app.xml':
+                text = data.decode('utf-8')
+                text = re.sub(r'<Pages>\d+</Pages>', f'<Pages>{pages}</Pages>', text)
+                text = re.sub(r'<Words>\d+</Words>', f'<Words>{words}</Words>', text)
+                data = text.encode('utf-8')
+            dst.writestr(item, data)
+
+
+def object_model_count(path: str, format: str) -> int:
+    """旧实现：加载完整对象模型"""
+    if format == 'pptx':
+        return len(Presentation(path).slides)
+    return len(Document(path).paragraphs) // 5
+
+
+def measure(func, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, round(statistics.median(times), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PPTX/DOCX 页数统计基准测试')
+    parser.add_argument('--slides', type=int, default=1000, help='演示文稿幻灯片数')
+    parser.add_argument('--paragraphs', type=int, default=20000, help='报告段落数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数（取中位数）')
+    parser.add_argument('--output', default=None, help='结果JSON')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='mineru_pages_'))
+    try:
+        deck, report, report_app = root / 'deck.pptx', root / 'report.docx', root / 'report_app.docx'
+        expected = {'deck': make_deck(deck, args.slides), 'report': make_report(report, args.paragraphs)}
+        expected['report_app'] = expected['report']
+        with_app_stats(report, report_app, expected['report'], args.paragraphs * 15)
+
+        results = {}
+        for name, path in (('deck', deck), ('report', report), ('report_app', report_app)):
+            format = path.suffix.lstrip('.')
+            old_pages, old_ms = measure(lambda: object_model_count(str(path), format), args.repeat)
+            new_pages, new_ms = measure(lambda: page_count(str(path), format), args.repeat)
+            results[name] = {
+                'size_mb': round(path.stat().st_size / 1024 / 1024, 2),
+                'expected': expected[name],
+                'object_model': {'pages': old_pages, 'ms': old_ms},
+                'ooxml': {'pages': new_pages, 'ms': new_ms},
+                'speedup': round(old_ms / new_ms, 1) if new_ms else None,
+            }
+            print(f"{name:<11} {results[name]['size_mb']:>6}MB  期望 {expected[name]:>5}  "
+                  f"对象模型 {old_pages:>5} 页 {old_ms:>9.1f}ms  "
+                  f"元数据 {new_pages:>5} 页 {new_ms:>8.1f}ms  ×{results[name]['speedup']}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
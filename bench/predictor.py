@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+处理耗时预测基准测试：在模拟服务器上处理一批混合文档记录历史，按时间顺序用前80%拟合、
+预测最后20%，与两个简单基线（平均耗时、按页数比例）比较
+
+语料（确定性生成）：
+- 1-80页的PDF（每页 4-40KB，大小与页数不成正比）、DOCX、PPTX、PNG
+- 每个文档随机开关公式识别和表格识别
+模拟服务器的耗时 = 固定耗时 + 页数 × (每页耗时 + 公式/表格额外耗时) + MB × 每MB耗时，再加 ±--jitter 的随机波动
+（模拟服务器对非PDF文档按1页计，这类文档的耗时主要由大小决定）
+按 fifo 顺序处理（生成顺序：格式交替、大小随机），历史的时间顺序与文档大小无关
+
+用法: python3 bench/predictor.py [--docs 150] [--workers 4] [--jitter 0.1]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'tools'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import PNG_PIXEL, make_docx, make_pptx
+from schedule import make_pdf
+from mineru_mock_server import MockConfig, MockMinerUServer
+
+
+def build_corpus(root: Path, docs: int, seed: int = 42) -> list:
+    """返回 [(路径, 处理选项)]"""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    items = []
+    for i in range(docs):
+        name = f"{i:04d}"
+        if i % 5 == 1:
+            path = make_docx(root / f"{name}.docx", rng.randint(5, 3000))
+        elif i % 5 == 2:
+            path = make_pptx(root / f"{name}.pptx", rng.randint(1, 30))
+        elif i % 5 == 3:
+            (root / f"{name}.png").write_bytes(PNG_PIXEL)
+            path = str(root / f"{name}.png")
+        else:
+            path = make_pdf(root / f"{name}.pdf", rng.randint(1, 80), rng.choice((4, 10, 40)), rng)
+        items.append((path, {'enable_formula': rng.random() < 0.5, 'enable_table': rng.random() < 0.5}))
+    return items
+
+
+async def run(items, base_url: str, tokens: str, workers: int) -> int:
+    from mineru_async import MinerUAsyncProcessor
+
+    processor = MinerUAsyncProcessor(max_workers=workers, base_url=base_url, tokens_file=tokens)
+    results = await asyncio.gather(*[processor.process_file(path, **options) for path, options in items])
+    return sum(1 for r in results if r)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='处理耗时预测基准测试（本地模拟服务器）')
+    parser.add_argument('--docs', type=int, default=150, help='文档数')
+    parser.add_argument('--workers', type=int, default=4, help='同时处理的文档数')
+    parser.add_argument('--latency-per-page', type=float, default=0.01, help='模拟每页处理耗时')
+    parser.add_argument('--formula-latency', type=float, default=0.01, help='开启公式识别时每页额外耗时')
+    parser.add_argument('--table-latency', type=float, default=0.005, help='开启表格识别时每页额外耗时')
+    parser.add_argument('--latency-per-mb', type=float, default=0.5, help='每MB额外耗时')
+    parser.add_argument('--base-latency', type=float, default=0.2, help='模拟每任务固定耗时')
+    parser.add_argument('--jitter', type=float, default=0.1, help='耗时随机波动（相对值）')
+    parser.add_argument('--holdout', type=float, default=0.2, help='用于评估的最近记录比例')
+    parser.add_argument('--output', default=None, help='结果JSON')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='mineru_predictor_'))
+    os.environ.update({
+        'MINERU_CONCURRENCY': 'fixed', 'MINERU_POLL_INTERVAL': '0.05', 'MINERU_RETRY_DELAY_SCALE': '0.1',
+        'MINERU_URL_CACHE': 'off', 'MINERU_QUOTA_LEDGER': 'off', 'MINERU_QUIET': '1', 'MINERU_SCHEDULE': 'fifo',
+        'MINERU_HISTORY': str(root / 'history.bin')
+    })
+    os.environ.pop('MINERU_IMAGE_STORE', None)
+    from mineru_logging import setup_logging
+    from mineru_history import HistoryStore, Predictor
+    setup_logging(quiet=True)
+
+    try:
+        items = build_corpus(root / 'corpus', args.docs)
+        tokens = root / 'all_tokens.json'
+        tokens.write_text(json.dumps({'bench@example.com': {
+            'name': 'bench', 'token_name': 'bench', 'token': 'bench-token',
+            'created_at': '2026-01-01T00:00:00Z', 'expired_at': '2099-01-01T00:00:00Z'
+        }}))
+        config = MockConfig(latency_per_page=args.latency_per_page, base_latency=args.base_latency,
+                            formula_latency=args.formula_latency, table_latency=args.table_latency,
+                            latency_per_mb=args.latency_per_mb, latency_jitter=args.jitter, seed=42)
+        start = time.time()
+        with MockMinerUServer(config=config) as server, contextlib.redirect_stdout(io.StringIO()):
+            succeeded = asyncio.run(run(items, server.base_url, str(tokens), args.workers))
+        elapsed = time.time() - start
+
+        store = HistoryStore(str(root / 'history.bin'))
+        report = Predictor(store).evaluate(args.holdout)
+        report.update({'succeeded': succeeded, 'docs': args.docs, 'history_bytes': store.history_file.stat().st_size})
+        print(f"处理 {succeeded}/{args.docs} 个文档（{elapsed:.1f}s），历史文件 {report['history_bytes']} 字节")
+        print(f"用前 {report['train']} 条拟合，预测最后 {report['test']} 条:")
+        for name, label in (('model', '分组回归'), ('baseline_mean', '基线: 平均耗时'),
+                            ('baseline_pages', '基线: 按页数')):
+            e = report[name]
+            print(f"  {label:<12} MAE {e['mae']:6.3f}s  MAPE {e['mape']:6.1%}  中位 {e['median_ape']:6.1%}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
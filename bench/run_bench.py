@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+端到端批量处理基准测试
+针对本地模拟服务器运行，离线、可复现，结果写入JSON便于跨提交对比
+
+场景：
+- process_file/small   MinerUAsyncProcessor.process_file（并发调用）
+- batch/small          BatchAsyncProcessor.process_files_parallel，大量小文件
+- batch/mixed          BatchAsyncProcessor.process_files_parallel，混合格式
+- split_merge/huge     拆分 → 批量处理分片 → 合并
+- url/small            process_file 处理URL（模拟服务器提供文档；--url-mode 选择直接提交或下载再上传）
+
+指标：docs/min、pages/sec、各阶段 p50/p95/p99、事件循环延迟、上传/下载量和重试次数、峰值RSS、最大打开socket数
+
+日志模式（--log-mode）：
+- sync   处理器直接在事件循环线程格式化并写日志文件（旧方式）
+- queue  记录放入队列，后台线程格式化和写入（默认）
+- quiet  只记录警告和错误
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import math
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'tools'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import build_corpus
+from mineru_executor import LoopLagMonitor
+from mineru_metrics import DOWNLOAD_BYTES, REGISTRY, RETRIES, UPLOAD_BYTES
+
+SCENARIOS = ['process_file/small', 'batch/small', 'batch/mixed', 'split_merge/huge', 'url/small']
+
+
+# ==================== 指标采集 ====================
+
+class ResourceSampler:
+    """后台采样进程RSS和打开的socket数"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self.max_sockets = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def rss_bytes() -> int:
+        """当前RSS（无 /proc 时退化为历史峰值）"""
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    @staticmethod
+    def open_sockets() -> Optional[int]:
+        """当前打开的socket数（仅Linux）"""
+        try:
+            fds = os.listdir('/proc/self/fd')
+        except OSError:
+            return None
+        count = 0
+        for fd in fds:
+            try:
+                if os.readlink(f'/proc/self/fd/{fd}').startswith('socket:'):
+                    count += 1
+            except OSError:
+                continue
+        return count
+
+    def _sample(self):
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+        sockets = self.open_sockets()
+        if sockets is not None:
+            self.max_sockets = max(self.max_sockets, sockets)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+async def measure_loop_lag(coro):
+    """运行协程的同时采样事件循环延迟，返回 (结果, 监控器)"""
+    async with LoopLagMonitor(keep_samples=True, keep_worst=5, warn_ms=float('inf')) as monitor:
+        return await coro, monitor
+
+
+def configure_logging(mode: str, level: str, log_file: Path):
+    """按日志模式配置（日志写入工作目录中的文件，不输出到终端）"""
+    from mineru_logging import setup_logging
+
+    if mode == 'quiet':
+        setup_logging(quiet=True, console=False)
+    else:
+        setup_logging(level=level, log_file=str(log_file), quiet=False, console=False,
+                      blocking=(mode == 'sync'))
+
+
+def percentiles(values: List[float]) -> Dict:
+    """最近秩百分位数"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+        return round(ordered[index], 4)
+
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 4),
+        'p50': rank(50),
+        'p95': rank(95),
+        'p99': rank(99),
+        'max': round(ordered[-1], 4)
+    }
+
+
+def stage_summary(timings: List[Dict[str, float]]) -> Dict:
+    """按阶段汇总耗时百分位"""
+    stages: Dict[str, List[float]] = {}
+    for item in timings:
+        for stage, seconds in item.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {stage: percentiles(values) for stage, values in stages.items()}
+
+
+def count_pages(path: str) -> int:
+    """文档页数（无法识别按1页）"""
+    from mineru_async import FileValidator
+    return FileValidator._get_page_count(path, Path(path).suffix.lower().lstrip('.')) or 1
+
+
+# ==================== 模拟服务器 ====================
+
+@contextlib.contextmanager
+def mock_server(args, files_dir: Optional[Path] = None):
+    """在子进程中启动模拟服务器（其内存和socket不计入被测进程），files_dir 中的文档以 /files/<文件名> 提供"""
+    cmd = [
+        sys.executable, str(project_root / 'tools' / 'mineru_mock_server.py'),
+        '--port', '0',
+        '--latency-per-page', str(args.latency_per_page),
+        '--base-latency', str(args.base_latency),
+        '--bandwidth', str(args.bandwidth),
+        '--disconnect-rate', str(args.disconnect_rate),
+        '--result-size', str(args.result_size),
+        '--workers', str(args.server_workers),
+        '--max-active-per-token', str(args.max_active_per_token),
+        '--seed', '42'
+    ]
+    if files_dir:
+        cmd += ['--files-dir', str(files_dir)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    try:
+        line = proc.stdout.readline()
+        match = re.search(r'(http://\S+/api/v4)', line)
+        if not match:
+            raise RuntimeError(f"模拟服务器启动失败: {line!r}")
+        yield match.group(1)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def counter_total(metric) -> float:
+    """计数器所有标签值之和"""
+    return sum(child.value for _, child in metric._samples())
+
+
+def write_tokens(path: Path) -> str:
+    path.write_text(json.dumps({'bench@example.com': {
+        'name': 'bench', 'token_name': 'bench', 'token': 'bench-token',
+        'created_at': '2026-01-01T00:00:00Z', 'expired_at': '2099-01-01T00:00:00Z'
+    }}))
+    return str(path)
+
+
+# ==================== 场景 ====================
+
+async def run_process_file(files: List[str], base_url: str, tokens: str, workers: int,
+                           output_dir: str = './output') -> Dict:
+    """并发调用 MinerUAsyncProcessor.process_file（output_dir 用于URL输入）"""
+    from mineru_async import MinerUAsyncProcessor
+
+    processor = MinerUAsyncProcessor(max_workers=workers, base_url=base_url, tokens_file=tokens)
+    semaphore = asyncio.Semaphore(workers)
+    latencies, timings = [], []
+
+    async def one(path: str):
+        async with semaphore:
+            start = time.time()
+            result = await processor.process_file(path, output_dir)
+            if result:
+                latencies.append(time.time() - start)
+                timings.append(result['timings'])
+            return result
+
+    results = await asyncio.gather(*[one(f) for f in files])
+    return {'ok': sum(1 for r in results if r), 'latencies': latencies, 'timings': timings}
+
+
+async def run_batch(files: List[str], base_url: str, tokens: str, workers: int) -> Dict:
+    """BatchAsyncProcessor.process_files_parallel"""
+    from mineru_batch_async import BatchAsyncProcessor
+
+    processor = BatchAsyncProcessor(max_concurrent=workers, base_url=base_url, tokens_file=tokens)
+    results = await processor.process_files_parallel(files)
+    done = [r for r in results if r.status == 'done']
+    return {
+        'ok': len(done),
+        'latencies': [r.end_time - r.start_time for r in done],
+        'timings': [r.timings for r in done]
+    }
+
+
+async def run_split_merge(files: List[str], base_url: str, tokens: str, workers: int) -> Dict:
+    """拆分 → 批量处理分片 → 合并"""
+    from mineru_batch_async import BatchAsyncProcessor
+    from mineru_batch_processor import FileChunker
+    from mineru_merge import ChunkMerger, ChunkResult
+
+    processor = BatchAsyncProcessor(max_concurrent=workers, base_url=base_url, tokens_file=tokens)
+    ok, latencies, timings = 0, [], []
+
+    for path in files:
+        start = time.time()
+        stages = {}
+
+        chunk_dir = Path(path).parent / f"{Path(path).stem}_chunks"
+        chunks = FileChunker.split_file(path, str(chunk_dir))
+        starts, total_pages = FileChunker.page_plan(chunks)
+        stages['split'] = time.time() - start
+
+        stage_start = time.time()
+        results = await processor.process_files_parallel(chunks)
+        stages['process_chunks'] = time.time() - stage_start
+        if len(results) != len(chunks) or not all(r.status == 'done' for r in results):
+            continue
+
+        stage_start = time.time()
+        merged = [ChunkResult(i, start, str(Path(c).parent / f"{Path(c).stem}_result"))
+                  for i, (start, c) in enumerate(zip(starts, chunks), 1)]
+        ChunkMerger().merge(merged, str(Path(path).parent / f"{Path(path).stem}_merged"), Path(path).stem,
+                            total_pages=total_pages)
+        stages['merge'] = time.time() - stage_start
+
+        ok += 1
+        latencies.append(time.time() - start)
+        timings.append(stages)
+
+    return {'ok': ok, 'latencies': latencies, 'timings': timings}
+
+
+RUNNERS = {
+    'process_file': run_process_file,
+    'batch': run_batch,
+    'split_merge': run_split_merge,
+    'url': run_process_file,
+}
+
+
+def run_scenario(name: str, work_dir: Path, base_url: str, tokens: str, args) -> Dict:
+    """生成语料并运行一个场景"""
+    runner_name, corpus_kind = name.split('/')
+    count = {'small': args.small_count, 'huge': args.huge_count, 'mixed': args.mixed_count}[corpus_kind]
+
+    corpus_dir = work_dir / runner_name.replace('_', '-')
+    files = build_corpus(corpus_kind, corpus_dir, count)
+    pages = sum(count_pages(f) for f in files)
+    runner = RUNNERS[runner_name]
+    if runner_name == 'url':
+        # 语料已在启动模拟服务器前生成（确定性，与此处重新生成的内容一致），改用模拟服务器上的URL
+        server_url = base_url.rsplit('/api/v4', 1)[0]
+        files = [f"{server_url}/files/{Path(f).name}" for f in files]
+        runner = functools.partial(runner, output_dir=str(corpus_dir / 'output'))
+
+    downloaded, uploaded, retries = DOWNLOAD_BYTES.value, counter_total(UPLOAD_BYTES), counter_total(RETRIES)
+    quiet = io.StringIO()
+    with ResourceSampler() as sampler, contextlib.redirect_stdout(quiet):
+        start = time.time()
+        outcome, monitor = asyncio.run(measure_loop_lag(runner(files, base_url, tokens, args.workers)))
+        wall = time.time() - start
+
+    return {
+        'docs': len(files),
+        'pages': pages,
+        'succeeded': outcome['ok'],
+        'failed': len(files) - outcome['ok'],
+        'wall_seconds': round(wall, 3),
+        'docs_per_min': round(len(files) / wall * 60, 2),
+        'pages_per_sec': round(pages / wall, 2),
+        'latency': percentiles(outcome['latencies']),
+        'stages': stage_summary(outcome['timings']),
+        'loop_lag_ms': percentiles(monitor.samples),
+        'loop_stalls_ms': [stall['lag_ms'] for stall in monitor.report()['worst']],
+        'upload_mb': round((counter_total(UPLOAD_BYTES) - uploaded) / 1024 / 1024, 2),
+        'download_mb': round((DOWNLOAD_BYTES.value - downloaded) / 1024 / 1024, 2),
+        'retries': int(counter_total(RETRIES) - retries),
+        'peak_rss_mb': round(sampler.peak_rss / 1024 / 1024, 1),
+        'max_open_sockets': sampler.max_sockets
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MinerU 批量处理基准测试（本地模拟服务器）')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='场景，逗号分隔')
+    parser.add_argument('--workers', type=int, default=5, help='并发数（默认5，自适应模式下为初始值）')
+    parser.add_argument('--concurrency', choices=['adaptive', 'fixed'], default='adaptive',
+                        help='并发控制：adaptive 按AIMD调整 / fixed 固定为 --workers（默认 adaptive）')
+    parser.add_argument('--server-workers', type=int, default=0, help='模拟服务端同时处理的任务数（0为不限）')
+    parser.add_argument('--max-active-per-token', type=int, default=0,
+                        help='模拟每个Token未完成的任务数上限，超出时429（0为不限）')
+    parser.add_argument('--small-count', type=int, default=50, help='small 语料文件数')
+    parser.add_argument('--huge-count', type=int, default=2, help='huge 语料文件数')
+    parser.add_argument('--mixed-count', type=int, default=20, help='mixed 语料文件数')
+    parser.add_argument('--latency-per-page', type=float, default=0.002, help='模拟每页处理耗时')
+    parser.add_argument('--base-latency', type=float, default=0.2, help='模拟每任务固定耗时')
+    parser.add_argument('--bandwidth', type=int, default=0, help='模拟每个连接的带宽上限（字节/秒）')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0, help='模拟下载中途断开的概率')
+    parser.add_argument('--result-size', type=int, default=0, help='模拟结果ZIP额外附带的字节数（大结果）')
+    parser.add_argument('--download-parallel', type=int, default=1, help='结果下载并行段数（默认1）')
+    parser.add_argument('--retry-delay-scale', type=float, default=0.1, help='重试等待时间缩放（默认0.1）')
+    parser.add_argument('--url-mode', choices=['auto', 'upload'], default='auto',
+                        help='URL处理方式：auto 直接提交URL / upload 本机下载再上传（默认 auto）')
+    parser.add_argument('--poll-interval', type=float, default=0.1, help='客户端轮询间隔')
+    parser.add_argument('--log-mode', choices=['sync', 'queue', 'quiet'], default='queue',
+                        help='日志模式：sync 同步写入 / queue 后台线程写入 / quiet 只记录警告（默认 queue）')
+    parser.add_argument('--log-level', default='INFO', help='sync/queue 模式的日志级别（默认 INFO）')
+    parser.add_argument('--quick', action='store_true', help='快速模式：缩小语料')
+    parser.add_argument('--output', default=None, help='结果JSON（默认 bench/results/<时间>-<提交>.json）')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.small_count, args.huge_count, args.mixed_count = 10, 1, 8
+
+    os.environ['MINERU_POLL_INTERVAL'] = str(args.poll_interval)
+    os.environ['MINERU_DOWNLOAD_PARALLEL'] = str(args.download_parallel)
+    os.environ['MINERU_RETRY_DELAY_SCALE'] = str(args.retry_delay_scale)
+    os.environ['MINERU_URL_MODE'] = args.url_mode
+    os.environ['MINERU_CONCURRENCY'] = args.concurrency
+    os.environ['MINERU_URL_CACHE'] = 'off'
+    os.environ.pop('MINERU_IMAGE_STORE', None)
+    REGISTRY.enable()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'scenarios': {}
+    }
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    with contextlib.ExitStack() as stack:
+        work_dir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix='mineru_bench_')))
+        files_dir = None
+        if 'url/small' in scenarios:
+            files_dir = work_dir / 'url-files'
+            build_corpus('small', files_dir, args.small_count)
+            files_dir = files_dir / 'small'
+        base_url = stack.enter_context(mock_server(args, files_dir))
+        # 模拟服务器在本机：允许直接提交其上的URL（与 tests/conftest.py 相同）
+        os.environ['MINERU_URL_ALLOW_HOSTS'] = urlparse(base_url).hostname
+        tokens = write_tokens(work_dir / 'all_tokens.json')
+        configure_logging(args.log_mode, args.log_level, work_dir / 'bench.log')
+
+        for name in scenarios:
+            if name not in SCENARIOS:
+                print(f"❌ 未知场景: {name}（可选: {', '.join(SCENARIOS)}）")
+                sys.exit(1)
+            print(f"⏱️  {name} ...", flush=True)
+            result = run_scenario(name, work_dir, base_url, tokens, args)
+            report['scenarios'][name] = result
+            print(f"   ✅ {result['succeeded']}/{result['docs']} 文档, {result['docs_per_min']} docs/min, "
+                  f"{result['pages_per_sec']} pages/s, p95 {result['latency'].get('p95', '-')}s, "
+                  f"loop lag p99 {result['loop_lag_ms'].get('p99', '-')}ms, "
+                  f"上传 {result['upload_mb']}MB, 下载 {result['download_mb']}MB, 重试 {result['retries']}, "
+                  f"RSS {result['peak_rss_mb']}MB, sockets {result['max_open_sockets']}")
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / 'results' / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\n📊 结果: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+调度策略基准测试：fifo / lpt / sjf 的总耗时（makespan）和平均完成时间
+
+语料（确定性生成）：
+- 大量1-20页的小PDF、若干 PPTX/DOCX/PNG，以及 --big 个400-600页的大PDF
+- 大PDF的文件名排在最后（--big-position last，fifo 总耗时的最坏情况）或最前（first，fifo 平均完成时间的最坏情况）；
+  PDF每页约 --page-kb KB（文件大小与页数成正比）
+模拟服务器每页处理 --latency-per-page 秒，服务端耗时与页数成正比
+
+场景：
+- batch   BatchAsyncProcessor.process_files_parallel，固定 --workers 个并发
+- calls   同时发起的 MinerUAsyncProcessor.process_file 调用（MCP 交互调用），最多 --workers 个同时处理
+
+完成时间从批量开始（所有调用发起）算起；并发固定（MINERU_CONCURRENCY=fixed），只比较顺序的影响
+
+用法: python3 bench/schedule.py [--docs 60] [--big 2] [--workers 4] [--policies fifo,lpt,sjf]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'tools'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import NameObject, StreamObject
+
+from corpus import PNG_PIXEL, make_docx, make_pptx
+from mineru_mock_server import MockConfig, MockMinerUServer
+
+
+def make_pdf(path: Path, pages: int, page_kb: int, rng: random.Random) -> str:
+    """每页带一段不可压缩的内容流（PDF注释），文件大小与页数成正比"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = writer.add_blank_page(width=200, height=200)
+        stream = StreamObject()
+        stream._data = b'%' + rng.randbytes(page_kb * 512).hex().encode() + b'\n'
+        page[NameObject('/Contents')] = writer._add_object(stream)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+
+def build_corpus(root: Path, docs: int, big: int, page_kb: int, big_position: str = 'last', seed: int = 42) -> list:
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(docs):
+        name = f"{rng.getrandbits(32):08x}"
+        if i < big:
+            prefix = 'zz' if big_position == 'last' else '00'
+            files.append(make_pdf(root / f"{prefix}_{name}.pdf", rng.randint(400, 600), page_kb, rng))
+        elif i % 5 == 1:
+            files.append(make_pptx(root / f"{name}.pptx", rng.randint(1, 10)))
+        elif i % 5 == 2:
+            files.append(make_docx(root / f"{name}.docx", rng.randint(5, 50)))
+        elif i % 5 == 3:
+            (root / f"{name}.png").write_bytes(PNG_PIXEL)
+            files.append(str(root / f"{name}.png"))
+        else:
+            files.append(make_pdf(root / f"{name}.pdf", rng.randint(1, 20), page_kb, rng))
+    return sorted(files)  # 与目录扫描一致，按文件名顺序提交
+
+
+async def run_batch(files, base_url, tokens, workers, policy):
+    from mineru_batch_async import BatchAsyncProcessor
+
+    processor = BatchAsyncProcessor(max_concurrent=workers, base_url=base_url, tokens_file=tokens, policy=policy)
+    start = time.time()
+    results = await processor.process_files_parallel(files)
+    return start, [(r.status == 'done', r.end_time) for r in results]
+
+
+async def run_calls(files, base_url, tokens, workers, policy):
+    from mineru_async import MinerUAsyncProcessor
+
+    processor = MinerUAsyncProcessor(max_workers=workers, base_url=base_url, tokens_file=tokens, policy=policy)
+    start = time.time()
+
+    async def one(path):
+        result = await processor.process_file(path)
+        return result is not None, time.time()
+
+    return start, await asyncio.gather(*[one(f) for f in files])
+
+
+RUNNERS = {'batch': run_batch, 'calls': run_calls}
+
+
+def measure(runner, corpus: Path, files_root: Path, base_url: str, tokens: str, workers: int, policy: str) -> dict:
+    # 每次用一份新的语料副本（输出目录写在源文件旁边）
+    shutil.rmtree(files_root, ignore_errors=True)
+    shutil.copytree(corpus, files_root)
+    files = sorted(str(p) for p in files_root.iterdir())
+    with contextlib.redirect_stdout(io.StringIO()):
+        start, outcomes = asyncio.run(runner(files, base_url, tokens, workers, policy))
+    done = [end - start for ok, end in outcomes if ok]
+    return {
+        'succeeded': len(done),
+        'docs': len(files),
+        'makespan': round(max(done), 2) if done else None,
+        'mean_completion': round(statistics.mean(done), 2) if done else None,
+        'p50_completion': round(statistics.median(done), 2) if done else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='调度策略基准测试（本地模拟服务器）')
+    parser.add_argument('--docs', type=int, default=60, help='文档数')
+    parser.add_argument('--big', type=int, default=2, help='其中400-600页的大PDF数')
+    parser.add_argument('--big-position', choices=['last', 'first'], default='last',
+                        help='大PDF的文件名排在最后/最前（默认 last）')
+    parser.add_argument('--page-kb', type=int, default=20, help='PDF每页大小（KB）')
+    parser.add_argument('--workers', type=int, default=4, help='固定并发数')
+    parser.add_argument('--latency-per-page', type=float, default=0.01, help='模拟每页处理耗时')
+    parser.add_argument('--base-latency', type=float, default=0.2, help='模拟每任务固定耗时')
+    parser.add_argument('--policies', default='fifo,lpt,sjf', help='调度策略，逗号分隔')
+    parser.add_argument('--scenarios', default='batch,calls', help='场景，逗号分隔')
+    parser.add_argument('--output', default=None, help='结果JSON')
+    args = parser.parse_args()
+
+    os.environ.update({
+        'MINERU_CONCURRENCY': 'fixed', 'MINERU_POLL_INTERVAL': '0.05', 'MINERU_RETRY_DELAY_SCALE': '0.1',
+        'MINERU_URL_CACHE': 'off', 'MINERU_QUOTA_LEDGER': 'off', 'MINERU_QUIET': '1'
+    })
+    os.environ.pop('MINERU_IMAGE_STORE', None)
+    os.environ.pop('MINERU_SCHEDULE', None)
+    from mineru_logging import setup_logging
+    setup_logging(quiet=True)
+
+    root = Path(tempfile.mkdtemp(prefix='mineru_schedule_'))
+    results = {}
+    try:
+        corpus = root / 'corpus'
+        build_corpus(corpus, args.docs, args.big, args.page_kb, args.big_position)
+        tokens = root / 'all_tokens.json'
+        tokens.write_text(json.dumps({'bench@example.com': {
+            'name': 'bench', 'token_name': 'bench', 'token': 'bench-token',
+            'created_at': '2026-01-01T00:00:00Z', 'expired_at': '2099-01-01T00:00:00Z'
+        }}))
+        config = MockConfig(latency_per_page=args.latency_per_page, base_latency=args.base_latency, seed=42)
+        print(f"语料: {args.docs} 个文档（{args.big} 个大PDF，文件名排在{'最后' if args.big_position == 'last' else '最前'}），"
+              f"并发 {args.workers}")
+        with MockMinerUServer(config=config) as server:
+            for scenario in args.scenarios.split(','):
+                for policy in args.policies.split(','):
+                    result = measure(RUNNERS[scenario], corpus, root / 'run', server.base_url, str(tokens),
+                                     args.workers, policy)
+                    results[f"{scenario}/{policy}"] = result
+                    print(f"{scenario:<6} {policy:<5} 成功 {result['succeeded']}/{result['docs']}  "
+                          f"总耗时 {result['makespan']:>6}s  平均完成 {result['mean_completion']:>6}s  "
+                          f"中位完成 {result['p50_completion']:>6}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
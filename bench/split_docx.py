@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+超大文档拆分基准测试：body 子元素层面拆分 vs python-docx 段落文本复制（旧 FileChunker.split_docx）
+
+语料（确定性生成）：--sections 节，每节一个标题、若干正文段落、一个表格和一张不同的图片，以分页符结束
+旧方式只复制 paragraph.text，分片中没有表格、图片和样式；这里同时统计分片中保留的表格、图片数
+
+用法: python3 bench/split_docx.py [--sections 1500] [--image-kb 16] [--workers 1,4]
+"""
+import argparse
+import io
+import json
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'bench'))
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.shared import Inches
+
+from mineru_ooxml_split import split_docx
+from split_pptx import make_png
+
+MAX_PAGES = 600
+SENTENCE = "MinerU converts documents to Markdown with layout, tables and formulas preserved. "
+
+
+def make_report(path: Path, sections: int, image_kb: int, seed: int = 42):
+    rng = random.Random(seed)
+    doc = Document()
+    for i in range(sections):
+        doc.add_heading(f"Section {i + 1}", 1)
+        for _ in range(4):
+            doc.add_paragraph(SENTENCE * 3)
+        table = doc.add_table(rows=3, cols=3)
+        table.cell(0, 0).text = f"Table {i + 1}"
+        doc.add_picture(io.BytesIO(make_png(rng, image_kb)), width=Inches(2))
+        doc.add_paragraph(SENTENCE).runs[0].add_break(WD_BREAK.PAGE)
+    doc.save(str(path))
+
+
+def paragraph_text_split(file_path: str, output_dir: Path) -> list:
+    """旧实现：按每页5段估算，新建文档并逐段复制文本"""
+    doc = Document(file_path)
+    total = len(doc.paragraphs)
+    if total // 5 <= MAX_PAGES:
+        return [file_path]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    per_chunk = MAX_PAGES * 5
+    chunks = []
+    for i in range((total + per_chunk - 1) // per_chunk):
+        new_doc = Document()
+        for para_num in range(i * per_chunk, min((i + 1) * per_chunk, total)):
+            new_doc.add_paragraph(doc.paragraphs[para_num].text)
+        path = output_dir / f"chunk_{i + 1}.docx"
+        new_doc.save(str(path))
+        chunks.append(str(path))
+    return chunks
+
+
+def inspect(chunks: list) -> dict:
+    """分片中的表格数和图片数（直接读ZIP）"""
+    tables = images = size = 0
+    for chunk in chunks:
+        with zipfile.ZipFile(chunk) as zf:
+            document = zf.read('word/document.xml')
+            images += sum(1 for n in zf.namelist() if n.startswith('word/media/'))
+        tables += len(re.findall(rb'<w:tbl>', document))
+        size += Path(chunk).stat().st_size
+    return {'chunks': len(chunks), 'tables': tables, 'images': images, 'size_mb': round(size / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DOCX 拆分基准测试')
+    parser.add_argument('--sections', type=int, default=1500, help='节数（每节一页）')
+    parser.add_argument('--image-kb', type=int, default=16, help='每节的图片大小（KB）')
+    parser.add_argument('--workers', default='1,4', help='包层面拆分的并行分片数，逗号分隔')
+    parser.add_argument('--output', default=None, help='结果JSON')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='mineru_split_'))
+    try:
+        report = root / 'report.docx'
+        make_report(report, args.sections, args.image_kb)
+        print(f"文档: {args.sections} 节, {report.stat().st_size / 1024 / 1024:.1f}MB")
+
+        results = {}
+        start = time.perf_counter()
+        chunks = paragraph_text_split(str(report), root / 'paragraph_text')
+        results['paragraph_text'] = {'seconds': round(time.perf_counter() - start, 2), **inspect(chunks)}
+
+        for workers in [int(w) for w in args.workers.split(',')]:
+            out = root / f'package_{workers}'
+            start = time.perf_counter()
+            chunks = split_docx(str(report), str(out), max_pages=MAX_PAGES, workers=workers)
+            results[f'package/{workers}'] = {'seconds': round(time.perf_counter() - start, 2), **inspect(chunks)}
+
+        for name, r in results.items():
+            print(f"{name:<15} {r['seconds']:>7.2f}s  {r['chunks']} 个分片  "
+                  f"表格 {r['tables']}  图片 {r['images']}  {r['size_mb']}MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+超大演示文稿拆分基准测试：OOXML 包层面拆分 vs python-pptx 重建（旧 FileChunker.split_pptx）
+
+语料（确定性生成）：--slides 张幻灯片，每张一个标题、一段正文和一张不同的图片
+旧方式只为每张幻灯片调用 add_slide(slide.slide_layout)，分片中是空白幻灯片；这里同时统计分片中保留的图片数
+
+用法: python3 bench/split_pptx.py [--slides 2000] [--image-kb 48] [--workers 1,4]
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from mineru_ooxml_split import split_pptx
+
+MAX_SLIDES = 600
+
+
+def make_png(rng: random.Random, kb: int) -> bytes:
+    """随机像素PNG（几乎不可压缩，大小约 kb KB）"""
+    side = max(int((kb * 1024 / 3) ** 0.5), 1)
+    raw = b''.join(b'\0' + rng.randbytes(side * 3) for _ in range(side))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', side, side, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def make_deck(path: Path, slides: int, image_kb: int, seed: int = 42):
+    rng = random.Random(seed)
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.placeholders[1].text = f"Body text of slide {i + 1}"
+        slide.shapes.add_picture(io.BytesIO(make_png(rng, image_kb)), Inches(5), Inches(4), Inches(2))
+    prs.save(str(path))
+
+
+def object_model_split(file_path: str, output_dir: Path) -> list:
+    """旧实现：python-pptx 新建演示文稿并按版式添加（空白）幻灯片"""
+    prs = Presentation(file_path)
+    total = len(prs.slides)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    chunks = []
+    for i in range((total + MAX_SLIDES - 1) // MAX_SLIDES):
+        new_prs = Presentation()
+        new_prs.slide_width, new_prs.slide_height = prs.slide_width, prs.slide_height
+        for slide_num in range(i * MAX_SLIDES, min((i + 1) * MAX_SLIDES, total)):
+            new_prs.slides.add_slide(prs.slides[slide_num].slide_layout)
+        path = output_dir / f"chunk_{i + 1}.pptx"
+        new_prs.save(str(path))
+        chunks.append(str(path))
+    return chunks
+
+
+def inspect(chunks: list) -> dict:
+    """分片中的幻灯片数和图片数（直接读ZIP）"""
+    slides = images = size = 0
+    for chunk in chunks:
+        with zipfile.ZipFile(chunk) as zf:
+            names = zf.namelist()
+        slides += sum(1 for n in names if n.startswith('ppt/slides/slide'))
+        images += sum(1 for n in names if n.startswith('ppt/media/'))
+        size += Path(chunk).stat().st_size
+    return {'chunks': len(chunks), 'slides': slides, 'images': images, 'size_mb': round(size / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PPTX 拆分基准测试')
+    parser.add_argument('--slides', type=int, default=2000, help='幻灯片数')
+    parser.add_argument('--image-kb', type=int, default=48, help='每张幻灯片的图片大小（KB）')
+    parser.add_argument('--workers', default='1,4', help='包层面拆分的并行分片数，逗号分隔')
+    parser.add_argument('--output', default=None, help='结果JSON')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='mineru_split_'))
+    try:
+        deck = root / 'deck.pptx'
+        make_deck(deck, args.slides, args.image_kb)
+        print(f"演示文稿: {args.slides} 张, {deck.stat().st_size / 1024 / 1024:.1f}MB")
+
+        results = {}
+        start = time.perf_counter()
+        chunks = object_model_split(str(deck), root / 'object_model')
+        results['object_model'] = {'seconds': round(time.perf_counter() - start, 2), **inspect(chunks)}
+
+        for workers in [int(w) for w in args.workers.split(',')]:
+            out = root / f'package_{workers}'
+            start = time.perf_counter()
+            chunks = split_pptx(str(deck), str(out), workers=workers)
+            results[f'package/{workers}'] = {'seconds': round(time.perf_counter() - start, 2), **inspect(chunks)}
+
+        for name, r in results.items():
+            print(f"{name:<14} {r['seconds']:>7.2f}s  {r['chunks']} 个分片  "
+                  f"幻灯片 {r['slides']}  图片 {r['images']}  {r['size_mb']}MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
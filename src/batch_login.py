@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
 """
-批量登录 - 全自动版本（支持 headless）
+批量登录 - 全自动版本（支持 headless，多账户并发）
 自动点击登录、自动点击阿里云验证码、自动检测登录成功
 默认 headless 模式，可用 --headed 参数打开浏览器界面
+每个账户一个独立的浏览器上下文，-j/--concurrency 控制同时登录的账户数（默认4），
+总耗时取决于最慢的账户而不是所有账户之和；等待基于页面元素和 Cookie 事件，不再固定 sleep
+登录 Cookie 保存到 all_cookies.json，供 MCP 服务器后台自动续期 Token（mineru_renewer）
 """
-import json, time, requests, random, yaml, sys
+import argparse
+import asyncio
+import random
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+
+import yaml
+from niquests import AsyncSession
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+sys.path.insert(0, str(Path(__file__).parent))
+from mineru_renewer import DEFAULT_BASE_URL, create_token, delete_tokens, load_json, write_json_atomic
 
 PROJECT_ROOT = Path(__file__).parent.parent
-HEADED = '--headed' in sys.argv
+TOKEN_PAGE = 'https://mineru.net/apiManage/token'
+EMAIL_INPUT = 'input[placeholder="邮箱/手机号/用户名"]'
+PASSWORD_INPUT = 'input[type="password"]'
+LOGIN_BUTTON = 'button.loginButton--wFHGh'
+CAPTCHA_CHECKBOX = '#aliyunCaptcha-checkbox-icon'
+CAPTCHA_POPUP = '#aliyunCaptcha-window-popup.window-show'
+LOGIN_COOKIES = ('uaa-token', 'opendatalab_session')
 
 STEALTH_JS = """
 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
@@ -46,144 +65,156 @@ def load_accounts():
     with open(PROJECT_ROOT / 'accounts.yaml', 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)['accounts']
 
-def save_all_tokens(tokens):
-    with open(PROJECT_ROOT / 'all_tokens.json', 'w') as f:
-        json.dump(tokens, f, indent=2, ensure_ascii=False)
-
-def type_human(page, selector, text):
-    page.locator(selector).click()
-    time.sleep(random.uniform(0.3, 0.6))
-    for char in text:
-        page.keyboard.type(char)
-        time.sleep(random.uniform(0.08, 0.18))
-    time.sleep(random.uniform(0.4, 0.8))
-
-def click_captcha(page):
-    """点击阿里云验证码 checkbox"""
-    for attempt in range(15):
-        try:
-            el = page.locator('#aliyunCaptcha-checkbox-icon')
-            if el.is_visible(timeout=2000):
-                el.click()
-                print(f"  🤖 点击验证码 (第{attempt+1}次)")
-                time.sleep(3)
-                if not page.locator('#aliyunCaptcha-window-popup.window-show').is_visible(timeout=3000):
-                    print("  ✅ 验证通过！")
-                    return True
-        except:
-            pass
-        time.sleep(1)
-    return False
-
-def login_account(account, browser, all_tokens):
-    email, password, name = account['email'], account['password'], account['name']
+def save_results(tokens, cookies):
+    """合并到现有文件后原子替换：运行中的 MCP 服务器不会读到写了一半的文件，未成功的账户保留旧 Token"""
+    all_tokens = load_json(PROJECT_ROOT / 'all_tokens.json')
+    all_tokens.update(tokens)
+    write_json_atomic(PROJECT_ROOT / 'all_tokens.json', all_tokens)
+    all_cookies = load_json(PROJECT_ROOT / 'all_cookies.json')
+    all_cookies.update(cookies)
+    write_json_atomic(PROJECT_ROOT / 'all_cookies.json', all_cookies)
+
+async def type_human(page, selector, text):
+    await page.locator(selector).click()
+    await page.locator(selector).press_sequentially(text, delay=random.uniform(80, 180))
+
+async def click_captcha(page, name, timeout=15000):
+    """点击阿里云验证码 checkbox，等待弹窗关闭"""
+    checkbox = page.locator(CAPTCHA_CHECKBOX)
+    try:
+        await checkbox.wait_for(state='visible', timeout=timeout)
+        await checkbox.click()
+        print(f"  [{name}] 🤖 点击验证码")
+        await page.locator(CAPTCHA_POPUP).wait_for(state='hidden', timeout=5000)
+        print(f"  [{name}] ✅ 验证通过！")
+        return True
+    except PlaywrightTimeout:
+        return False
 
-    print(f"\n{'='*60}")
-    print(f"[{name}] {email}")
-    print(f"{'='*60}")
+async def wait_for_cookies(context, timeout):
+    """等待登录 Cookie 出现，返回 Cookie 字典（超时返回 None）"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        cookies = {c['name']: c['value'] for c in await context.cookies() if c['name'] in LOGIN_COOKIES}
+        if len(cookies) == len(LOGIN_COOKIES):
+            return cookies
+        await asyncio.sleep(0.25)
+    return None
+
+async def login_account(account, browser):
+    """在独立的浏览器上下文中登录一个账户，返回登录 Cookie（失败返回 None）"""
+    email, password, name = account['email'], account['password'], account['name']
 
-    context = browser.new_context(
+    context = await browser.new_context(
         viewport={'width': 1280, 'height': 720},
         user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
         locale='zh-CN',
         timezone_id='Asia/Shanghai',
     )
-    page = context.new_page()
-    page.add_init_script(STEALTH_JS)
-
-    print("🌐 访问...")
-    page.goto('https://mineru.net/apiManage/token', wait_until='networkidle')
-    time.sleep(2)
-
-    print("🖱️  点击登录...")
     try:
-        page.get_by_text("登录", exact=True).first.click(timeout=10000)
-        time.sleep(3)
-    except:
-        print("  ⚠️  未找到登录按钮")
-        context.close()
-        return False
+        page = await context.new_page()
+        await page.add_init_script(STEALTH_JS)
 
-    try:
-        page.wait_for_selector('input[placeholder="邮箱/手机号/用户名"]', timeout=10000)
-    except:
-        print("  ⚠️  登录表单未出现")
-        context.close()
-        return False
+        print(f"  [{name}] 🌐 访问...")
+        await page.goto(TOKEN_PAGE, wait_until='domcontentloaded')
 
-    print("📝 输入...")
-    type_human(page, 'input[placeholder="邮箱/手机号/用户名"]', email)
-    time.sleep(0.5)
-    type_human(page, 'input[type="password"]', password)
-    time.sleep(1)
-
-    print("🖱️  提交...")
-    page.locator('button.loginButton--wFHGh').click()
-    time.sleep(4)
-
-    print("🔍 处理验证码...")
-    captcha_ok = click_captcha(page)
-    if not captcha_ok:
-        print(f"  ⏸️  验证码未自动通过 - {name}")
-
-    print("🔄 检测中（最多60秒）...")
-    for i in range(60):
-        time.sleep(1)
-        cookies = {c['name']: c['value'] for c in context.cookies()
-                  if c['name'] in ['uaa-token', 'opendatalab_session']}
-
-        if len(cookies) >= 2:
-            print(f"✅ 登录成功！（{i+1}秒）")
-            uaa_token = cookies['uaa-token']
-            headers = {'authorization': f'Bearer {uaa_token}', 'content-type': 'application/json'}
-
-            r = requests.get('https://mineru.net/api/v4/tokens', headers=headers, timeout=10)
-            if r.status_code == 200:
-                token_list = r.json()['data'].get('list', [])
-                if token_list:
-                    print(f"🗑️  删除 {len(token_list)} 个旧 Token...")
-                    for token in token_list:
-                        requests.delete(f'https://mineru.net/api/v4/tokens/{token["id"]}', headers=headers)
-
-            ts = datetime.now().strftime("%Y%m%d%H%M%S")
-            token_name = f"token-{ts}"
-            r = requests.post('https://mineru.net/api/v4/tokens', headers=headers,
-                            json={"token_name": token_name}, timeout=10)
-
-            if r.status_code == 200:
-                result = r.json()['data']
-                print(f"✅ Token: {token_name}")
-                all_tokens[email] = {
-                    'name': name, 'token_name': token_name, 'token': result['token'],
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'expired_at': result['expired_at']
-                }
-                context.close()
-                return True
-            else:
-                print(f"❌ Token 创建失败: {r.status_code}")
-
-        if (i+1) % 15 == 0:
-            click_captcha(page)
-            print(f"  [{i+1}s]...")
-
-    print("❌ 超时")
-    context.close()
-    return False
-
-def main():
-    mode = "headed（有界面）" if HEADED else "headless（无界面）"
+        print(f"  [{name}] 🖱️  点击登录...")
+        try:
+            await page.get_by_text("登录", exact=True).first.click(timeout=15000)
+            await page.wait_for_selector(EMAIL_INPUT, timeout=10000)
+        except PlaywrightTimeout:
+            print(f"  [{name}] ⚠️  登录表单未出现")
+            return None
+
+        await type_human(page, EMAIL_INPUT, email)
+        await type_human(page, PASSWORD_INPUT, password)
+        await page.locator(LOGIN_BUTTON).click()
+
+        print(f"  [{name}] 🔍 处理验证码...")
+        if not await click_captcha(page, name):
+            print(f"  [{name}] ⏸️  验证码未自动通过")
+
+        # 最多60秒，每15秒重试一次验证码
+        for _ in range(4):
+            cookies = await wait_for_cookies(context, 15)
+            if cookies:
+                return cookies
+            await click_captcha(page, name, timeout=2000)
+        print(f"  [{name}] ❌ 超时")
+        return None
+    finally:
+        await context.close()
+
+async def issue_token(session, uaa_token, persist):
+    """
+    先创建新 Token，persist(token_name, result) 落盘后再删除其余旧 Token（达到数量上限时只能先删后建）
+    中途中断时磁盘上总有一个服务端仍有效的 Token
+    """
+    token_name = f"token-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    result = await create_token(session, DEFAULT_BASE_URL, uaa_token, token_name)
+    if result is None:
+        await delete_tokens(session, DEFAULT_BASE_URL, uaa_token, keep=set())
+        result = await create_token(session, DEFAULT_BASE_URL, uaa_token, token_name)
+        if result is not None:
+            persist(token_name, result)
+        return token_name, result
+    persist(token_name, result)
+    await delete_tokens(session, DEFAULT_BASE_URL, uaa_token, keep={token_name})
+    return token_name, result
+
+async def renew_account(account, browser, session, semaphore, tokens, cookies_out):
+    """登录（失败重试1次）并获取新 Token，返回耗时"""
+    email, name = account['email'], account['name']
+    async with semaphore:
+        # 错开启动，避免同时提交登录触发风控
+        await asyncio.sleep(random.uniform(0, 2))
+        start = time.monotonic()
+        for attempt in range(2):
+            try:
+                cookies = await login_account(account, browser)
+            except Exception as e:
+                print(f"  [{name}] ⚠️  {e}")
+                cookies = None
+            if cookies:
+                break
+            if attempt == 0:
+                print(f"  [{name}] 🔄 重试...")
+        else:
+            return False, time.monotonic() - start
+
+        print(f"  [{name}] ✅ 登录成功（{time.monotonic() - start:.0f}秒）")
+        cookies_out[email] = {**cookies, 'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+        def persist(token_name, result):
+            """每个账户拿到新 Token 立即原子写入（运行中的 MCP 服务器随即可用）"""
+            tokens[email] = {
+                'name': name, 'token_name': token_name, 'token': result['token'],
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'expired_at': result['expired_at']
+            }
+            save_results({email: tokens[email]}, {email: cookies_out[email]})
+
+        token_name, result = await issue_token(session, cookies['uaa-token'], persist)
+        if result is None:
+            print(f"  [{name}] ❌ Token 创建失败")
+            return False, time.monotonic() - start
+        print(f"  [{name}] ✅ Token: {token_name}")
+        return True, time.monotonic() - start
+
+async def main(headed: bool, concurrency: int):
+    mode = "headed（有界面）" if headed else "headless（无界面）"
     print("="*60)
-    print(f"批量登录（全自动 - {mode}）")
+    print(f"批量登录（全自动 - {mode}，并发 {concurrency}）")
     print("="*60)
 
     accounts = load_accounts()
-    all_tokens = {}
+    tokens, cookies = {}, {}
     print(f"\n共 {len(accounts)} 个账户\n")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=not HEADED,
+    start = time.monotonic()
+    async with async_playwright() as p, AsyncSession() as session:
+        browser = await p.chromium.launch(
+            headless=not headed,
             args=[
                 '--disable-blink-features=AutomationControlled',
                 '--disable-features=IsolateOrigins,site-per-process',
@@ -192,32 +223,32 @@ def main():
                 '--disable-dev-shm-usage',
             ]
         )
+        semaphore = asyncio.Semaphore(concurrency)
+        outcomes = await asyncio.gather(*[
+            renew_account(account, browser, session, semaphore, tokens, cookies) for account in accounts
+        ], return_exceptions=True)
+        await browser.close()
 
-        success_count = 0
-        for i, account in enumerate(accounts, 1):
-            print(f"\n[{i}/{len(accounts)}]")
-            # 最多重试2次
-            for attempt in range(2):
-                if login_account(account, browser, all_tokens):
-                    success_count += 1
-                    save_all_tokens(all_tokens)
-                    break
-                elif attempt == 0:
-                    print(f"  🔄 重试...")
-                    time.sleep(3)
-            if i < len(accounts):
-                time.sleep(2)
-
-        browser.close()
+    wall = time.monotonic() - start
 
     print(f"\n{'='*60}")
-    print(f"完成: {success_count}/{len(accounts)}")
-    print(f"Token 已保存: all_tokens.json")
+    print(f"完成: {len(tokens)}/{len(accounts)}，总耗时 {wall:.0f}秒")
+    print(f"Token 已保存: all_tokens.json（登录Cookie: all_cookies.json，用于自动续期）")
     print(f"{'='*60}")
-    for email, info in all_tokens.items():
-        print(f"\n{info['name']} ({email})")
-        print(f"  Token: {info['token_name']}")
-        print(f"  过期: {info['expired_at']}")
+    for account, outcome in zip(accounts, outcomes):
+        email = account['email']
+        if isinstance(outcome, Exception):
+            print(f"\n❌ {account['name']} ({email}): {outcome}")
+        elif email in tokens:
+            print(f"\n{account['name']} ({email})  {outcome[1]:.0f}秒")
+            print(f"  Token: {tokens[email]['token_name']}")
+            print(f"  过期: {tokens[email]['expired_at']}")
+        else:
+            print(f"\n❌ {account['name']} ({email})  {outcome[1]:.0f}秒")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='MinerU 批量登录并获取 Token')
+    parser.add_argument('--headed', action='store_true', help='打开浏览器界面（调试用）')
+    parser.add_argument('-j', '--concurrency', type=int, default=4, help='同时登录的账户数（默认4，1为逐个登录）')
+    args = parser.parse_args()
+    asyncio.run(main(args.headed, max(1, args.concurrency)))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+MinerU 账户池：每个账户一个熔断器 + 健康分
+- closed：正常调度；连续失败达到阈值 → open
+- open：不参与调度，冷却期结束后 → half-open
+- half-open：只放行一个探测请求，成功 → closed，失败 → open（冷却期翻倍）
+- Token 错误/过期（401/403、A0202/A0211）立即熔断并使用最长冷却期，Token 更新后恢复
+- 429 立即熔断，冷却期不短于 Retry-After
+- 健康分 0-100：成功率（指数滑动平均）× 延迟系数，按健康分加权随机选择账户
+- 每日页数额度（mineru_quota）：只在剩余额度够用的账户中选择，都不够时选剩余最多的账户
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mineru_metrics import ACCOUNT_HEALTH
+from mineru_quota import QuotaLedger
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+AUTH_STATUS = {401, 403}
+AUTH_CODES = {'A0202', 'A0211'}  # Token 错误 / Token 过期
+
+# 失败类型
+AUTH = 'auth'          # Token 无效或过期
+THROTTLE = 'throttle'  # 429 限流
+ERROR = 'error'        # 其他错误（超时、5xx、业务错误）
+
+
+def classify(status: Optional[int] = None, code=None) -> str:
+    """按HTTP状态码和业务错误码判断失败类型"""
+    if status in AUTH_STATUS or str(code) in AUTH_CODES:
+        return AUTH
+    if status == 429:
+        return THROTTLE
+    return ERROR
+
+
+def _is_expired(info: Dict) -> bool:
+    try:
+        expired_at = datetime.fromisoformat(info['expired_at'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        return False
+    return expired_at <= datetime.now(timezone.utc)
+
+
+@dataclass
+class AccountHealth:
+    """单个账户的熔断器状态和统计"""
+    email: str
+    token: str
+    state: str = CLOSED
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    success_rate: float = 1.0        # 成功率滑动平均
+    latency: Optional[float] = None  # 延迟滑动平均（秒）
+    cooldown: float = 0.0            # 当前冷却期（秒）
+    open_until: float = 0.0
+    probing: bool = False            # half-open 时探测请求是否在进行中
+    last_error: Optional[str] = None
+
+
+class AccountPool:
+    """带熔断和健康分的账户池"""
+
+    _shared: Dict[str, 'AccountPool'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, tokens: Dict[str, Dict], failure_threshold: int = 3, base_cooldown: float = 30.0,
+                 max_cooldown: float = 600.0, slow_latency: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic, seed: Optional[int] = None,
+                 quota: Optional[QuotaLedger] = None):
+        """
+        Args:
+            tokens: all_tokens.json 内容 {邮箱: {'token': ..., 'expired_at': ...}}
+            failure_threshold: 连续失败多少次熔断
+            base_cooldown: 首次熔断的冷却期（秒），再次熔断翻倍
+            max_cooldown: 冷却期上限（秒），Token 失效直接使用
+            slow_latency: 延迟超过该值（秒）时按比例降低健康分
+            clock: 时钟（测试用）
+            seed: 加权随机种子
+            quota: 每日页数额度账本（默认只在内存中记录）
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.slow_latency = slow_latency
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.quota = quota or QuotaLedger()
+        self.lock = threading.Lock()
+        self.accounts: Dict[str, AccountHealth] = {}
+        self.update_tokens(tokens)
+
+    @classmethod
+    def shared(cls, tokens_file: str, tokens: Dict[str, Dict]) -> 'AccountPool':
+        """同一Token文件共用一个账户池（单文件和批量处理器看到相同的健康状态）"""
+        key = str(Path(tokens_file).resolve())
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is None:
+                pool = cls._shared[key] = cls(tokens, quota=QuotaLedger.from_env())
+            else:
+                pool.update_tokens(tokens)
+            return pool
+
+    def update_tokens(self, tokens: Dict[str, Dict]):
+        """同步Token：新增/删除账户，Token 变化的账户重置熔断器"""
+        with self.lock:
+            for email in list(self.accounts):
+                if email not in tokens:
+                    del self.accounts[email]
+            for email, info in tokens.items():
+                account = self.accounts.get(email)
+                if account is not None and account.token == info['token']:
+                    continue
+                account = self.accounts[email] = AccountHealth(email, info['token'])
+                if _is_expired(info):
+                    self._open(account, AUTH, 'Token 已过期')
+                ACCOUNT_HEALTH.labels(email).set(self._score(account))
+
+    # ==================== 调度 ====================
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def pick(self, exclude: Tuple[str, ...] = (), pages: Optional[int] = None) -> Tuple[str, str]:
+        """
+        选择账户，返回 (邮箱, Token)
+
+        closed 账户中只选今天剩余额度不少于 pages 的，按健康分加权随机；都不够时选剩余额度最多的
+        （超出额度的页数仍会处理，只是优先级降低）。冷却期结束的 open 账户转为 half-open 并作为探测请求返回。
+        所有账户都不可用时返回最早结束冷却的账户（提前探测），保证任务仍能推进。
+        """
+        with self.lock:
+            now = self.clock()
+            candidates = [a for a in self.accounts.values() if a.email not in exclude] or list(self.accounts.values())
+            if not candidates:
+                raise ValueError("账户池为空")
+
+            for account in candidates:
+                if account.state == OPEN and now >= account.open_until:
+                    account.state = HALF_OPEN
+                    account.probing = False
+                    logger.info("🔎 账户 %s 冷却结束，进入探测", account.email)
+            for account in candidates:
+                if account.state == HALF_OPEN and (not account.probing or now >= account.open_until):
+                    # 探测请求没有回报结果（如调用方异常退出）时，超时后允许再次探测
+                    account.probing = True
+                    account.open_until = now + self.base_cooldown
+                    return account.email, account.token
+
+            closed = [a for a in candidates if a.state == CLOSED]
+            if closed:
+                remaining = {a.email: self.quota.remaining(a.email) for a in closed}
+                closed = ([a for a in closed if remaining[a.email] >= (pages or 1)]
+                          or [max(closed, key=lambda a: remaining[a.email])])
+                weights = [max(self._score(a), 1.0) for a in closed]
+                account = self.rng.choices(closed, weights)[0]
+            else:
+                account = min(candidates, key=lambda a: a.open_until)
+            return account.email, account.token
+
+    def token(self, email: Optional[str]) -> Optional[str]:
+        """账户当前的Token（不存在时返回 None）"""
+        account = self.accounts.get(email)
+        return account.token if account else None
+
+    def record_success(self, email: str, latency: Optional[float] = None):
+        """记录一次成功请求（latency 为请求耗时秒数）"""
+        with self.lock:
+            account = self.accounts.get(email)
+            if account is None:
+                return
+            account.successes += 1
+            account.consecutive_failures = 0
+            account.success_rate = 0.8 * account.success_rate + 0.2
+            if latency is not None:
+                account.latency = latency if account.latency is None else 0.8 * account.latency + 0.2 * latency
+            if account.state != CLOSED:
+                logger.info("✅ 账户 %s 恢复", email)
+                account.state = CLOSED
+                account.cooldown = 0.0
+                account.probing = False
+            ACCOUNT_HEALTH.labels(email).set(self._score(account))
+
+    def record_failure(self, email: str, kind: str = ERROR, message: Optional[str] = None,
+                       retry_after: Optional[float] = None):
+        """记录一次失败请求（kind 见 classify）"""
+        with self.lock:
+            account = self.accounts.get(email)
+            if account is None:
+                return
+            account.failures += 1
+            account.consecutive_failures += 1
+            account.success_rate = 0.8 * account.success_rate
+            account.last_error = message or kind
+            if account.state == HALF_OPEN or kind in (AUTH, THROTTLE) \
+                    or account.consecutive_failures >= self.failure_threshold:
+                self._open(account, kind, account.last_error, retry_after)
+            ACCOUNT_HEALTH.labels(email).set(self._score(account))
+
+    def _open(self, account: AccountHealth, kind: str, message: Optional[str], retry_after: Optional[float] = None):
+        if kind == AUTH:
+            cooldown = self.max_cooldown
+        else:
+            cooldown = min(self.max_cooldown, account.cooldown * 2 or self.base_cooldown)
+            if retry_after:
+                cooldown = max(cooldown, retry_after)
+        if account.state != OPEN:
+            logger.warning("⛔ 账户 %s 熔断 %.0f秒: %s", account.email, cooldown, message)
+        account.state = OPEN
+        account.cooldown = cooldown
+        account.open_until = self.clock() + cooldown
+        account.probing = False
+        account.last_error = message
+
+    # ==================== 健康分 ====================
+
+    def _score(self, account: AccountHealth) -> float:
+        if account.state == OPEN:
+            return 0.0
+        score = 100 * account.success_rate
+        if account.latency and account.latency > self.slow_latency:
+            score *= self.slow_latency / account.latency
+        return round(score, 1)
+
+    def status(self) -> List[Dict]:
+        """每个账户的熔断状态和健康分"""
+        with self.lock:
+            now = self.clock()
+            return [{
+                'email': a.email,
+                'state': a.state,
+                'health': self._score(a),
+                'successes': a.successes,
+                'failures': a.failures,
+                'latency_ms': round(a.latency * 1000) if a.latency is not None else None,
+                'retry_in': round(a.open_until - now) if a.state == OPEN else None,
+                'last_error': a.last_error,
+                **self.quota.status(a.email)
+            } for a in self.accounts.values()]
+
+
+# 使用示例
+if __name__ == '__main__':
+    import json
+    import sys
+
+    tokens_file = sys.argv[1] if len(sys.argv) > 1 else str(Path(__file__).parent.parent / 'all_tokens.json')
+    with open(tokens_file, 'r') as f:
+        pool = AccountPool(json.load(f), quota=QuotaLedger.from_env())
+    for item in pool.status():
+        print(f"{item['email']}: {item['state']} 健康分 {item['health']} "
+              f"今日 {item['pages_today']}/{item['daily_pages']}页 {item['last_error'] or ''}")
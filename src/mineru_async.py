@@ -3,21 +3,50 @@
 MinerU 真正异步客户端 - 使用niquests AsyncSession
 性能提升10倍
 """
+import ipaddress
 import json
+import logging
+import contextlib
+import os
+import re
 import asyncio
-import random
+import tempfile
 import time
 import zipfile
 import shutil
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 from datetime import datetime
+from urllib.parse import urlparse
+
+from mineru_image_store import ImageStore
+from mineru_metrics import STAGE_SECONDS, DOCUMENTS, INFLIGHT, UPLOAD_BYTES, POLLS, ERRORS, PREDICTION_ERROR
+from mineru_tracing import TRACER
+from mineru_logging import setup_logging
+from mineru_retry import RetryEngine, check_status, parse_json
+from mineru_download import ResumableDownloader
+from mineru_accounts import AccountPool, classify, AUTH, THROTTLE
+from mineru_url_cache import UrlCache
+from mineru_executor import run_cpu, run_disk
+from mineru_ooxml import page_count as ooxml_page_count
+from mineru_scheduling import SJF, Scheduler
+from mineru_history import JobEstimate, Predictor, Run
+from mineru_concurrency import (AimdLimiter, ConcurrencyController, Slot, StageLimits, STAGES, DOWNLOAD, PROCESS, PUT,
+                                SUBMIT, is_congestion)
+
+logger = logging.getLogger(__name__)
+
+# 直接提交URL时表示服务端无法获取文件的错误（回退为本机下载再上传）；其他失败重新上传也不会成功，还会再次扣额度
+URL_FETCH_CODES = {'-60003', '-60008'}  # 文件读取失败 / 文件读取超时
+URL_FETCH_ERROR = re.compile(
+    r'-6000[38]\b|文件读取失败|文件读取超时|failed to (?:download|fetch|read) (?:the )?file|'
+    r'file (?:download|read) (?:failed|timed? ?out)',
+    re.IGNORECASE
+)
 
 try:
     from niquests import AsyncSession
     from PyPDF2 import PdfReader, PdfWriter
-    from pptx import Presentation
-    from docx import Document
 except ImportError:
     print("❌ 请安装依赖:")
     print("   uv pip install niquests PyPDF2 python-pptx python-docx")
@@ -48,12 +77,40 @@ class FileValidator:
         return path.startswith(('http://', 'https://'))
     
     @staticmethod
-    async def validate_url(session: AsyncSession, url: str) -> Tuple[bool, str, Dict]:
-        """验证URL（真正异步）"""
+    def is_public_url(url: str, allow_hosts: Iterable[str] = ()) -> bool:
+        """服务端能否访问该URL：内网/本机地址不能（allow_hosts 中的主机除外，见 MINERU_URL_ALLOW_HOSTS）"""
+        host = urlparse(url).hostname or ''
+        if host in allow_hosts:
+            return True
+        if host == 'localhost' or host.endswith(('.local', '.internal', '.lan')):
+            return False
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            return True
+        return not (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved)
+    
+    @staticmethod
+    async def validate_url(session: AsyncSession, url: str,
+                           cache: Optional[UrlCache] = None) -> Tuple[bool, str, Dict]:
+        """
+        验证URL（真正异步）
+        
+        Args:
+            cache: URL元数据缓存（可选），有缓存时发条件请求，304 直接使用缓存的大小和格式
+        """
         try:
-            response = await session.head(url, timeout=10, allow_redirects=True)
+            cached = cache.get(url) if cache else None
+            headers = cache.conditional_headers(url) if cached else {}
+            response = await session.head(url, timeout=10, allow_redirects=True, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                cache.touch(url)
+                return True, "", FileValidator._url_info(url, cached)
             
             if response.status_code != 200:
+                if cache:
+                    cache.discard(url)
                 return False, f"URL无法访问: {response.status_code}", {}
             
             size = int(response.headers.get('content-length', 0))
@@ -87,21 +144,36 @@ class FileValidator:
             if not format:
                 return False, f"无法识别文件格式", {}
             
-            file_info = {
-                'path': url,
-                'name': Path(url).name or 'document',
+            file_info = FileValidator._url_info(url, {
+                'name': Path(urlparse(url).path).name or 'document',
                 'size': size,
                 'format': format,
-                'is_url': True,
-                'pages': None,
-                'needs_split': False
-            }
+                'etag': response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified')
+            })
+            if cache:
+                cache.store(url, file_info)
             
             return True, "", file_info
         
         except Exception as e:
             return False, f"URL验证失败: {e}", {}
     
+    @staticmethod
+    def _url_info(url: str, meta: Dict) -> Dict:
+        """URL 文件信息（etag/last_modified 用于判断结果是否可复用）"""
+        return {
+            'path': url,
+            'name': meta['name'],
+            'size': meta['size'],
+            'format': meta['format'],
+            'is_url': True,
+            'pages': None,
+            'needs_split': False,
+            'etag': meta.get('etag'),
+            'last_modified': meta.get('last_modified')
+        }
+    
     @staticmethod
     def _guess_format_from_url(url: str, content_type: str) -> Optional[str]:
         """从URL推断格式"""
@@ -156,12 +228,9 @@ class FileValidator:
             if format == 'pdf':
                 reader = PdfReader(file_path)
                 return len(reader.pages)
-            elif format in ['pptx', 'ppt']:
-                prs = Presentation(file_path)
-                return len(prs.slides)
-            elif format in ['docx', 'doc']:
-                doc = Document(file_path)
-                return len(doc.paragraphs) // 5
+            elif format in ['pptx', 'docx']:
+                # 只读 ZIP 中的元数据，不构建 python-pptx/python-docx 对象模型
+                return ooxml_page_count(file_path, format)
         except:
             pass
         return None
@@ -170,7 +239,23 @@ class FileValidator:
 class MinerUAsyncClient:
     """MinerU 真正异步客户端"""
     
-    def __init__(self, tokens_file='all_tokens.json'):
+    DEFAULT_BASE_URL = 'https://mineru.net/api/v4'
+    
+    def __init__(self, tokens_file='all_tokens.json', base_url: Optional[str] = None,
+                 poll_interval: Optional[float] = None, retry: Optional[RetryEngine] = None,
+                 predictor: Optional[Predictor] = None):
+        """
+        初始化
+        
+        Args:
+            tokens_file: Token文件
+            base_url: API地址（默认读取环境变量 MINERU_BASE_URL，如指向本地模拟服务器）
+            poll_interval: 查询任务状态的间隔秒数（默认读取 MINERU_POLL_INTERVAL，否则5秒）
+            retry: 重试引擎（默认按阶段的指数退避策略）
+            predictor: 处理耗时预测（默认按 MINERU_HISTORY 的处理历史）
+        
+        URL 处理方式读取环境变量 MINERU_URL_MODE：auto（默认，直接提交URL）或 upload（总是本机下载再上传）
+        """
         if not Path(tokens_file).is_absolute():
             # Token文件在项目根目录，不是src目录
             script_dir = Path(__file__).parent.parent  # 向上一级到项目根目录
@@ -178,12 +263,30 @@ class MinerUAsyncClient:
         
         self.tokens_file = str(tokens_file)
         self.tokens = self._load_tokens()
-        self.base_url = 'https://mineru.net/api/v4'
+        self.base_url = (base_url or os.environ.get('MINERU_BASE_URL') or self.DEFAULT_BASE_URL).rstrip('/')
+        self.poll_interval = poll_interval if poll_interval is not None else float(
+            os.environ.get('MINERU_POLL_INTERVAL', 5)
+        )
+        self.retry = retry or RetryEngine()
+        self.url_mode = os.environ.get('MINERU_URL_MODE', 'auto')
+        # 服务端可以访问的内网主机（逗号分隔），这些主机上的URL同样直接提交
+        self.url_allow_hosts = {host.strip() for host in os.environ.get('MINERU_URL_ALLOW_HOSTS', '').split(',')
+                                if host.strip()}
         
         if not self.tokens:
             raise ValueError(f"未找到Token文件: {self.tokens_file}")
         
-        print(f"✅ 已加载 {len(self.tokens)} 个账户")
+        self.accounts = AccountPool.shared(self.tokens_file, self.tokens)
+        self.batch_accounts: Dict[str, str] = {}  # batch_id → 上传所用账户（轮询使用同一账户）
+        # 自适应并发：服务端排队时间的判断余量随轮询间隔（状态每个间隔才更新一次）
+        process = STAGES[PROCESS]
+        self.limits = ConcurrencyController.shared(self.tokens_file, {PROCESS: StageLimits(
+            process.initial, process.maximum, process.tolerance, max(process.slack, 2 * self.poll_interval))})
+        self.job_slots: Dict[str, Tuple[AimdLimiter, Slot]] = {}  # batch_id → 账户 process 并发占用（任务完成时释放）
+        # 处理耗时预测（MINERU_HISTORY），进行中任务的预计剩余时间
+        self.predictor = predictor if predictor is not None else Predictor.shared()
+        self.jobs: Dict[str, JobEstimate] = {}  # batch_id/task_id → 进行中的任务
+        logger.info("✅ 已加载 %d 个账户", len(self.tokens))
     
     def _load_tokens(self) -> Dict:
         """加载Token"""
@@ -194,368 +297,779 @@ class MinerUAsyncClient:
             return {}
     
     def _get_random_token(self) -> str:
-        """随机选择Token"""
-        email = random.choice(list(self.tokens.keys()))
-        return self.tokens[email]['token']
+        """选择Token（按账户健康分）"""
+        return self._pick_account()[1]
     
-    async def upload_file(self, session: AsyncSession, file_path: str, **options) -> Optional[str]:
-        """上传本地文件（真正异步）"""
-        token = self._get_random_token()
+    def _pick_account(self, exclude: Tuple[str, ...] = (), pages: Optional[int] = None) -> Tuple[str, str]:
+        """选择账户（跳过熔断中和今日剩余额度不足 pages 的账户，按健康分加权），返回 (邮箱, Token)"""
+        return self.accounts.pick(exclude, pages)
+    
+    async def _post_api(self, session: AsyncSession, account: str, token: str, endpoint: str,
+                        data: Dict, stage: str, job_slot: Optional[Slot] = None
+                        ) -> Tuple[Optional[Dict], Optional[str], object]:
+        """
+        用指定账户调用提交类接口，返回 (data, 失败类型, 业务错误码)
+        
+        成功和失败都计入账户健康状态；Token 失效或限流时返回失败类型，调用方换账户重试；
+        遇到429时立即减少该账户的 submit 和 process（job_slot 所在）并发上限
+        """
         headers = {
             'authorization': f'Bearer {token}',
             'content-type': 'application/json'
         }
+        last = {}
+        
+        async def post() -> Dict:
+            response = await session.post(
+                f"{self.base_url}/{endpoint}",
+                headers=headers,
+                json=data,
+                timeout=30
+            )
+            last['status'] = response.status_code
+            if response.status_code == 429:
+                last['throttled'] = True
+            return parse_json(response)
+        
+        start = time.time()
+        with TRACER.span(stage, {'account': account}) as span:
+            try:
+                async with self.limits.slot(SUBMIT, account) as slot:
+                    try:
+                        result = await self.retry.call(stage, post, account)
+                    finally:
+                        # 重试成功前遇到的 429 也说明并发过高
+                        slot.congested = bool(last.get('throttled'))
+                        if slot.congested and job_slot is not None:
+                            self.limits.limiter(PROCESS, account).backoff(job_slot)
+            except Exception as e:
+                kind = classify(last.get('status'))
+                self.accounts.record_failure(account, kind, str(e), getattr(e, 'retry_after', None))
+                ERRORS.labels(account, stage).inc()
+                span.end(error=str(e))
+                logger.error("❌ %s 失败: %s", stage, e)
+                return None, kind, None
+            
+            if result['code'] != 0:
+                kind = classify(last.get('status'), result['code'])
+                self.accounts.record_failure(account, kind, result.get('msg'))
+                ERRORS.labels(account, stage).inc()
+                span.end(error=result.get('msg'))
+                logger.error("❌ %s 失败: %s", stage, result.get('msg'))
+                return None, kind, result['code']
+            
+            self.accounts.record_success(account, time.time() - start)
+            span.set_attributes({'batch_id': result['data'].get('batch_id'),
+                                 'task_id': result['data'].get('task_id')})
+            return result['data'], None, None
+    
+    async def _submit(self, session: AsyncSession, endpoint: str, data: Dict, stage: str,
+                      name: str, pages: Optional[int] = None) -> Tuple[Optional[Dict], Optional[str], object]:
+        """
+        提交请求，账户 Token 失效或限流时换一个账户重试（此时尚未创建任务，不会重复），
+        返回 (data, 账户, 业务错误码)
         
+        Args:
+            pages: 文档页数（已知时优先选择剩余额度够用的账户，提交成功后计入该账户今天的额度）
+        """
+        tried: Tuple[str, ...] = ()
+        while True:
+            # 服务端未完成任务数已达自适应上限的账户暂不选择（全部已满时在选中的账户上排队）
+            busy = tuple(a for a in self.accounts.accounts if self.limits.full(PROCESS, a))
+            exclude = tried + busy if len(set(tried + busy)) < len(self.accounts) else tried
+            account, token = self._pick_account(exclude, pages)
+            TRACER.current_span().set_attribute('account', account)
+            process = self.limits.limiter(PROCESS, account)
+            job_slot = await process.acquire()
+            try:
+                result, kind, code = await self._post_api(session, account, token, endpoint, data, stage, job_slot)
+            except BaseException:
+                # 取消或意外异常：不知道任务是否已创建，释放占用且不参与调节（否则上限被永久占满）
+                job_slot.ignore = True
+                process.release(job_slot)
+                raise
+            if result is not None:
+                job_id = result.get('batch_id') or result.get('task_id')
+                self.job_slots[job_id] = (process, job_slot)
+                self.accounts.quota.reserve(account, job_id, pages)
+                return result, account, None
+            job_slot.congested = kind == THROTTLE
+            process.release(job_slot)
+            tried += (account,)
+            if kind not in (AUTH, THROTTLE) or len(tried) >= len(self.accounts):
+                return None, None, code
+            logger.warning("🔀 账户 %s 不可用，换账户重试: %s", account, name)
+    
+    def _finish_job(self, job_id: str, queue_time: Optional[float] = None, congested: bool = False):
+        """任务结束：释放账户的 process 并发占用（queue_time 为服务端排队时间，None 时不参与调节）"""
+        entry = self.job_slots.pop(job_id, None)
+        if entry is None:
+            return
+        limiter, slot = entry
+        slot.latency = queue_time
+        slot.congested = congested
+        slot.ignore = queue_time is None and not congested
+        limiter.release(slot)
+    
+    def _track_job(self, job_id: str, name: str, run: Run):
+        """任务已提交：按特征预测服务端耗时"""
+        self.jobs[job_id] = JobEstimate(name, run, self.predictor.predict_run(run))
+    
+    def _update_job(self, job_id: str, results: List[Dict]) -> JobEstimate:
+        """按轮询结果更新任务的状态和页数进度"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = self.jobs[job_id] = JobEstimate(job_id)  # 未经本客户端提交，只显示进度
+        job.state = results[0].get('state', job.state)
+        if job.state == 'running' and job.running_since is None:
+            job.running_since = time.time()
+        job.extracted = sum(r.get('extract_progress', {}).get('extracted_pages', 0) for r in results)
+        job.total = sum(r.get('extract_progress', {}).get('total_pages', 0) for r in results) or job.total
+        return job
+    
+    def _record_job(self, job_id: str, queue_time: float, seconds: float, pages: int):
+        """任务完成：记录处理历史（服务端统计的页数优先），预测误差写入指标"""
+        job = self.jobs.get(job_id)
+        if job is None or job.run is None:
+            return
+        if job.predicted is not None and seconds > 0:
+            PREDICTION_ERROR.labels(job.run.format).observe(abs(job.predicted - seconds) / seconds)
+            logger.debug("⏱️  预测 %.1fs，实际 %.1fs: %s", job.predicted, seconds, job.name)
+        job.run.pages = pages or job.run.pages
+        job.run.queue = queue_time
+        job.run.seconds = seconds
+        self.predictor.record(job.run)
+    
+    def jobs_status(self) -> List[Dict]:
+        """进行中的任务：状态、已用时间、预测耗时和预计剩余秒数"""
+        return [job.status(job_id) for job_id, job in list(self.jobs.items())]
+    
+    async def upload_file(self, session: AsyncSession, file_path: str, pages: Optional[int] = None,
+                          **options) -> Optional[str]:
+        """
+        上传本地文件（真正异步），获取链接和PUT分别重试，PUT失败只重传到同一链接
+        
+        账户 Token 失效或限流时换一个账户重新申请链接（此时尚未上传，不会产生重复任务）；
+        pages 为验证得到的页数，用于按每日额度选择账户
+        """
+        stage_start = time.time()
         file_name = Path(file_path).name
         
         # 1. 获取上传链接（异步）
         data = {'files': [{'name': file_name}], **options}
-        
-        response = await session.post(
-            f"{self.base_url}/file-urls/batch",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        result = response.json()
-        
-        if result['code'] != 0:
-            print(f"❌ 获取上传链接失败: {result.get('msg')}")
+        result, account, _ = await self._submit(session, 'file-urls/batch', data, 'get_upload_url', file_name,
+                                                pages)
+        if result is None:
             return None
         
-        batch_id = result['data']['batch_id']
-        upload_url = result['data']['file_urls'][0]
-        print(f"✅ 获取上传链接成功")
+        batch_id = result['batch_id']
+        upload_url = result['file_urls'][0]
+        self.batch_accounts[batch_id] = account
+        TRACER.current_span().set_attribute('batch_id', batch_id)
+        STAGE_SECONDS.labels('get_upload_url').observe(time.time() - stage_start)
+        logger.debug("✅ 获取上传链接成功: batch_id=%s", batch_id)
         
-        # 2. 上传文件（异步）
-        print(f"📤 上传文件中...")
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
-        
-        upload_response = await session.put(upload_url, data=file_data, timeout=300)
+        # 2. 上传文件（异步，同时读入内存的文件数受 put 并发上限约束）
+        try:
+            return await self._put_file(session, file_path, upload_url, batch_id, account, pages, options)
+        except BaseException:
+            # 读文件失败、取消等：任务不会运行，释放额度和 process 占用
+            self._abandon_upload(batch_id, account)
+            raise
+    
+    async def _put_file(self, session: AsyncSession, file_path: str, upload_url: str, batch_id: str,
+                        account: str, pages: Optional[int], options: Dict) -> Optional[str]:
+        """PUT 文件到上传链接，成功返回 batch_id（失败时已放弃该任务）"""
+        file_name = Path(file_path).name
+        logger.debug("📤 上传文件中: %s", file_name)
+        async with self.limits.slot(PUT) as slot:
+            file_data = await run_disk(Path(file_path).read_bytes)
+            
+            stage_start = time.time()
+            async def put():
+                response = await session.put(upload_url, data=file_data, timeout=300)
+                if response.status_code in (429, 503):
+                    slot.congested = True
+                return check_status(response)
+            
+            with TRACER.span('put', {'account': account, 'batch_id': batch_id, 'file.size': len(file_data)}) as span:
+                try:
+                    upload_response = await self.retry.call('put', put, account)
+                except Exception as e:
+                    self._abandon_upload(batch_id, account)
+                    slot.congested = slot.congested or is_congestion(e)
+                    span.end(error=str(e))
+                    logger.error("❌ 文件上传失败: %s", e)
+                    return None
+                span.set_attribute('http.status_code', upload_response.status_code)
+                
+                if upload_response.status_code == 200:
+                    STAGE_SECONDS.labels('put').observe(time.time() - stage_start)
+                    UPLOAD_BYTES.labels(account).inc(len(file_data))
+                    self._track_job(batch_id, file_name, Run.features({
+                        'format': Path(file_path).suffix.lower().lstrip('.'), 'pages': pages, 'size': len(file_data)
+                    }, options))
+                    logger.debug("✅ 文件上传成功: %s", file_name)
+                    return batch_id
+                else:
+                    self._abandon_upload(batch_id, account)
+                    span.end(error=f"HTTP {upload_response.status_code}")
+                    logger.error("❌ 文件上传失败: HTTP %s", upload_response.status_code)
+                    return None
+    
+    def _abandon_upload(self, batch_id: str, account: str):
+        """上传失败：任务不会在服务端运行，不占用额度和账户的 process 并发"""
+        self.batch_accounts.pop(batch_id, None)
+        self.accounts.quota.release(batch_id)
+        self._finish_job(batch_id)
+        ERRORS.labels(account, 'put').inc()
+    
+    async def submit_url(self, session: AsyncSession, url: str, pages: Optional[int] = None,
+                         file_info: Optional[Dict] = None, **options) -> Tuple[Optional[str], object]:
+        """
+        直接提交URL任务（/extract/task，服务端自行下载，不经过本机），返回 (task_id, 业务错误码)
         
-        if upload_response.status_code == 200:
-            print(f"✅ 文件上传成功")
-            return batch_id
-        else:
-            print(f"❌ 文件上传失败: {upload_response.status_code}")
-            return None
+        file_info 为验证得到的URL信息（格式、大小，用于预测处理耗时）
+        """
+        stage_start = time.time()
+        result, account, code = await self._submit(session, 'extract/task', {'url': url, **options},
+                                                   'submit_url', url, pages)
+        if result is None:
+            return None, code
+        task_id = result['task_id']
+        self.batch_accounts[task_id] = account
+        self._track_job(task_id, url, Run.features({**(file_info or {}), 'pages': pages, 'is_url': True}, options))
+        TRACER.current_span().set_attribute('task_id', task_id)
+        STAGE_SECONDS.labels('submit_url').observe(time.time() - stage_start)
+        logger.debug("✅ URL任务已提交: task_id=%s", task_id)
+        return task_id, None
     
-    async def get_batch_result(self, session: AsyncSession, batch_id: str) -> Optional[List[Dict]]:
-        """获取批量任务结果（真正异步）"""
-        token = self._get_random_token()
+    async def _poll(self, session: AsyncSession, job_id: str, path: str) -> Optional[Dict]:
+        """查询任务状态（使用提交任务的账户），临时错误重试，重试用尽时抛出"""
+        account = self.batch_accounts.get(job_id)
+        token = self.accounts.token(account)
+        if token is None:
+            account, token = self._pick_account()
         headers = {'authorization': f'Bearer {token}'}
         
-        response = await session.get(
-            f"{self.base_url}/extract-results/batch/{batch_id}",
-            headers=headers,
-            timeout=30
-        )
-        result = response.json()
+        async def poll() -> Dict:
+            POLLS.labels(account).inc()
+            response = await session.get(f"{self.base_url}/{path}", headers=headers, timeout=30)
+            return parse_json(response)
+        
+        try:
+            result = await self.retry.call('poll', poll, account)
+        except Exception as e:
+            self.accounts.record_failure(account, message=str(e))
+            ERRORS.labels(account, 'poll').inc()
+            raise
         
         if result['code'] == 0:
-            return result['data']['extract_result']
+            return result['data']
+        self.accounts.record_failure(account, classify(code=result['code']), result.get('msg'))
+        ERRORS.labels(account, 'poll').inc()
         return None
     
-    async def wait_for_completion(self, session: AsyncSession, batch_id: str, max_wait: int = 600) -> Optional[List[Dict]]:
-        """等待批量任务完成（真正异步）"""
+    async def get_batch_result(self, session: AsyncSession, batch_id: str) -> Optional[List[Dict]]:
+        """获取批量任务结果（真正异步），临时错误重试同一 batch_id，重试用尽时抛出"""
+        data = await self._poll(session, batch_id, f"extract-results/batch/{batch_id}")
+        return data['extract_result'] if data else None
+    
+    async def get_task_result(self, session: AsyncSession, task_id: str) -> Optional[List[Dict]]:
+        """获取URL任务结果（与批量结果格式一致：单元素列表）"""
+        data = await self._poll(session, task_id, f"extract/task/{task_id}")
+        return [data] if data else None
+    
+    async def wait_for_completion(self, session: AsyncSession, batch_id: str, max_wait: int = 600,
+                                  on_progress: Optional[Callable[[JobEstimate], None]] = None
+                                  ) -> Optional[List[Dict]]:
+        """等待批量任务完成（真正异步），每次轮询后调用 on_progress（状态、页数进度和预计剩余时间）"""
+        try:
+            return await self._wait_for_completion(session, batch_id, max_wait, self.get_batch_result,
+                                                   on_progress=on_progress)
+        finally:
+            self.batch_accounts.pop(batch_id, None)
+            self.jobs.pop(batch_id, None)
+            self.accounts.quota.finish(batch_id)
+            self._finish_job(batch_id)
+    
+    async def wait_for_task(self, session: AsyncSession, task_id: str, max_wait: int = 600) -> Optional[List[Dict]]:
+        """等待URL任务完成，失败时返回包含 err_msg 的结果（用于判断是否回退为下载再上传）"""
+        try:
+            return await self._wait_for_completion(session, task_id, max_wait, self.get_task_result,
+                                                   return_failed=True)
+        finally:
+            self.batch_accounts.pop(task_id, None)
+            self.jobs.pop(task_id, None)
+            self.accounts.quota.finish(task_id)
+            self._finish_job(task_id)
+    
+    async def _wait_for_completion(self, session: AsyncSession, batch_id: str, max_wait: int,
+                                   fetch, return_failed: bool = False,
+                                   on_progress: Optional[Callable[[JobEstimate], None]] = None
+                                   ) -> Optional[List[Dict]]:
         start_time = time.time()
+        running_since = None  # 服务端开始处理的时间（之前为排队）
+        total_pages = 0       # 服务端统计的页数（计入账户今天的额度）
         
         while time.time() - start_time < max_wait:
-            results = await self.get_batch_result(session, batch_id)
+            try:
+                results = await fetch(session, batch_id)
+            except Exception as e:
+                TRACER.record_span('server_running' if running_since else 'server_queue',
+                                   running_since or start_time, time.time(), {'batch_id': batch_id})
+                logger.error("❌ 查询任务状态失败: batch_id=%s, %s", batch_id, e)
+                return None
             
             if results:
+                job = self._update_job(batch_id, results)
+                if on_progress:
+                    on_progress(job)
                 all_done = True
+                pages = sum(r.get('extract_progress', {}).get('total_pages', 0) for r in results)
+                if pages > total_pages:
+                    total_pages = pages
+                    self.accounts.quota.settle(batch_id, pages)
                 for result in results:
                     state = result.get('state')
                     
                     if state == 'failed':
-                        print(f"❌ 失败: {result.get('err_msg')}")
+                        self.accounts.quota.release(batch_id)
+                        self._finish_job(batch_id, (running_since or time.time()) - start_time)
+                        TRACER.record_span('server_running' if running_since else 'server_queue',
+                                           running_since or start_time, time.time(), {'batch_id': batch_id})
+                        if return_failed:
+                            return results
+                        logger.error("❌ 失败: %s", result.get('err_msg'))
                         return None
                     elif state in ['pending', 'running', 'waiting-file', 'converting']:
                         all_done = False
+                        if state == 'running' and running_since is None:
+                            running_since = time.time()
+                            STAGE_SECONDS.labels('server_queue').observe(running_since - start_time)
+                            TRACER.record_span('server_queue', start_time, running_since, {'batch_id': batch_id})
                         if state == 'running':
                             progress = result.get('extract_progress', {})
                             extracted = progress.get('extracted_pages', 0)
                             total = progress.get('total_pages', 0)
                             if total > 0:
-                                print(f"  进度: {extracted}/{total}页", end='\r')
+                                logger.debug("  进度: %s %d/%d页", batch_id, extracted, total)
                 
                 if all_done:
+                    now = time.time()
+                    if running_since is None:
+                        STAGE_SECONDS.labels('server_queue').observe(now - start_time)
+                        TRACER.record_span('server_queue', start_time, now, {'batch_id': batch_id})
+                    else:
+                        STAGE_SECONDS.labels('server_running').observe(now - running_since)
+                        TRACER.record_span('server_running', running_since, now,
+                                           {'batch_id': batch_id, 'pages': total_pages or None})
+                    self._finish_job(batch_id, (running_since or now) - start_time)
+                    self._record_job(batch_id, (running_since or now) - start_time, now - start_time, total_pages)
                     return results
             
-            await asyncio.sleep(5)
+            await asyncio.sleep(self.poll_interval)
         
-        print(f"❌ 任务超时")
+        TRACER.record_span('server_running' if running_since else 'server_queue',
+                           running_since or start_time, time.time(), {'batch_id': batch_id, 'timeout': True})
+        self._finish_job(batch_id, congested=True)
+        logger.error("❌ 任务超时: batch_id=%s", batch_id)
         return None
+    
+    async def process_url(self, session: AsyncSession, url: str, file_info: Dict, upload_options: Dict,
+                          timings: Dict) -> Optional[str]:
+        """
+        处理URL文件，返回结果ZIP链接
+        
+        默认直接提交URL（/extract/task），文件由服务端下载，不经过本机；
+        内网地址、服务端报告无法下载时，回退为本机下载后再上传（MINERU_URL_MODE=upload 时总是如此）
+        """
+        stage_start = time.time()
+        if self.url_mode == 'auto' and FileValidator.is_public_url(url, self.url_allow_hosts):
+            logger.info("🌐 直接提交URL...")
+            task_id, code = await self.submit_url(session, url, file_info.get('pages'), file_info, **upload_options)
+            timings['submit'] = time.time() - stage_start
+            if task_id:
+                process_start = time.time()
+                results = await self.wait_for_task(session, task_id)
+                if not results:
+                    logger.error("❌ 处理失败")
+                    return None
+                result = results[0]
+                if result.get('state') == 'done':
+                    timings['process'] = time.time() - process_start
+                    return result.get('full_zip_url')
+                error = result.get('err_msg') or '未知错误'
+                if not URL_FETCH_ERROR.search(error):
+                    logger.error("❌ 处理失败: %s", error)
+                    return None
+                # 失败的直接提交整体计入 submit
+                timings['submit'] = time.time() - stage_start
+            elif str(code) in URL_FETCH_CODES:
+                error = f"错误码 {code}"
+            else:
+                return None
+            logger.warning("⚠️  服务端无法下载URL（%s），改为本机下载后上传: %s", error, url)
+        
+        return await self._download_and_upload(session, url, file_info, upload_options, timings)
+    
+    async def _download_and_upload(self, session: AsyncSession, url: str, file_info: Dict,
+                                   upload_options: Dict, timings: Dict) -> Optional[str]:
+        """回退路径：断点续传下载到临时目录，上传后等待处理完成，返回结果ZIP链接"""
+        logger.info("🌐 下载URL文件...")
+        file_name = file_info['name']
+        if '.' not in file_name:
+            file_name = f"{file_name}.{file_info['format']}"
+        
+        tmp_dir = Path(tempfile.mkdtemp(prefix='mineru_url_'))
+        try:
+            stage_start = time.time()
+            tmp_path = tmp_dir / file_name
+            with TRACER.span('fetch_source') as span:
+                size = await ResultProcessor.download(session, url, tmp_path, self.retry)
+                span.set_attribute('bytes', size)
+            timings['fetch'] = time.time() - stage_start
+            logger.info("✅ 下载完成: %s (%.1fMB)", tmp_path, size / 1024 / 1024)
+            
+            stage_start = time.time()
+            batch_id = await self.upload_file(session, str(tmp_path), file_info.get('pages'), **upload_options)
+            timings['upload'] = time.time() - stage_start
+            if not batch_id:
+                logger.error("❌ 上传失败")
+                return None
+            logger.info("✅ 已上传，batch_id: %s", batch_id)
+            
+            stage_start = time.time()
+            results = await self.wait_for_completion(session, batch_id)
+            timings['process'] = time.time() - stage_start
+            if not results or results[0].get('state') != 'done':
+                err = results[0].get('err_msg', '未知错误') if results else '无结果'
+                logger.error("❌ 处理失败: %s", err)
+                return None
+            return results[0].get('full_zip_url')
+        finally:
+            await run_disk(shutil.rmtree, tmp_dir, ignore_errors=True)
 
 
 class ResultProcessor:
     """结果处理器"""
     
     @staticmethod
-    async def download_and_extract(session: AsyncSession, zip_url: str, output_dir: str) -> Optional[str]:
-        """下载并解压结果（真正异步）"""
+    async def download(session: AsyncSession, url: str, path: Path,
+                       retry: Optional[RetryEngine] = None, parallel: Optional[int] = None) -> int:
+        """
+        断点续传下载到文件（见 mineru_download），返回文件字节数
+        
+        连接中断时用 Range 从已收到的位置续传，完成后校验大小和MD5
+        """
+        return await ResumableDownloader(session, retry, parallel).download(url, path)
+    
+    @staticmethod
+    async def download_and_extract(session: AsyncSession, zip_url: str, output_dir: str,
+                                   retry: Optional[RetryEngine] = None,
+                                   limits: Optional[ConcurrencyController] = None) -> Optional[str]:
+        """下载并解压结果（真正异步），中断后断点续传；limits 限制同时下载数（解压不占用）"""
         try:
-            print(f"📥 下载中...")
-            response = await session.get(zip_url, timeout=300)
-            
-            if response.status_code != 200:
-                print(f"❌ 下载失败: {response.status_code}")
-                return None
-            
+            logger.debug("📥 下载中: %s", zip_url)
             zip_path = Path(output_dir) / "result.zip"
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
+            slot = limits.slot(DOWNLOAD) if limits else contextlib.nullcontext()
+            async with slot:
+                with TRACER.span('download') as span:
+                    size = await ResultProcessor.download(session, zip_url, zip_path, retry)
+                    span.set_attribute('bytes', size)
             
-            print(f"✅ 下载完成")
-            
-            print(f"📦 解压中...")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(output_dir)
-            
-            print(f"✅ 解压完成")
-            zip_path.unlink()
+            logger.debug("✅ 下载完成，解压中: %s", output_dir)
+            extract_start = time.time()
+            with TRACER.span('extract'):
+                await run_disk(ResultProcessor.extract, zip_path, output_dir)
+            STAGE_SECONDS.labels('extract').observe(time.time() - extract_start)
             
             return output_dir
         except Exception as e:
-            print(f"❌ 下载解压失败: {e}")
+            ERRORS.labels('', 'download').inc()
+            logger.error("❌ 下载解压失败: %s", e)
             return None
     
+    @staticmethod
+    def extract(zip_path: Path, output_dir: str):
+        """解压并删除ZIP（阻塞，异步代码中通过 run_disk 调用）"""
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            zip_ref.extractall(output_dir)
+        zip_path.unlink()
+    
     @staticmethod
     def find_markdown(chunk_dir: str) -> Optional[str]:
         """查找Markdown文件"""
         for md_file in Path(chunk_dir).rglob("*.md"):
             return str(md_file)
         return None
+    
+    @staticmethod
+    def organize_output(extracted: str, output_path: Path, file_name: str,
+                        image_store: Optional[ImageStore] = None) -> Dict:
+        """
+        整理输出：复制Markdown和图片到 <file_name>.md / <file_name>_images（阻塞，异步代码中通过 run_disk 调用）
+        
+        Args:
+            image_store: 内容寻址图片存储（可选），启用时图片以链接形式去重存放
+        """
+        md_file = output_path / f"{file_name}.md"
+        images_dir = output_path / f"{file_name}_images"
+        
+        source_md = ResultProcessor.find_markdown(extracted)
+        if source_md:
+            shutil.copy(source_md, md_file)
+        
+        image_count = 0
+        source_images = Path(extracted) / "images"
+        if source_images.exists():
+            if images_dir.exists():
+                shutil.rmtree(images_dir)
+            
+            if image_store:
+                image_count = image_store.ingest_dir(str(source_images), str(images_dir))['files']
+            else:
+                shutil.copytree(source_images, images_dir)
+                image_count = len(list(images_dir.glob("*")))
+        
+        return {
+            'markdown': str(md_file) if source_md else None,
+            'images': str(images_dir) if images_dir.exists() else None,
+            'image_count': image_count
+        }
 
 
 class MinerUAsyncProcessor:
     """MinerU 真正异步处理器"""
     
-    def __init__(self, max_workers: int = 10):
-        self.client = MinerUAsyncClient()
+    def __init__(self, max_workers: int = 10, image_store: Optional[str] = None,
+                 base_url: Optional[str] = None, tokens_file: str = 'all_tokens.json',
+                 policy: Optional[str] = None):
+        """
+        初始化
+        
+        Args:
+            max_workers: 初始并行度（同时处理的文档数，之后按AIMD自动调整）
+            image_store: 内容寻址图片存储目录（默认读取环境变量 MINERU_IMAGE_STORE，未设置则不启用）
+            base_url: API地址（默认读取环境变量 MINERU_BASE_URL）
+            tokens_file: Token文件
+            policy: 并发调用超过上限时的调度策略 fifo / lpt / sjf（默认读取 MINERU_SCHEDULE，
+                再默认 sjf：小文档先处理，交互调用的平均等待最短）
+        """
+        predictor = Predictor.shared()
+        self.client = MinerUAsyncClient(tokens_file, base_url=base_url, predictor=predictor)
         self.max_workers = max_workers
+        self.documents = AimdLimiter.for_documents(max_workers)
+        self.scheduler = Scheduler(policy, default=SJF, predictor=predictor)
+        self.image_store = ImageStore(image_store) if image_store else ImageStore.from_env()
+        self.url_cache = UrlCache.from_env()
     
     async def process_file(self, file_path: str, output_dir: str = "./output", **options) -> Optional[Dict]:
-        """处理单个文件（真正异步）"""
-        import logging
-        logger = logging.getLogger(__name__)
+        """处理单个文件（真正异步），记录进行中任务数、结果计数、各阶段耗时和追踪"""
+        priority = await self._priority(file_path, options) if self.scheduler.reorders else 0.0
+        async with self.documents.slot(priority):
+            return await self._process_tracked(file_path, output_dir, **options)
+    
+    async def _priority(self, file_path: str, options: Dict) -> float:
+        """排队时的优先级：按文件大小、格式和处理选项粗略估计（完整验证在取得位置之后进行）"""
+        if FileValidator.is_url(file_path):
+            return self.scheduler.priority({'is_url': True}, options)
+        try:
+            size = (await run_disk(os.stat, file_path)).st_size
+        except OSError:
+            size = 0
+        return self.scheduler.priority({'size': size, 'format': Path(file_path).suffix.lower().lstrip('.')}, options)
+    
+    async def _process_tracked(self, file_path: str, output_dir: str, **options) -> Optional[Dict]:
+        INFLIGHT.inc()
+        try:
+            with TRACER.span('document', {'file.name': Path(file_path).name}) as span:
+                result = await self._process_file(file_path, output_dir, **options)
+                span.set_attribute('status', 'done' if result else 'failed')
+                if not result:
+                    span.end(error='failed')
+        finally:
+            INFLIGHT.dec()
         
-        logger.info(f"process_file() 开始: {file_path}")
-        print(f"\n📄 处理: {file_path}")
+        DOCUMENTS.labels('done' if result else 'failed').inc()
+        if result:
+            for stage, seconds in result['timings'].items():
+                STAGE_SECONDS.labels(stage).observe(seconds)
+        return result
+    
+    async def _process_file(self, file_path: str, output_dir: str = "./output", **options) -> Optional[Dict]:
+        """处理单个文件（真正异步）"""
+        logger.info("📄 处理: %s", file_path)
         
         try:
+            timings = {}  # 各阶段耗时（秒）
+            stage_start = time.time()
+            
             # 1. 验证文件
             async with AsyncSession() as session:
                 if FileValidator.is_url(file_path):
-                    logger.info("检测到URL")
-                    print("🌐 检测到URL，验证中...")
-                    is_valid, error, file_info = await FileValidator.validate_url(session, file_path)
+                    logger.debug("🌐 检测到URL，验证中...")
+                    is_valid, error, file_info = await FileValidator.validate_url(session, file_path, self.url_cache)
+                    self.url_cache.save()
                 else:
-                    logger.info("检测到本地文件")
-                    print("📁 检测到本地文件，验证中...")
-                    is_valid, error, file_info = FileValidator.validate_file(file_path)
+                    logger.debug("📁 检测到本地文件，验证中...")
+                    is_valid, error, file_info = await run_cpu(FileValidator.validate_file, file_path)
                 
-                logger.info(f"验证结果: is_valid={is_valid}")
+                logger.debug("验证结果: is_valid=%s", is_valid)
+                TRACER.record_span('validate', stage_start, time.time(), {'valid': is_valid})
                 
                 if not is_valid:
-                    logger.error(f"验证失败: {error}")
-                    print(f"❌ {error}")
+                    logger.error("❌ %s", error)
                     return None
                 
-                logger.info(f"文件信息: {file_info}")
-                print(f"✅ 验证通过: {file_info['format'].upper()}, {file_info['size']/1024/1024:.1f}MB")
-                if file_info.get('pages'):
-                    print(f"   页数: {file_info['pages']}")
+                logger.debug("文件信息: %s", file_info)
+                TRACER.current_span().set_attributes({
+                    'file.format': file_info.get('format'),
+                    'file.size': file_info.get('size'),
+                    'file.pages': file_info.get('pages')
+                })
+                timings['validate'] = time.time() - stage_start
+                stage_start = time.time()
+                logger.info("✅ 验证通过: %s, %.1fMB, %s页", file_info['format'].upper(),
+                            file_info['size'] / 1024 / 1024, file_info.get('pages') or '-')
+                
+                # 智能参数设置
+                upload_options = {
+                    'model_version': options.get('model_version', 'vlm'),
+                    'enable_formula': options.get('enable_formula', True),
+                    'enable_table': options.get('enable_table', True)
+                    # 不设置 language，让API自动检测
+                }
+                
+                # HTML文件使用专用模型
+                if file_info['format'] == 'html':
+                    upload_options['model_version'] = 'MinerU-HTML'
                 
                 # 2. 上传本地文件（真正异步）
                 if not file_info['is_url']:
-                    logger.info("开始上传本地文件")
-                    print(f"\n📤 上传本地文件...")
-                    
-                    # 智能参数设置
-                    upload_options = {
-                        'model_version': options.get('model_version', 'vlm'),
-                        'enable_formula': options.get('enable_formula', True),
-                        'enable_table': options.get('enable_table', True)
-                        # 不设置 language，让API自动检测
-                    }
+                    logger.info("📤 上传本地文件...")
                     
-                    # HTML文件使用专用模型
-                    if file_info['format'] == 'html':
-                        upload_options['model_version'] = 'MinerU-HTML'
-                    
-                    batch_id = await self.client.upload_file(session, file_path, **upload_options)
+                    batch_id = await self.client.upload_file(session, file_path, file_info.get('pages'),
+                                                             **upload_options)
+                    timings['upload'] = time.time() - stage_start
+                    stage_start = time.time()
                     
                     if not batch_id:
-                        logger.error("上传失败")
-                        print("❌ 文件上传失败")
+                        logger.error("❌ 文件上传失败")
                         return None
                     
-                    logger.info(f"上传成功: batch_id={batch_id}")
-                    print(f"✅ 文件已上传，batch_id: {batch_id}")
+                    logger.info("✅ 文件已上传，batch_id: %s", batch_id)
                     
                     # 3. 检查是否需要使用page_ranges
                     pages = file_info.get('pages')
                     if pages and pages > 600:
-                        logger.info(f"文件超过600页({pages}页)，需要使用page_ranges处理")
-                        print(f"\n⚠️  文件有{pages}页，超过600页限制")
-                        print(f"📦 使用page_ranges参数拆分处理...")
+                        logger.info("⚠️  文件有%d页，超过600页限制，使用page_ranges参数拆分处理", pages)
                         
                         # 创建page_ranges请求
                         chunk_count = (pages + 599) // 600
-                        print(f"   将拆分为 {chunk_count} 个请求")
+                        logger.info("   将拆分为 %d 个请求", chunk_count)
                         
                         # 等待文件上传完成并自动提交任务
-                        logger.info("等待文件上传完成...")
-                        await asyncio.sleep(5)  # 等待文件扫描
+                        logger.debug("等待文件上传完成...")
+                        await asyncio.sleep(self.client.poll_interval)  # 等待文件扫描
                         
                         # 获取结果
                         results = await self.client.wait_for_completion(session, batch_id)
+                        timings['process'] = time.time() - stage_start
+                        stage_start = time.time()
                         
                         if not results or len(results) == 0:
-                            logger.error("处理失败")
-                            print("❌ 处理失败")
+                            logger.error("❌ 处理失败")
                             return None
                         
                         result = results[0]
                         
                         if result.get('state') != 'done':
-                            logger.error(f"处理失败: {result.get('err_msg')}")
-                            print(f"❌ 处理失败: {result.get('err_msg')}")
+                            logger.error("❌ 处理失败: %s", result.get('err_msg'))
                             return None
                         
                         full_zip_url = result.get('full_zip_url')
-                        logger.info(f"处理完成: {full_zip_url}")
+                        logger.debug("处理完成: %s", full_zip_url)
                     else:
                         # 4. 等待处理完成（真正异步）
-                        logger.info("等待处理完成")
-                        print(f"\n⏳ 等待处理完成...")
+                        logger.info("⏳ 等待处理完成...")
                         
                         results = await self.client.wait_for_completion(session, batch_id)
+                        timings['process'] = time.time() - stage_start
+                        stage_start = time.time()
                         
                         if not results or len(results) == 0:
-                            logger.error("处理失败")
-                            print("❌ 处理失败")
+                            logger.error("❌ 处理失败")
                             return None
                         
                         result = results[0]
                         
                         if result.get('state') != 'done':
-                            logger.error(f"处理失败: {result.get('err_msg')}")
-                            print(f"❌ 处理失败: {result.get('err_msg')}")
+                            logger.error("❌ 处理失败: %s", result.get('err_msg'))
                             return None
                         
                         full_zip_url = result.get('full_zip_url')
-                        logger.info(f"处理完成: {full_zip_url}")
+                        logger.debug("处理完成: %s", full_zip_url)
                 else:
-                    # URL处理：先下载到临时文件，再上传处理
-                    logger.info("URL文件，先下载到本地")
-                    print(f"\n🌐 下载URL文件...")
-                    
-                    import tempfile
-                    url = file_path
-                    file_name = file_info['name']
-                    if '.' not in file_name:
-                        file_name = f"{file_name}.{file_info['format']}"
-                    
-                    tmp_path = Path(tempfile.gettempdir()) / file_name
-                    
-                    resp = await session.get(url, timeout=120)
-                    if resp.status_code != 200:
-                        print(f"❌ 下载失败: HTTP {resp.status_code}")
+                    # 3. URL：直接提交给服务端下载，服务端无法访问时回退为本机下载再上传
+                    full_zip_url = await self.client.process_url(session, file_path, file_info, upload_options, timings)
+                    stage_start = time.time()
+                    if not full_zip_url:
                         return None
-                    
-                    tmp_path.write_bytes(resp.content)
-                    logger.info(f"下载完成: {tmp_path} ({tmp_path.stat().st_size / 1024 / 1024:.1f}MB)")
-                    print(f"✅ 下载完成: {tmp_path.stat().st_size / 1024 / 1024:.1f}MB")
-                    
-                    upload_options = {
-                        'model_version': options.get('model_version', 'vlm'),
-                        'enable_formula': options.get('enable_formula', True),
-                        'enable_table': options.get('enable_table', True)
-                    }
-                    if file_info['format'] == 'html':
-                        upload_options['model_version'] = 'MinerU-HTML'
-                    
-                    batch_id = await self.client.upload_file(session, str(tmp_path), **upload_options)
-                    
-                    if not batch_id:
-                        print("❌ 上传失败")
-                        return None
-                    
-                    print(f"✅ 已上传，batch_id: {batch_id}")
-                    
-                    results = await self.client.wait_for_completion(session, batch_id)
-                    if not results or len(results) == 0 or results[0].get('state') != 'done':
-                        err = results[0].get('err_msg', '未知错误') if results else '无结果'
-                        print(f"❌ 处理失败: {err}")
-                        return None
-                    
-                    full_zip_url = results[0].get('full_zip_url')
-                    # URL文件输出到临时目录
-                    output_path = Path(tempfile.gettempdir())
-                    file_path = str(tmp_path)  # 后续整理输出用本地路径
                 
                 # 4. 下载并解压（真正异步）
-                logger.info("开始下载结果")
-                print(f"\n📥 下载并解压结果...")
+                logger.info("📥 下载并解压结果...")
                 
                 output_path = Path(output_dir)
+                stem = Path(file_info['name']).stem
                 if not file_info['is_url']:
                     output_path = Path(file_path).parent
+                    stem = Path(file_path).stem
                 
                 output_path.mkdir(exist_ok=True, parents=True)
                 
-                chunk_dir = output_path / f"{Path(file_path).stem}_result"
+                chunk_dir = output_path / f"{stem}_result"
                 chunk_dir.mkdir(exist_ok=True)
                 
-                extracted = await ResultProcessor.download_and_extract(session, full_zip_url, str(chunk_dir))
+                extracted = await ResultProcessor.download_and_extract(
+                    session, full_zip_url, str(chunk_dir), self.client.retry, self.client.limits
+                )
+                timings['download'] = time.time() - stage_start
+                stage_start = time.time()
                 
                 if not extracted:
-                    logger.error("下载解压失败")
-                    print("❌ 下载解压失败")
+                    logger.error("❌ 下载解压失败")
                     return None
                 
-                logger.info(f"下载解压成功: {extracted}")
+                logger.debug("下载解压成功: %s", extracted)
                 
                 # 5. 整理输出
-                logger.info("整理输出文件")
-                file_name = Path(file_path).stem
-                md_file = output_path / f"{file_name}.md"
-                images_dir = output_path / f"{file_name}_images"
+                logger.debug("整理输出文件")
+                with TRACER.span('organize'):
+                    output = await run_disk(
+                        ResultProcessor.organize_output, extracted, output_path, stem, self.image_store
+                    )
+                timings['organize'] = time.time() - stage_start
                 
-                # 复制Markdown
-                source_md = ResultProcessor.find_markdown(extracted)
-                if source_md:
-                    shutil.copy(source_md, md_file)
-                    logger.info(f"Markdown已复制: {md_file}")
-                    print(f"✅ Markdown: {md_file}")
+                if output['markdown']:
+                    logger.info("✅ Markdown: %s", output['markdown'])
                 
-                # 复制图片
-                source_images = Path(extracted) / "images"
-                if source_images.exists():
-                    if images_dir.exists():
-                        shutil.rmtree(images_dir)
-                    shutil.copytree(source_images, images_dir)
-                    image_count = len(list(images_dir.glob("*")))
-                    logger.info(f"图片已复制: {image_count}个")
-                    print(f"✅ 图片: {images_dir} ({image_count}个)")
+                if output['images']:
+                    logger.info("✅ 图片: %s (%d个)", output['images'], output['image_count'])
                 
-                logger.info("处理完成")
+                logger.debug("处理完成: %s", file_path)
                 return {
                     'source': file_path,
                     'source_type': 'url' if file_info['is_url'] else 'file',
+                    'timings': timings,
                     'output': {
-                        'markdown': str(md_file),
-                        'images': str(images_dir) if images_dir.exists() else None
+                        'markdown': str(output_path / f"{stem}.md"),
+                        'images': output['images']
                     }
                 }
         
         except Exception as e:
-            logger.error(f"处理异常: {e}", exc_info=True)
-            print(f"❌ 处理失败: {e}")
+            logger.error("❌ 处理失败: %s", e, exc_info=True)
             return None
 
 
@@ -569,6 +1083,8 @@ if __name__ == '__main__':
     
     file_path = sys.argv[1]
     
+    setup_logging()
+    TRACER.configure_from_env()
     processor = MinerUAsyncProcessor(max_workers=10)
     result = asyncio.run(processor.process_file(file_path))
     
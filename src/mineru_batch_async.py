@@ -5,12 +5,13 @@ MinerU 批量异步并行处理器
 完整的进度可视化：总进度 + 单文件进度 + 实时速度
 """
 import asyncio
+import os
 import sys
+import threading
 import time
-import shutil
 from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import Any, List, Dict, Optional, Iterable, Tuple, Callable
+from dataclasses import dataclass, field
 
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -23,6 +24,17 @@ from rich import box
 from rich.layout import Layout
 
 from mineru_async import MinerUAsyncClient, FileValidator, ResultProcessor
+from mineru_concurrency import AimdLimiter
+from mineru_scheduling import LPT, Scheduler
+from mineru_history import Predictor
+from mineru_image_store import ImageStore
+from mineru_manifest import ChangeManifest
+from mineru_scanner import scan_files
+from mineru_url_cache import HostLimiter, UrlCache
+from mineru_executor import LoopLagMonitor, run_cpu, run_disk
+from mineru_metrics import REGISTRY, STAGE_SECONDS, DOCUMENTS, INFLIGHT
+from mineru_tracing import TRACER
+from mineru_logging import setup_logging
 from niquests import AsyncSession
 
 console = Console()
@@ -39,51 +51,80 @@ class FileTask:
     error: Optional[str] = None
     start_time: float = 0
     end_time: float = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）：upload/process/download/organize
+    span: Any = field(default=None, repr=False)  # 文档追踪 span（从验证开始）
 
 
 class BatchAsyncProcessor:
     """批量异步并行处理器"""
     
-    def __init__(self, max_concurrent: int = 5):
+    def __init__(self, max_concurrent: int = 5, image_store: Optional[str] = None,
+                 base_url: Optional[str] = None, tokens_file: str = 'all_tokens.json',
+                 output_dir: str = './output', policy: Optional[str] = None):
         """
         初始化
         
         Args:
-            max_concurrent: 最大并发数（建议3-5，避免API限流）
+            max_concurrent: 初始并发数（之后按AIMD自动调整，MINERU_CONCURRENCY=fixed 时固定）
+            image_store: 内容寻址图片存储目录（默认读取环境变量 MINERU_IMAGE_STORE，未设置则不启用）
+            base_url: API地址（默认读取环境变量 MINERU_BASE_URL）
+            tokens_file: Token文件
+            output_dir: URL输入的输出目录（本地文件输出到源文件所在目录）
+            policy: 调度策略 fifo / lpt / sjf（默认读取 MINERU_SCHEDULE，再默认 lpt：大文档先处理，总耗时最短）
         """
-        self.client = MinerUAsyncClient()
+        predictor = Predictor.shared()  # 处理历史：客户端记录，调度按预测耗时排序
+        self.client = MinerUAsyncClient(tokens_file, base_url=base_url, predictor=predictor)
         self.max_concurrent = max_concurrent
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.documents = AimdLimiter.for_documents(max_concurrent)  # 同时处理的文档数（自适应）
+        self.scheduler = Scheduler(policy, default=LPT, predictor=predictor)
+        self.schedule_window = 32  # 流式处理时已验证、等待调度的文档数（在其中按策略挑选）
+        self.image_store = ImageStore(image_store) if image_store else ImageStore.from_env()
+        self.output_dir = output_dir
+        self.url_cache = UrlCache.from_env()
+        self.host_limiter = HostLimiter()
+        self.loop_lag: Optional[Dict] = None  # 最近一次批量处理期间事件循环的最严重阻塞
+        self.upload_options = {
+            'model_version': 'vlm',
+            'enable_formula': True,
+            'enable_table': True
+        }
     
-    async def process_files_parallel(self, file_paths: List[str]) -> List[Dict]:
+    async def process_files_parallel(self, file_paths: List[str],
+                                     manifest: Optional[ChangeManifest] = None,
+                                     max_concurrent: Optional[int] = None) -> List[Dict]:
         """
         真正的批量异步并行处理
         
         多个文件同时：上传、处理、下载
+        
+        Args:
+            file_paths: 待处理文件
+            manifest: 增量处理清单（可选），成功的文件会记录到清单，未变化的URL直接跳过
+            max_concurrent: 本次调用的固定并发数（默认自适应）
         """
         console.print(Panel.fit(
             f"[bold cyan]MinerU 批量异步并行处理[/bold cyan]\n"
-            f"[dim]并发数: {self.max_concurrent} | 文件数: {len(file_paths)}[/dim]",
+            f"[dim]并发数: {max_concurrent or self.max_concurrent} | 文件数: {len(file_paths)} | "
+            f"调度: {self.scheduler.policy}[/dim]",
             border_style="cyan"
         ))
         
-        # 1. 验证所有文件
+        # 1. 验证所有文件（URL 并发验证，每个主机限制并发数）
         console.print("\n[bold]步骤1: 验证文件[/bold]")
         tasks = []
         
         async with AsyncSession() as session:
-            for file_path in file_paths:
-                if FileValidator.is_url(file_path):
-                    is_valid, error, file_info = await FileValidator.validate_url(session, file_path)
-                else:
-                    is_valid, error, file_info = FileValidator.validate_file(file_path)
-                
-                if is_valid:
-                    task = FileTask(file_path=file_path, file_info=file_info)
-                    tasks.append(task)
-                    console.print(f"  ✅ {file_info['name']} ({file_info['size']/1024/1024:.1f}MB)")
-                else:
-                    console.print(f"  ❌ {Path(file_path).name}: {error}")
+            validated = await asyncio.gather(*[self._validate(session, f) for f in file_paths])
+        self.url_cache.save()
+        
+        for file_path, (is_valid, error, file_info, span) in zip(file_paths, validated):
+            if not is_valid:
+                console.print(f"  ❌ {Path(file_path).name}: {error}")
+            elif self._skip_unchanged_url(file_info, span, manifest):
+                console.print(f"  ⏭️  {file_info['name']}: 未变化，跳过")
+            else:
+                tasks.append(FileTask(file_path=file_path, file_info=file_info, span=span))
+                console.print(f"  ✅ {file_info['name']} ({file_info['size']/1024/1024:.1f}MB)")
         
         if not tasks:
             console.print("[red]没有有效的文件[/red]")
@@ -127,137 +168,369 @@ class BatchAsyncProcessor:
                 )
                 task_ids[task.file_path] = task_id
             
-            # 并行处理（使用信号量控制并发数）
+            # 并行处理（同时处理的文档数按AIMD调整，指定 max_concurrent 时固定）
+            limiter = AimdLimiter.for_documents(max_concurrent, fixed=True) if max_concurrent else self.documents
+            
             async def process_one(task: FileTask):
-                async with self.semaphore:
-                    task.start_time = time.time()
-                    task_id = task_ids[task.file_path]
-                    
-                    try:
-                        # 更新状态：上传中
-                        task.status = 'uploading'
-                        progress.update(task_id, description=f"[yellow]📤 {task.file_info['name'][:40]}")
-                        
-                        async with AsyncSession() as session:
-                            # 上传
-                            upload_options = {
-                                'model_version': 'vlm',
-                                'enable_formula': True,
-                                'enable_table': True
-                            }
-                            
-                            batch_id = await self.client.upload_file(
-                                session, task.file_path, **upload_options
-                            )
-                            
-                            if not batch_id:
-                                task.status = 'failed'
-                                task.error = '上传失败'
-                                progress.update(task_id, completed=100, description=f"[red]❌ {task.file_info['name'][:40]}")
-                                return task
-                            
-                            task.batch_id = batch_id
-                            progress.update(task_id, completed=30)
-                            
-                            # 更新状态：处理中
-                            task.status = 'processing'
-                            progress.update(task_id, description=f"[cyan]⚙️  {task.file_info['name'][:40]}")
-                            
-                            # 等待处理
-                            results = await self.client.wait_for_completion(session, batch_id, max_wait=300)
-                            
-                            if not results or len(results) == 0:
-                                task.status = 'failed'
-                                task.error = '处理失败'
-                                progress.update(task_id, completed=100, description=f"[red]❌ {task.file_info['name'][:40]}")
-                                return task
-                            
-                            result = results[0]
-                            
-                            if result.get('state') != 'done':
-                                task.status = 'failed'
-                                task.error = result.get('err_msg', '未知错误')
-                                progress.update(task_id, completed=100, description=f"[red]❌ {task.file_info['name'][:40]}")
-                                return task
-                            
-                            progress.update(task_id, completed=60)
-                            
-                            # 更新状态：下载中
-                            task.status = 'downloading'
-                            progress.update(task_id, description=f"[magenta]📥 {task.file_info['name'][:40]}")
-                            
-                            # 下载并整理
-                            full_zip_url = result.get('full_zip_url')
-                            output_path = Path(task.file_path).parent
-                            chunk_dir = output_path / f"{Path(task.file_path).stem}_result"
-                            chunk_dir.mkdir(exist_ok=True)
-                            
-                            extracted = await ResultProcessor.download_and_extract(
-                                session, full_zip_url, str(chunk_dir)
-                            )
-                            
-                            if not extracted:
-                                task.status = 'failed'
-                                task.error = '下载失败'
-                                progress.update(task_id, completed=100, description=f"[red]❌ {task.file_info['name'][:40]}")
-                                return task
-                            
-                            progress.update(task_id, completed=90)
-                            
-                            # 整理输出
-                            file_name = Path(task.file_path).stem
-                            md_file = output_path / f"{file_name}.md"
-                            images_dir = output_path / f"{file_name}_images"
-                            
-                            source_md = ResultProcessor.find_markdown(extracted)
-                            if source_md:
-                                shutil.copy(source_md, md_file)
-                            
-                            source_images = Path(extracted) / "images"
-                            image_count = 0
-                            if source_images.exists():
-                                if images_dir.exists():
-                                    shutil.rmtree(images_dir)
-                                shutil.copytree(source_images, images_dir)
-                                image_count = len(list(images_dir.glob("*")))
-                            
-                            task.status = 'done'
-                            task.result = {
-                                'markdown': str(md_file),
-                                'images': str(images_dir),
-                                'image_count': image_count
-                            }
-                            task.end_time = time.time()
-                            
-                            progress.update(task_id, completed=100, description=f"[green]✅ {task.file_info['name'][:40]}")
-                            progress.update(overall_task, advance=1)
-                            
-                            return task
-                    
-                    except Exception as e:
-                        task.status = 'failed'
-                        task.error = str(e)
-                        task.end_time = time.time()
-                        progress.update(task_id, completed=100, description=f"[red]❌ {task.file_info['name'][:40]}")
-                        progress.update(overall_task, advance=1)
-                        return task
+                async with limiter.slot(self.scheduler.priority(task.file_info, self.upload_options)):
+                    await self._run_task(task, progress, task_ids[task.file_path], manifest)
+                    progress.update(overall_task, advance=1)
+                    return task
             
-            # 真正的异步并行处理
-            results = await asyncio.gather(*[process_one(task) for task in tasks])
+            # 真正的异步并行处理（按调度策略的顺序开始，结果保持输入顺序）
+            monitor = LoopLagMonitor()
+            monitor.start()
+            try:
+                ordered = self.scheduler.order(tasks, lambda t: t.file_info, self.upload_options)
+                await asyncio.gather(*[process_one(task) for task in ordered])
+                results = tasks
+            finally:
+                await monitor.stop()
+                self.loop_lag = monitor.report()
+                if manifest is not None:
+                    manifest.save()
         
         # 4. 显示汇总
         self.show_summary(results)
         
         return results
     
+    async def process_stream(self, file_iter: Iterable, max_workers: Optional[int] = None,
+                             manifest: Optional[ChangeManifest] = None,
+                             prune_root: Optional[str] = None,
+                             on_done: Optional[Callable[[str, str], None]] = None,
+                             keep_results: bool = True) -> Tuple[List[FileTask], Dict]:
+        """
+        流式批量处理：边扫描边处理
+        
+        扫描在后台线程中进行，发现的文件经有界队列送给工作协程，同时处理的文档数按AIMD自动调整
+        （指定 max_workers 时固定），大目录无需等待扫描结束即可开始出结果，扫描内存有界。
+        按调度策略排序时，另有 schedule_window 个已验证的文件等待，空出位置时从中按策略挑选。
+        
+        Args:
+            file_iter: 文件迭代器（路径字符串或 os.DirEntry，如 scan_files() 的结果）
+            max_workers: 固定并行度（默认自适应，从 max_concurrent 开始）
+            manifest: 增量处理清单（可选），未变化的文件直接跳过
+            prune_root: 配合 manifest 使用，扫描结束后清理该目录下已删除源文件的输出
+            on_done: 每个文件处理结束后的回调 (文件路径, 状态)，状态为 done/failed/invalid/skipped
+            keep_results: 是否保留每个文件的处理结果；长期运行（监听模式）时设为 False，只在统计信息中计数
+        
+        Returns:
+            (处理结果, 统计信息)；统计信息中 processed/failed 为处理/失败的文件数
+        """
+        limiter = AimdLimiter.for_documents(max_workers, fixed=True) if max_workers else self.documents
+        workers = limiter.maximum + (self.schedule_window if self.scheduler.reorders else 0)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        loop = asyncio.get_running_loop()
+        stats = {'scanned': 0, 'skipped': 0, 'pruned': [], 'processed': 0, 'failed': 0}
+        results: List[FileTask] = []
+        
+        console.print(Panel.fit(
+            f"[bold cyan]MinerU 流式批量处理[/bold cyan]\n"
+            f"[dim]并行度: {max_workers or f'自适应（{int(limiter.limit)}-{limiter.maximum}）'} | "
+            f"调度: {self.scheduler.policy} | 边扫描边处理[/dim]",
+            border_style="cyan"
+        ))
+        
+        stopped = threading.Event()
+        
+        def put(item) -> bool:
+            """线程安全入队；处理已停止时放弃"""
+            while not stopped.is_set():
+                future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(queue.put(item), 1), loop)
+                try:
+                    future.result()
+                    return True
+                except asyncio.TimeoutError:
+                    continue
+            return False
+        
+        def produce():
+            """后台线程：扫描并入队（队列满时阻塞，内存有界）"""
+            prune = manifest is not None and prune_root
+            if prune:
+                manifest.begin_scan()  # 扫描到的文件标记在清单中，不另存完整路径列表
+            try:
+                for item in file_iter:
+                    path = item.path if isinstance(item, os.DirEntry) else item
+                    stats['scanned'] += 1
+                    if prune:
+                        manifest.mark_seen(item)
+                    try:
+                        if manifest is not None and manifest.is_unchanged(item, self.upload_options):
+                            stats['skipped'] += 1
+                            continue
+                    except OSError:
+                        continue
+                    if not put(path):
+                        return
+                
+                if prune:
+                    stats['pruned'] = manifest.prune(root=prune_root, remove_outputs=True)
+            finally:
+                for _ in range(workers):
+                    if not put(None):
+                        break
+        
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold]{task.description}"),
+            BarColumn(complete_style="green"),
+            TaskProgressColumn(),
+            TextColumn("({task.completed}/{task.total})"),
+            console=console,
+            expand=True
+        ) as progress:
+            
+            overall_task = progress.add_task("[cyan]📊 总进度", total=None)
+            
+            async def handle(session, file_path: str):
+                """验证一个文件，再按调度策略等待文档位置并处理"""
+                is_valid, error, file_info, span = await self._validate(session, file_path)
+                
+                if not is_valid:
+                    console.print(f"  ❌ {Path(file_path).name}: {error}")
+                    if on_done:
+                        on_done(file_path, 'invalid')
+                    return
+                
+                if self._skip_unchanged_url(file_info, span, manifest):
+                    stats['skipped'] += 1
+                    if on_done:
+                        on_done(file_path, 'skipped')
+                    return
+                
+                task = FileTask(file_path=file_path, file_info=file_info, span=span)
+                stats['processed'] += 1
+                if keep_results:
+                    results.append(task)
+                progress.update(overall_task, total=stats['processed'] + queue.qsize())
+                
+                async with limiter.slot(self.scheduler.priority(file_info, self.upload_options)):
+                    task_id = progress.add_task(f"[blue]⏳ {file_info['name'][:40]}", total=100)
+                    await self._run_task(task, progress, task_id, manifest)
+                    progress.remove_task(task_id)
+                    progress.update(overall_task, advance=1)
+                
+                if task.status == 'failed':
+                    stats['failed'] += 1
+                    console.print(f"  ❌ {file_info['name']}: {task.error}")
+                if on_done:
+                    on_done(file_path, task.status)
+            
+            async def worker():
+                async with AsyncSession() as session:
+                    while True:
+                        file_path = await queue.get()
+                        if file_path is None:
+                            return
+                        await handle(session, file_path)
+            
+            producer = loop.run_in_executor(None, produce)
+            monitor = LoopLagMonitor()
+            monitor.start()
+            try:
+                await asyncio.gather(producer, *[worker() for _ in range(workers)])
+            finally:
+                stopped.set()
+                await monitor.stop()
+                self.loop_lag = monitor.report()
+                self.url_cache.save()
+                if manifest is not None:
+                    manifest.save()
+            progress.update(overall_task, total=stats['processed'])
+        
+        console.print(f"\n[cyan]🔍 扫描 {stats['scanned']} 个文件，跳过 {stats['skipped']} 个未变化的文件[/cyan]")
+        if results:
+            self.show_summary(results)
+        
+        return results, stats
+    
+    async def _validate(self, session: AsyncSession, file_path: str) -> Tuple[bool, str, Dict, Any]:
+        """验证文件，开启文档追踪 span，返回 (是否有效, 错误, 文件信息, span)"""
+        span = TRACER.start_span('document', {'file.name': Path(file_path).name})
+        validate_start = time.time()
+        if FileValidator.is_url(file_path):
+            async with self.host_limiter.limit(file_path):
+                is_valid, error, file_info = await FileValidator.validate_url(session, file_path, self.url_cache)
+        else:
+            is_valid, error, file_info = await run_cpu(FileValidator.validate_file, file_path)
+        STAGE_SECONDS.labels('validate').observe(time.time() - validate_start)
+        
+        with TRACER.activate(span):
+            TRACER.record_span('validate', validate_start, time.time(), {'valid': is_valid})
+        if is_valid:
+            span.set_attributes({
+                'file.format': file_info.get('format'),
+                'file.size': file_info.get('size'),
+                'file.pages': file_info.get('pages')
+            })
+        else:
+            span.set_attribute('status', 'invalid')
+            span.end(error=error)
+        return is_valid, error, file_info, span
+    
+    def _skip_unchanged_url(self, file_info: Dict, span, manifest: Optional[ChangeManifest]) -> bool:
+        """URL 自上次处理后未变（ETag / Last-Modified 相同且输出仍在）时跳过，结束其追踪 span"""
+        if manifest is None or not file_info['is_url'] \
+                or not manifest.is_unchanged_url(file_info['path'], self.upload_options, file_info):
+            return False
+        if span is not None:
+            span.set_attribute('status', 'skipped')
+            span.end()
+        return True
+    
+    async def _run_task(self, task: FileTask, progress: Progress, task_id,
+                        manifest: Optional[ChangeManifest] = None) -> FileTask:
+        """处理单个文件任务：上传 → 等待处理 → 下载 → 整理输出"""
+        name = task.file_info['name'][:40]
+        task.start_time = time.time()
+        stage_start = task.start_time
+        
+        def mark(stage: str):
+            """记录阶段耗时"""
+            nonlocal stage_start
+            now = time.time()
+            task.timings[stage] = now - stage_start
+            STAGE_SECONDS.labels(stage).observe(now - stage_start)
+            stage_start = now
+        
+        def fail(error: str) -> FileTask:
+            task.status = 'failed'
+            task.error = error
+            task.end_time = time.time()
+            progress.update(task_id, completed=100, description=f"[red]❌ {name}")
+            return task
+        
+        INFLIGHT.inc()
+        with TRACER.activate(task.span):
+            try:
+                # 更新状态：上传中
+                task.status = 'uploading'
+                progress.update(task_id, description=f"[yellow]📤 {name}")
+                
+                async with AsyncSession() as session:
+                    if task.file_info['is_url']:
+                        # URL：直接提交（服务端下载），无法访问时回退为下载再上传
+                        task.status = 'processing'
+                        progress.update(task_id, description=f"[cyan]⚙️  {name}")
+                        timings = {}
+                        full_zip_url = await self.client.process_url(
+                            session, task.file_path, task.file_info, self.upload_options, timings
+                        )
+                        for stage, seconds in timings.items():
+                            task.timings[stage] = seconds
+                            STAGE_SECONDS.labels(stage).observe(seconds)
+                        stage_start = time.time()
+                        
+                        if not full_zip_url:
+                            return fail('处理失败')
+                        output_path = Path(self.output_dir)
+                        output_path.mkdir(parents=True, exist_ok=True)
+                        stem = Path(task.file_info['name']).stem
+                    else:
+                        # 上传
+                        batch_id = await self.client.upload_file(
+                            session, task.file_path, task.file_info.get('pages'), **self.upload_options
+                        )
+                        mark('upload')
+                        
+                        if not batch_id:
+                            return fail('上传失败')
+                        
+                        task.batch_id = batch_id
+                        progress.update(task_id, completed=30)
+                        
+                        # 更新状态：处理中
+                        task.status = 'processing'
+                        progress.update(task_id, description=f"[cyan]⚙️  {name}")
+                        
+                        # 等待处理
+                        results = await self.client.wait_for_completion(session, batch_id, max_wait=300)
+                        mark('process')
+                        
+                        if not results or len(results) == 0:
+                            return fail('处理失败')
+                        
+                        result = results[0]
+                        
+                        if result.get('state') != 'done':
+                            return fail(result.get('err_msg', '未知错误'))
+                        
+                        full_zip_url = result.get('full_zip_url')
+                        output_path = Path(task.file_path).parent
+                        stem = Path(task.file_path).stem
+                    
+                    progress.update(task_id, completed=60)
+                    
+                    # 更新状态：下载中
+                    task.status = 'downloading'
+                    progress.update(task_id, description=f"[magenta]📥 {name}")
+                    
+                    # 下载并整理
+                    chunk_dir = output_path / f"{stem}_result"
+                    chunk_dir.mkdir(exist_ok=True)
+                    
+                    extracted = await ResultProcessor.download_and_extract(
+                        session, full_zip_url, str(chunk_dir), self.client.retry, self.client.limits
+                    )
+                    mark('download')
+                    
+                    if not extracted:
+                        return fail('下载失败')
+                    
+                    progress.update(task_id, completed=90)
+                    
+                    # 整理输出
+                    with TRACER.span('organize'):
+                        output = await run_disk(
+                            ResultProcessor.organize_output, extracted, output_path, stem, self.image_store
+                        )
+                    mark('organize')
+                    
+                    task.status = 'done'
+                    task.result = {
+                        'markdown': str(output_path / f"{stem}.md"),
+                        'images': str(output_path / f"{stem}_images"),
+                        'image_count': output['image_count']
+                    }
+                    task.end_time = time.time()
+                    
+                    if manifest is not None:
+                        outputs = {
+                            'markdown': task.result['markdown'],
+                            'images': task.result['images'],
+                            'result_dir': str(chunk_dir)
+                        }
+                        if task.file_info['is_url']:
+                            manifest.record_url(task.file_path, self.upload_options, task.file_info, outputs)
+                        else:
+                            await run_cpu(manifest.record, task.file_path, self.upload_options, outputs)
+                    
+                    progress.update(task_id, completed=100, description=f"[green]✅ {name}")
+                    
+                    return task
+            
+            except Exception as e:
+                return fail(str(e))
+            
+            finally:
+                INFLIGHT.dec()
+                DOCUMENTS.labels(task.status).inc()
+                if task.span is not None:
+                    task.span.set_attributes({'status': task.status, 'batch_id': task.batch_id})
+                    task.span.end(error=task.error if task.status == 'failed' else None)
+    
     def show_summary(self, results: List[FileTask]):
         """显示处理汇总"""
         # 统计
         success = [r for r in results if r.status == 'done']
         failed = [r for r in results if r.status == 'failed']
         
-        total_time = max((r.end_time - r.start_time for r in results if r.end_time > 0), default=0)
-        total_pages = sum(r.file_info.get('pages', 0) for r in success)
+        # 总耗时为墙钟时间（最早开始到最晚结束），而不是单个文件的最长耗时
+        finished = [r for r in results if r.end_time > 0]
+        total_time = (max(r.end_time for r in finished) - min(r.start_time for r in finished)) if finished else 0
+        total_pages = sum(r.file_info.get('pages') or 0 for r in success)
         total_images = sum(r.result.get('image_count', 0) for r in success if r.result)
         
         # 结果表格
@@ -297,6 +570,10 @@ class BatchAsyncProcessor:
         stats_table.add_row("📖 总页数", f"{total_pages}")
         stats_table.add_row("🖼️  总图片", f"{total_images}")
         stats_table.add_row("⏱️  总耗时", f"{total_time:.1f}秒")
+        if self.loop_lag:
+            stats_table.add_row("🐢 循环阻塞", f"最大 {self.loop_lag['max_ms']:.0f}ms")
+        if self.documents.adaptive:
+            stats_table.add_row("🎚️  并发上限", f"当前 {int(self.documents.limit)}，最高 {int(self.documents.peak)}")
         
         if len(success) > 0:
             avg_time = total_time / len(success)
@@ -317,28 +594,51 @@ class BatchAsyncProcessor:
 
 # 使用示例
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        console.print("[yellow]用法:[/yellow]")
-        console.print("  批量处理: [cyan]python3 mineru_batch_async.py <dir> [pattern][/cyan]")
-        console.print("  示例: [cyan]python3 mineru_batch_async.py ~/Downloads '*.pdf'[/cyan]")
-        sys.exit(1)
+    import argparse
     
-    directory = sys.argv[1]
-    pattern = sys.argv[2] if len(sys.argv) > 2 else "*.pdf"
+    parser = argparse.ArgumentParser(description='MinerU 批量异步并行处理')
+    parser.add_argument('directory', help='目录路径')
+    parser.add_argument('pattern', nargs='?', default='*.pdf', help='文件模式，多个用逗号分隔（默认 *.pdf）')
+    parser.add_argument('--recursive', '-r', action='store_true', help='递归扫描子目录')
+    parser.add_argument('--exclude', default=None, help='排除的文件/目录模式，多个用逗号分隔')
+    parser.add_argument('--workers', type=int, default=None, help='固定并行度（默认从3开始自适应调整）')
+    parser.add_argument('--schedule', choices=['fifo', 'lpt', 'sjf'], default=None,
+                        help='调度策略：lpt 大文档先处理（默认）/ sjf 小文档先处理 / fifo 按文件名顺序')
+    parser.add_argument('--incremental', action='store_true', help='跳过未变化的文件')
+    parser.add_argument('--prune', action='store_true', help='增量处理时删除已删除源文件的输出')
+    parser.add_argument('--quiet', '-q', action='store_true', help='安静模式：日志只输出警告和错误')
+    args = parser.parse_args()
     
-    # 扫描文件
-    dir_path = Path(directory).expanduser()
-    files = sorted([str(f) for f in dir_path.glob(pattern)])
+    # 日志级别（MINERU_LOG_LEVEL / MINERU_LOG_FILE / MINERU_QUIET）
+    setup_logging(quiet=args.quiet or None)
     
-    if not files:
-        console.print(f"[red]未找到匹配的文件: {pattern}[/red]")
-        sys.exit(1)
+    # 指标导出（MINERU_METRICS_PORT / MINERU_METRICS_FILE）和链路追踪（MINERU_TRACE_FILE）
+    REGISTRY.configure_from_env()
+    TRACER.configure_from_env()
     
-    console.print(f"[cyan]找到 {len(files)} 个文件[/cyan]\n")
+    dir_path = Path(args.directory).expanduser()
     
     # 批量处理
-    processor = BatchAsyncProcessor(max_concurrent=3)
-    results = asyncio.run(processor.process_files_parallel(files))
+    processor = BatchAsyncProcessor(max_concurrent=args.workers or 3, policy=args.schedule)
+    
+    manifest = ChangeManifest.for_directory(str(dir_path)) if args.incremental else None
+    
+    # 边扫描边处理
+    files = scan_files(str(dir_path), args.pattern, args.exclude, recursive=args.recursive)
+    results, stats = asyncio.run(processor.process_stream(
+        files, max_workers=args.workers, manifest=manifest,
+        prune_root=str(dir_path) if args.prune else None
+    ))
+    
+    if stats['pruned']:
+        console.print(f"[yellow]🗑️  已清理 {len(stats['pruned'])} 个已删除文件的输出[/yellow]")
+    
+    if not results:
+        if stats['skipped']:
+            console.print("\n[bold green]✅ 所有文件均为最新[/bold green]")
+            sys.exit(0)
+        console.print(f"[red]未找到匹配的文件: {args.pattern}[/red]")
+        sys.exit(1)
     
     # 统计
     success_count = sum(1 for r in results if r.status == 'done')
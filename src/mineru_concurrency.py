@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+MinerU 自适应并发（AIMD）
+- 每个（阶段, 账户）一个并发上限：上限被用满、请求成功且延迟正常时加性增加（每成功 limit 次加1），
+  429、超时或延迟明显高于基线时乘性减少（减半）；同一窗口内（减少之前开始的请求）的多次拥塞只减一次
+- 阶段：
+    document  同时处理的文档数（每个处理器一个），任何阶段减少上限时视为拥塞
+    submit    每个账户同时进行的申请上传链接/提交URL请求，延迟信号为请求耗时
+    process   每个账户在服务端未完成的任务（提交到完成），延迟信号为服务端排队时间
+    put       上传；download 下载结果（不分账户，只按错误和超时调节）
+- 各上限写入 mineru_concurrency_limit 指标；MINERU_CONCURRENCY=fixed 关闭自适应，
+  MINERU_MAX_CONCURRENCY 为同时处理文档数的上限（默认32）
+"""
+import asyncio
+import bisect
+import contextlib
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from mineru_metrics import CONCURRENCY_LIMIT
+
+try:
+    from niquests.exceptions import Timeout as _HttpTimeout
+except ImportError:  # pragma: no cover
+    _HttpTimeout = TimeoutError
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT = 'document'
+SUBMIT = 'submit'
+PROCESS = 'process'
+PUT = 'put'
+DOWNLOAD = 'download'
+
+DEFAULT_MAX_DOCUMENTS = 32
+
+
+@dataclass
+class StageLimits:
+    """阶段的初始上限、上限范围和延迟判断"""
+    initial: int = 4
+    maximum: int = 32
+    tolerance: Optional[float] = None  # 延迟超过 基线 × tolerance + slack 视为拥塞（None 为不看延迟）
+    slack: float = 1.0                 # 延迟判断的绝对余量（秒），吸收轮询间隔等量化误差
+
+
+STAGES = {
+    SUBMIT: StageLimits(initial=4, maximum=16, tolerance=3.0, slack=1.0),
+    PROCESS: StageLimits(initial=4, maximum=64, tolerance=2.0, slack=10.0),
+    PUT: StageLimits(initial=4, maximum=32),
+    DOWNLOAD: StageLimits(initial=4, maximum=32),
+}
+
+
+def is_adaptive() -> bool:
+    return os.environ.get('MINERU_CONCURRENCY', 'adaptive').lower() != 'fixed'
+
+
+def is_congestion(error: BaseException) -> bool:
+    """超时视为拥塞（429 由调用方根据状态码标记）"""
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError, _HttpTimeout))
+
+
+@dataclass
+class Slot:
+    """一次占用：结束时根据 congested / latency 调节上限"""
+    epoch: int
+    backoffs: int
+    start: float
+    latency: Optional[float] = None  # 用于判断的延迟（默认为占用时长）
+    congested: bool = False
+    ignore: bool = False             # 结果不参与调节（如上传失败，任务没有进入服务端）
+    released: bool = False
+
+
+class AimdLimiter:
+    """单个（阶段, 账户）的自适应并发上限（只在事件循环线程中使用）"""
+
+    backoffs = 0  # 所有阶段累计的减少次数（document 上限据此判断处理期间是否发生拥塞）
+
+    def __init__(self, stage: str, account: str = '', initial: int = 4, maximum: int = 32, minimum: int = 1,
+                 tolerance: Optional[float] = None, slack: float = 1.0, adaptive: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            stage: 阶段名（指标标签）
+            account: 账户（不分账户的阶段为空）
+            initial: 初始上限
+            maximum/minimum: 上限范围
+            tolerance/slack: 延迟判断，见 StageLimits
+            adaptive: False 时上限固定为 initial
+            clock: 时钟（测试用）
+        """
+        self.stage = stage
+        self.account = account
+        self.minimum = minimum
+        self.maximum = max(maximum, initial) if adaptive else initial
+        self.limit = float(max(min(initial, self.maximum), minimum))
+        self.tolerance = tolerance
+        self.slack = slack
+        self.adaptive = adaptive
+        self.clock = clock
+        self.inflight = 0
+        self.epoch = 0                       # 每次减少加1
+        self.baseline: Optional[float] = None  # 延迟基线（近期最小值，缓慢上浮）
+        self.peak = self.limit
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []  # (priority, 到达顺序, future)，有序
+        self._arrivals = itertools.count()
+        self._publish()
+
+    @classmethod
+    def for_documents(cls, initial: int, fixed: bool = False) -> 'AimdLimiter':
+        """同时处理的文档数（fixed 或 MINERU_CONCURRENCY=fixed 时固定为 initial）"""
+        maximum = int(os.environ.get('MINERU_MAX_CONCURRENCY', DEFAULT_MAX_DOCUMENTS))
+        return cls(DOCUMENT, initial=initial, maximum=maximum, adaptive=is_adaptive() and not fixed)
+
+    def _publish(self):
+        CONCURRENCY_LIMIT.labels(self.stage, self.account).set(int(self.limit))
+
+    # ==================== 占用 ====================
+
+    def full(self) -> bool:
+        return self.inflight >= int(self.limit)
+
+    async def acquire(self, priority: float = 0.0) -> Slot:
+        """等待空位：priority 小的先得（调度策略），相同时先到先得；已有人排队时新来的也排队"""
+        arrival = next(self._arrivals)
+        if self.full() or self._waiters:
+            loop = asyncio.get_running_loop()
+            while True:
+                entry = (priority, arrival, loop.create_future())
+                bisect.insort(self._waiters, entry)
+                self._wake()
+                try:
+                    await entry[2]
+                except asyncio.CancelledError:
+                    if entry[2].done() and not entry[2].cancelled():
+                        self._wake()  # 已被唤醒又取消，空位交给下一个
+                    raise
+                finally:
+                    if entry in self._waiters:
+                        self._waiters.remove(entry)
+                if not self.full():
+                    break  # 空位被抢走时按原来的顺序重新排队
+        self.inflight += 1
+        return Slot(self.epoch, AimdLimiter.backoffs, self.clock())
+
+    def release(self, slot: Slot):
+        """结束占用：拥塞则减少上限，否则在上限用满且延迟正常时增加"""
+        if slot.released:
+            return
+        slot.released = True
+        saturated = self.inflight >= int(self.limit)
+        self.inflight -= 1
+        if self.adaptive and not slot.ignore:
+            if self.stage == DOCUMENT and AimdLimiter.backoffs != slot.backoffs:
+                slot.congested = True
+            latency = slot.latency if slot.latency is not None else self.clock() - slot.start
+            if slot.congested or self._slow(latency):
+                self._decrease(slot)
+            elif saturated:
+                self._increase()
+        self._wake()
+
+    def backoff(self, slot: Slot):
+        """占用期间已确认拥塞（如提交时429）：立即减少上限，不等占用结束"""
+        if self.adaptive:
+            self._decrease(slot)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: float = 0.0) -> AsyncIterator[Slot]:
+        """占用一个位置；超时异常视为拥塞"""
+        slot = await self.acquire(priority)
+        try:
+            yield slot
+        except BaseException as e:
+            slot.congested = slot.congested or is_congestion(e)
+            raise
+        finally:
+            self.release(slot)
+
+    def _wake(self):
+        free = int(self.limit) - self.inflight
+        for entry in list(self._waiters[:max(free, 0)]):
+            self._waiters.remove(entry)
+            waiter = entry[2]
+            if not waiter.done():
+                try:
+                    waiter.set_result(None)
+                except RuntimeError:  # 所属事件循环已关闭
+                    pass
+
+    # ==================== 调节 ====================
+
+    def _slow(self, latency: float) -> bool:
+        """延迟明显高于基线（基线取近期最小值，每次缓慢向当前值上浮，适应服务端的正常变化）"""
+        if self.tolerance is None:
+            return False
+        baseline = self.baseline
+        self.baseline = latency if baseline is None else min(latency, baseline + 0.05 * (latency - baseline))
+        return baseline is not None and latency > baseline * self.tolerance + self.slack
+
+    def _increase(self):
+        old = int(self.limit)
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.peak = max(self.peak, self.limit)
+        if int(self.limit) != old:
+            logger.debug("📈 并发上限 %s %s: %d → %d", self.stage, self.account, old, int(self.limit))
+            self._publish()
+            self._wake()
+
+    def _decrease(self, slot: Slot):
+        if slot.epoch != self.epoch:
+            return  # 本窗口已经减少过
+        old = int(self.limit)
+        self.limit = max(self.minimum, self.limit / 2)
+        self.epoch += 1
+        if self.stage != DOCUMENT:
+            AimdLimiter.backoffs += 1
+        logger.info("📉 并发上限 %s %s: %d → %d", self.stage, self.account, old, int(self.limit))
+        self._publish()
+
+    def status(self) -> Dict:
+        return {'stage': self.stage, 'account': self.account, 'limit': int(self.limit),
+                'peak': int(self.peak), 'inflight': self.inflight}
+
+
+class ConcurrencyController:
+    """按（阶段, 账户）管理 AIMD 上限；同一Token文件的客户端共用（账户在服务端的并发是同一份）"""
+
+    _shared: Dict[str, 'ConcurrencyController'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, stages: Optional[Dict[str, StageLimits]] = None, adaptive: Optional[bool] = None):
+        self.stages = {**STAGES, **(stages or {})}
+        self.adaptive = is_adaptive() if adaptive is None else adaptive
+        self.limiters: Dict[Tuple[str, str], AimdLimiter] = {}
+
+    @classmethod
+    def shared(cls, tokens_file: str, stages: Optional[Dict[str, StageLimits]] = None) -> 'ConcurrencyController':
+        """同一Token文件共用（stages 只在首次创建时生效）"""
+        key = str(Path(tokens_file).resolve())
+        with cls._shared_lock:
+            controller = cls._shared.get(key)
+            if controller is None:
+                controller = cls._shared[key] = cls(stages)
+            return controller
+
+    def limiter(self, stage: str, account: str = '') -> AimdLimiter:
+        limiter = self.limiters.get((stage, account))
+        if limiter is None:
+            limits = self.stages[stage]
+            # 固定模式下不限制各阶段（只由文档数控制并发，与之前一致）
+            initial = limits.initial if self.adaptive else limits.maximum
+            limiter = self.limiters[(stage, account)] = AimdLimiter(
+                stage, account, initial=initial, maximum=limits.maximum, tolerance=limits.tolerance,
+                slack=limits.slack, adaptive=self.adaptive)
+        return limiter
+
+    def slot(self, stage: str, account: str = ''):
+        return self.limiter(stage, account).slot()
+
+    def full(self, stage: str, account: str = '') -> bool:
+        return self.limiter(stage, account).full()
+
+    def status(self) -> List[Dict]:
+        return [limiter.status() for limiter in self.limiters.values()]
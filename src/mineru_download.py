@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+MinerU 结果断点续传下载
+- 下载到 <文件>.part，进度记录在 <文件>.part.json，中断（包括进程重启）后从已收到的位置继续
+- 续传使用 Range + If-Range（ETag），服务端内容变化或不支持 Range 时从头下载
+- 完成后校验大小；ETag 为内容MD5时（OSS/S3 单次上传）校验MD5，通过后才改名为正式文件
+- 可选多段并行 Range 下载（MINERU_DOWNLOAD_PARALLEL=4），在单连接限速的链路上跑满带宽
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from mineru_executor import run_cpu
+from mineru_metrics import DOWNLOAD_BYTES
+from mineru_retry import RetryEngine, RetryableError, check_status
+
+logger = logging.getLogger(__name__)
+
+
+class ContentChanged(Exception):
+    """服务端内容已变化（If-Range 不匹配），已下载的部分作废"""
+
+
+class VerificationError(Exception):
+    """下载完成后大小或MD5校验失败"""
+
+
+@dataclass
+class Segment:
+    """一段字节范围 [start, end]（end 为 None 表示到文件末尾、大小未知）"""
+    start: int
+    end: Optional[int] = None
+    received: int = 0
+
+    @property
+    def position(self) -> int:
+        return self.start + self.received
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None and self.position > self.end
+
+
+def _etag_md5(etag: Optional[str]) -> Optional[str]:
+    """ETag 是内容MD5时返回小写MD5"""
+    if not etag:
+        return None
+    value = etag.strip()
+    if value.startswith('W/'):
+        return None
+    value = value.strip('"')
+    return value.lower() if re.fullmatch(r'[0-9a-fA-F]{32}', value) else None
+
+
+def _file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResumableDownloader:
+    """断点续传下载器"""
+
+    CHUNK_SIZE = 256 * 1024
+    SAVE_INTERVAL = 1.0  # 进度文件最短写入间隔（秒）
+
+    def __init__(self, session, retry: Optional[RetryEngine] = None, parallel: Optional[int] = None,
+                 min_segment: int = 8 * 1024 * 1024):
+        """
+        Args:
+            session: niquests AsyncSession
+            retry: 重试引擎（每段单独重试）
+            parallel: 并行段数（默认读取 MINERU_DOWNLOAD_PARALLEL，再默认1）
+            min_segment: 每段最小字节数，文件小于两段时不拆分
+        """
+        self.session = session
+        self.retry = retry or RetryEngine()
+        self.parallel = max(1, parallel or int(os.environ.get('MINERU_DOWNLOAD_PARALLEL', 1)))
+        self.min_segment = min_segment
+
+    # ==================== 进度文件 ====================
+
+    @staticmethod
+    def _paths(path: Path):
+        return path.with_name(path.name + '.part'), path.with_name(path.name + '.part.json')
+
+    @staticmethod
+    def _load(url: str, part: Path, meta_path: Path) -> Optional[Dict]:
+        """读取同一URL的未完成下载"""
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or not part.exists():
+            return None
+        segments = [Segment(**s) for s in meta['segments']]
+        if len(segments) == 1 and segments[0].end is None:
+            # 单段顺序下载：以实际文件长度为准
+            segments[0].received = min(segments[0].received, part.stat().st_size)
+        return {'url': url, 'etag': meta.get('etag'), 'size': meta.get('size'), 'segments': segments}
+
+    @staticmethod
+    def _save(meta_path: Path, state: Dict):
+        tmp = meta_path.with_name(meta_path.name + '.tmp')
+        tmp.write_text(json.dumps({
+            'url': state['url'], 'etag': state['etag'], 'size': state['size'],
+            'segments': [asdict(s) for s in state['segments']]
+        }), encoding='utf-8')
+        os.replace(tmp, meta_path)
+
+    # ==================== 下载 ====================
+
+    async def _plan(self, url: str, parallel: int) -> Dict:
+        """确定分段：并行时先用 HEAD 获取大小和 Range 支持"""
+        state = {'url': url, 'etag': None, 'size': None, 'segments': [Segment(0)]}
+        if parallel < 2:
+            return state
+
+        async def head():
+            return check_status(await self.session.head(url, timeout=30, allow_redirects=True))
+
+        try:
+            response = await self.retry.call('download', head)
+        except Exception as e:
+            logger.debug("HEAD 失败，使用单连接下载: %s", e)
+            return state
+        size = int(response.headers.get('Content-Length') or 0)
+        if response.status_code != 200 or response.headers.get('Accept-Ranges') != 'bytes' \
+                or size < 2 * self.min_segment:
+            return state
+
+        count = min(parallel, size // self.min_segment)
+        step = -(-size // count)
+        state['etag'] = response.headers.get('ETag')
+        state['size'] = size
+        state['segments'] = [Segment(start, min(start + step, size) - 1) for start in range(0, size, step)]
+        return state
+
+    async def _fetch(self, state: Dict, segment: Segment, part: Path, meta_path: Path):
+        """下载一段（重试时从该段已收到的位置继续）"""
+        if segment.done:
+            return
+        multi = len(state['segments']) > 1
+        headers = {}
+        if segment.received or segment.end is not None:
+            headers['Range'] = f"bytes={segment.position}-{'' if segment.end is None else segment.end}"
+            if state['etag']:
+                headers['If-Range'] = state['etag']
+
+        response = await self.session.get(state['url'], headers=headers, stream=True, timeout=300)
+
+        if response.status_code == 416 and segment.end is None and segment.received:
+            segment.end = segment.position - 1  # 已经完整
+            return
+        check_status(response)
+
+        if response.status_code == 206:
+            match = re.match(r'bytes (\d+)-(\d+)/(\d+|\*)', response.headers.get('Content-Range', ''))
+            if not match or int(match.group(1)) != segment.position:
+                raise ContentChanged(f"Content-Range 不匹配: {response.headers.get('Content-Range')}")
+            last = int(match.group(2))
+            if match.group(3) != '*' and state['size'] is None:
+                state['size'] = int(match.group(3))
+        elif response.status_code == 200:
+            if multi:
+                raise ContentChanged("服务端返回完整内容（不支持 Range 或内容已变化）")
+            if segment.received:
+                logger.debug("服务端未续传，从头下载: %s", state['url'])
+            segment.received = 0
+            with open(part, 'r+b') as f:
+                f.truncate(0)
+            length = response.headers.get('Content-Length')
+            state['size'] = int(length) if length else None
+            last = state['size'] - 1 if state['size'] is not None else None
+        else:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        state['etag'] = state['etag'] or response.headers.get('ETag')
+
+        saved_at = time.monotonic()
+        try:
+            with open(part, 'r+b') as f:
+                f.seek(segment.position)
+                async for chunk in await response.iter_content(self.CHUNK_SIZE):
+                    if segment.end is not None:
+                        chunk = chunk[:segment.end - segment.position + 1]
+                    f.write(chunk)
+                    segment.received += len(chunk)
+                    DOWNLOAD_BYTES.inc(len(chunk))
+                    if time.monotonic() - saved_at > self.SAVE_INTERVAL:
+                        f.flush()
+                        self._save(meta_path, state)
+                        saved_at = time.monotonic()
+                    if segment.done:
+                        break
+        finally:
+            self._save(meta_path, state)
+
+        if last is not None and segment.position <= last:
+            raise RetryableError(f"连接中断: 收到 {segment.position}/{last + 1} 字节")
+        if segment.end is None:
+            segment.end = segment.position - 1
+
+    async def _run(self, state: Dict, part: Path, meta_path: Path):
+        tasks = [
+            asyncio.ensure_future(self.retry.call(
+                'download', lambda s=segment: self._fetch(state, s, part, meta_path)
+            ))
+            for segment in state['segments'] if not segment.done
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _verify(self, state: Dict, part: Path) -> int:
+        size = part.stat().st_size
+        if state['size'] is not None and size != state['size']:
+            raise VerificationError(f"大小不一致: {size} != {state['size']}")
+        expected_md5 = _etag_md5(state['etag'])
+        if expected_md5:
+            actual = await run_cpu(_file_md5, part)
+            if actual != expected_md5:
+                raise VerificationError(f"MD5不一致: {actual} != {expected_md5}")
+        return size
+
+    async def download(self, url: str, path) -> int:
+        """
+        下载到 path，返回字节数
+
+        中断（重试用尽或进程退出）时保留 .part 和 .part.json，下次下载同一URL时续传
+        """
+        path = Path(path)
+        part, meta_path = self._paths(path)
+
+        state = self._load(url, part, meta_path)
+        if state is not None:
+            logger.info("⏩ 续传: %s（已有 %d 字节）", path.name, sum(s.received for s in state['segments']))
+        else:
+            state = await self._plan(url, self.parallel)
+            with open(part, 'wb') as f:
+                if state['size']:
+                    f.truncate(state['size'])
+
+        try:
+            await self._run(state, part, meta_path)
+        except ContentChanged as e:
+            logger.warning("⚠️  %s，从头下载: %s", e, path.name)
+            state = await self._plan(url, 1)
+            part.write_bytes(b'')
+            await self._run(state, part, meta_path)
+
+        try:
+            size = await self._verify(state, part)
+        except VerificationError:
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(part, path)
+        meta_path.unlink(missing_ok=True)
+        return size
+
+
+# 使用示例
+if __name__ == '__main__':
+    import sys
+
+    from niquests import AsyncSession
+
+    if len(sys.argv) < 3:
+        print("用法: python3 mineru_download.py <url> <输出文件> [并行段数]")
+        sys.exit(1)
+
+    async def main():
+        async with AsyncSession() as session:
+            downloader = ResumableDownloader(session, parallel=int(sys.argv[3]) if len(sys.argv) > 3 else None)
+            start = time.time()
+            size = await downloader.download(sys.argv[1], sys.argv[2])
+            print(f"✅ {sys.argv[2]}: {size / 1024 / 1024:.1f}MB, {time.time() - start:.1f}秒")
+
+    asyncio.run(main())
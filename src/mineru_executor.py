@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+MinerU 阻塞任务执行器：异步代码中的阻塞I/O和CPU工作不在事件循环线程执行
+- 磁盘池（MINERU_DISK_WORKERS，默认4）：解压、复制图片、遍历目录、读写整个文件
+- CPU池（MINERU_CPU_WORKERS，默认CPU核数，最多4）：PDF/PPTX/DOCX 解析、哈希校验
+  纯Python解析持有GIL，但放到线程后事件循环最多等一个GIL切换间隔（约5ms），而不是整个解析过程
+- 两个池分开且线程数有上限：大量解压排队时不会拖住页数统计，反之亦然
+- LoopLagMonitor：定时 sleep 测量事件循环延迟，记录最严重的几次阻塞，超过阈值时告警
+"""
+import asyncio
+import contextvars
+import functools
+import heapq
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from mineru_metrics import LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DISK = 'disk'
+CPU = 'cpu'
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _default_workers(kind: str) -> int:
+    if kind == DISK:
+        return int(os.environ.get('MINERU_DISK_WORKERS', 4))
+    return int(os.environ.get('MINERU_CPU_WORKERS', min(os.cpu_count() or 1, 4)))
+
+
+def get_pool(kind: str) -> ThreadPoolExecutor:
+    """磁盘池或CPU池（首次使用时创建，进程内共用）"""
+    pool = _pools.get(kind)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(kind)
+            if pool is None:
+                pool = _pools[kind] = ThreadPoolExecutor(max(_default_workers(kind), 1),
+                                                         thread_name_prefix=f'mineru-{kind}')
+    return pool
+
+
+async def _run(kind: str, func: Callable[..., T], *args, **kwargs) -> T:
+    # 复制上下文：线程中的代码看到当前追踪 span 等上下文变量
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_pool(kind), call)
+
+
+async def run_disk(func: Callable[..., T], *args, **kwargs) -> T:
+    """在磁盘池中运行阻塞的文件操作"""
+    return await _run(DISK, func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args, **kwargs) -> T:
+    """在CPU池中运行解析、哈希等计算"""
+    return await _run(CPU, func, *args, **kwargs)
+
+
+def shutdown():
+    """关闭执行器（等待进行中的任务）"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=True)
+        _pools.clear()
+
+
+class LoopLagMonitor:
+    """事件循环延迟监控：每 interval 秒 sleep 一次，实际多睡的时间就是循环被阻塞的时间"""
+
+    def __init__(self, interval: float = 0.01, keep_worst: int = 10, keep_samples: bool = False,
+                 warn_ms: Optional[float] = None):
+        """
+        Args:
+            interval: 采样间隔（秒）
+            keep_worst: 记录最严重的几次阻塞
+            keep_samples: 保留全部样本（基准测试计算百分位用；常驻进程不要开启）
+            warn_ms: 阻塞超过该值（毫秒）时记录警告（默认读取 MINERU_LOOP_LAG_WARN_MS，再默认500）
+        """
+        self.interval = interval
+        self.keep_worst = keep_worst
+        self.samples: Optional[List[float]] = [] if keep_samples else None
+        self.warn_ms = warn_ms if warn_ms is not None else float(os.environ.get('MINERU_LOOP_LAG_WARN_MS', 500))
+        self.worst: List[Tuple[float, float]] = []  # 最小堆：(延迟毫秒, 发生时间)
+        self.count = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """在当前事件循环中启动"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def __aenter__(self) -> 'LoopLagMonitor':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record((loop.time() - start - self.interval) * 1000)
+
+    def record(self, lag_ms: float):
+        """记录一个样本（毫秒）"""
+        lag_ms = max(lag_ms, 0.0)
+        self.count += 1
+        LOOP_LAG.observe(lag_ms / 1000)
+        if self.samples is not None:
+            self.samples.append(lag_ms)
+        if len(self.worst) < self.keep_worst:
+            heapq.heappush(self.worst, (lag_ms, time.time()))
+        elif lag_ms > self.worst[0][0]:
+            heapq.heapreplace(self.worst, (lag_ms, time.time()))
+        if lag_ms >= self.warn_ms:
+            logger.warning("🐢 事件循环被阻塞 %.0fms", lag_ms)
+
+    def report(self) -> Dict:
+        """最严重的几次阻塞（从大到小）"""
+        worst = sorted(self.worst, reverse=True)
+        return {
+            'samples': self.count,
+            'max_ms': round(worst[0][0], 1) if worst else 0.0,
+            'worst': [{'lag_ms': round(lag, 1),
+                       'at': time.strftime('%H:%M:%S', time.localtime(at))} for lag, at in worst]
+        }
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+MinerU 处理耗时历史和预测
+- 每个完成的任务记录一条：格式、模型、公式/表格开关、页数、大小 → 服务端耗时（提交到完成，含排队）
+- 历史文件默认 ~/.cache/mineru/history.bin（MINERU_HISTORY 修改，设为 off 只在内存中记录）：
+  定长二进制记录（每条24字节），只追加（O_APPEND，多个进程可同时写入）；
+  加载时只读最近 max_records 条，忽略写到一半的末尾记录；文件超过 2×max_records 条时重写为最近的部分
+- 预测：按（格式, 模型）分组的线性回归 耗时 = c0 + c1×页数 + c2×MB + c3×页数×公式 + c4×页数×表格
+  （岭回归，累加最小二乘的正规方程，新记录不需要重新拟合）；样本不足 min_samples 的分组依次退回
+  同一模型、全部记录
+- 用于调度策略（按预测耗时排序）、Rich 界面的预计处理时间和 MCP 的任务状态
+
+用法: python3 src/mineru_history.py [--file history.bin] [--holdout 0.2]   # 历史统计和预测误差
+"""
+import argparse
+import logging
+import os
+import statistics
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mineru_scheduling import BYTES_PER_PAGE_TRANSFER, estimate_pages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_FILE = Path.home() / '.cache' / 'mineru' / 'history.bin'
+
+# 记录中按编号保存（未知为0，新增时只能追加到末尾）
+FORMATS = ('', 'pdf', 'doc', 'docx', 'ppt', 'pptx', 'png', 'jpg', 'jpeg', 'html')
+MODELS = ('', 'pipeline', 'vlm', 'MinerU-HTML')
+
+FORMULA = 1
+TABLE = 2
+URL = 4
+
+DEFAULT_SECONDS_PER_PAGE = 1.0   # 还没有任何历史时的每页耗时（秒）
+
+
+@dataclass
+class Run:
+    """一次处理（预测时只用到特征字段）"""
+    format: str = ''
+    model: str = ''
+    formula: bool = True
+    table: bool = True
+    is_url: bool = False
+    pages: int = 0          # 0 为未知（按大小和格式估算）
+    size: int = 0           # 字节（URL 未知时为0）
+    queue: float = 0.0      # 服务端排队秒数
+    seconds: float = 0.0    # 服务端耗时（提交到完成，含排队）
+    timestamp: int = 0
+
+    @classmethod
+    def features(cls, file_info: Dict, options: Optional[Dict] = None) -> 'Run':
+        """按验证得到的文件信息和处理选项（默认与处理器一致：vlm、开启公式和表格）"""
+        options = options or {}
+        format = (file_info.get('format') or '').lower()
+        model = 'MinerU-HTML' if format == 'html' else options.get('model_version', 'vlm')
+        return cls(format=format if format in FORMATS else '', model=model if model in MODELS else '',
+                   formula=bool(options.get('enable_formula', True)), table=bool(options.get('enable_table', True)),
+                   is_url=bool(file_info.get('is_url')), pages=int(file_info.get('pages') or 0),
+                   size=int(file_info.get('size') or 0))
+
+    def x(self) -> Tuple[float, ...]:
+        """回归特征 (1, 页数, MB, 开启公式的页数, 开启表格的页数)"""
+        pages = float(self.pages or estimate_pages({'format': self.format, 'size': self.size,
+                                                    'is_url': self.is_url}))
+        return 1.0, pages, self.size / 1_000_000, pages * self.formula, pages * self.table
+
+    def groups(self) -> List[Tuple]:
+        """从细到粗的分组（预测时取第一个样本足够的）"""
+        return [('format', self.format, self.model), ('model', self.model), ('all',)]
+
+
+class HistoryStore:
+    """处理历史（定长二进制记录，只追加）"""
+
+    MAGIC = b'MNRH'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHH')       # magic, 版本, 记录长度
+    RECORD = struct.Struct('<IBBBxIIff')  # 时间, 格式, 模型, 标志位, 页数, 大小, 排队秒数, 耗时秒数
+
+    def __init__(self, history_file: Optional[str] = None, max_records: int = 10000):
+        """
+        Args:
+            history_file: 历史文件（None 为只在内存中记录）
+            max_records: 加载和保留的最近记录数
+        """
+        self.history_file = Path(history_file).expanduser() if history_file else None
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.on_disk = 0          # 文件中的完整记录数
+        self.repair = False       # 文件头无效或末尾有不完整记录，下次写入前修复
+        self.runs: List[Run] = self._load()
+
+    @classmethod
+    def from_env(cls) -> 'HistoryStore':
+        """按 MINERU_HISTORY 创建（off/0 为只在内存中记录）"""
+        value = os.environ.get('MINERU_HISTORY', str(DEFAULT_HISTORY_FILE))
+        return cls(None if value.lower() in ('', '0', 'off', 'false') else value)
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    @classmethod
+    def pack(cls, run: Run) -> bytes:
+        flags = (FORMULA if run.formula else 0) | (TABLE if run.table else 0) | (URL if run.is_url else 0)
+        return cls.RECORD.pack(run.timestamp, FORMATS.index(run.format), MODELS.index(run.model), flags,
+                               min(run.pages, 0xFFFFFFFF), min(run.size, 0xFFFFFFFF), run.queue, run.seconds)
+
+    @classmethod
+    def unpack(cls, values: Tuple) -> Run:
+        timestamp, format, model, flags, pages, size, queue, seconds = values
+        return Run(format=FORMATS[format] if format < len(FORMATS) else '',
+                   model=MODELS[model] if model < len(MODELS) else '',
+                   formula=bool(flags & FORMULA), table=bool(flags & TABLE), is_url=bool(flags & URL),
+                   pages=pages, size=size, queue=queue, seconds=seconds, timestamp=timestamp)
+
+    def _header(self) -> bytes:
+        return self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size)
+
+    def _load(self) -> List[Run]:
+        if self.history_file is None:
+            return []
+        try:
+            with open(self.history_file, 'rb') as f:
+                total = os.fstat(f.fileno()).st_size
+                if f.read(self.HEADER.size) != self._header():
+                    self.repair = total > 0  # 其他版本的文件：重新开始
+                    return []
+                count = (total - self.HEADER.size) // self.RECORD.size
+                self.on_disk = count
+                self.repair = self.HEADER.size + count * self.RECORD.size != total
+                skip = max(0, count - self.max_records)
+                f.seek(self.HEADER.size + skip * self.RECORD.size)
+                data = f.read((count - skip) * self.RECORD.size)
+        except FileNotFoundError:
+            return []
+        return [self.unpack(values) for values in self.RECORD.iter_unpack(data)]
+
+    def append(self, run: Run):
+        """追加一条记录（写入失败时只在内存中保留）"""
+        if not run.timestamp:
+            run.timestamp = int(time.time())
+        with self.lock:
+            self.runs.append(run)
+            if len(self.runs) > self.max_records:
+                del self.runs[:len(self.runs) - self.max_records]
+            if self.history_file is None:
+                return
+            try:
+                if self.repair or self.on_disk >= 2 * self.max_records:
+                    self._rewrite()
+                else:
+                    self._write(self.pack(run))
+            except OSError as e:
+                logger.warning("⚠️  处理历史写入失败: %s", e)
+
+    def _write(self, data: bytes):
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                data = self._header() + data
+            os.write(fd, data)  # 一次写入一条完整记录
+        finally:
+            os.close(fd)
+        self.on_disk += 1
+
+    def _rewrite(self):
+        """只保留内存中的最近记录，原子替换（去掉不完整的末尾记录，文件不会无限增长）"""
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.history_file.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(self._header() + b''.join(self.pack(run) for run in self.runs))
+        os.replace(tmp, self.history_file)
+        self.on_disk = len(self.runs)
+        self.repair = False
+
+
+class LeastSquares:
+    """y = c·x 的岭回归（累加正规方程 XᵀX、Xᵀy）"""
+
+    def __init__(self, dims: int = 5):
+        self.n = 0
+        self.xtx = [[0.0] * dims for _ in range(dims)]
+        self.xty = [0.0] * dims
+        self.total = 0.0
+        self.coefficients: Optional[List[float]] = None
+
+    def add(self, x: Tuple[float, ...], y: float):
+        self.n += 1
+        self.total += y
+        for i, xi in enumerate(x):
+            self.xty[i] += xi * y
+            for j, xj in enumerate(x):
+                self.xtx[i][j] += xi * xj
+        self.coefficients = None
+
+    def solve(self, ridge: float) -> List[float]:
+        """高斯消元（部分主元）；ridge 只加在斜率上，样本特征相同时退化为均值"""
+        if self.coefficients is None:
+            dims = len(self.xty)
+            a = [row[:] + [self.xty[i]] for i, row in enumerate(self.xtx)]
+            for i in range(1, dims):
+                a[i][i] += ridge
+            for col in range(dims):
+                pivot = max(range(col, dims), key=lambda r: abs(a[r][col]))
+                a[col], a[pivot] = a[pivot], a[col]
+                if abs(a[col][col]) < 1e-12:
+                    continue
+                for r in range(dims):
+                    if r != col:
+                        factor = a[r][col] / a[col][col]
+                        for c in range(col, dims + 1):
+                            a[r][c] -= factor * a[col][c]
+            self.coefficients = [a[i][dims] / a[i][i] if abs(a[i][i]) >= 1e-12 else 0.0 for i in range(dims)]
+        return self.coefficients
+
+    def predict(self, x: Tuple[float, ...], ridge: float) -> float:
+        return max(0.0, sum(c * xi for c, xi in zip(self.solve(ridge), x)))
+
+
+@dataclass
+class JobEstimate:
+    """进行中的任务（预计剩余时间）"""
+    name: str
+    run: Optional[Run] = None           # 特征（未跟踪提交的任务为 None，不记录历史）
+    predicted: Optional[float] = None   # 提交时预测的服务端耗时
+    submitted: float = field(default_factory=time.time)
+    state: str = 'pending'
+    running_since: Optional[float] = None
+    extracted: int = 0
+    total: int = 0
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """预计剩余秒数：开始出页后按已处理页数的速度修正预测（进度越多越相信实际速度）"""
+        now = now or time.time()
+        remaining = None if self.predicted is None else max(0.0, self.predicted - (now - self.submitted))
+        if self.running_since is None or not self.extracted or not self.total:
+            return remaining
+        done = min(self.extracted / self.total, 1.0)
+        observed = (now - self.running_since) / self.extracted * (self.total - self.extracted)
+        return observed if remaining is None else done * observed + (1 - done) * remaining
+
+    def status(self, job_id: str) -> Dict:
+        now = time.time()
+        eta = self.eta(now)
+        return {
+            'job_id': job_id,
+            'name': self.name,
+            'state': self.state,
+            'elapsed': round(now - self.submitted, 1),
+            'predicted': round(self.predicted, 1) if self.predicted is not None else None,
+            'eta': round(eta, 1) if eta is not None else None,
+            'pages': f"{self.extracted}/{self.total}" if self.total else None
+        }
+
+
+class Predictor:
+    """按处理历史预测服务端耗时"""
+
+    _shared: Dict[str, 'Predictor'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, store: Optional[HistoryStore] = None, min_samples: int = 5, ridge: float = 1.0):
+        """
+        Args:
+            store: 处理历史（None 为只在内存中记录）
+            min_samples: 分组至少有这么多条记录才使用该分组的模型
+            ridge: 岭回归系数（只作用于斜率）
+        """
+        self.store = store if store is not None else HistoryStore()
+        self.min_samples = min_samples
+        self.ridge = ridge
+        self.models: Dict[Tuple, LeastSquares] = {}
+        for run in self.store.runs:
+            self._add(run)
+
+    @classmethod
+    def shared(cls) -> 'Predictor':
+        """按 MINERU_HISTORY 创建，同一历史文件在进程内共用（只在内存中记录时每次新建）"""
+        store = HistoryStore.from_env()
+        if store.history_file is None:
+            return cls(store)
+        key = str(store.history_file.resolve())
+        with cls._shared_lock:
+            predictor = cls._shared.get(key)
+            if predictor is None:
+                predictor = cls._shared[key] = cls(store)
+            return predictor
+
+    def _add(self, run: Run):
+        x = run.x()
+        for key in run.groups():
+            self.models.setdefault(key, LeastSquares()).add(x, run.seconds)
+
+    def record(self, run: Run):
+        """记录一次完成的处理（写入历史并更新模型）"""
+        self.store.append(run)
+        self._add(run)
+
+    @property
+    def samples(self) -> int:
+        model = self.models.get(('all',))
+        return model.n if model else 0
+
+    def ready(self) -> bool:
+        return self.samples >= self.min_samples
+
+    def predict_run(self, run: Run) -> Optional[float]:
+        """预测服务端耗时（秒），历史不足时为 None"""
+        for key in run.groups():
+            model = self.models.get(key)
+            if model is not None and model.n >= self.min_samples:
+                return model.predict(run.x(), self.ridge)
+        return None
+
+    def predict(self, file_info: Dict, options: Optional[Dict] = None) -> Optional[float]:
+        return self.predict_run(Run.features(file_info, options))
+
+    def seconds_per_page(self) -> float:
+        """
+        每页耗时（秒）：历史足够时取全部记录拟合的每页耗时（开启公式和表格），
+        不足时取已有记录的总耗时 / 总页数，没有记录时为 DEFAULT_SECONDS_PER_PAGE
+        """
+        model = self.models.get(('all',))
+        if model is None or not model.n:
+            return DEFAULT_SECONDS_PER_PAGE
+        if self.ready():
+            c = model.solve(self.ridge)
+            if c[1] + c[3] + c[4] > 0:
+                return c[1] + c[3] + c[4]
+        pages = model.xtx[0][1]    # x[0] = 1, x[1] = 页数
+        return model.total / pages if pages > 0 else DEFAULT_SECONDS_PER_PAGE
+
+    def cost(self, file_info: Dict, options: Optional[Dict] = None) -> Optional[float]:
+        """调度用的任务大小（秒）：预测的服务端耗时 + 本地文件上传字节数折算（与 job_cost 一致）"""
+        predicted = self.predict(file_info, options)
+        if predicted is None:
+            return None
+        transfer = 0 if file_info.get('is_url') else file_info.get('size') or 0
+        return predicted + transfer / BYTES_PER_PAGE_TRANSFER * self.seconds_per_page()
+
+    def evaluate(self, holdout: float = 0.2) -> Dict:
+        """按时间顺序用前面的记录拟合、预测最后 holdout 比例的记录，与两个简单基线比较"""
+        runs = self.store.runs
+        split = int(len(runs) * (1 - holdout))
+        train, test = runs[:split], runs[split:]
+        report = {'samples': len(runs), 'train': len(train), 'test': len(test)}
+        if not train or not test:
+            return report
+
+        model = Predictor(HistoryStore(max_records=len(train)), self.min_samples, self.ridge)
+        for run in train:
+            model._add(run)
+        mean = statistics.mean(run.seconds for run in train)
+        per_page = sum(run.seconds for run in train) / max(sum(run.x()[1] for run in train), 1.0)
+        report['model'] = prediction_error([model.predict_run(run) for run in test], test)
+        report['baseline_mean'] = prediction_error([mean] * len(test), test)
+        report['baseline_pages'] = prediction_error([per_page * run.x()[1] for run in test], test)
+        return report
+
+
+def prediction_error(predictions: Iterable[Optional[float]], runs: List[Run]) -> Dict:
+    """平均绝对误差（秒）、平均和中位绝对百分比误差（没有预测的按0秒计）"""
+    pairs = [(p or 0.0, run.seconds) for p, run in zip(predictions, runs)]
+    pct = [abs(p - y) / y for p, y in pairs if y > 0]
+    return {
+        'mae': round(statistics.mean(abs(p - y) for p, y in pairs), 3),
+        'mape': round(statistics.mean(pct), 3) if pct else None,
+        'median_ape': round(statistics.median(pct), 3) if pct else None
+    }
+
+
+# 使用示例
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='处理耗时历史统计和预测误差')
+    parser.add_argument('--file', default=None, help='历史文件（默认读取 MINERU_HISTORY）')
+    parser.add_argument('--holdout', type=float, default=0.2, help='用于评估的最近记录比例')
+    args = parser.parse_args()
+
+    store = HistoryStore(args.file) if args.file else HistoryStore.from_env()
+    predictor = Predictor(store)
+    print(f"📚 历史记录: {len(store)} 条 ({store.history_file or '内存'})")
+    for key, model in sorted(predictor.models.items(), key=lambda item: -item[1].n):
+        if key[0] == 'format':
+            c0, c1, c2, c3, c4 = model.solve(predictor.ridge)
+            print(f"  {key[1] or '-':<6} {key[2] or '-':<12} {model.n:>6} 条  平均 {model.total / model.n:6.1f}s  "
+                  f"= {c0:.2f} + {c1:.3f}×页 + {c2:.3f}×MB + {c3:.3f}×公式页 + {c4:.3f}×表格页")
+    report = predictor.evaluate(args.holdout)
+    if 'model' in report:
+        print(f"🎯 预测误差（最近 {report['test']} 条，用之前的 {report['train']} 条拟合）:")
+        for name, label in (('model', '分组回归'), ('baseline_mean', '基线: 平均耗时'),
+                            ('baseline_pages', '基线: 按页数')):
+            e = report[name]
+            print(f"  {label:<12} MAE {e['mae']:.2f}s  MAPE {e['mape']:.1%}  中位 {e['median_ape']:.1%}")
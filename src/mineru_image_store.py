@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+MinerU 内容寻址图片存储（可选）
+- 图片按 SHA-256 存放在 <store>/objects/ab/cdef...，跨文档去重
+- 文档图片目录中的文件硬链接到存储（跨设备时退化为符号链接）
+- 每个图片目录写入 .image_manifest.json：原文件名 → 哈希
+- 支持统计节省空间、回收无引用的图片（gc）
+"""
+import json
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+MANIFEST_NAME = '.image_manifest.json'
+
+
+class ImageStore:
+    """内容寻址图片存储"""
+
+    ENV_VAR = 'MINERU_IMAGE_STORE'
+
+    def __init__(self, root: str):
+        self.root = Path(root).expanduser()
+        self.objects_dir = self.root / 'objects'
+        self.registry_file = self.root / 'manifests.txt'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._registered: Optional[Set[str]] = None  # 已登记的目录（首次登记时从文件加载一次）
+        self._registry_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['ImageStore']:
+        """根据环境变量 MINERU_IMAGE_STORE 创建（未设置时返回None）"""
+        root = os.environ.get(cls.ENV_VAR)
+        return cls(root) if root else None
+
+    # ==================== 基础操作 ====================
+
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        """计算文件SHA-256（分块读取）"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def blob_path(self, digest: str) -> Path:
+        """哈希对应的存储路径"""
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def put(self, path: Path) -> Tuple[str, bool]:
+        """把文件放入存储，返回 (哈希, 是否新增)；已存在则不重复存储"""
+        digest = self.file_hash(path)
+        blob = self.blob_path(digest)
+
+        if blob.exists():
+            return digest, False
+
+        blob.parent.mkdir(exist_ok=True)
+        tmp = blob.with_name(f'{blob.name}.{os.getpid()}.{threading.get_ident()}.tmp')  # 多线程同时导入同一图片
+        try:
+            os.link(path, tmp)
+        except OSError:
+            shutil.copyfile(path, tmp)
+        os.replace(tmp, blob)
+
+        return digest, True
+
+    def link(self, digest: str, target: Path) -> str:
+        """在目标位置创建指向存储的链接，返回链接方式"""
+        blob = self.blob_path(digest)
+        tmp = target.with_name(f".{target.name}.tmp")
+        if tmp.exists() or tmp.is_symlink():
+            tmp.unlink()
+
+        try:
+            os.link(blob, tmp)
+            mode = 'hardlink'
+        except OSError:
+            os.symlink(blob.resolve(), tmp)
+            mode = 'symlink'
+
+        os.replace(tmp, target)
+        return mode
+
+    # ==================== 文档图片目录 ====================
+
+    def ingest_dir(self, source_dir: str, dest_dir: Optional[str] = None) -> Dict:
+        """
+        导入图片目录
+
+        Args:
+            source_dir: 图片来源目录
+            dest_dir: 文档图片目录（默认原地替换 source_dir 中的文件）
+
+        Returns:
+            统计信息
+        """
+        source = Path(source_dir)
+        dest = Path(dest_dir) if dest_dir else source
+        dest.mkdir(parents=True, exist_ok=True)
+
+        manifest = {}
+        stats = {'files': 0, 'new_blobs': 0, 'deduplicated': 0, 'bytes_saved': 0}
+
+        for img in sorted(source.iterdir()):
+            if not img.is_file() or img.name.startswith('.'):
+                continue
+
+            size = img.stat().st_size
+            digest, is_new = self.put(img)
+            self.link(digest, dest / img.name)
+
+            manifest[img.name] = {'sha256': digest, 'size': size}
+            stats['files'] += 1
+            if is_new:
+                stats['new_blobs'] += 1
+            else:
+                stats['deduplicated'] += 1
+                stats['bytes_saved'] += size
+
+        with open(dest / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'images': manifest}, f, indent=2, ensure_ascii=False)
+
+        self._register(dest)
+        return stats
+
+    def _register(self, images_dir: Path):
+        """登记图片目录（gc时据此判断引用）；已登记的目录保存在内存中，不必每次重读登记文件"""
+        path = str(images_dir.resolve())
+        with self._registry_lock:
+            if self._registered is None:
+                self._registered = self._registered_dirs()
+            if path in self._registered:
+                return
+            with open(self.registry_file, 'a', encoding='utf-8') as f:
+                f.write(path + '\n')
+            self._registered.add(path)
+
+    def _registered_dirs(self) -> Set[str]:
+        """所有登记过的图片目录"""
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                return {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    @staticmethod
+    def load_manifest(images_dir: Path) -> Dict:
+        """读取图片目录的清单"""
+        try:
+            with open(Path(images_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f).get('images', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _live_references(self, prune: bool = False) -> Dict[str, int]:
+        """统计仍被引用的哈希：哈希 → 引用次数（prune 时从登记文件中清理已删除的目录）"""
+        live = {}
+        alive_dirs = []
+
+        for images_dir in sorted(self._registered_dirs()):
+            path = Path(images_dir)
+            if not path.is_dir():
+                continue
+            alive_dirs.append(images_dir)
+
+            for name, entry in self.load_manifest(path).items():
+                # 文件已被删除的条目不算引用
+                if (path / name).exists():
+                    live[entry['sha256']] = live.get(entry['sha256'], 0) + 1
+
+        if prune:
+            with self._registry_lock:
+                tmp = self.registry_file.with_suffix('.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.writelines(d + '\n' for d in alive_dirs)
+                os.replace(tmp, self.registry_file)
+                self._registered = set(alive_dirs)
+
+        return live
+
+    def _iter_blobs(self):
+        """遍历存储中的所有图片"""
+        for prefix in self.objects_dir.iterdir():
+            if not prefix.is_dir():
+                continue
+            for blob in prefix.iterdir():
+                if not blob.name.endswith('.tmp'):
+                    yield prefix.name + blob.name, blob
+
+    # ==================== 统计与回收 ====================
+
+    def stats(self) -> Dict:
+        """存储统计：逻辑大小、实际大小、节省空间（只读，不修改登记文件）"""
+        live = self._live_references()
+
+        blobs = 0
+        stored_bytes = 0
+        logical_bytes = 0
+        for digest, blob in self._iter_blobs():
+            size = blob.stat().st_size
+            blobs += 1
+            stored_bytes += size
+            logical_bytes += size * live.get(digest, 0)
+
+        return {
+            'blobs': blobs,
+            'references': sum(live.values()),
+            'stored_bytes': stored_bytes,
+            'logical_bytes': logical_bytes,
+            'bytes_saved': max(logical_bytes - stored_bytes, 0)
+        }
+
+    def gc(self, dry_run: bool = False) -> Dict:
+        """回收没有任何图片目录引用的图片（dry_run 时不修改任何文件）"""
+        live = self._live_references(prune=not dry_run)
+
+        removed = 0
+        freed_bytes = 0
+        for digest, blob in list(self._iter_blobs()):
+            if digest in live:
+                continue
+            freed_bytes += blob.stat().st_size
+            removed += 1
+            if not dry_run:
+                blob.unlink()
+
+        return {'removed': removed, 'freed_bytes': freed_bytes, 'dry_run': dry_run}
+
+
+# 使用示例
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 3:
+        print("用法:")
+        print("  导入: python3 mineru_image_store.py <store_dir> ingest <images_dir> [...]")
+        print("  统计: python3 mineru_image_store.py <store_dir> stats")
+        print("  回收: python3 mineru_image_store.py <store_dir> gc [--dry-run]")
+        sys.exit(1)
+
+    store = ImageStore(sys.argv[1])
+    command = sys.argv[2]
+
+    if command == 'ingest':
+        for images_dir in sys.argv[3:]:
+            result = store.ingest_dir(images_dir)
+            print(f"✅ {images_dir}: {result['files']}张图片, 去重{result['deduplicated']}张, "
+                  f"节省 {result['bytes_saved'] / 1024 / 1024:.1f}MB")
+
+    elif command == 'stats':
+        result = store.stats()
+        print(f"📦 存储图片: {result['blobs']}个 ({result['stored_bytes'] / 1024 / 1024:.1f}MB)")
+        print(f"🔗 引用次数: {result['references']}")
+        print(f"💾 节省空间: {result['bytes_saved'] / 1024 / 1024:.1f}MB")
+
+    elif command == 'gc':
+        result = store.gc(dry_run='--dry-run' in sys.argv)
+        action = "可回收" if result['dry_run'] else "已回收"
+        print(f"🗑️  {action}: {result['removed']}个 ({result['freed_bytes'] / 1024 / 1024:.1f}MB)")
+
+    else:
+        print(f"❌ 未知命令: {command}")
+        sys.exit(1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+MinerU 日志配置（非阻塞）
+- 记录方只把 LogRecord 放入内存队列，格式化和终端/文件写入都在后台线程完成
+- 按模块设置级别：MINERU_LOG_LEVEL="INFO,mineru_async=DEBUG,mineru_mcp_server=WARNING"
+- 安静模式：MINERU_QUIET=1 只输出警告和错误，INFO/DEBUG 调用在级别判断处直接返回，不做任何格式化
+- 日志文件：MINERU_LOG_FILE=/path/to/mineru.log
+
+热路径请使用惰性参数：logger.info("上传成功: %s", batch_id)，不要用 f-string
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+CONSOLE_FORMAT = '%(message)s'
+FILE_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+_listener: Optional[QueueListener] = None
+_handlers = []
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """进程内队列：不在调用方线程预先格式化，全部交给后台线程"""
+
+    def prepare(self, record):
+        return record
+
+
+def parse_levels(spec: str) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    解析级别配置
+
+    "INFO,mineru_async=DEBUG" → ('INFO', {'mineru_async': 'DEBUG'})
+    """
+    default = None
+    modules = {}
+    for part in spec.replace(' ', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            name, level = part.split('=', 1)
+            modules[name.strip()] = level.strip().upper()
+        else:
+            default = part.upper()
+    return default, modules
+
+
+def setup_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                  quiet: Optional[bool] = None, console: bool = True,
+                  console_format: str = CONSOLE_FORMAT, file_format: str = FILE_FORMAT,
+                  blocking: bool = False) -> Optional[QueueListener]:
+    """
+    配置根日志（可重复调用，后一次覆盖前一次）
+
+    Args:
+        level: 级别配置，如 "INFO" 或 "INFO,mineru_async=DEBUG"（默认读取 MINERU_LOG_LEVEL，再默认 INFO）
+        log_file: 日志文件（默认读取 MINERU_LOG_FILE）
+        quiet: 安静模式，只输出 WARNING 及以上（默认读取 MINERU_QUIET）
+        console: 是否输出到 stderr（stdout 留给 MCP stdio 通道和命令行结果）
+        blocking: 直接在调用方写入（调试和基准对比用）
+
+    Returns:
+        后台监听线程（blocking 时为 None）
+    """
+    global _listener
+
+    default, modules = parse_levels(level or os.environ.get('MINERU_LOG_LEVEL', ''))
+    log_file = log_file or os.environ.get('MINERU_LOG_FILE')
+    if quiet is None:
+        quiet = os.environ.get('MINERU_QUIET', '').lower() in ('1', 'true', 'yes')
+    if quiet:
+        default = 'WARNING'
+        modules = {name: lvl for name, lvl in modules.items()
+                   if logging.getLevelName(lvl) >= logging.WARNING}
+
+    shutdown()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(logging.Formatter(console_format))
+        handlers.append(stream)
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(file_format))
+        handlers.append(file_handler)
+    _handlers.extend(handlers)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(default or 'INFO')
+    for name, module_level in modules.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    if blocking:
+        for handler in handlers:
+            root.addHandler(handler)
+        return None
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(_InProcessQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown():
+    """停止后台线程并写完队列中的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    while _handlers:
+        handler = _handlers.pop()
+        handler.close()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+MinerU 增量处理清单
+记录 (路径, 大小, mtime, 内容哈希, 处理选项) → 输出文件
+- 大小和mtime未变：直接跳过，不读文件内容
+- mtime变了但大小相同：计算哈希确认，内容未变同样跳过
+- 源文件已删除：可选删除对应输出
+- URL：按验证时得到的 ETag / Last-Modified 判断（配合条件请求，未变的URL不下载任何内容）
+- 线程安全：扫描线程检查/清理、事件循环记录/保存可以同时进行（计算哈希和删除输出不持有锁）
+"""
+import json
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple, Iterable, Union
+
+PathLike = Union[str, os.DirEntry]
+
+
+def is_url(item: PathLike) -> bool:
+    return isinstance(item, str) and item.startswith(('http://', 'https://'))
+
+
+def file_sha256(path: str) -> str:
+    """计算文件SHA-256（分块读取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChangeManifest:
+    """增量处理清单"""
+
+    FILE_NAME = '.mineru_manifest.json'
+    VERSION = 1
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = Path(manifest_file)
+        self.entries = self._load()
+        self.dirty = False
+        self._lock = threading.Lock()  # 保护 entries、dirty 和 _seen
+        self._seen: Optional[Set[str]] = None  # 本次扫描中见到的已记录文件（见 begin_scan）
+
+    @classmethod
+    def for_directory(cls, directory: str) -> 'ChangeManifest':
+        """目录默认清单：<directory>/.mineru_manifest.json"""
+        return cls(str(Path(directory).expanduser() / cls.FILE_NAME))
+
+    def _load(self) -> Dict:
+        """加载清单"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data.get('files', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {}
+
+    def save(self):
+        """原子写入清单"""
+        with self._lock:
+            if not self.dirty:
+                return
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.manifest_file.with_name(self.manifest_file.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'files': self.entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.manifest_file)
+            self.dirty = False
+
+    @staticmethod
+    def options_key(options: Optional[Dict]) -> str:
+        """处理选项指纹（选项变化视为需要重新处理）"""
+        payload = json.dumps(options or {}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _path_and_stat(item: PathLike) -> Tuple[str, os.stat_result]:
+        """路径和stat（DirEntry 复用扫描时的结果）"""
+        if isinstance(item, os.DirEntry):
+            return os.path.abspath(item.path), item.stat()
+        path = os.path.abspath(os.path.expanduser(item))
+        return path, os.stat(path)
+
+    # ==================== 变化检测 ====================
+
+    def _reusable(self, entry: Optional[Dict], options: Optional[Dict]) -> bool:
+        """记录存在、处理选项相同且输出仍在"""
+        if not entry or entry['options'] != self.options_key(options):
+            return False
+        markdown = entry.get('outputs', {}).get('markdown')
+        return not (markdown and not os.path.exists(markdown))
+
+    def is_unchanged(self, item: PathLike, options: Optional[Dict] = None) -> bool:
+        """判断文件自上次成功处理后是否未变（URL 需要先验证，见 is_unchanged_url，这里总是返回 False）"""
+        if is_url(item):
+            return False
+        path, st = self._path_and_stat(item)
+        with self._lock:
+            entry = self.entries.get(path)
+            if not self._reusable(entry, options) or entry['size'] != st.st_size:
+                return False
+            if entry['mtime_ns'] == st.st_mtime_ns:
+                return True
+
+        # mtime变了（如重新复制），用内容哈希确认
+        if file_sha256(path) != entry['sha256']:
+            return False
+        with self._lock:
+            if self.entries.get(path) is entry:  # 期间没有被重新记录或清理
+                entry['mtime_ns'] = st.st_mtime_ns
+                self.dirty = True
+        return True
+
+    def is_unchanged_url(self, url: str, options: Optional[Dict], file_info: Dict) -> bool:
+        """
+        判断URL自上次成功处理后是否未变
+
+        file_info 为 FileValidator.validate_url 的结果；服务端没有返回 ETag / Last-Modified 时无法判断，视为已变
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+            if not self._reusable(entry, options):
+                return False
+            if file_info.get('etag'):
+                return entry.get('etag') == file_info['etag']
+            if file_info.get('last_modified'):
+                return entry.get('last_modified') == file_info['last_modified'] and entry['size'] == file_info['size']
+            return False
+
+    def plan(self, items: Iterable[PathLike], options: Optional[Dict] = None) -> Tuple[List[str], List[str]]:
+        """
+        划分待处理和可跳过的文件
+
+        Returns:
+            (changed, unchanged)：新增/修改的文件，未变的文件
+        """
+        changed = []
+        unchanged = []
+        for item in items:
+            path = item.path if isinstance(item, os.DirEntry) else item
+            try:
+                if self.is_unchanged(item, options):
+                    unchanged.append(path)
+                else:
+                    changed.append(path)
+            except FileNotFoundError:
+                continue
+        return changed, unchanged
+
+    # ==================== 更新 ====================
+
+    def record(self, item: PathLike, options: Optional[Dict], outputs: Dict):
+        """记录一次成功处理（本地文件）"""
+        path, st = self._path_and_stat(item)
+        entry = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': file_sha256(path),
+            'options': self.options_key(options),
+            'outputs': outputs
+        }
+        with self._lock:
+            self.entries[path] = entry
+            self.dirty = True
+
+    def record_url(self, url: str, options: Optional[Dict], file_info: Dict, outputs: Dict):
+        """记录一次成功处理（URL）"""
+        entry = {
+            'size': file_info.get('size'),
+            'etag': file_info.get('etag'),
+            'last_modified': file_info.get('last_modified'),
+            'options': self.options_key(options),
+            'outputs': outputs
+        }
+        with self._lock:
+            self.entries[url] = entry
+            self.dirty = True
+
+    @staticmethod
+    def _abspath(item: PathLike) -> str:
+        return os.path.abspath(item.path if isinstance(item, os.DirEntry) else os.path.expanduser(item))
+
+    def begin_scan(self):
+        """开始流式扫描：之后 mark_seen 的文件在 prune(None) 时保留"""
+        with self._lock:
+            self._seen = set()
+
+    def mark_seen(self, item: PathLike):
+        """扫描到一个文件（只记住清单中已有的，内存不随扫描的文件数增长）"""
+        path = self._abspath(item)
+        with self._lock:
+            if self._seen is not None and path in self.entries:
+                self._seen.add(path)
+
+    def prune(self, existing: Optional[Iterable[PathLike]] = None, root: Optional[str] = None,
+              remove_outputs: bool = False) -> List[str]:
+        """
+        清理已删除源文件的记录
+
+        Args:
+            existing: 本次扫描到的所有源文件（None 时使用 begin_scan 之后 mark_seen 的文件，并结束本次扫描）
+            root: 只清理该目录下的记录（默认全部）
+            remove_outputs: 同时删除对应的输出文件
+
+        Returns:
+            被清理的源文件路径
+        """
+        if existing is None:
+            with self._lock:
+                seen, self._seen = self._seen or set(), None
+        else:
+            seen = {self._abspath(item) for item in existing}
+        prefix = os.path.join(os.path.abspath(os.path.expanduser(root)), '') if root else None
+
+        removed = {}
+        with self._lock:
+            for path in list(self.entries):
+                if is_url(path) or path in seen or os.path.exists(path):
+                    continue
+                if prefix and not path.startswith(prefix):
+                    continue
+                removed[path] = self.entries.pop(path)
+            if removed:
+                self.dirty = True
+
+        if remove_outputs:
+            for entry in removed.values():
+                self._remove_outputs(entry.get('outputs', {}))
+        return list(removed)
+
+    @staticmethod
+    def _remove_outputs(outputs: Dict):
+        """删除输出文件/目录"""
+        for output in outputs.values():
+            if not isinstance(output, str) or not output:
+                continue
+            path = Path(output)
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.exists():
+                path.unlink()
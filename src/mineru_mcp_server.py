@@ -5,20 +5,19 @@ MinerU MCP Server - 文档处理MCP服务器
 """
 import asyncio
 import json
+import os
 import sys
 import traceback
 from pathlib import Path
 from typing import Any, Sequence
 
-# 添加详细日志
+# 添加详细日志（后台线程写入 stderr 和日志文件，不阻塞事件循环；stdout 为 MCP stdio 通道）
 import logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler('/tmp/mineru_mcp_debug.log'),
-        logging.StreamHandler(sys.stderr)
-    ]
+sys.path.insert(0, str(Path(__file__).parent))
+from mineru_logging import setup_logging
+setup_logging(
+    log_file=os.environ.get('MINERU_LOG_FILE', '/tmp/mineru_mcp_debug.log'),
+    console_format='%(asctime)s [%(levelname)s] %(message)s'
 )
 logger = logging.getLogger(__name__)
 
@@ -46,6 +45,8 @@ logger.info(f"✅ 项目路径: {script_dir}")
 # 延迟导入mineru_async
 logger.info("步骤3: 准备延迟导入mineru_async...")
 processor = None
+renewer = None  # Token 后台续期（main 中启动）
+loop_monitor = None  # 事件循环延迟监控（main 中启动）
 
 # 创建MCP服务器
 logger.info("步骤4: 创建MCP服务器...")
@@ -136,7 +137,11 @@ async def list_tools() -> list[Tool]:
                     },
                     "file_pattern": {
                         "type": "string",
-                        "description": "文件过滤器（如 *.pdf）"
+                        "description": "文件过滤器（如 *.pdf，多个用逗号分隔：*.pdf,*.docx）"
+                    },
+                    "exclude": {
+                        "type": "string",
+                        "description": "排除的文件/目录模式，多个用逗号分隔（默认已排除隐藏目录和输出目录）"
                     },
                     "recursive": {
                         "type": "boolean",
@@ -144,7 +149,15 @@ async def list_tools() -> list[Tool]:
                     },
                     "max_workers": {
                         "type": "number",
-                        "description": "最大并行度（默认10）"
+                        "description": "最大并行度（默认3）"
+                    },
+                    "incremental": {
+                        "type": "boolean",
+                        "description": "增量处理：跳过上次处理后未变化的文件（默认false）"
+                    },
+                    "prune_deleted": {
+                        "type": "boolean",
+                        "description": "增量处理时删除已删除源文件的输出（默认false）"
                     }
                 },
                 "required": ["directory"]
@@ -158,7 +171,23 @@ async def list_tools() -> list[Tool]:
 功能：
 - 查看所有账户Token
 - 检查过期状态
-- 显示剩余天数""",
+- 显示剩余天数
+- 显示账户健康状态（熔断状态、健康分、最近错误）
+- 显示今日已提交页数和剩余额度""",
+            inputSchema={
+                "type": "object",
+                "properties": {}
+            }
+        ),
+        
+        Tool(
+            name="get_job_status",
+            description="""查询进行中的任务。
+            
+功能：
+- 列出服务端正在处理的任务（状态、已用时间、页数进度）
+- 按本地处理历史预测每个任务的服务端耗时和预计剩余时间
+- 显示预测模型的历史记录数和预测误差（最近20%的记录）""",
             inputSchema={
                 "type": "object",
                 "properties": {}
@@ -170,29 +199,46 @@ async def list_tools() -> list[Tool]:
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
     """处理工具调用"""
-    global processor
+    global processor, renewer
     
     logger.info(f"call_tool() 被调用: {name}")
     logger.info(f"参数: {arguments}")
     
     try:
         # Token 过期检查（处理文档前）
+        # 部分过期：继续处理（过期账户已被熔断，不参与调度），后台立即续期；
+        # 全部过期：先同步续期一次，仍无可用Token时才提示手动登录
         if name in ("process_document", "process_directory"):
             from datetime import datetime, timezone
             project_root = Path(__file__).parent.parent
             tokens_file = project_root / 'all_tokens.json'
+            
+            def expired_accounts(tokens):
+                now = datetime.now(timezone.utc)
+                return [e for e, i in tokens.items()
+                        if (datetime.fromisoformat(i['expired_at'].replace('Z', '+00:00')) - now).days <= 0]
+            
             try:
                 with open(tokens_file, 'r') as f:
                     tokens = json.load(f)
-                now = datetime.now(timezone.utc)
-                expired = [e for e, i in tokens.items()
-                          if (datetime.fromisoformat(i['expired_at'].replace('Z', '+00:00')) - now).days <= 0]
-                if expired:
+                expired = expired_accounts(tokens)
+                if expired and renewer is not None:
+                    if len(expired) < len(tokens):
+                        renewer.trigger()
+                    else:
+                        logger.info("所有Token已过期，尝试立即续期...")
+                        await renewer.run_once(force=True)
+                        with open(tokens_file, 'r') as f:
+                            tokens = json.load(f)
+                        expired = expired_accounts(tokens)
+                if expired and len(expired) == len(tokens):
                     return [TextContent(type="text", text=json.dumps({
                         "status": "token_expired",
                         "expired_count": len(expired),
                         "message": f"{len(expired)}个Token已过期，请先执行续期: .venv/bin/python3 src/batch_login.py",
                     }, ensure_ascii=False))]
+                if expired:
+                    logger.warning(f"{len(expired)}个Token已过期，跳过这些账户继续处理")
             except FileNotFoundError:
                 return [TextContent(type="text", text=json.dumps({
                     "status": "no_tokens",
@@ -280,24 +326,47 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageC
             
             logger.info(f"目录: {directory}, 模式: {pattern}")
             
-            # 扫描文件
+            # 扫描文件（边扫描边处理）
+            from mineru_scanner import scan_files
             dir_path = Path(directory).expanduser()
-            files = sorted([str(f) for f in dir_path.glob(pattern)])
+            files = scan_files(str(dir_path), pattern, arguments.get("exclude"),
+                               recursive=bool(arguments.get("recursive", False)))
             
-            if not files:
+            # 增量处理：跳过未变化的文件
+            manifest = None
+            if arguments.get("incremental"):
+                from mineru_manifest import ChangeManifest
+                manifest = ChangeManifest.for_directory(str(dir_path))
+            
+            max_workers = arguments.get("max_workers")
+            results, stats = await processor['batch'].process_stream(
+                files,
+                max_workers=int(max_workers) if max_workers else None,
+                manifest=manifest,
+                prune_root=str(dir_path) if manifest is not None and arguments.get("prune_deleted") else None
+            )
+            logger.info(f"扫描 {stats['scanned']} 个, 跳过 {stats['skipped']} 个, 清理 {len(stats['pruned'])} 个")
+            
+            if not results:
+                if stats['skipped']:
+                    return [TextContent(
+                        type="text",
+                        text=json.dumps({
+                            "status": "up_to_date",
+                            "skipped": stats['skipped'],
+                            "pruned": len(stats['pruned'])
+                        }, ensure_ascii=False)
+                    )]
                 return [TextContent(
                     type="text",
                     text=json.dumps({"status": "no_files", "message": f"未找到匹配的文件: {pattern}"})
                 )]
             
-            logger.info(f"找到 {len(files)} 个文件")
-            
-            # 批量异步并行处理
-            results = await processor['batch'].process_files_parallel(files)
-            
             # 汇总结果
             summary = {
                 "total_files": len(results),
+                "skipped": stats['skipped'],
+                "pruned": len(stats['pruned']),
                 "success": sum(1 for r in results if r.status == 'done'),
                 "failed": sum(1 for r in results if r.status == 'failed'),
                 "results": [
@@ -328,13 +397,25 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageC
             
             logger.info(f"读取到 {len(tokens)} 个账户")
             
+            # 本进程中处理器观察到的健康状态（与处理器共用同一账户池）
+            from mineru_accounts import AccountPool
+            health = {h['email']: h for h in AccountPool.shared(str(tokens_file), tokens).status()}
+            
             status = []
             for email, info in tokens.items():
+                h = health.get(email, {})
                 status.append({
                     "email": email,
                     "name": info['name'],
                     "token_name": info['token_name'],
-                    "expired_at": info['expired_at']
+                    "expired_at": info['expired_at'],
+                    "state": h.get('state'),
+                    "health": h.get('health'),
+                    "failures": h.get('failures'),
+                    "retry_in": h.get('retry_in'),
+                    "last_error": h.get('last_error'),
+                    "pages_today": h.get('pages_today'),
+                    "quota_remaining": h.get('quota_remaining')
                 })
             
             return [TextContent(
@@ -342,6 +423,23 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageC
                 text=json.dumps(status, indent=2, ensure_ascii=False)
             )]
         
+        elif name == "get_job_status":
+            logger.info("处理 get_job_status 工具调用")
+            # 两个处理器共用同一份处理历史（MINERU_HISTORY 为 off 时各自只在内存中记录）
+            jobs = processor['single'].client.jobs_status() + processor['batch'].client.jobs_status()
+            predictor = processor['single'].client.predictor
+            
+            return [TextContent(
+                type="text",
+                text=json.dumps({
+                    "jobs": jobs,
+                    "predictor": {
+                        "history_file": str(predictor.store.history_file) if predictor.store.history_file else None,
+                        **predictor.evaluate()
+                    }
+                }, indent=2, ensure_ascii=False)
+            )]
+        
         logger.warning(f"未知工具: {name}")
         return [TextContent(type="text", text=json.dumps({"error": "未知工具"}))]
     
@@ -357,6 +455,31 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent | ImageC
 async def main():
     """运行MCP服务器"""
     logger.info("步骤5: 启动MCP服务器...")
+    
+    # 指标导出（MINERU_METRICS_PORT / MINERU_METRICS_FILE），未设置时不开启
+    from mineru_metrics import REGISTRY
+    if REGISTRY.configure_from_env():
+        logger.info("✅ 指标导出已开启")
+    
+    # 链路追踪（MINERU_TRACE_FILE），未设置时不开启
+    from mineru_tracing import TRACER
+    if TRACER.configure_from_env():
+        logger.info("✅ 链路追踪已开启")
+    
+    # Token 后台续期（需要 batch_login.py 保存的 all_cookies.json；MINERU_TOKEN_RENEW=0 关闭）
+    global renewer
+    if os.environ.get('MINERU_TOKEN_RENEW', '1') != '0':
+        from mineru_renewer import TokenRenewer
+        renewer = TokenRenewer()
+        renewer.start()
+        logger.info("✅ Token 后台续期已开启")
+    
+    # 事件循环延迟监控：阻塞超过 MINERU_LOOP_LAG_WARN_MS（默认500ms）时记录警告
+    global loop_monitor
+    from mineru_executor import LoopLagMonitor
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start()
+    
     try:
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             logger.info("✅ stdio通道已建立")
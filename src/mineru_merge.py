@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+MinerU 分片结果合并引擎
+按页序流式合并：Markdown、图片、content_list、middle JSON
+- 图片统一重命名为 chunk_{i}_{name}，并同步改写 Markdown/JSON 中的引用
+- 每个分片的 page_idx 加上全局页码偏移（优先使用拆分计划中的起始页，失败的分片标记缺页而不是让后续页码前移）
+- 逐行/逐项写出，内存占用只与单个分片相关，与文档总大小无关
+"""
+import json
+import re
+import shutil
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Dict, Optional, Iterator, Sequence, Union
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Markdown / HTML 中的图片引用：![...](images/x.jpg)、<img src="images/x.jpg">
+IMAGE_REF_PATTERN = re.compile(r'(?<=[(\'"])images/([^)\'"\s]+)')
+
+# JSON 中保存图片路径的字段
+IMAGE_PATH_KEYS = ('img_path', 'image_path')
+
+
+def natural_sort_key(path) -> List:
+    """自然排序：chunk_2 排在 chunk_10 之前"""
+    return [int(part) if part.isdigit() else part
+            for part in re.split(r'(\d+)', str(path))]
+
+
+@dataclass
+class ChunkResult:
+    """拆分计划中的一个分片"""
+    index: int                        # 分片序号（1开始），合并后图片命名为 chunk_{index}_*
+    start_page: Optional[int] = None  # 全局起始页（0开始，来自拆分计划）；None 时接在上一个分片之后
+    chunk_dir: Optional[str] = None   # 结果解压目录；None 表示该分片处理失败
+    pages: Optional[int] = None       # 分片页数（未知时按结果统计，失败的分片按下一个分片的起始页推算）
+
+    @property
+    def failed(self) -> bool:
+        return self.chunk_dir is None
+
+
+ChunkLike = Union[str, Path, ChunkResult]
+
+
+class ChunkMerger:
+    """分片结果合并器"""
+
+    def __init__(self, images_prefix: str = 'images', image_store=None):
+        """
+        初始化
+
+        Args:
+            images_prefix: 合并后Markdown中引用图片使用的相对目录
+            image_store: 内容寻址图片存储 ImageStore（可选），启用时合并后的图片去重存放
+        """
+        self.images_prefix = images_prefix
+        self.image_store = image_store
+
+    # ==================== 路径改写 ====================
+
+    @staticmethod
+    def image_name(chunk_id: int, name: str) -> str:
+        """合并命名空间中的图片文件名"""
+        return f"chunk_{chunk_id}_{Path(name).name}"
+
+    def rewrite_markdown_line(self, line: str, chunk_id: int) -> str:
+        """改写一行Markdown中的图片引用"""
+        return IMAGE_REF_PATTERN.sub(
+            lambda m: f"{self.images_prefix}/{self.image_name(chunk_id, m.group(1))}",
+            line
+        )
+
+    def rewrite_image_path(self, path: str, chunk_id: int) -> str:
+        """改写JSON中的图片路径（middle JSON 中只有文件名，保持原样式）"""
+        name = self.image_name(chunk_id, path)
+        return f"{self.images_prefix}/{name}" if '/' in path else name
+
+    def rewrite_json(self, node, chunk_id: int, page_offset: int):
+        """改写JSON节点中的图片路径和页码（原地修改）"""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'page_idx' and isinstance(value, int):
+                    node[key] = value + page_offset
+                elif key in IMAGE_PATH_KEYS and isinstance(value, str) and value:
+                    node[key] = self.rewrite_image_path(value, chunk_id)
+                else:
+                    self.rewrite_json(value, chunk_id, page_offset)
+        elif isinstance(node, list):
+            for item in node:
+                self.rewrite_json(item, chunk_id, page_offset)
+        return node
+
+    # ==================== 分片文件定位 ====================
+
+    @staticmethod
+    def find_markdown(chunk_dir: str) -> Optional[Path]:
+        """查找分片Markdown（优先 full.md）"""
+        chunk_path = Path(chunk_dir)
+        for candidate in chunk_path.rglob("full.md"):
+            return candidate
+        for candidate in chunk_path.rglob("*.md"):
+            return candidate
+        return None
+
+    @staticmethod
+    def find_content_list(chunk_dir: str) -> Optional[Path]:
+        """查找分片 content_list.json"""
+        for candidate in Path(chunk_dir).rglob("*content_list.json"):
+            return candidate
+        return None
+
+    @staticmethod
+    def find_middle_json(chunk_dir: str) -> Optional[Path]:
+        """查找分片 middle JSON（layout.json 或 *_middle.json）"""
+        chunk_path = Path(chunk_dir)
+        for pattern in ("layout.json", "*_middle.json"):
+            for candidate in chunk_path.rglob(pattern):
+                return candidate
+        return None
+
+    @staticmethod
+    def iter_images(chunk_dir: str) -> Iterator[Path]:
+        """遍历分片中的所有图片"""
+        for path in sorted(Path(chunk_dir).rglob("*")):
+            if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES:
+                yield path
+
+    @staticmethod
+    def count_pages(chunk_dir: str) -> int:
+        """统计分片页数（middle JSON 优先，其次 content_list 最大 page_idx）"""
+        middle = ChunkMerger.find_middle_json(chunk_dir)
+        if middle:
+            with open(middle, 'r', encoding='utf-8') as f:
+                return len(json.load(f).get('pdf_info', []))
+
+        content_list = ChunkMerger.find_content_list(chunk_dir)
+        if content_list:
+            with open(content_list, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+            return max((item.get('page_idx', 0) for item in items), default=-1) + 1
+
+        return 0
+
+    def page_offsets(self, chunk_dirs: List[str]) -> List[int]:
+        """按分片顺序累计全局页码偏移（没有拆分计划时使用）"""
+        offsets = []
+        total = 0
+        for chunk_dir in chunk_dirs:
+            offsets.append(total)
+            total += self.count_pages(chunk_dir)
+        return offsets
+
+    @staticmethod
+    def numbered(chunks: Sequence[ChunkLike]) -> List[ChunkResult]:
+        """统一为按序号排列的 ChunkResult（分片目录按顺序编号）"""
+        return sorted((c if isinstance(c, ChunkResult) else ChunkResult(i, chunk_dir=str(c))
+                       for i, c in enumerate(chunks, 1)), key=lambda c: c.index)
+
+    def resolve(self, chunks: Sequence[ChunkLike], total_pages: Optional[int] = None) -> List[ChunkResult]:
+        """
+        确定每个分片的起始页和页数（只在后一个分片没有计划起始页时才统计结果页数）
+
+        Args:
+            chunks: ChunkResult（来自拆分计划）或分片目录（按顺序编号）
+            total_pages: 文档总页数（用于推算最后一个分片失败时缺失的页数）
+        """
+        chunks = self.numbered(chunks)
+        resolved = []
+        next_page = 0
+        for i, chunk in enumerate(chunks):
+            start = chunk.start_page if chunk.start_page is not None else next_page
+            pages = chunk.pages
+            if pages is None and not chunk.failed and i + 1 < len(chunks) and chunks[i + 1].start_page is None:
+                pages = self.count_pages(chunk.chunk_dir)
+            if pages is None:
+                # 失败的分片：页数到下一个已知起始页（或总页数）为止
+                following = next((c.start_page for c in chunks[i + 1:] if c.start_page is not None), total_pages)
+                pages = following - start if following is not None else None
+            resolved.append(replace(chunk, start_page=start, pages=pages))
+            next_page = start + (pages or 0)
+        return resolved
+
+    @staticmethod
+    def gap_note(chunk: ChunkResult) -> str:
+        """失败分片在合并Markdown中的占位说明"""
+        if chunk.pages:
+            return (f"<!-- MinerU: 分片 {chunk.index} 处理失败，"
+                    f"缺少第 {chunk.start_page + 1}-{chunk.start_page + chunk.pages} 页 -->\n")
+        return f"<!-- MinerU: 分片 {chunk.index} 处理失败，缺少第 {chunk.start_page + 1} 页起的内容 -->\n"
+
+    # ==================== 合并 ====================
+
+    def merge_markdown(self, chunks: Sequence[ChunkLike], output_file: str) -> int:
+        """流式合并Markdown（失败的分片写入占位说明），返回合并的分片数"""
+        merged = 0
+        written = False
+        chunks = self.numbered(chunks)
+        if any(chunk.failed for chunk in chunks):
+            chunks = self.resolve(chunks)
+        with open(output_file, 'w', encoding='utf-8') as out:
+            for chunk in chunks:
+                md_file = None if chunk.failed else self.find_markdown(chunk.chunk_dir)
+                if not md_file and not chunk.failed:
+                    continue
+
+                if written:
+                    out.write("\n")
+                written = True
+
+                if chunk.failed:
+                    out.write(self.gap_note(chunk))
+                    continue
+
+                last_line = "\n"
+                with open(md_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        last_line = self.rewrite_markdown_line(line, chunk.index)
+                        out.write(last_line)
+
+                if not last_line.endswith("\n"):
+                    out.write("\n")
+                merged += 1
+
+        return merged
+
+    def merge_images(self, chunks: Sequence[ChunkLike], images_dir: str) -> int:
+        """复制所有分片图片到合并命名空间（按分片序号命名，失败的分片不影响后续名称），返回图片数"""
+        images_path = Path(images_dir)
+        images_path.mkdir(exist_ok=True, parents=True)
+
+        count = 0
+        for chunk in self.numbered(chunks):
+            if chunk.failed:
+                continue
+            for img in self.iter_images(chunk.chunk_dir):
+                shutil.copyfile(img, images_path / self.image_name(chunk.index, img.name))
+                count += 1
+
+        if self.image_store:
+            self.image_store.ingest_dir(str(images_path))
+
+        return count
+
+    def merge_content_list(self, chunks: Sequence[ChunkResult], output_file: str) -> int:
+        """逐项合并 content_list.json（chunks 为 resolve 的结果），返回条目数"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as out:
+            out.write("[")
+            for chunk in chunks:
+                content_list = None if chunk.failed else self.find_content_list(chunk.chunk_dir)
+                if not content_list:
+                    continue
+
+                with open(content_list, 'r', encoding='utf-8') as f:
+                    items = json.load(f)
+
+                for item in items:
+                    out.write(",\n" if count else "\n")
+                    out.write(json.dumps(self.rewrite_json(item, chunk.index, chunk.start_page), ensure_ascii=False))
+                    count += 1
+
+                del items
+            out.write("\n]\n" if count else "]\n")
+
+        return count
+
+    def merge_middle_json(self, chunks: Sequence[ChunkResult], output_file: str) -> int:
+        """
+        逐页合并 middle JSON 的 pdf_info（chunks 为 resolve 的结果），返回页数
+
+        失败分片的每一页写入占位页 {"page_idx": n, "missing": true}
+        """
+        pages = 0
+        header = {}
+        with open(output_file, 'w', encoding='utf-8') as out:
+            out.write('{"pdf_info": [')
+            for chunk in chunks:
+                if chunk.failed:
+                    for page_idx in range(chunk.start_page, chunk.start_page + (chunk.pages or 0)):
+                        out.write(",\n" if pages else "\n")
+                        out.write(json.dumps({'page_idx': page_idx, 'missing': True}))
+                        pages += 1
+                    continue
+
+                middle = self.find_middle_json(chunk.chunk_dir)
+                if not middle:
+                    continue
+
+                with open(middle, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                for page in data.pop('pdf_info', []):
+                    out.write(",\n" if pages else "\n")
+                    out.write(json.dumps(self.rewrite_json(page, chunk.index, chunk.start_page), ensure_ascii=False))
+                    pages += 1
+
+                # 其余顶层字段（_backend、_version_name等）取第一个分片的值
+                for key, value in data.items():
+                    header.setdefault(key, value)
+                del data
+
+            out.write("\n]" if pages else "]")
+            for key, value in header.items():
+                out.write(f", {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}")
+            out.write("}\n")
+
+        return pages
+
+    def merge(self, chunks: Sequence[ChunkLike], output_dir: str, name: str,
+              page_offsets: Optional[List[int]] = None, total_pages: Optional[int] = None) -> Dict:
+        """
+        完整合并所有分片
+
+        Args:
+            chunks: 拆分计划中的分片 ChunkResult（含失败的分片），或分片解压目录（按页序排列）
+            output_dir: 输出目录
+            name: 输出文件名前缀
+            page_offsets: 分片目录的全局起始页（0开始），默认按分片页数累计
+            total_pages: 文档总页数（最后一个分片失败时用于标记缺失的页码范围）
+
+        Returns:
+            合并结果（missing_chunks 为失败分片的序号）
+        """
+        if page_offsets is not None:
+            if len(page_offsets) != len(chunks):
+                raise ValueError("page_offsets 数量必须与分片数一致")
+            # 按全局起始页排序，保证页序
+            ordered = sorted(zip(page_offsets, chunks), key=lambda x: x[0])
+            chunks = [ChunkResult(i, offset, str(chunk_dir)) for i, (offset, chunk_dir) in enumerate(ordered, 1)]
+        chunks = self.resolve(chunks, total_pages)
+
+        output_path = Path(output_dir)
+        output_path.mkdir(exist_ok=True, parents=True)
+
+        md_file = output_path / f"{name}.md"
+        images_dir = output_path / self.images_prefix
+        content_list_file = output_path / f"{name}_content_list.json"
+        middle_file = output_path / f"{name}_middle.json"
+
+        self.merge_markdown(chunks, str(md_file))
+        image_count = self.merge_images(chunks, str(images_dir))
+        item_count = self.merge_content_list(chunks, str(content_list_file))
+        page_count = self.merge_middle_json(chunks, str(middle_file))
+
+        return {
+            'total_chunks': len(chunks),
+            'page_offsets': [chunk.start_page for chunk in chunks],
+            'missing_chunks': [chunk.index for chunk in chunks if chunk.failed],
+            'pages': page_count,
+            'images': image_count,
+            'content_items': item_count,
+            'output_files': {
+                'markdown': str(md_file),
+                'images': str(images_dir),
+                'content_list': str(content_list_file),
+                'middle_json': str(middle_file)
+            }
+        }
+
+
+# 使用示例
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 4:
+        print("用法: python3 mineru_merge.py <output_dir> <name> <chunk_dir1> [chunk_dir2 ...]")
+        sys.exit(1)
+
+    output_dir, name = sys.argv[1], sys.argv[2]
+    chunk_dirs = sorted(sys.argv[3:], key=natural_sort_key)
+
+    result = ChunkMerger().merge(chunk_dirs, output_dir, name)
+
+    print(f"✅ 合并完成: {result['total_chunks']}个分片, {result['pages']}页, {result['images']}张图片")
+    for kind, path in result['output_files'].items():
+        print(f"  {kind}: {path}")
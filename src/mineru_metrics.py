@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+MinerU 处理指标（Prometheus 文本格式）
+- 各阶段耗时直方图、上传/下载字节数、轮询/重试/错误计数（按账户）、进行中任务数
+- 默认关闭：关闭时每次记录只有一次属性判断，热路径开销可忽略
+- 通过环境变量开启：
+    MINERU_METRICS_PORT=9464      HTTP /metrics 端点
+    MINERU_METRICS_FILE=path.prom 定期写入文件（node_exporter textfile collector）
+    MINERU_METRICS_INTERVAL=15    文件写入间隔（秒）
+"""
+import atexit
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+class _Metric:
+    """指标基类：按标签值缓存子指标"""
+
+    TYPE = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> '_Metric':
+        """按标签值取子指标（关闭时直接返回自身，不创建对象）"""
+        if not self.registry.enabled:
+            return self
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> '_Metric':
+        raise NotImplementedError
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _samples(self) -> List[Tuple[Tuple[str, ...], '_Metric']]:
+        if self.labelnames:
+            with self._lock:
+                return sorted(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        for key, child in self._samples():
+            lines.extend(child._render_sample(self, key))
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数"""
+
+    TYPE = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def _new_child(self):
+        return Counter(self.registry, self.name, self.documentation)
+
+    def inc(self, amount: float = 1):
+        if self.registry.enabled:
+            self.value += amount
+
+    def _render_sample(self, parent, key):
+        return [f'{parent.name}{parent._label_str(key)} {_format_value(self.value)}']
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    TYPE = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def _new_child(self):
+        return Gauge(self.registry, self.name, self.documentation)
+
+    def inc(self, amount: float = 1):
+        if self.registry.enabled:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        if self.registry.enabled:
+            self.value -= amount
+
+    def set(self, value: float):
+        if self.registry.enabled:
+            self.value = value
+
+    def _render_sample(self, parent, key):
+        return [f'{parent.name}{parent._label_str(key)} {_format_value(self.value)}']
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+
+    TYPE = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.registry, self.name, self.documentation, buckets=self.buckets[:-1])
+
+    def observe(self, value: float):
+        if not self.registry.enabled:
+            return
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def _render_sample(self, parent, key):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            le = 'le="%s"' % _format_value(bound)
+            lines.append(f'{parent.name}_bucket{parent._label_str(key, le)} {cumulative}')
+        lines.append(f'{parent.name}_sum{parent._label_str(key)} {_format_value(self.sum)}')
+        lines.append(f'{parent.name}_count{parent._label_str(key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.metrics: List[_Metric] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._writer: Optional[threading.Thread] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def enable(self):
+        self.enabled = True
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    # ==================== 导出 ====================
+
+    def write_file(self, path: str):
+        """原子写入指标文件"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def start_file_writer(self, path: str, interval: float = 15.0):
+        """后台定期写入指标文件"""
+        self.enable()
+
+        def run():
+            while True:
+                try:
+                    self.write_file(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        self._writer = threading.Thread(target=run, daemon=True, name='mineru-metrics-writer')
+        self._writer.start()
+
+    def start_http_server(self, port: int, addr: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """后台启动 /metrics HTTP 端点"""
+        self.enable()
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((addr, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='mineru-metrics-http').start()
+        return self._server
+
+    def configure_from_env(self) -> bool:
+        """根据环境变量开启导出，返回是否开启"""
+        port = os.environ.get('MINERU_METRICS_PORT')
+        path = os.environ.get('MINERU_METRICS_FILE')
+        if port and self._server is None:
+            self.start_http_server(int(port), os.environ.get('MINERU_METRICS_ADDR', '127.0.0.1'))
+        if path and self._writer is None:
+            self.start_file_writer(path, float(os.environ.get('MINERU_METRICS_INTERVAL', 15)))
+            atexit.register(self.write_file, path)  # 退出前写入最终值
+        return self.enabled
+
+
+# ==================== 全局指标 ====================
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'mineru_stage_duration_seconds', '各处理阶段耗时', ['stage'])
+DOCUMENTS = REGISTRY.counter(
+    'mineru_documents_total', '处理结束的文档数', ['status'])
+INFLIGHT = REGISTRY.gauge(
+    'mineru_inflight_jobs', '正在处理的文档数')
+UPLOAD_BYTES = REGISTRY.counter(
+    'mineru_upload_bytes_total', '上传字节数', ['account'])
+DOWNLOAD_BYTES = REGISTRY.counter(
+    'mineru_download_bytes_total', '下载字节数')
+POLLS = REGISTRY.counter(
+    'mineru_polls_total', '任务状态轮询次数', ['account'])
+RETRIES = REGISTRY.counter(
+    'mineru_retries_total', '重试次数', ['account', 'stage'])
+ERRORS = REGISTRY.counter(
+    'mineru_errors_total', '错误次数', ['account', 'stage'])
+ACCOUNT_HEALTH = REGISTRY.gauge(
+    'mineru_account_health', '账户健康分（0-100，熔断时为0）', ['account'])
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    'mineru_concurrency_limit', '自适应并发上限（按阶段和账户）', ['stage', 'account'])
+PREDICTION_ERROR = REGISTRY.histogram(
+    'mineru_prediction_error_ratio', '服务端耗时预测的相对误差（|预测-实际|/实际）', ['format'],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0))
+LOOP_LAG = REGISTRY.histogram(
+    'mineru_event_loop_lag_seconds', '事件循环延迟（定时sleep多睡的时间）',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+
+# 使用示例
+if __name__ == '__main__':
+    REGISTRY.enable()
+    STAGE_SECONDS.labels('upload').observe(0.8)
+    UPLOAD_BYTES.labels('demo@example.com').inc(1024)
+    INFLIGHT.inc()
+    print(REGISTRY.render())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+MinerU OOXML 元数据读取：直接读 ZIP 中的少量 XML 统计 PPTX/DOCX 页数，不构建 python-pptx/python-docx 对象模型
+- PPTX：统计 presentation.xml 中的 <p:sldId>（与 python-pptx 的 len(prs.slides) 一致），
+  读不到时使用 docProps/app.xml 的 <Slides>
+- DOCX：docProps/app.xml 的 <Pages> 由 Word 保存时写入；python-docx 等工具生成的文件中它是模板里的旧值
+  （Pages=1、Words=0），所以只在字数统计非零时采用。否则流式扫描 document.xml：
+  有 Word 记录的分页位置（<w:lastRenderedPageBreak>）时按它计数，再否则按段落行数、图片和手动分页估算
+- 旧的二进制格式（.ppt/.doc）和损坏的文件返回 None
+"""
+import math
+import posixpath
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+# 关系类型（按后缀匹配，同时兼容 Transitional 和 Strict 命名空间）
+OFFICE_DOCUMENT_REL = '/officeDocument'
+EXTENDED_PROPERTIES_REL = '/extended-properties'
+
+DEFAULT_PARTS = {'pptx': 'ppt/presentation.xml', 'docx': 'word/document.xml'}
+DEFAULT_APP_PART = 'docProps/app.xml'
+
+# DOCX 版面估算（A4、五号字、默认页边距）
+CHARS_PER_LINE = 90   # 西文字符；中日韩字符按2个计
+LINES_PER_PAGE = 45
+DRAWING_LINES = 15    # 一张嵌入图片约占的行数
+
+READ_CHUNK = 1024 * 1024
+
+# WordprocessingML 命名空间（Transitional / Strict），用于找出 document.xml 使用的前缀（通常为 w:）
+_WORD_NAMESPACE = re.compile(rb'xmlns(?::(\w+))?="http://(?:schemas\.openxmlformats\.org/wordprocessingml/2006/main'
+                             rb'|purl\.oclc\.org/ooxml/wordprocessingml/main)"')
+_RELATIONSHIP_NAMESPACE = re.compile(rb'xmlns:(\w+)="http://(?:schemas\.openxmlformats\.org/officeDocument/2006'
+                                     rb'|purl\.oclc\.org/ooxml/officeDocument)/relationships"')
+_WIDE = re.compile('[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+
+
+class WordMarkers:
+    """document.xml 中按命名空间前缀匹配的标记（以字面量开头的正则比任意前缀快得多）"""
+
+    def __init__(self, prefix: bytes, relationship_prefix: bytes = b'r'):
+        tag = prefix + b':' if prefix else b''
+        self.paragraph_end = b'</' + tag + b'p>'
+        self.section_break = b'<' + tag + b'sectPr'
+        self.drawing = b'<' + tag + b'drawing'
+        self.rendered_break = b'<' + tag + b'lastRenderedPageBreak'
+        self.text = re.compile(rb'<' + re.escape(tag) + rb't(?:\s[^>]*)?>([^<]*)<')
+        # 手动分页：<w:br w:type="page"/> 或段落属性 <w:pageBreakBefore/>
+        self.page_break = re.compile(rb'<' + re.escape(tag) + rb'(?:br\s[^>]*\btype="page"|pageBreakBefore'
+                                     rb'(?![^>]*val="(?:false|0|off)"))[^>]*>')
+        self.break_after = re.compile(rb'<' + re.escape(tag) + rb'br\s[^>]*\btype="page"')
+        self.break_before = re.compile(rb'<' + re.escape(tag) + rb'pageBreakBefore(?![^>]*val="(?:false|0|off)")[\s/>]')
+        # 通过关系ID引用其他部件的属性（r:embed、r:id、r:link 等）
+        self.reference = re.compile(rb'\s' + re.escape(relationship_prefix) + rb':\w+="([^"]*)"')
+
+    @classmethod
+    def detect(cls, head: bytes) -> 'WordMarkers':
+        match = _WORD_NAMESPACE.search(head)
+        relationship = _RELATIONSHIP_NAMESPACE.search(head)
+        return cls((match.group(1) or b'') if match else b'w', relationship.group(1) if relationship else b'r')
+
+
+def local_name(tag: str) -> str:
+    """去掉命名空间的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iterparse_part(zf: zipfile.ZipFile, part: str, events=('end',)) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """流式解析包中的一个XML部件（部件不存在时抛出 KeyError）"""
+    with zf.open(part) as f:
+        yield from ElementTree.iterparse(f, events=events)
+
+
+def rels_part(part: str) -> str:
+    """部件的关系文件路径（'' 为包本身）"""
+    directory, _, name = part.rpartition('/')
+    return f"{directory}/_rels/{name}.rels" if directory else f"_rels/{name}.rels"
+
+
+def read_relationships(zf: zipfile.ZipFile, part: str = '') -> List[Tuple[str, str, str]]:
+    """
+    部件的内部关系
+
+    Returns:
+        [(关系ID, 类型, 目标部件路径)]，外部链接（TargetMode="External"）不包含；没有关系文件时为空
+    """
+    directory = part.rpartition('/')[0]
+    relationships = []
+    try:
+        for _, elem in iterparse_part(zf, rels_part(part)):
+            if local_name(elem.tag) != 'Relationship' or elem.get('TargetMode') == 'External':
+                continue
+            target = elem.get('Target', '')
+            target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(directory, target))
+            relationships.append((elem.get('Id', ''), elem.get('Type', ''), target))
+    except (KeyError, ElementTree.ParseError):
+        pass
+    return relationships
+
+
+def _relationship_targets(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """包级关系：类型后缀 → 部件路径"""
+    return {rel_type[rel_type.rfind('/'):]: target for _, rel_type, target in read_relationships(zf)}
+
+
+def read_app_properties(zf: zipfile.ZipFile, part: Optional[str] = None) -> Dict[str, int]:
+    """docProps/app.xml 中的整数字段（Pages、Slides、Words、Characters 等；没有该部件时为空）"""
+    part = part or DEFAULT_APP_PART
+    props = {}
+    try:
+        for _, elem in iterparse_part(zf, part):
+            text = (elem.text or '').strip()
+            if text.isdigit():
+                props[local_name(elem.tag)] = int(text)
+    except (KeyError, ElementTree.ParseError):
+        pass
+    return props
+
+
+def count_slides(zf: zipfile.ZipFile, main_part: str, app: Dict[str, int]) -> Optional[int]:
+    """PPTX 幻灯片数"""
+    try:
+        slides = 0
+        for _, elem in iterparse_part(zf, main_part):
+            tag = local_name(elem.tag)
+            if tag == 'sldId':
+                slides += 1
+            elif tag == 'sldIdLst':
+                return slides
+        return slides  # 没有 sldIdLst：空演示文稿
+    except (KeyError, ElementTree.ParseError):
+        return app.get('Slides') or None
+
+
+def estimate_lines(xml: bytes, markers: WordMarkers) -> float:
+    """一段 document.xml 占用的行数：每段至少一行，长段落按字符宽度折行，图片按固定行数"""
+    paragraphs = xml.count(markers.paragraph_end)
+    text = b''.join(markers.text.findall(xml)).decode('utf-8', 'replace')
+    width = len(text) + len(_WIDE.findall(text))
+    # 逐段向上取整平均多出半行
+    return max(paragraphs, width / CHARS_PER_LINE + paragraphs / 2) + DRAWING_LINES * xml.count(markers.drawing)
+
+
+def estimate_pages(zf: zipfile.ZipFile, main_part: str) -> Optional[int]:
+    """
+    流式扫描 document.xml 估算 DOCX 页数
+
+    整块用字面量计数和正则统计（逐元素解析 XML 比 python-docx 的 lxml 还慢），只在手动分页处切开，
+    每次只在内存中保留一个读取块
+    """
+    markers = None
+    rendered = 0      # Word 上次排版时记录的分页
+    pages = 0         # 手动分页结束的页数
+    lines = 0.0       # 当前手动分页段已用行数
+    rest = b''
+    try:
+        with zf.open(main_part) as f:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                data = rest + chunk
+                markers = markers or WordMarkers.detect(data[:4096])
+                # 在最后一个标签结束处切开，标签不会跨块
+                cut = data.rfind(b'>') + 1 if chunk else len(data)
+                data, rest = data[:cut], data[cut:]
+                rendered += data.count(markers.rendered_break)
+                first, *sections = markers.page_break.split(data)
+                lines += estimate_lines(first, markers)
+                for section in sections:
+                    pages += math.ceil(lines / LINES_PER_PAGE)
+                    lines = estimate_lines(section, markers)
+                if not chunk:
+                    break
+    except (KeyError, zipfile.BadZipFile):
+        return None
+    if rendered:
+        return rendered + 1
+    return max(pages + math.ceil(lines / LINES_PER_PAGE), 1)
+
+
+def page_count(file_path: str, format: str) -> Optional[int]:
+    """
+    PPTX 幻灯片数 / DOCX 页数
+
+    Args:
+        file_path: 文件路径
+        format: pptx 或 docx（其他格式返回 None）
+
+    Returns:
+        页数；不是有效的 OOXML 包时为 None
+    """
+    if format not in DEFAULT_PARTS:
+        return None
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            rels = _relationship_targets(zf)
+            main_part = rels.get(OFFICE_DOCUMENT_REL) or DEFAULT_PARTS[format]
+            app = read_app_properties(zf, rels.get(EXTENDED_PROPERTIES_REL))
+            if format == 'pptx':
+                return count_slides(zf, main_part, app)
+            if app.get('Pages') and (app.get('Words') or app.get('Characters')):
+                return app['Pages']
+            return estimate_pages(zf, main_part)
+    except (OSError, zipfile.BadZipFile):
+        return None
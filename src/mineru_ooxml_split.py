@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+MinerU OOXML 拆分：在 ZIP 包层面拆分超大演示文稿和文档，不经过 python-pptx/python-docx 对象模型
+- 从包关系（.rels）计算每张幻灯片/每段正文独占的部件（图片、备注页、图表、页眉页脚、嵌入对象等），
+  公共部件（母版、版式、主题、样式、编号、脚注、文档属性）每个分片都复制
+- PPTX：分片按顺序装入幻灯片
+- DOCX：在 w:body 的子元素之间切分，优先在分页符、分节符处；document.xml 流式扫描两遍
+  （第一遍用 expat 记录子元素的字节位置并规划分片，第二遍按字节范围复制），原始XML不经过解析重建
+- 分片同时满足页数（600）和大小（200MB）限制；大小按部件的压缩大小计算
+- 只改写 .rels、[Content_Types].xml、app.xml 和主部件中与删除的部件有关的条目，
+  其余部件流式原样复制（已压缩的图片/视频不再重新压缩）
+- 多个分片在线程池中并行写入（zlib 压缩时释放GIL）
+"""
+import logging
+import math
+from abc import ABC, abstractmethod
+import re
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Set
+from xml.parsers import expat
+
+from mineru_ooxml import (LINES_PER_PAGE, READ_CHUNK, WordMarkers, estimate_lines, iterparse_part, local_name,
+                          page_count, read_relationships, rels_part)
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 600
+MAX_BYTES = 200 * 1024 * 1024
+# DOCX 页数是估算值，规划时留出余量
+DOCX_PAGE_MARGIN = 0.9
+
+CONTENT_TYPES = '[Content_Types].xml'
+COPY_BUFFER = 1024 * 1024
+
+# 源文件中 deflate 节省不到 5% 的部件（图片、视频等已压缩格式）原样存储
+STORED_RATIO = 0.95
+
+_RELATIONSHIP = re.compile(rb'<Relationship\s[^>]*?\bId="([^"]*)"[^>]*/>')
+_OVERRIDE = re.compile(rb'<Override\s[^>]*?\bPartName="/?([^"]*)"[^>]*/>')
+# 通过关系ID引用其他部件的空元素：<p:sldId r:id=.../>、自定义放映中的 <p:sld r:id=.../>、跳转链接等
+_REFERENCE = re.compile(rb'<[\w:]+[^<>]*?\s\w+:id="([^"]*)"[^<>]*/>')
+# 按幻灯片编号引用的空元素（如节列表中的 <p14:sldId id="256"/>）
+_SLIDE_NUMBER = re.compile(rb'<(?:\w+:)?sldId\s+id="(\d+)"\s*/>')
+
+
+class OoxmlPackage:
+    """OOXML 包结构：部件、部件之间的关系；按部件集合写出分片"""
+
+    APP_PAGES = b'Pages'  # app.xml 中记录页数的字段
+
+    def __init__(self, file_path: str, default_main: str):
+        self.file_path = str(file_path)
+        with zipfile.ZipFile(self.file_path) as zf:
+            self.infos = {info.filename: info for info in zf.infolist()}
+            self.relationships = {self.source_part(name): read_relationships(zf, self.source_part(name))
+                                  for name in self.infos if name.endswith('.rels')}
+        self.main = self.package_target('/officeDocument') or default_main
+        self.app = self.package_target('/extended-properties')
+        self.base: Set[str] = set()
+
+    def package_target(self, rel_suffix: str) -> Optional[str]:
+        return next((target for _, rel_type, target in self.relationships.get('', [])
+                     if rel_type.endswith(rel_suffix)), None)
+
+    @staticmethod
+    def source_part(rels_name: str) -> str:
+        """关系文件对应的部件（rels_part 的逆运算，'' 为包本身）"""
+        directory, _, name = rels_name.rpartition('/')
+        parent = directory.rpartition('/')[0] if '/' in directory else ''
+        part = name[:-len('.rels')]
+        return f"{parent}/{part}" if parent and part else part
+
+    def closure(self, start: str, exclude: Set[str]) -> Set[str]:
+        """从 start 沿关系可达的部件（不进入 exclude），包含这些部件的关系文件"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for _, _, target in self.relationships.get(stack.pop(), []):
+                if target not in seen and target not in exclude and target in self.infos:
+                    seen.add(target)
+                    stack.append(target)
+        return {part for part in seen if part in self.infos} | \
+            {rels_part(part) for part in seen if rels_part(part) in self.infos}
+
+    def size(self, parts: Set[str]) -> int:
+        return sum(self.infos[part].compress_size for part in parts)
+
+    # ==================== 写入分片 ====================
+
+    def write_chunk(self, chunk: 'PackageChunk', output_path: str):
+        """写出一个分片（每次调用单独打开源文件，可以在多个线程中并行）"""
+        included = self.base | chunk.parts
+        with zipfile.ZipFile(self.file_path) as src, \
+                zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for name, info in self.infos.items():
+                if name not in included:
+                    continue
+                target = zipfile.ZipInfo(name, date_time=info.date_time)
+                target.compress_type = (zipfile.ZIP_STORED if info.compress_size >= info.file_size * STORED_RATIO
+                                        else zipfile.ZIP_DEFLATED)
+                data = self._rewrite(name, src, included, chunk)
+                if data is not None:
+                    dst.writestr(target, data)
+                    continue
+                with dst.open(target, 'w') as fout:
+                    self._copy(name, src, fout, chunk)
+
+    def _copy(self, name: str, src: zipfile.ZipFile, fout: IO[bytes], chunk: 'PackageChunk'):
+        with src.open(name) as fin:
+            shutil.copyfileobj(fin, fout, COPY_BUFFER)
+
+    def removed_ids(self, part: str, included: Set[str]) -> Set[bytes]:
+        """part 的关系中指向未包含部件的关系ID"""
+        return {rel_id.encode('utf-8') for rel_id, _, target in self.relationships.get(part, [])
+                if target in self.infos and target not in included}
+
+    def _rewrite(self, name: str, src: zipfile.ZipFile, included: Set[str], chunk: 'PackageChunk') -> Optional[bytes]:
+        """需要改写的部件返回新内容，原样复制的返回 None"""
+        if name == CONTENT_TYPES:
+            return _OVERRIDE.sub(lambda m: m.group(0) if m.group(1).decode('utf-8') in included else b'',
+                                 src.read(name))
+        if name == self.app:
+            field_name = self.APP_PAGES
+            return re.sub(rb'<' + field_name + rb'>\d+</' + field_name + rb'>',
+                          b'<%s>%d</%s>' % (field_name, chunk.pages, field_name), src.read(name))
+        if name.endswith('.rels'):
+            removed = self.removed_ids(self.source_part(name), included)
+            if removed:
+                return _RELATIONSHIP.sub(lambda m: b'' if m.group(1) in removed else m.group(0), src.read(name))
+        return None
+
+    def write_chunks(self, chunks: List['PackageChunk'], output_dir: str, suffix: str, workers: int) -> List[str]:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        stem = Path(self.file_path).stem
+        paths = [str(output_path / f"{stem}_chunk_{i + 1}{suffix}") for i in range(len(chunks))]
+        with ThreadPoolExecutor(max(1, min(workers, len(chunks))), thread_name_prefix='mineru-split') as pool:
+            list(pool.map(self.write_chunk, chunks, paths))
+        for i, chunk in enumerate(chunks):
+            logger.info("  ✅ 分片 %d/%d: %d页", i + 1, len(chunks), chunk.pages)
+        return paths
+
+
+@dataclass
+class PackageChunk(ABC):
+    parts: Set[str] = field(default_factory=set)  # 分片独占的部件
+    size: int = 0                                 # 独占内容的压缩大小
+
+    @property
+    @abstractmethod
+    def pages(self) -> int:
+        """分片页数（幻灯片数或估算页数）"""
+
+
+@dataclass
+class PptxChunk(PackageChunk):
+    slides: List[str] = field(default_factory=list)  # 幻灯片部件（按顺序）
+
+    @property
+    def pages(self) -> int:
+        return len(self.slides)
+
+
+@dataclass
+class DocxChunk(PackageChunk):
+    start: int = 0           # document.xml 中第一个 body 子元素的字节位置
+    end: int = 0             # 最后一个子元素之后的字节位置
+    page_estimate: float = 0.0
+
+    @property
+    def pages(self) -> int:
+        return max(math.ceil(self.page_estimate), 1)
+
+
+# ==================== PPTX ====================
+
+class PptxPackage(OoxmlPackage):
+    """演示文稿：幻灯片顺序，每张幻灯片独占的部件"""
+
+    APP_PAGES = b'Slides'
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path, 'ppt/presentation.xml')
+        self.presentation = self.main
+        self.slide_numbers: Dict[str, str] = {}
+        with zipfile.ZipFile(self.file_path) as zf:
+            self.slides = self._slide_order(zf)
+        self.slide_set = set(self.slides)
+        # 不经过任何幻灯片可达的部件：每个分片都需要
+        self.base = self.closure('', self.slide_set) | {CONTENT_TYPES}
+        self.base_size = self.size(self.base)
+
+    def _slide_order(self, zf: zipfile.ZipFile) -> List[str]:
+        """presentation.xml 中 sldIdLst 的顺序"""
+        by_id = {rel_id: target for rel_id, rel_type, target in self.relationships.get(self.presentation, [])
+                 if rel_type.endswith('/slide')}
+        slides = []
+        for _, elem in iterparse_part(zf, self.presentation):
+            tag = local_name(elem.tag)
+            if tag == 'sldId':
+                rel_id = next((v for k, v in elem.attrib.items() if k.startswith('{') and local_name(k) == 'id'), None)
+                if rel_id in by_id:
+                    slides.append(by_id[rel_id])
+                    self.slide_numbers[by_id[rel_id]] = elem.get('id', '')
+            elif tag == 'sldIdLst':
+                break
+        return slides
+
+    def plan(self, max_slides: int = MAX_PAGES, max_bytes: int = MAX_BYTES) -> List[PptxChunk]:
+        """按顺序装入幻灯片：每个分片不超过 max_slides 张，估计大小不超过 max_bytes"""
+        chunks = [PptxChunk()]
+        for slide in self.slides:
+            own = self.closure(slide, self.slide_set - {slide}) - self.base
+            chunk = chunks[-1]
+            added = own - chunk.parts
+            if chunk.slides and (len(chunk.slides) >= max_slides
+                                 or self.base_size + chunk.size + self.size(added) > max_bytes):
+                chunk = PptxChunk()
+                chunks.append(chunk)
+                added = own
+            if self.base_size + self.size(own) > max_bytes:
+                logger.warning("⚠️ 幻灯片 %s 及其资源超过大小限制（%.1fMB）", slide,
+                               (self.base_size + self.size(own)) / 1024 / 1024)
+            chunk.slides.append(slide)
+            chunk.parts |= added
+            chunk.size += self.size(added)
+        return chunks
+
+    def _rewrite(self, name, src, included, chunk):
+        data = super()._rewrite(name, src, included, chunk)
+        if data is not None or name.endswith('.rels') or name == CONTENT_TYPES:
+            return data
+        # 删除引用其他分片中幻灯片的元素（sldId、自定义放映、跳转链接）
+        removed = self.removed_ids(name, included)
+        if not removed:
+            return None
+        data = _REFERENCE.sub(lambda m: b'' if m.group(1) in removed else m.group(0), src.read(name))
+        if name == self.presentation:
+            numbers = {self.slide_numbers[s].encode('utf-8') for s in self.slides if s not in included}
+            data = _SLIDE_NUMBER.sub(lambda m: b'' if m.group(1) in numbers else m.group(0), data)
+        return data
+
+
+def split_pptx(file_path: str, output_dir: str, max_slides: int = MAX_PAGES, max_bytes: int = MAX_BYTES,
+               workers: int = 4) -> List[str]:
+    """
+    拆分演示文稿
+
+    Args:
+        file_path: PPTX 文件
+        output_dir: 分片输出目录
+        max_slides: 每个分片最多幻灯片数
+        max_bytes: 每个分片最大大小（按源文件中部件的压缩大小估计）
+        workers: 并行写入的分片数
+
+    Returns:
+        分片路径（按幻灯片顺序）；无需拆分或不是 OOXML 包时为 [file_path]
+    """
+    if not zipfile.is_zipfile(file_path):
+        return [file_path]
+    package = PptxPackage(file_path)
+    if len(package.slides) <= max_slides and Path(file_path).stat().st_size <= max_bytes:
+        return [file_path]
+    return package.write_chunks(package.plan(max_slides, max_bytes), output_dir, '.pptx', workers)
+
+
+# ==================== DOCX ====================
+
+class _DocxPlanner:
+    """
+    按顺序装入 body 子元素，超出限制时在最近的分页/分节处切开（没有时在当前子元素之前切开）
+
+    current 是分片中到最近一个分页处为止的内容，pending 是之后还没遇到分页的内容
+    """
+
+    def __init__(self, package: 'DocxPackage', max_pages: float, max_bytes: int):
+        self.package = package
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.chunks: List[DocxChunk] = []
+        self.current: Optional[DocxChunk] = None
+        self.pending: Optional[DocxChunk] = None
+
+    def _fits(self, *groups: Optional[DocxChunk]) -> bool:
+        groups = [g for g in groups if g is not None]
+        pages = sum(g.page_estimate for g in groups)
+        size = (self.package.base_size + self.package.size(set().union(*(g.parts for g in groups)))
+                + sum(g.end - g.start for g in groups) * self.package.xml_ratio)
+        # 未满的一页也要算一整页
+        return math.ceil(pages) <= self.max_pages and size <= self.max_bytes
+
+    @staticmethod
+    def _merge(first: Optional[DocxChunk], second: Optional[DocxChunk]) -> Optional[DocxChunk]:
+        if first is None or second is None:
+            return first or second
+        return DocxChunk(parts=first.parts | second.parts, start=first.start, end=second.end,
+                         page_estimate=first.page_estimate + second.page_estimate)
+
+    def _page_boundary(self):
+        """分页处：未满的一页按整页计，之前的内容可以作为分片结尾"""
+        if self.pending is not None:
+            if not self.package.rendered:
+                self.pending.page_estimate = math.ceil(self.pending.page_estimate)
+            self.current, self.pending = self._merge(self.current, self.pending), None
+
+    def add(self, start: int, end: int, xml: bytes):
+        markers = self.package.markers
+        refs = {ref.decode('utf-8') for ref in markers.reference.findall(xml)}
+        if self.package.rendered:
+            pages = xml.count(markers.rendered_break)
+        else:
+            pages = estimate_lines(xml, markers) / LINES_PER_PAGE
+        child = DocxChunk(parts=self.package.parts_for(refs), start=start, end=end, page_estimate=pages)
+
+        if markers.break_before.search(xml):
+            self._page_boundary()
+        if not self._fits(self.current, self.pending, child):
+            if self.current is not None:
+                self.chunks.append(self.current)
+                self.current = None
+            if self.pending is not None and not self._fits(self.pending, child):
+                self.chunks.append(self.pending)
+                self.pending = None
+            if not self._fits(child):
+                logger.warning("⚠️ 正文元素（字节 %d-%d）超过单个分片的限制，无法在 body 层面继续拆分", start, end)
+        self.pending = self._merge(self.pending, child)
+        if markers.break_after.search(xml) or markers.section_break in xml:
+            self._page_boundary()
+
+    def finish(self) -> List[DocxChunk]:
+        last = self._merge(self.current, self.pending)
+        if last is not None:
+            self.chunks.append(last)
+        return self.chunks
+
+
+class DocxPackage(OoxmlPackage):
+    """文档：w:body 子元素的字节范围、每段正文引用的部件"""
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path, 'word/document.xml')
+        self.document = self.main
+        info = self.infos[self.document]
+        self.xml_ratio = info.compress_size / info.file_size if info.file_size else 1.0
+        self.head = b''     # 第一个 body 子元素之前（XML声明、<w:document>、<w:body>）
+        self.tail = b''     # 最后的节属性 <w:sectPr> 和 </w:body></w:document>
+        self.rel_targets = {rel_id: target for rel_id, _, target in self.relationships.get(self.document, [])}
+        self._prescan()
+
+    def _prescan(self):
+        """快速扫描：正文引用的部件不属于公共部件；是否有 Word 记录的分页"""
+        referenced = set()
+        self.rendered = False
+        with zipfile.ZipFile(self.file_path) as zf, zf.open(self.document) as f:
+            head = f.read(READ_CHUNK)
+            self.markers = WordMarkers.detect(head[:4096])
+            data = head
+            while data:
+                # 在最后一个标签结束处切开，属性不会跨块
+                cut = data.rfind(b'>') + 1
+                block, rest = data[:cut], data[cut:]
+                referenced.update(ref.decode('utf-8') for ref in self.markers.reference.findall(block))
+                self.rendered = self.rendered or self.markers.rendered_break in block
+                chunk = f.read(READ_CHUNK)
+                data = rest + chunk if chunk else b''
+        # 公共部件：包级部件、文档本身，以及文档中没有被正文引用的关系（样式、编号、脚注等）
+        content = {self.rel_targets[ref] for ref in referenced if ref in self.rel_targets}
+        self.base = self.closure('', {self.document}) | {self.document, CONTENT_TYPES}
+        for target in set(self.rel_targets.values()) - content:
+            if target in self.infos:
+                self.base |= self.closure(target, {self.document})
+        if rels_part(self.document) in self.infos:
+            self.base.add(rels_part(self.document))
+        # document.xml 按每个分片实际写入的字节另算
+        self.base_size = self.size(self.base - {self.document})
+
+    def parts_for(self, refs: Set[str]) -> Set[str]:
+        """关系ID引用的部件（及其关系可达的部件），去掉公共部件"""
+        parts = set()
+        for ref in refs:
+            target = self.rel_targets.get(ref)
+            if target and target in self.infos and target not in self.base:
+                parts |= self.closure(target, {self.document})
+        return parts - self.base
+
+    def plan(self, max_pages: float = MAX_PAGES, max_bytes: int = MAX_BYTES) -> List[DocxChunk]:
+        """
+        流式扫描 document.xml，按 body 子元素规划分片
+
+        expat 只用于定位子元素的字节位置（不建树），每次只在内存中保留一个子元素和一个读取块
+        """
+        planner = _DocxPlanner(self, max_pages, max_bytes)
+        parser = expat.ParserCreate()
+        state = {'depth': 0, 'start': None, 'tail': None, 'body_end': None}
+        buffer = bytearray()
+        offset = 0  # buffer[0] 在 document.xml 中的位置
+        markers = self.markers
+
+        def flush(until: int):
+            """把 [state.start, until) 作为一个子元素交给规划器"""
+            nonlocal offset
+            start = state['start']
+            xml = bytes(buffer[start - offset:until - offset])
+            planner.add(start, until, xml)
+            del buffer[:until - offset]
+            offset = until
+
+        def start_element(name, attrs):
+            state['depth'] += 1
+            if state['depth'] != 3:
+                return
+            position = parser.CurrentByteIndex
+            if state['start'] is None:
+                self.head = bytes(buffer[:position - offset])
+            else:
+                flush(position)
+            state['start'] = position
+            state['tail'] = position if name.rpartition(':')[2] == 'sectPr' else None
+
+        def end_element(name):
+            if state['depth'] == 2:
+                state['body_end'] = parser.CurrentByteIndex
+            state['depth'] -= 1
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        with zipfile.ZipFile(self.file_path) as zf, zf.open(self.document) as f:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                buffer += chunk
+                parser.Parse(chunk, not chunk)
+                if not chunk:
+                    break
+
+        # 最后一个子元素是节属性时作为尾部写入每个分片，否则尾部从 </w:body> 开始
+        tail_start = state['tail'] if state['tail'] is not None else state['body_end']
+        if state['start'] is not None and state['start'] != tail_start:
+            flush(tail_start)
+        self.tail = bytes(buffer[tail_start - offset:])
+        self.base |= self.parts_for({ref.decode('utf-8') for ref in markers.reference.findall(self.tail)})
+        self.base_size = self.size(self.base - {self.document}) + (len(self.head) + len(self.tail)) * self.xml_ratio
+        return planner.finish()
+
+    def _copy(self, name, src, fout, chunk):
+        if name != self.document:
+            return super()._copy(name, src, fout, chunk)
+        fout.write(self.head)
+        with src.open(name) as fin:
+            fin.seek(chunk.start)
+            remaining = chunk.end - chunk.start
+            while remaining > 0:
+                data = fin.read(min(COPY_BUFFER, remaining))
+                if not data:
+                    break
+                fout.write(data)
+                remaining -= len(data)
+        fout.write(self.tail)
+
+
+def split_docx(file_path: str, output_dir: str, max_pages: int = MAX_PAGES, max_bytes: int = MAX_BYTES,
+               workers: int = 4) -> List[str]:
+    """
+    拆分文档（在 body 子元素之间切分，保留表格、图片、样式、编号）
+
+    Args:
+        file_path: DOCX 文件
+        output_dir: 分片输出目录
+        max_pages: 每个分片最多页数（按估算页数的90%规划）
+        max_bytes: 每个分片最大大小
+        workers: 并行写入的分片数
+
+    Returns:
+        分片路径（按正文顺序）；无需拆分或不是 OOXML 包时为 [file_path]
+    """
+    if not zipfile.is_zipfile(file_path):
+        return [file_path]
+    pages = page_count(file_path, 'docx') or 0
+    if pages <= max_pages and Path(file_path).stat().st_size <= max_bytes:
+        return [file_path]
+    package = DocxPackage(file_path)
+    chunks = package.plan(max_pages * DOCX_PAGE_MARGIN, max_bytes)
+    logger.info("📝 拆分DOCX: 约%d页 → %d个文件", pages, len(chunks))
+    return package.write_chunks(chunks, output_dir, '.docx', workers)
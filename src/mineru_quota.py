@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+MinerU 账户每日页数额度账本
+- 每个账户每天的最高优先级解析额度有限（默认2000页，MINERU_DAILY_PAGES 修改），按北京时间零点重置
+- 提交任务时按验证得到的页数预记（reserve），处理中从 extract_progress.total_pages 得到实际页数后更正（settle），
+  服务端处理失败的任务不计（release）
+- 账本文件默认 ~/.cache/mineru/quota.json（MINERU_QUOTA_LEDGER 修改，设为 off 只在内存中记录），
+  按任务记录，保存时与文件中其他进程写入的任务合并，MCP 服务器和批量处理器共用同一份额度
+  （读取-合并-替换期间持有账本旁 .lock 文件的 flock，并发保存不会丢失彼此的记录）
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DEFAULT_LEDGER_FILE = Path.home() / '.cache' / 'mineru' / 'quota.json'
+DEFAULT_DAILY_PAGES = 2000
+
+# 额度按北京时间的日期计算
+QUOTA_TZ = timezone(timedelta(hours=8))
+
+
+class QuotaLedger:
+    """每个账户每天提交的页数（JSON 文件，每次修改后原子写入）"""
+
+    VERSION = 1
+
+    def __init__(self, ledger_file: Optional[str] = None, daily_pages: int = DEFAULT_DAILY_PAGES,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            ledger_file: 账本文件（None 为只在内存中记录）
+            daily_pages: 每个账户每天的页数额度
+            clock: 时钟（测试用）
+        """
+        self.ledger_file = Path(ledger_file).expanduser() if ledger_file else None
+        self.daily_pages = daily_pages
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.mtime: Optional[float] = None
+        self.days: Dict[str, Dict[str, Dict[str, int]]] = self._load()  # 日期 → 账户 → 任务ID → 页数
+        self.jobs: Dict[str, Tuple[str, str]] = {}                       # 进行中的任务ID → (日期, 账户)
+        self.touched: Dict[str, Tuple[str, str, Optional[int]]] = {}     # 未保存的修改：任务ID → (日期, 账户, 页数)，页数 None 为已删除
+
+    @classmethod
+    def from_env(cls) -> 'QuotaLedger':
+        """按 MINERU_QUOTA_LEDGER（off/0 为只在内存中记录）和 MINERU_DAILY_PAGES 创建"""
+        value = os.environ.get('MINERU_QUOTA_LEDGER', str(DEFAULT_LEDGER_FILE))
+        daily_pages = int(os.environ.get('MINERU_DAILY_PAGES', DEFAULT_DAILY_PAGES))
+        return cls(None if value.lower() in ('', '0', 'off', 'false') else value, daily_pages)
+
+    def today(self) -> str:
+        return datetime.fromtimestamp(self.clock(), QUOTA_TZ).date().isoformat()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        if self.ledger_file is None:
+            return {}
+        try:
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                self.mtime = os.fstat(f.fileno()).st_mtime
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data.get('days', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {}
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程互斥（账本旁的 .lock 文件）：读取-合并-替换期间其他进程不能保存"""
+        self.ledger_file.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.ledger_file.with_name(f'{self.ledger_file.name}.lock'), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _save(self):
+        """
+        持有文件锁重新读取文件，应用本进程未保存的修改（其他进程的记录保留），只保留今天和昨天，原子写入
+
+        写入失败时修改保留在 touched 中，下次保存时重试
+        """
+        if self.ledger_file is None:
+            self.touched.clear()
+            return
+        with self._file_lock():
+            days = self._load()
+            for job_id, (day, email, pages) in self.touched.items():
+                jobs = days.setdefault(day, {}).setdefault(email, {})
+                if pages is None:
+                    jobs.pop(job_id, None)
+                else:
+                    jobs[job_id] = pages
+            now = datetime.fromtimestamp(self.clock(), QUOTA_TZ)
+            keep = {now.date().isoformat(), (now - timedelta(days=1)).date().isoformat()}
+            days = {day: accounts for day, accounts in days.items() if day in keep}
+
+            tmp = self.ledger_file.with_name(f'{self.ledger_file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'days': days}, f, ensure_ascii=False)
+            os.replace(tmp, self.ledger_file)
+            self.mtime = self.ledger_file.stat().st_mtime
+        self.days = days
+        self.touched.clear()
+
+    def _refresh(self):
+        """其他进程更新了账本文件时重新读取"""
+        if self.ledger_file is None:
+            return
+        try:
+            mtime = self.ledger_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self.mtime:
+            self.days = self._load()
+
+    # ==================== 记录 ====================
+
+    def reserve(self, email: str, job_id: str, pages: Optional[int]):
+        """提交任务时预记页数（页数未知时按1页计，处理中得到实际页数后更正）"""
+        with self.lock:
+            day = self.today()
+            pages = max(int(pages or 1), 1)
+            self.days.setdefault(day, {}).setdefault(email, {})[job_id] = pages
+            self.jobs[job_id] = (day, email)
+            self.touched[job_id] = (day, email, pages)
+            self._save()
+
+    def settle(self, job_id: str, pages: int):
+        """服务端报告的实际页数（extract_progress.total_pages）"""
+        with self.lock:
+            if job_id not in self.jobs or not pages:
+                return
+            day, email = self.jobs[job_id]
+            jobs = self.days.setdefault(day, {}).setdefault(email, {})
+            if jobs.get(job_id) == pages:
+                return
+            jobs[job_id] = pages
+            self.touched[job_id] = (day, email, pages)
+            self._save()
+
+    def release(self, job_id: str):
+        """服务端处理失败的任务不占用额度"""
+        with self.lock:
+            if job_id not in self.jobs:
+                return
+            day, email = self.jobs.pop(job_id)
+            self.days.get(day, {}).get(email, {}).pop(job_id, None)
+            self.touched[job_id] = (day, email, None)
+            self._save()
+
+    def finish(self, job_id: str):
+        """任务结束（完成或不再跟踪）：页数已定，不再需要更正或释放"""
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+    # ==================== 查询 ====================
+
+    def used(self, email: str) -> int:
+        """账户今天已提交的页数"""
+        with self.lock:
+            self._refresh()
+            return sum(self.days.get(self.today(), {}).get(email, {}).values())
+
+    def remaining(self, email: str) -> int:
+        """账户今天剩余的页数额度"""
+        return max(self.daily_pages - self.used(email), 0)
+
+    def status(self, email: str) -> Dict:
+        used = self.used(email)
+        return {
+            'pages_today': used,
+            'quota_remaining': max(self.daily_pages - used, 0),
+            'daily_pages': self.daily_pages
+        }
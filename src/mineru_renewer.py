@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+MinerU Token 后台续期
+- 按每个账户的 expired_at 提前续期（默认提前7天，MINERU_RENEW_BEFORE_DAYS）
+- 用 batch_login.py 保存的登录 Cookie（all_cookies.json）调用 /api/v4/tokens：先创建新 Token，
+  写入 all_tokens.json（原子替换）并热更新账户池，宽限期后再删除旧 Token，进行中的任务不受影响
+- Cookie 缺失或过期的账户只记录警告，需要重新运行 batch_login.py
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from niquests import AsyncSession
+
+from mineru_accounts import AccountPool
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_BASE_URL = 'https://mineru.net/api/v4'
+
+
+def write_json_atomic(path, data):
+    """写入临时文件后原子替换，读取方不会看到写了一半的文件"""
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_json(path) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def parse_time(value: str) -> Optional[datetime]:
+    """解析 expired_at（ISO 格式，无时区按UTC）"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def cookie_expiry(uaa_token: str) -> Optional[datetime]:
+    """读取登录 Cookie（JWT）的过期时间，不校验签名"""
+    try:
+        payload = uaa_token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return datetime.fromtimestamp(claims['exp'], timezone.utc)
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _headers(uaa_token: str) -> Dict:
+    return {'authorization': f'Bearer {uaa_token}', 'content-type': 'application/json'}
+
+
+async def create_token(session: AsyncSession, base_url: str, uaa_token: str, token_name: str) -> Optional[Dict]:
+    """用登录Cookie创建 API Token，返回 {'token', 'expired_at', ...}，失败返回 None"""
+    response = await session.post(f"{base_url}/tokens", headers=_headers(uaa_token),
+                                  json={'token_name': token_name}, timeout=30)
+    if response.status_code != 200:
+        logger.warning("⚠️  创建Token失败: HTTP %s", response.status_code)
+        return None
+    result = response.json()
+    if result.get('code', 0) != 0:
+        logger.warning("⚠️  创建Token失败: %s", result.get('msg'))
+        return None
+    return result['data']
+
+
+async def delete_tokens(session: AsyncSession, base_url: str, uaa_token: str, keep: set) -> int:
+    """删除账户下名称不在 keep 中的 Token，返回删除数量"""
+    headers = _headers(uaa_token)
+    response = await session.get(f"{base_url}/tokens", headers=headers, timeout=30)
+    if response.status_code != 200:
+        logger.warning("⚠️  获取Token列表失败: HTTP %s", response.status_code)
+        return 0
+    deleted = 0
+    for token in response.json()['data'].get('list', []):
+        if token['token_name'] in keep:
+            continue
+        r = await session.delete(f"{base_url}/tokens/{token['id']}", headers=headers, timeout=30)
+        if r.status_code == 200:
+            deleted += 1
+            logger.debug("🗑️  已删除旧Token: %s", token['token_name'])
+    return deleted
+
+
+class TokenRenewer:
+    """后台 Token 续期服务"""
+
+    def __init__(self, tokens_file=None, cookies_file=None, base_url: Optional[str] = None,
+                 renew_before: Optional[timedelta] = None, check_interval: float = 3600.0,
+                 delete_grace: float = 120.0):
+        """
+        Args:
+            tokens_file: Token文件（默认项目根目录 all_tokens.json）
+            cookies_file: 登录Cookie文件（默认项目根目录 all_cookies.json）
+            base_url: API地址（默认读取 MINERU_BASE_URL）
+            renew_before: 提前多久续期（默认读取 MINERU_RENEW_BEFORE_DAYS，再默认7天）
+            check_interval: 最长检查间隔（秒）
+            delete_grace: 新 Token 生效后多久删除旧 Token（秒），让进行中的请求用完旧 Token
+        """
+        self.tokens_file = Path(tokens_file or PROJECT_ROOT / 'all_tokens.json')
+        self.cookies_file = Path(cookies_file or PROJECT_ROOT / 'all_cookies.json')
+        self.base_url = (base_url or os.environ.get('MINERU_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.renew_before = renew_before if renew_before is not None else timedelta(
+            days=float(os.environ.get('MINERU_RENEW_BEFORE_DAYS', 7))
+        )
+        self.check_interval = check_interval
+        self.delete_grace = delete_grace
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.pending: List[asyncio.Task] = []  # 等待删除旧 Token 的任务
+        self.warned: set = set()
+        self.retry_at: Dict[str, datetime] = {}  # 续期失败的账户下次重试时间
+
+    # ==================== 调度 ====================
+
+    def due(self, info: Dict, now: Optional[datetime] = None) -> bool:
+        """是否需要续期"""
+        expired_at = parse_time(info.get('expired_at', ''))
+        return expired_at is None or expired_at - (now or datetime.now(timezone.utc)) <= self.renew_before
+
+    def next_check(self, tokens: Dict[str, Dict]) -> float:
+        """距离下一个账户需要续期的秒数（不超过 check_interval）"""
+        now = datetime.now(timezone.utc)
+        wait = self.check_interval
+        for email, info in tokens.items():
+            expired_at = parse_time(info.get('expired_at', ''))
+            if expired_at is None:
+                continue
+            at = expired_at - self.renew_before
+            if email in self.retry_at:
+                at = max(at, self.retry_at[email])
+            wait = min(wait, (at - now).total_seconds())
+        return max(wait, 1.0)
+
+    def trigger(self):
+        """立即检查一次（如发现已过期的Token时）"""
+        self.wakeup.set()
+
+    def start(self) -> asyncio.Task:
+        """在当前事件循环中启动后台续期"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def stop(self):
+        tasks = [t for t in [self.task, *self.pending] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self.pending.clear()
+
+    async def run(self):
+        """循环：续期到期的账户，然后睡到下一个账户到期（或被 trigger 唤醒）"""
+        logger.info("🔄 Token 后台续期已启动（提前 %s）", self.renew_before)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("❌ Token 续期检查失败: %s", e)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.next_check(load_json(self.tokens_file)))
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def run_once(self, force: bool = False) -> Dict[str, str]:
+        """
+        续期所有到期的账户，返回 {邮箱: renewed/no_cookies/cookie_expired/failed}
+        
+        续期失败的账户 check_interval 后再试（force=True 时立即重试）
+        """
+        async with self.lock:
+            now = datetime.now(timezone.utc)
+            tokens = load_json(self.tokens_file)
+            due = [email for email, info in tokens.items()
+                   if self.due(info, now) and (force or self.retry_at.get(email, now) <= now)]
+            if not due:
+                return {}
+            cookies = load_json(self.cookies_file)
+            outcome = {}
+            async with AsyncSession() as session:
+                for email in due:
+                    outcome[email] = await self._renew(session, email, cookies.get(email, {}))
+                    if outcome[email] == 'renewed':
+                        self.retry_at.pop(email, None)
+                    else:
+                        self.retry_at[email] = now + timedelta(seconds=self.check_interval)
+            return outcome
+
+    # ==================== 续期 ====================
+
+    async def _renew(self, session: AsyncSession, email: str, cookies: Dict) -> str:
+        uaa_token = cookies.get('uaa-token')
+        if not uaa_token:
+            self._warn_once(email, "⚠️  %s 没有保存的登录Cookie，无法自动续期，请运行 batch_login.py")
+            return 'no_cookies'
+        cookie_exp = cookie_expiry(uaa_token)
+        if cookie_exp is not None and cookie_exp <= datetime.now(timezone.utc):
+            self._warn_once(email, "⚠️  %s 的登录Cookie已过期，无法自动续期，请运行 batch_login.py")
+            return 'cookie_expired'
+
+        token_name = f"token-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        try:
+            created = await create_token(session, self.base_url, uaa_token, token_name)
+            if created is None:
+                # 可能达到 Token 数量上限：先删除未在使用的旧 Token 再创建
+                current = load_json(self.tokens_file).get(email, {}).get('token_name')
+                await delete_tokens(session, self.base_url, uaa_token, keep={current})
+                created = await create_token(session, self.base_url, uaa_token, token_name)
+            if created is None:
+                logger.error("❌ %s Token 续期失败", email)
+                return 'failed'
+        except Exception as e:
+            logger.error("❌ %s Token 续期失败: %s", email, e)
+            return 'failed'
+
+        self._swap(email, token_name, created)
+        logger.info("✅ %s Token 已续期，新过期时间 %s", email, created['expired_at'])
+        self.warned.discard(email)
+
+        task = asyncio.create_task(self._delete_later(uaa_token, token_name))
+        self.pending = [t for t in self.pending if not t.done()] + [task]
+        return 'renewed'
+
+    async def _delete_later(self, uaa_token: str, token_name: str):
+        await asyncio.sleep(self.delete_grace)
+        try:
+            async with AsyncSession() as session:
+                await delete_tokens(session, self.base_url, uaa_token, keep={token_name})
+        except Exception as e:
+            logger.warning("⚠️  删除旧Token失败: %s", e)
+
+    def _swap(self, email: str, token_name: str, created: Dict):
+        """写入新 Token（重新读取文件，只改这一个账户）并热更新账户池"""
+        tokens = load_json(self.tokens_file)
+        info = tokens.get(email, {})
+        tokens[email] = {
+            **info,
+            'name': info.get('name', email),
+            'token_name': token_name,
+            'token': created['token'],
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'expired_at': created['expired_at']
+        }
+        write_json_atomic(self.tokens_file, tokens)
+        AccountPool.shared(str(self.tokens_file), tokens)
+
+    def _warn_once(self, email: str, message: str):
+        if email not in self.warned:
+            self.warned.add(email)
+            logger.warning(message, email)
+
+
+# 使用示例
+if __name__ == '__main__':
+    from mineru_logging import setup_logging
+
+    setup_logging()
+
+    async def main():
+        renewer = TokenRenewer(delete_grace=0)
+        outcome = await renewer.run_once()
+        await asyncio.gather(*renewer.pending)
+        if not outcome:
+            print("✅ 没有需要续期的Token")
+        for email, result in outcome.items():
+            print(f"{email}: {result}")
+
+    asyncio.run(main())
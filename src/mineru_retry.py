@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+MinerU 重试引擎
+- 指数退避 + 全抖动（full jitter），每个阶段单独设置尝试次数和等待预算
+- 错误分类：网络中断、超时、408/425/429/5xx、网关返回的非JSON页面 → 可重试；
+  其他4xx和业务错误码 → 不重试
+- 非幂等阶段（申请上传链接、提交URL任务）只在请求确定未被处理时重试：连接未建立、429、503；
+  读超时、连接中途断开、其他5xx时服务端可能已创建任务，重试会重复创建并消耗额度
+- 只重试失败的阶段：重新获取上传链接、对同一上传链接重新PUT、轮询同一 batch_id、
+  下载用 Range 从断点续传，不会因为后面的阶段失败而重新上传
+- MINERU_RETRY_DELAY_SCALE 缩放等待时间（测试/基准针对模拟服务器时使用）
+"""
+import asyncio
+import logging
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from mineru_metrics import RETRIES
+from mineru_tracing import TRACER
+
+try:
+    from niquests import exceptions as http_errors
+    from urllib3.exceptions import NewConnectionError
+    _NETWORK_ERRORS = (http_errors.ConnectionError, http_errors.Timeout, http_errors.ChunkedEncodingError)
+    _CONNECT_TIMEOUT = (http_errors.ConnectTimeout,)
+except ImportError:  # pragma: no cover
+    NewConnectionError = None
+    _NETWORK_ERRORS = _CONNECT_TIMEOUT = ()
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+REJECTED_STATUS = {429, 503}    # 服务端明确拒绝、未处理请求的状态码（非幂等阶段也可重试）
+
+
+class RetryableError(Exception):
+    """可重试错误（retry_after 为服务端要求的最短等待秒数，status 为HTTP状态码）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+def is_unsent(error: BaseException) -> bool:
+    """请求确定没有到达服务端：连接未建立（拒绝、DNS失败、连接超时）"""
+    if isinstance(error, _CONNECT_TIMEOUT + (ConnectionRefusedError,)):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return NewConnectionError is not None and isinstance(reason, NewConnectionError)
+
+
+def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    错误是否值得重试
+
+    Args:
+        idempotent: 请求是否幂等；非幂等请求只在服务端确定未处理时重试（连接未建立、429、503）
+    """
+    if isinstance(error, RetryableError):
+        return idempotent or error.status in REJECTED_STATUS
+    if not idempotent:
+        return is_unsent(error)
+    return isinstance(error, _NETWORK_ERRORS + (ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def check_status(response):
+    """429/5xx 等状态码转换为可重试错误"""
+    if response.status_code in RETRYABLE_STATUS:
+        raise RetryableError(f"HTTP {response.status_code}", _retry_after(response), response.status_code)
+    return response
+
+
+def parse_json(response) -> Dict:
+    """检查状态码并解析JSON（网关错误页等无法解析的响应视为可重试）"""
+    check_status(response)
+    try:
+        return response.json()
+    except ValueError:
+        raise RetryableError(f"HTTP {response.status_code}: 响应不是JSON", status=response.status_code)
+
+
+@dataclass
+class RetryPolicy:
+    """单个阶段的重试策略"""
+    attempts: int = 5          # 最多尝试次数（含第一次）
+    base_delay: float = 1.0    # 首次重试的退避上限（秒）
+    max_delay: float = 30.0    # 单次退避上限（秒）
+    budget: float = 120.0      # 本阶段累计等待上限（秒）
+    idempotent: bool = True    # 非幂等阶段只重试确定未被处理的请求
+
+    def backoff(self, retry: int, rng: random.Random) -> float:
+        """第 retry 次重试前的等待（全抖动）"""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+DEFAULT_POLICIES = {
+    'get_upload_url': RetryPolicy(attempts=5, base_delay=1.0, budget=60, idempotent=False),
+    'submit_url': RetryPolicy(attempts=5, base_delay=1.0, budget=60, idempotent=False),
+    'put': RetryPolicy(attempts=4, base_delay=2.0, budget=120),
+    'poll': RetryPolicy(attempts=8, base_delay=1.0, budget=120),
+    'download': RetryPolicy(attempts=6, base_delay=1.0, budget=180),
+}
+
+
+class RetryEngine:
+    """按阶段重试异步调用"""
+
+    def __init__(self, policies: Optional[Dict[str, RetryPolicy]] = None,
+                 delay_scale: Optional[float] = None, seed: Optional[int] = None):
+        """
+        Args:
+            policies: 覆盖的阶段策略（未列出的阶段使用 DEFAULT_POLICIES）
+            delay_scale: 等待时间缩放（默认读取 MINERU_RETRY_DELAY_SCALE，再默认1）
+            seed: 抖动随机种子
+        """
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.delay_scale = delay_scale if delay_scale is not None else float(
+            os.environ.get('MINERU_RETRY_DELAY_SCALE', 1)
+        )
+        self.rng = random.Random(seed)
+
+    async def call(self, stage: str, fn: Callable[[], Awaitable[Any]], account: str = '') -> Any:
+        """
+        调用 fn()，可重试错误按阶段策略退避后重试，预算用尽或不可重试时抛出最后的错误
+
+        fn 每次调用都应只重做本阶段（如续传时从已下载的位置继续）
+        """
+        policy = self.policies.get(stage) or RetryPolicy()
+        waited = 0.0
+        attempt = 1
+        while True:
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_retryable(e, policy.idempotent) or attempt >= policy.attempts:
+                    raise
+                delay = policy.backoff(attempt - 1, self.rng)
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after:
+                    delay = max(delay, min(retry_after, policy.max_delay))
+                if waited + delay > policy.budget:
+                    raise
+                waited += delay
+                RETRIES.labels(account, stage).inc()
+                logger.warning("🔁 %s 失败（%s），%.1f秒后第%d次重试", stage, e, delay, attempt)
+                await asyncio.sleep(delay * self.delay_scale)
+                attempt += 1
+                continue
+            if attempt > 1:
+                TRACER.current_span().set_attribute('retries', attempt - 1)
+            return result
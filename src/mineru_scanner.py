@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+MinerU 目录扫描器
+- 基于 os.scandir，复用目录项的 stat 结果
+- 支持递归、多个文件模式、排除规则
+- 生成器逐个产出文件，扫描与处理可以流水线进行，内存有界
+"""
+import fnmatch
+import os
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# 默认跳过的目录：隐藏目录和本工具生成的输出目录
+DEFAULT_EXCLUDES = ('.*', '*_result', '*_images')
+
+
+def split_patterns(patterns: Union[str, Iterable[str], None]) -> List[str]:
+    """拆分文件模式：支持 "*.pdf,*.docx" 或 "*.pdf *.docx" 或列表"""
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    result = []
+    for item in patterns:
+        result.extend(p.strip() for p in item.replace(',', ' ').split() if p.strip())
+    return result
+
+
+def _matches(name: str, patterns: List[str]) -> bool:
+    """文件名是否匹配任一模式（不区分大小写）"""
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+
+def compile_filter(patterns: Union[str, Iterable[str], None] = '*.pdf',
+                   excludes: Union[str, Iterable[str], None] = None,
+                   recursive: bool = False) -> Tuple[List[str], List[str], bool]:
+    """
+    解析扫描规则
+
+    Returns:
+        (包含模式, 排除模式, 是否递归)："**/" 前缀隐含递归
+    """
+    include = []
+    for p in split_patterns(patterns) or ['*']:
+        if p.startswith('**/'):
+            recursive = True
+            p = p[3:]
+        include.append(p.lower())
+
+    exclude = [p.lower() for p in DEFAULT_EXCLUDES]
+    exclude.extend(p.lower() for p in split_patterns(excludes))
+    return include, exclude, recursive
+
+
+def match_path(path: str, root: str, patterns: Union[str, Iterable[str], None] = '*.pdf',
+               excludes: Union[str, Iterable[str], None] = None,
+               recursive: bool = False) -> bool:
+    """判断单个路径是否符合扫描规则（用于文件系统事件过滤）"""
+    include, exclude, recursive = compile_filter(patterns, excludes, recursive)
+    root = os.path.abspath(os.path.expanduser(root))
+    rel = os.path.relpath(os.path.abspath(path), root)
+    parts = rel.split(os.sep)
+
+    if rel.startswith(os.pardir) or (len(parts) > 1 and not recursive):
+        return False
+    if any(_matches(part, exclude) for part in parts):
+        return False
+    return _matches(parts[-1], include)
+
+
+def scan_files(root: str, patterns: Union[str, Iterable[str], None] = '*.pdf',
+               excludes: Union[str, Iterable[str], None] = None,
+               recursive: bool = False) -> Iterator[os.DirEntry]:
+    """
+    扫描目录下匹配的文件
+
+    Args:
+        root: 目录路径
+        patterns: 文件模式（如 "*.pdf,*.docx"），"**/*.pdf" 隐含递归
+        excludes: 额外排除的文件/目录模式（默认已排除隐藏目录和输出目录）
+        recursive: 是否递归扫描子目录
+
+    Yields:
+        os.DirEntry（每个目录内按名称排序）
+    """
+    include, exclude, recursive = compile_filter(patterns, excludes, recursive)
+
+    stack = [os.path.abspath(os.path.expanduser(root))]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if _matches(entry.name, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirs.append(entry.path)
+                elif entry.is_file() and _matches(entry.name, include):
+                    yield entry
+            except OSError:
+                continue
+
+        # 倒序入栈，保证按名称顺序深度优先遍历
+        stack.extend(reversed(subdirs))
+
+
+# 使用示例
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print("用法: python3 mineru_scanner.py <dir> [pattern] [--recursive]")
+        print("示例: python3 mineru_scanner.py ~/Downloads '*.pdf,*.docx' --recursive")
+        sys.exit(1)
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    count = 0
+    for entry in scan_files(args[0], args[1] if len(args) > 1 else '*.pdf',
+                            recursive='--recursive' in sys.argv):
+        print(entry.path)
+        count += 1
+    print(f"✅ 共 {count} 个文件")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+MinerU 文档调度策略
+- fifo  按提交（文件名）顺序
+- lpt   最长的先处理：大文档不会排在最后单独拖长总耗时（批量处理默认）
+- sjf   最短的先处理：平均完成时间最短，小文档不会排在大文档后面（MCP 服务器默认）
+- 任务大小按页数估算（以“页”为单位）：没有页数时按格式的典型每页字节数估算，图片按1页；
+  本地文件另加上传和下载的耗时（每 BYTES_PER_PAGE_TRANSFER 字节约相当于处理1页）
+- 配置了处理历史（mineru_history.Predictor）时统一以秒为单位：按预测的服务端耗时排序，
+  历史不足时用页数估算 × 每页耗时，历史在队列等待期间变得足够时，前后入队的文档仍可直接比较
+- MINERU_SCHEDULE 修改默认策略
+"""
+import os
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+FIFO = 'fifo'
+LPT = 'lpt'
+SJF = 'sjf'
+POLICIES = (FIFO, LPT, SJF)
+
+# 没有页数时按格式估算：典型的每页字节数
+BYTES_PER_PAGE = {
+    'pdf': 100_000,
+    'doc': 30_000,
+    'docx': 30_000,
+    'ppt': 200_000,
+    'pptx': 200_000,
+    'html': 50_000,
+}
+IMAGE_FORMATS = {'png', 'jpg', 'jpeg'}
+DEFAULT_PAGES = 10                    # 大小和页数都未知（如尚未验证的URL）
+BYTES_PER_PAGE_TRANSFER = 1_000_000   # 上传/下载这么多字节约相当于服务端处理1页
+
+T = TypeVar('T')
+
+
+def estimate_pages(file_info: Dict) -> float:
+    """文档页数（未知时按大小和格式估算）"""
+    if file_info.get('pages'):
+        return float(file_info['pages'])
+    if file_info.get('format') in IMAGE_FORMATS:
+        return 1.0
+    size = file_info.get('size')
+    if not size:
+        return float(DEFAULT_PAGES)
+    return max(1.0, size / BYTES_PER_PAGE.get(file_info.get('format'), BYTES_PER_PAGE['pdf']))
+
+
+def job_cost(file_info: Dict) -> float:
+    """任务大小（页）：服务端处理页数 + 本地文件上传的字节数折算"""
+    transfer = 0 if file_info.get('is_url') else file_info.get('size') or 0
+    return estimate_pages(file_info) + transfer / BYTES_PER_PAGE_TRANSFER
+
+
+class Scheduler:
+    """按策略给等待处理的文档排序（priority 越小越先处理，相同时先到先得）"""
+
+    def __init__(self, policy: Optional[str] = None, default: str = FIFO, predictor=None):
+        """
+        Args:
+            policy: fifo / lpt / sjf（默认读取 MINERU_SCHEDULE，再默认 default）
+            default: 未指定时的策略
+            predictor: 处理耗时预测（mineru_history.Predictor，可选），历史足够时按预测耗时排序
+        """
+        policy = (policy or os.environ.get('MINERU_SCHEDULE') or default).lower()
+        if policy not in POLICIES:
+            raise ValueError(f"未知调度策略: {policy}（可选: {', '.join(POLICIES)}）")
+        self.policy = policy
+        self.predictor = predictor
+
+    @property
+    def reorders(self) -> bool:
+        return self.policy != FIFO
+
+    def cost(self, file_info: Dict, options: Optional[Dict] = None) -> float:
+        """
+        任务大小：没有 predictor 时为页数估算；有 predictor 时总是秒
+        （预测的耗时，历史不足时为页数估算 × predictor.seconds_per_page()）
+        """
+        if self.predictor is None:
+            return job_cost(file_info)
+        predicted = self.predictor.cost(file_info, options)
+        if predicted is not None:
+            return predicted
+        return job_cost(file_info) * self.predictor.seconds_per_page()
+
+    def priority(self, file_info: Dict, options: Optional[Dict] = None) -> float:
+        """options 为处理选项（模型、公式、表格，影响预测耗时）"""
+        if self.policy == LPT:
+            return -self.cost(file_info, options)
+        if self.policy == SJF:
+            return self.cost(file_info, options)
+        return 0.0
+
+    def order(self, items: Iterable[T], info: Callable[[T], Dict] = lambda item: item,
+              options: Optional[Dict] = None) -> List[T]:
+        """按策略排序（稳定排序，大小相同的保持原顺序）"""
+        return sorted(items, key=lambda item: self.priority(info(item), options))
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+MinerU 处理链路追踪（OpenTelemetry 风格）
+- 每个文档一条 trace：document → validate / get_upload_url / put / server_queue /
+  server_running / download / extract / organize
+- span 带 batch_id、账户、文件大小/页数等属性
+- 导出为 OTLP JSON（每行一个 ExportTraceServiceRequest，与 OTel Collector 文件导出格式一致）
+- 默认关闭：设置环境变量 MINERU_TRACE_FILE=traces.jsonl 开启，关闭时返回空操作 span
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+SERVICE_NAME = 'mineru'
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('mineru_current_span', default=None)
+
+
+def _otlp_value(value: Any) -> Dict:
+    """属性值转换为 OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    """一个处理阶段"""
+
+    def __init__(self, tracer: 'Tracer', name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict] = None, start_ns: Optional[int] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def end(self, error: Optional[str] = None, end_ns: Optional[int] = None):
+        """结束并导出（重复调用无效）"""
+        if self.end_ns is not None:
+            return
+        if error:
+            self.error = str(error)
+        self.end_ns = end_ns or time.time_ns()
+        self.tracer._export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+        return False
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """追踪关闭时使用：所有操作为空"""
+
+    trace_id = span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def end(self, error=None, end_ns=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Activation:
+    """把已有 span 设为当前 span（不结束它）"""
+
+    def __init__(self, span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        if isinstance(self.span, Span):
+            self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _current_span.reset(self._token)
+        return False
+
+
+class FileExporter:
+    """后台线程批量写入 OTLP JSON 行"""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 512):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='mineru-trace-exporter')
+        self._thread.start()
+
+    def export(self, span: Span):
+        self.queue.put(span)
+
+    def _drain(self) -> List[Span]:
+        spans = []
+        while len(spans) < self.batch_size:
+            try:
+                spans.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _write(self, spans: List[Span]):
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}}
+            ]},
+            'scopeSpans': [{'scope': {'name': 'mineru'}, 'spans': [s.to_otlp() for s in spans]}]
+        }]}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        while True:
+            spans = self._drain()
+            if not spans:
+                return
+            try:
+                self._write(spans)
+            except OSError:
+                return
+
+    def shutdown(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+class Tracer:
+    """追踪器"""
+
+    def __init__(self):
+        self.exporter: Optional[FileExporter] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, path: str, flush_interval: float = 1.0):
+        """开启追踪并导出到文件"""
+        if self.exporter is None:
+            self.exporter = FileExporter(path, flush_interval)
+            atexit.register(self.shutdown)
+
+    def configure_from_env(self) -> bool:
+        """根据环境变量 MINERU_TRACE_FILE 开启，返回是否开启"""
+        path = os.environ.get('MINERU_TRACE_FILE')
+        if path:
+            self.configure(path)
+        return self.enabled
+
+    def shutdown(self):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+    def _export(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    # ==================== 创建 span ====================
+
+    @staticmethod
+    def current_span():
+        """当前 span（没有时返回空操作 span）"""
+        return _current_span.get() or NOOP_SPAN
+
+    def start_span(self, name: str, attributes: Optional[Dict] = None, parent=None,
+                   start_ns: Optional[int] = None):
+        """
+        创建 span（需手动 end()；用作 with 语句时自动成为当前 span 并在退出时结束）
+
+        Args:
+            name: 阶段名
+            attributes: 属性
+            parent: 父 span（默认当前 span，没有则开启新 trace）
+            start_ns: 开始时间（用于补记已经发生的阶段）
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = parent if isinstance(parent, Span) else _current_span.get()
+        if parent is None:
+            return Span(self, name, os.urandom(16).hex(), None, attributes, start_ns)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes, start_ns)
+
+    span = start_span
+
+    def record_span(self, name: str, start: float, end: float, attributes: Optional[Dict] = None):
+        """补记一个已经结束的阶段（start/end 为 time.time() 秒）"""
+        if self.exporter is None:
+            return
+        span = self.start_span(name, attributes, start_ns=int(start * 1e9))
+        span.end(end_ns=int(end * 1e9))
+
+    @staticmethod
+    def activate(span) -> _Activation:
+        """在 with 块内把 span 设为当前 span（不结束）"""
+        return _Activation(span)
+
+
+TRACER = Tracer()
+
+
+# 使用示例
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print("用法: python3 mineru_tracing.py <traces.jsonl>")
+        print("  汇总 trace 文件中各阶段耗时（最慢的10个文档）")
+        sys.exit(1)
+
+    documents = []
+    stages: Dict[str, List[float]] = {}
+    with open(sys.argv[1], encoding='utf-8') as f:
+        for line in f:
+            for resource in json.loads(line)['resourceSpans']:
+                for scope in resource['scopeSpans']:
+                    for span in scope['spans']:
+                        seconds = (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e9
+                        attrs = {a['key']: list(a['value'].values())[0] for a in span['attributes']}
+                        if span['name'] == 'document':
+                            documents.append((seconds, attrs.get('file.name'), attrs.get('batch_id')))
+                        else:
+                            stages.setdefault(span['name'], []).append(seconds)
+
+    print("📊 各阶段耗时（秒）")
+    for name, values in sorted(stages.items()):
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"  {name:16s} n={len(values):<6d} p50={values[len(values) // 2]:.2f}  p95={p95:.2f}  max={values[-1]:.2f}")
+
+    print("\n🐢 最慢的文档")
+    for seconds, name, batch_id in sorted(documents, reverse=True)[:10]:
+        print(f"  {seconds:8.1f}s  {name}  batch_id={batch_id}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+MinerU URL 元数据缓存和按主机并发限制
+- 缓存每个URL验证得到的大小、格式、ETag/Last-Modified，再次验证时发条件请求
+  （If-None-Match / If-Modified-Since），304 直接使用缓存，不再探测格式
+- 缓存文件默认 ~/.cache/mineru/url_cache.json（MINERU_URL_CACHE 修改，设为 off 关闭持久化）
+- HostLimiter：URL 验证并发进行，同一主机最多 per_host 个请求（MINERU_URL_PER_HOST，默认4）
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_CACHE_FILE = Path.home() / '.cache' / 'mineru' / 'url_cache.json'
+
+# 缓存的元数据字段（来自验证结果）
+FIELDS = ('name', 'size', 'format', 'etag', 'last_modified')
+
+
+class UrlCache:
+    """URL 元数据缓存（JSON 文件，修改后 save() 原子写入）"""
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Optional[str] = None, max_entries: int = 10000):
+        """
+        Args:
+            cache_file: 缓存文件（None 为只在内存中缓存）
+            max_entries: 最多缓存的URL数，超出时淘汰最久未验证的
+        """
+        self.cache_file = Path(cache_file).expanduser() if cache_file else None
+        self.max_entries = max_entries
+        self.entries = self._load()
+        self.dirty = False
+
+    @classmethod
+    def from_env(cls) -> 'UrlCache':
+        """按 MINERU_URL_CACHE 创建（off/0 为只在内存中缓存）"""
+        value = os.environ.get('MINERU_URL_CACHE', str(DEFAULT_CACHE_FILE))
+        return cls(None if value.lower() in ('', '0', 'off', 'false') else value)
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.cache_file is None:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data.get('urls', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {}
+
+    def save(self):
+        """原子写入缓存"""
+        if not self.dirty or self.cache_file is None:
+            return
+        if len(self.entries) > self.max_entries:
+            oldest = sorted(self.entries, key=lambda url: self.entries[url].get('checked_at', 0))
+            for url in oldest[:len(self.entries) - self.max_entries]:
+                del self.entries[url]
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_name(f'{self.cache_file.name}.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'urls': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_file)
+        self.dirty = False
+
+    # ==================== 读写 ====================
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """条件请求头（没有缓存或缓存没有校验字段时为空）"""
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, file_info: Dict):
+        """记录一次验证结果"""
+        self.entries[url] = {**{k: file_info.get(k) for k in FIELDS}, 'checked_at': time.time()}
+        self.dirty = True
+
+    def touch(self, url: str):
+        """304：缓存仍然有效"""
+        self.entries[url]['checked_at'] = time.time()
+        self.dirty = True
+
+    def discard(self, url: str):
+        if self.entries.pop(url, None) is not None:
+            self.dirty = True
+
+
+class HostLimiter:
+    """按主机限制并发（同一主机最多 per_host 个，总数最多 total 个）"""
+
+    def __init__(self, per_host: Optional[int] = None, total: int = 32):
+        self.per_host = per_host or int(os.environ.get('MINERU_URL_PER_HOST', 4))
+        self.total = asyncio.Semaphore(total)
+        self.hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @contextlib.asynccontextmanager
+    async def limit(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc.lower()
+        semaphore = self.hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore, self.total:
+            yield
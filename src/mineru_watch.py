@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+MinerU 目录监听模式
+- 文件落入目录后数秒内开始处理，无需等待cron
+- Linux 使用 inotify（ctypes），其他平台或不可用时退化为轮询
+- 大小和mtime稳定一段时间后才入队，避免处理写了一半的文件
+- 待处理队列持久化为追加写的 JSONL 日志，重启后继续处理
+- 处理失败的文件记录大小和mtime，文件没有变化时不再重新提交
+- 基于 BatchAsyncProcessor.process_stream，沿用并发限制和增量清单
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mineru_manifest import ChangeManifest
+from mineru_scanner import compile_filter, match_path, scan_files
+
+
+# ==================== 持久化队列 ====================
+
+class PersistentQueue:
+    """
+    追加写的持久化队列
+
+    每行一条记录：{"op": "add", "path": ...} 或 {"op": "done", "path": ..., "status": ...}
+    （失败时附带文件的 "signature": [大小, mtime_ns]）。
+    启动时重放日志恢复未完成的文件，已完成记录过多时压缩日志。
+    """
+
+    COMPACT_THRESHOLD = 1000
+    FAILED = ('failed', 'invalid')
+
+    def __init__(self, journal_file: str):
+        self.journal_file = Path(journal_file)
+        self.lock = threading.Lock()
+        self.pending: Dict[str, float] = {}
+        self.failed: Dict[str, Tuple[int, int]] = {}  # 失败的文件 → 失败时的 (大小, mtime_ns)
+        self.finished = 0
+        self._replay()
+
+    def _replay(self):
+        """重放日志"""
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 崩溃时写了一半的行
+                    if record.get('op') == 'add':
+                        self.pending[record['path']] = record.get('time', 0)
+                        self.failed.pop(record['path'], None)
+                    elif record.get('op') == 'done':
+                        self.pending.pop(record['path'], None)
+                        if record.get('signature'):
+                            self.failed[record['path']] = tuple(record['signature'])
+                        self.finished += 1
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record: Dict):
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, path: str) -> bool:
+        """入队（已在队列中返回False）"""
+        with self.lock:
+            if path in self.pending:
+                return False
+            now = time.time()
+            self._append({'op': 'add', 'path': path, 'time': now})
+            self.pending[path] = now
+            self.failed.pop(path, None)
+            return True
+
+    def done(self, path: str, status: str = 'done', signature: Optional[Tuple[int, int]] = None):
+        """标记处理结束（失败时 signature 为文件当时的 (大小, mtime_ns)）"""
+        with self.lock:
+            if self.pending.pop(path, None) is None:
+                return
+            record = {'op': 'done', 'path': path, 'status': status, 'time': time.time()}
+            if status in self.FAILED and signature:
+                record['signature'] = list(signature)
+                self.failed[path] = tuple(signature)
+            self._append(record)
+            self.finished += 1
+            if self.finished >= self.COMPACT_THRESHOLD:
+                self._compact()
+
+    def failed_unchanged(self, path: str, signature: Optional[Tuple[int, int]]) -> bool:
+        """上次处理失败且文件没有变化（重新提交只会再次失败并消耗额度）"""
+        with self.lock:
+            return signature is not None and self.failed.get(path) == tuple(signature)
+
+    def _compact(self):
+        """只保留未完成的记录和失败文件的记录"""
+        tmp = self.journal_file.with_name(self.journal_file.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for path, signature in self.failed.items():
+                f.write(json.dumps({'op': 'done', 'path': path, 'status': 'failed', 'signature': list(signature)},
+                                   ensure_ascii=False) + '\n')
+            for path, added in self.pending.items():
+                f.write(json.dumps({'op': 'add', 'path': path, 'time': added}, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.journal_file)
+        self.finished = 0
+
+    def items(self) -> List[str]:
+        """未完成的文件（按入队顺序）"""
+        with self.lock:
+            return list(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
+
+
+# ==================== 写入完成检测 ====================
+
+class StabilityTracker:
+    """大小和mtime在 settle_seconds 内保持不变才认为写入完成"""
+
+    def __init__(self, settle_seconds: float = 2.0):
+        self.settle_seconds = settle_seconds
+        self.files: Dict[str, Tuple[int, int, float]] = {}
+
+    def observe(self, path: str):
+        """记录文件（已在跟踪中则等待下次检查）"""
+        if path not in self.files:
+            self.files[path] = (-1, -1, time.monotonic())
+
+    def ready(self) -> List[str]:
+        """返回已稳定的文件并停止跟踪"""
+        now = time.monotonic()
+        stable = []
+        for path, (size, mtime_ns, since) in list(self.files.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.files[path]  # 已删除或被移走
+                continue
+
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self.files[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.settle_seconds:
+                del self.files[path]
+                stable.append(path)
+        return stable
+
+    def __len__(self):
+        return len(self.files)
+
+
+# ==================== 文件系统事件 ====================
+
+class InotifyWatcher:
+    """基于 inotify 的事件源（仅Linux）"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory: str, recursive: bool = False, excludes=None):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify 仅支持 Linux')
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.libc = libc
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+
+        self.directory = os.path.abspath(directory)
+        self.recursive = recursive
+        self.exclude = compile_filter(None, excludes)[1]
+        self.watches: Dict[int, str] = {}
+        self._add_tree(self.directory)
+
+    def _add_watch(self, directory: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch 失败: {directory}')
+        self.watches[wd] = directory
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name.lower(), p) for p in self.exclude)
+
+    def _add_tree(self, directory: str):
+        """监听目录（递归模式下包括子目录）"""
+        self._add_watch(directory)
+        if not self.recursive:
+            return
+        for dirpath, dirnames, _ in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not self._excluded(d)]
+            for d in dirnames:
+                self._add_watch(os.path.join(dirpath, d))
+
+    def poll(self, timeout: float) -> Optional[List[str]]:
+        """
+        等待事件
+
+        Returns:
+            有变化的文件路径；事件队列溢出时返回 None（需要全量重扫）
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & self.IN_ISDIR:
+                # 新建的子目录：开始监听并交给重扫处理其中已有的文件（排除的目录如 *_result 输出目录忽略）
+                if self.recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO) \
+                        and not self._excluded(os.fsdecode(name)):
+                    try:
+                        self._add_tree(path)
+                    except OSError:
+                        pass
+                    return None
+                continue
+            paths.append(path)
+
+        return paths
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """轮询事件源：定期扫描，对比大小和mtime"""
+
+    def __init__(self, directory: str, patterns='*.pdf', excludes=None, recursive: bool = False):
+        self.directory = directory
+        self.patterns = patterns
+        self.excludes = excludes
+        self.recursive = recursive
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> Optional[List[str]]:
+        """等待 timeout 秒后扫描，返回新增或变化的文件"""
+        time.sleep(timeout)
+
+        current = {}
+        changed = []
+        for entry in scan_files(self.directory, self.patterns, self.excludes, self.recursive):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            current[entry.path] = (st.st_size, st.st_mtime_ns)
+            if self.snapshot.get(entry.path) != current[entry.path]:
+                changed.append(entry.path)
+
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+# ==================== 监听处理 ====================
+
+class DirectoryWatcher:
+    """监听目录并持续处理新文档"""
+
+    QUEUE_FILE = '.mineru_watch_queue.jsonl'
+
+    def __init__(self, directory: str, patterns='*.pdf', excludes=None, recursive: bool = False,
+                 settle_seconds: float = 2.0, poll_interval: float = 1.0,
+                 queue_file: Optional[str] = None, force_polling: bool = False):
+        """
+        初始化
+
+        Args:
+            directory: 监听目录
+            patterns: 文件模式（如 "*.pdf,*.docx"）
+            excludes: 排除的文件/目录模式
+            recursive: 是否监听子目录
+            settle_seconds: 文件大小稳定多久后视为写入完成
+            poll_interval: 事件等待/轮询间隔（秒）
+            queue_file: 持久化队列文件（默认 <directory>/.mineru_watch_queue.jsonl）
+            force_polling: 强制使用轮询（如网络文件系统上 inotify 收不到事件）
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.patterns = patterns
+        self.excludes = excludes
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+
+        self.queue = PersistentQueue(queue_file or os.path.join(self.directory, self.QUEUE_FILE))
+        self.tracker = StabilityTracker(settle_seconds)
+        self.manifest = ChangeManifest.for_directory(self.directory)
+        self.stop_event = threading.Event()
+        self.mode = None
+
+    def _open_watcher(self):
+        """优先 inotify，不可用时退化为轮询"""
+        if not self.force_polling:
+            try:
+                watcher = InotifyWatcher(self.directory, self.recursive, self.excludes)
+                self.mode = 'inotify'
+                return watcher
+            except (OSError, AttributeError) as e:
+                print(f"⚠️  inotify 不可用（{e}），使用轮询模式")
+        self.mode = 'polling'
+        return PollingWatcher(self.directory, self.patterns, self.excludes, self.recursive)
+
+    def _rescan(self):
+        """全量扫描：启动时和事件溢出时"""
+        for entry in scan_files(self.directory, self.patterns, self.excludes, self.recursive):
+            self.tracker.observe(entry.path)
+
+    def iter_ready(self, options: Optional[Dict] = None) -> Iterator[str]:
+        """
+        持续产出可以处理的文件（阻塞，直到 stop()）
+
+        顺序：上次未完成的文件 → 目录中未处理的文件 → 新落入的文件
+        """
+        for path in self.queue.items():
+            try:
+                if self.manifest.is_unchanged(path, options):
+                    self.queue.done(path, 'skipped')  # 上次处理完成但未来得及记录
+                    continue
+            except OSError:
+                self.queue.done(path, 'missing')
+                continue
+            yield path
+
+        watcher = self._open_watcher()
+        try:
+            self._rescan()
+            while not self.stop_event.is_set():
+                # 有待稳定的文件时缩短等待，尽快确认写入完成
+                timeout = min(self.poll_interval, 0.5) if len(self.tracker) else self.poll_interval
+                paths = watcher.poll(timeout)
+
+                if paths is None:
+                    self._rescan()
+                else:
+                    for path in paths:
+                        if match_path(path, self.directory, self.patterns, self.excludes, self.recursive):
+                            self.tracker.observe(path)
+
+                for path in self.tracker.ready():
+                    try:
+                        if self.manifest.is_unchanged(path, options):
+                            continue
+                        if self.queue.failed_unchanged(path, self._signature(path)):
+                            continue
+                    except OSError:
+                        continue
+                    if self.queue.add(path):
+                        yield path
+        finally:
+            watcher.close()
+
+    def stop(self):
+        """停止监听（正在处理的文件会完成）"""
+        self.stop_event.set()
+
+    async def run(self, processor, max_workers: Optional[int] = None):
+        """
+        监听并处理，直到 stop()
+
+        Args:
+            processor: BatchAsyncProcessor
+            max_workers: 固定并行度（默认自适应，从 processor.max_concurrent 开始）
+        """
+        return await processor.process_stream(
+            self.iter_ready(processor.upload_options),
+            max_workers=max_workers,
+            manifest=self.manifest,
+            on_done=self._on_done,
+            keep_results=False
+        )
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def _on_done(self, path: str, status: str):
+        """处理结束：先落盘清单再出队，进程被杀后已完成的文件不会重新处理；失败时记录文件当时的大小和mtime"""
+        self.manifest.save()
+        signature = None
+        if status in PersistentQueue.FAILED:
+            try:
+                signature = self._signature(path)
+            except OSError:
+                pass
+        self.queue.done(path, status, signature)
+
+
+# 使用示例
+if __name__ == '__main__':
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description='MinerU 目录监听：文件落入目录即自动处理')
+    parser.add_argument('directory', help='监听目录')
+    parser.add_argument('pattern', nargs='?', default='*.pdf', help='文件模式，多个用逗号分隔（默认 *.pdf）')
+    parser.add_argument('--recursive', '-r', action='store_true', help='监听子目录')
+    parser.add_argument('--exclude', default=None, help='排除的文件/目录模式，多个用逗号分隔')
+    parser.add_argument('--workers', type=int, default=None, help='固定并行度（默认从3开始自适应调整）')
+    parser.add_argument('--schedule', choices=['fifo', 'lpt', 'sjf'], default=None,
+                        help='调度策略：lpt 大文档先处理（默认）/ sjf 小文档先处理 / fifo 按文件名顺序')
+    parser.add_argument('--settle', type=float, default=2.0, help='文件大小稳定多少秒后开始处理（默认2）')
+    parser.add_argument('--interval', type=float, default=1.0, help='事件等待/轮询间隔秒数（默认1）')
+    parser.add_argument('--polling', action='store_true', help='强制轮询（网络文件系统）')
+    parser.add_argument('--quiet', '-q', action='store_true', help='安静模式：日志只输出警告和错误')
+    args = parser.parse_args()
+
+    from mineru_batch_async import BatchAsyncProcessor
+    from mineru_logging import setup_logging
+    from mineru_metrics import REGISTRY
+    from mineru_tracing import TRACER
+
+    setup_logging(quiet=args.quiet or None)
+    REGISTRY.configure_from_env()
+    TRACER.configure_from_env()
+
+    watcher = DirectoryWatcher(
+        args.directory, args.pattern, args.exclude, args.recursive,
+        settle_seconds=args.settle, poll_interval=args.interval, force_polling=args.polling
+    )
+    processor = BatchAsyncProcessor(max_concurrent=args.workers or 3, policy=args.schedule)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, watcher.stop)
+            except NotImplementedError:
+                pass
+        print(f"👀 监听 {watcher.directory} ({args.pattern})，Ctrl+C 停止")
+        return await watcher.run(processor, max_workers=args.workers)
+
+    _, stats = asyncio.run(main())
+    print(f"👋 已停止：处理 {stats['processed']} 个文件（失败 {stats['failed']} 个），"
+          f"队列剩余 {len(watcher.queue)} 个")
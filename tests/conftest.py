@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+共享测试夹具：本地模拟服务器、测试Token、PDF生成、可控时钟
+"""
+import json
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+from PyPDF2 import PdfWriter
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'tools'))
+
+from mineru_mock_server import MockConfig, MockMinerUServer
+
+
+def make_pdf(path: Path, pages: int) -> Path:
+    """生成指定页数的空白PDF"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return path
+
+
+def token_info(token, expired_at='2099-01-01T00:00:00Z'):
+    """all_tokens.json 中一个账户的记录"""
+    return {'name': token, 'token_name': token, 'token': token,
+            'created_at': '2026-01-01T00:00:00Z', 'expired_at': expired_at}
+
+
+class Clock:
+    """可控时钟：注入到熔断器、并发上限、额度账本等，测试中直接设置 now"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def tokens_file(tmp_path):
+    path = tmp_path / 'all_tokens.json'
+    path.write_text(json.dumps({'mock@example.com': {
+        'name': 'mock', 'token_name': 'mock', 'token': 'mock-token',
+        'created_at': '2026-01-01T00:00:00Z', 'expired_at': '2099-01-01T00:00:00Z'
+    }}))
+    return str(path)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv('MINERU_POLL_INTERVAL', '0.05')
+    monkeypatch.setenv('MINERU_RETRY_DELAY_SCALE', '0.01')
+    monkeypatch.setenv('MINERU_URL_CACHE', 'off')
+    monkeypatch.setenv('MINERU_QUOTA_LEDGER', 'off')
+    monkeypatch.setenv('MINERU_HISTORY', 'off')
+    with MockMinerUServer(config=MockConfig(latency_per_page=0.01, base_latency=0.05, seed=1)) as mock:
+        monkeypatch.setenv('MINERU_URL_ALLOW_HOSTS', urlparse(mock.url).hostname)  # 模拟服务器可以访问自己的文档
+        yield mock
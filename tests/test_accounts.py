@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+账户池测试：熔断状态转换、健康分调度、失效账户不再拖累批量任务
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_accounts import AccountPool, AUTH, CLOSED, HALF_OPEN, OPEN, THROTTLE
+from mineru_batch_async import BatchAsyncProcessor
+from conftest import Clock, make_pdf, token_info
+
+
+def test_breaker_opens_probes_and_recovers():
+    clock = Clock()
+    pool = AccountPool({'a': token_info('ta'), 'b': token_info('tb')},
+                       failure_threshold=3, base_cooldown=10, clock=clock, seed=1)
+
+    for _ in range(3):
+        pool.record_failure('a', message='HTTP 500')
+    state = {s['email']: s for s in pool.status()}
+    assert state['a']['state'] == OPEN and state['a']['health'] == 0
+    assert {pool.pick()[0] for _ in range(50)} == {'b'}
+
+    # 冷却结束后只放行一个探测请求
+    clock.now = 11
+    assert pool.pick()[0] == 'a'
+    assert pool.accounts['a'].state == HALF_OPEN
+    assert {pool.pick()[0] for _ in range(20)} == {'b'}
+
+    # 探测失败：冷却期翻倍
+    pool.record_failure('a', message='HTTP 500')
+    assert pool.accounts['a'].state == OPEN and pool.accounts['a'].cooldown == 20
+
+    clock.now = 32
+    assert pool.pick()[0] == 'a'
+    pool.record_success('a', 0.2)
+    assert pool.accounts['a'].state == CLOSED
+
+
+def test_auth_and_throttle_open_immediately():
+    clock = Clock()
+    pool = AccountPool({'a': token_info('ta'), 'b': token_info('tb'),
+                        'old': token_info('to', expired_at='2020-01-01T00:00:00Z')},
+                       base_cooldown=10, max_cooldown=600, clock=clock)
+    assert pool.accounts['old'].state == OPEN
+
+    pool.record_failure('a', AUTH, 'token error')
+    assert pool.accounts['a'].state == OPEN and pool.accounts['a'].cooldown == 600
+    pool.record_failure('b', THROTTLE, 'HTTP 429', retry_after=45)
+    assert pool.accounts['b'].cooldown == 45
+
+    # 全部熔断时仍返回最早恢复的账户
+    assert pool.pick()[0] == 'b'
+
+    # Token 更新后熔断器重置
+    pool.update_tokens({'a': token_info('ta2'), 'b': token_info('tb')})
+    assert pool.accounts['a'].state == CLOSED
+    assert 'old' not in pool.accounts
+
+
+def test_health_score_prefers_fast_accounts():
+    pool = AccountPool({'fast': token_info('tf'), 'slow': token_info('ts')}, slow_latency=1, seed=2)
+    pool.record_success('fast', 0.1)
+    pool.record_success('slow', 20)
+    health = {s['email']: s['health'] for s in pool.status()}
+    assert health['fast'] == 100 and health['slow'] == 5
+    picks = [pool.pick()[0] for _ in range(200)]
+    assert picks.count('fast') > 150
+
+
+def test_stale_accounts_do_not_fail_documents(tmp_path, server):
+    """多个失效账户：文档全部成功，失效账户只被尝试常数次，轮询使用上传时的账户"""
+    tokens = {'good@example.com': token_info('good')}
+    for i in range(4):
+        tokens[f'stale{i}@example.com'] = token_info(f'stale{i}')
+    tokens_file = tmp_path / 'all_tokens.json'
+    tokens_file.write_text(json.dumps(tokens))
+    server.config.revoked_tokens = {f'stale{i}' for i in range(4)}
+
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=1)) for i in range(12)]
+    processor = BatchAsyncProcessor(max_concurrent=3, base_url=server.base_url, tokens_file=str(tokens_file))
+    results = asyncio.run(processor.process_files_parallel(files))
+
+    assert [r.status for r in results] == ['done'] * len(files)
+    used = server.stats['tokens']
+    # 熔断前最多被并发中的任务各选中一次，与文档数无关
+    for i in range(4):
+        assert used.get(f'stale{i}', 0) <= 3
+    assert used['good'] == len(files) + server.stats['requests']['extract-results/batch']
+    status = {s['email']: s for s in processor.client.accounts.status()}
+    assert all(status[f'stale{i}@example.com']['state'] == OPEN for i in range(4)
+               if used.get(f'stale{i}'))
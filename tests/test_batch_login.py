@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+批量登录测试：每个账户的新 Token 先原子落盘再删除旧 Token，中途中断不会丢失可用 Token
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+pytest.importorskip('playwright')
+import batch_login
+from mineru_renewer import write_json_atomic
+
+ACCOUNTS = [{'email': f'{name}@example.com', 'password': 'x', 'name': name} for name in ('a', 'b')]
+
+
+@pytest.fixture
+def login(tmp_path, monkeypatch):
+    """登录成功、创建 Token 成功；删除旧 Token 时记录磁盘上的 Token 文件"""
+    monkeypatch.setattr(batch_login, 'PROJECT_ROOT', tmp_path)
+    monkeypatch.setattr(batch_login.random, 'uniform', lambda a, b: 0)
+    write_json_atomic(tmp_path / 'all_tokens.json', {
+        f'{a["email"]}': {'name': a['name'], 'token_name': 'token-old', 'token': 'old'} for a in ACCOUNTS
+    })
+
+    async def login_account(account, browser):
+        return {'uaa-token': f'uaa-{account["name"]}', 'opendatalab_session': 's'}
+
+    async def create_token(session, base_url, uaa_token, token_name):
+        return {'token': f'new-{uaa_token}', 'expired_at': '2099-01-01T00:00:00Z'}
+
+    on_disk = []
+
+    async def delete_tokens(session, base_url, uaa_token, keep):
+        on_disk.append(json.loads((tmp_path / 'all_tokens.json').read_text()))
+        if uaa_token == 'uaa-b':
+            raise KeyboardInterrupt    # 模拟第二个账户删除旧 Token 时被中断
+
+    monkeypatch.setattr(batch_login, 'login_account', login_account)
+    monkeypatch.setattr(batch_login, 'create_token', create_token)
+    monkeypatch.setattr(batch_login, 'delete_tokens', delete_tokens)
+    return tmp_path, on_disk
+
+
+def test_token_saved_before_old_tokens_deleted(login):
+    tmp_path, on_disk = login
+    tokens, cookies = {}, {}
+
+    async def main():
+        semaphore = asyncio.Semaphore(1)
+        for account in ACCOUNTS:
+            await batch_login.renew_account(account, None, None, semaphore, tokens, cookies)
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(main())
+
+    # 删除旧 Token 时新 Token 已在磁盘上
+    assert on_disk[0]['a@example.com']['token'] == 'new-uaa-a'
+    assert on_disk[1]['b@example.com']['token'] == 'new-uaa-b'
+    assert on_disk[0]['b@example.com']['token'] == 'old'
+
+    # 中断后两个账户的新 Token 和 Cookie 都已保存
+    saved = json.loads((tmp_path / 'all_tokens.json').read_text())
+    assert {email: info['token'] for email, info in saved.items()} == \
+        {'a@example.com': 'new-uaa-a', 'b@example.com': 'new-uaa-b'}
+    assert set(json.loads((tmp_path / 'all_cookies.json').read_text())) == {'a@example.com', 'b@example.com'}
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+基准测试工具测试：百分位计算和结果对比
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'bench'))
+
+from compare import compare
+from run_bench import percentiles, stage_summary
+
+
+def test_percentiles_nearest_rank():
+    """最近秩百分位"""
+    result = percentiles([float(i) for i in range(1, 101)])
+    assert (result['p50'], result['p95'], result['p99'], result['max']) == (50.0, 95.0, 99.0, 100.0)
+    assert percentiles([]) == {'count': 0}
+
+
+def test_stage_summary_groups_by_stage():
+    summary = stage_summary([{'upload': 1.0, 'process': 2.0}, {'upload': 3.0}])
+    assert summary['upload']['count'] == 2
+    assert summary['process']['p50'] == 2.0
+
+
+def test_compare_flags_regressions():
+    """吞吐下降和延迟上升超过阈值视为退化"""
+    baseline = {'scenarios': {'batch/small': {
+        'docs_per_min': 100.0, 'latency': {'p95': 1.0}, 'stages': {'upload': {'p95': 0.5}}
+    }}}
+    current = {'scenarios': {'batch/small': {
+        'docs_per_min': 80.0, 'latency': {'p95': 1.05}, 'stages': {'upload': {'p95': 0.2}}
+    }}}
+
+    rows, regressions = compare(baseline, current, threshold=0.10)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('batch/small docs_per_min')
+    assert any(row[1] == 'stages.upload.p95' and '✅' in row[4] for row in rows)
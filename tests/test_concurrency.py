@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+自适应并发（AIMD）测试：用满时加性增加、拥塞时每个窗口只减半一次、排队时间高于基线时减少、
+固定模式、文档数随阶段拥塞减少、按服务端的账户并发上限收敛并写入指标（由注入的时钟驱动）、
+提交后出错或取消时释放账户的 process 占用和额度
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from niquests import AsyncSession
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_async import MinerUAsyncClient
+from mineru_concurrency import AimdLimiter, PROCESS, STAGES
+from mineru_metrics import REGISTRY
+from conftest import Clock, make_pdf
+
+
+def run(limiter: AimdLimiter, count: int, **marks):
+    """占用 count 个位置后全部释放（marks 设置到每个占用上）"""
+    async def main():
+        slots = [await limiter.acquire() for _ in range(count)]
+        for slot in slots:
+            for key, value in marks.items():
+                setattr(slot, key, value)
+            limiter.release(slot)
+    asyncio.run(main())
+
+
+def test_limit_grows_additively_only_when_saturated():
+    limiter = AimdLimiter('put', initial=2, maximum=4)
+    run(limiter, 1)
+    assert limiter.limit == 2          # 上限没有用满，不增加
+
+    run(limiter, 2)
+    assert limiter.limit == 2.5        # 每次用满的成功加 1/limit
+    for _ in range(10):
+        run(limiter, int(limiter.limit))
+    assert limiter.limit == 4 and limiter.peak == 4
+
+
+def test_congestion_halves_once_per_window():
+    limiter = AimdLimiter('submit', initial=8, maximum=16)
+    backoffs = AimdLimiter.backoffs
+    run(limiter, 4, congested=True)    # 同一窗口内的4次429只减一次
+    assert limiter.limit == 4 and AimdLimiter.backoffs == backoffs + 1
+
+    run(limiter, 1, congested=True)    # 减少之后开始的请求再次拥塞
+    assert limiter.limit == 2
+
+    for _ in range(3):
+        run(limiter, 1, congested=True)
+    assert limiter.limit == 1          # 不低于下限
+
+
+def test_queue_time_above_baseline_backs_off():
+    clock = Clock()
+    limiter = AimdLimiter(PROCESS, 'a', initial=4, tolerance=2.0, slack=1.0, clock=clock)
+    for _ in range(3):
+        run(limiter, 1, latency=2.0)
+    run(limiter, 1, latency=4.5)       # 未超过 2×2+1
+    assert limiter.limit == 4
+    run(limiter, 1, latency=8.0)
+    assert limiter.limit == 2
+
+    fixed = AimdLimiter(PROCESS, 'a', initial=4, tolerance=2.0, adaptive=False)
+    run(fixed, 4, congested=True)
+    run(fixed, 4)
+    assert fixed.limit == 4 and fixed.maximum == 4
+
+
+def test_documents_back_off_when_a_stage_backs_off():
+    documents = AimdLimiter.for_documents(6)
+    stage = AimdLimiter('download', initial=4)
+
+    async def main():
+        slot = await documents.acquire()
+        run_slot = await stage.acquire()
+        run_slot.congested = True
+        stage.release(run_slot)
+        documents.release(slot)
+
+    asyncio.run(main())
+    assert documents.limit == 3
+
+    assert AimdLimiter.for_documents(6, fixed=True).maximum == 6
+
+
+def test_process_limit_converges_to_account_capacity(monkeypatch):
+    """
+    服务端每个账户最多3个未完成任务、每个任务10秒，超出时429：process 上限减少并收敛到容量附近，
+    document 上限随之减少，所有文档最终完成（按注入的时钟推进，不依赖真实耗时）
+    """
+    monkeypatch.setattr(REGISTRY, 'enabled', True)
+    clock = Clock()
+    limits = STAGES[PROCESS]
+    process = AimdLimiter(PROCESS, 'a', initial=8, maximum=limits.maximum, tolerance=limits.tolerance,
+                          slack=limits.slack, clock=clock)
+    documents = AimdLimiter.for_documents(8)
+    capacity, duration = 3, 10.0
+    pending, rejected, limits_seen = 40, 0, []
+
+    async def main():
+        nonlocal pending, rejected
+        running = []  # (完成时间, document 占用, process 占用)
+        while pending or running:
+            while pending and not documents.full() and not process.full():
+                document = await documents.acquire()
+                slot = await process.acquire()
+                if len(running) >= capacity:
+                    rejected += 1
+                    process.backoff(slot)      # 提交时429：立即减少，文档稍后重试
+                    slot.ignore = True
+                    process.release(slot)
+                    documents.release(document)
+                    continue
+                running.append((clock.now + duration, document, slot))
+                pending -= 1
+            running.sort(key=lambda entry: entry[0])
+            finish, document, slot = running.pop(0)
+            clock.now = finish
+            slot.latency = 0.0                 # 服务端排队时间
+            process.release(slot)
+            documents.release(document)
+            limits_seen.append(int(process.limit))
+
+    asyncio.run(main())
+    assert pending == 0 and rejected > 0
+    assert process.epoch >= 1 and documents.limit < 8
+    assert max(limits_seen[len(limits_seen) // 2:]) <= capacity + 1     # 收敛后不再远超容量
+    assert f'mineru_concurrency_limit{{stage="process",account="a"}} {int(process.limit)}' in REGISTRY.render()
+
+
+def test_process_slot_released_when_upload_raises_or_is_cancelled(tmp_path, tokens_file, server, monkeypatch):
+    """
+    验证后文件被删除（读文件出错）或提交时被取消：process 占用和额度都释放，
+    次数超过上限后仍能正常上传（否则共享的并发上限被永久占满）
+    """
+    client = MinerUAsyncClient(tokens_file, base_url=server.base_url)
+    process = client.limits.limiter(PROCESS, 'mock@example.com')
+    missing = str(tmp_path / 'gone.pdf')
+    valid = str(make_pdf(tmp_path / 'doc.pdf', pages=1))
+    post_api = client._post_api
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(3600)
+
+    async def main():
+        async with AsyncSession() as session:
+            for _ in range(int(process.limit) + 1):
+                with pytest.raises(FileNotFoundError):
+                    await asyncio.wait_for(client.upload_file(session, missing, 1), 10)
+            assert process.inflight == 0 and not client.accounts.quota.jobs and not client.job_slots
+
+            monkeypatch.setattr(client, '_post_api', hang)
+            for _ in range(int(process.limit) + 1):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.upload_file(session, valid, 1), 0.05)
+            assert process.inflight == 0
+            monkeypatch.setattr(client, '_post_api', post_api)
+
+            return await asyncio.wait_for(client.upload_file(session, valid, 1), 10)
+
+    assert asyncio.run(main())
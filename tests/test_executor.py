@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+阻塞任务执行器测试：磁盘/CPU池分开、上下文传递、事件循环延迟监控
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_executor import LoopLagMonitor, run_cpu, run_disk
+
+REQUEST = contextvars.ContextVar('request', default=None)
+
+
+def test_pools_are_separate_and_keep_context():
+    def where():
+        return threading.current_thread().name, REQUEST.get()
+
+    async def run():
+        REQUEST.set('doc-1')
+        return await run_disk(where), await run_cpu(where)
+
+    (disk_thread, disk_ctx), (cpu_thread, cpu_ctx) = asyncio.run(run())
+    assert disk_thread.startswith('mineru-disk') and cpu_thread.startswith('mineru-cpu')
+    assert disk_ctx == cpu_ctx == 'doc-1'
+
+
+def test_monitor_catches_blocking_calls_but_not_offloaded_ones():
+    """在事件循环中 sleep 会被记录为阻塞；放到执行器中则循环保持响应"""
+    async def run(blocking: bool):
+        async with LoopLagMonitor(warn_ms=float('inf')) as monitor:
+            await asyncio.sleep(0.05)
+            if blocking:
+                time.sleep(0.3)
+            else:
+                await run_disk(time.sleep, 0.3)
+            await asyncio.sleep(0.05)
+        return monitor.report()
+
+    blocked = asyncio.run(run(blocking=True))
+    assert blocked['max_ms'] >= 250
+    assert blocked['worst'][0]['lag_ms'] == blocked['max_ms']
+
+    offloaded = asyncio.run(run(blocking=False))
+    assert offloaded['max_ms'] < 100
+    assert offloaded['samples'] > 20
+
+
+def test_worst_stalls_are_kept_in_order():
+    monitor = LoopLagMonitor(keep_worst=3, warn_ms=float('inf'))
+    for lag in [5, 120, 3, 80, 400, 1, 60]:
+        monitor.record(lag)
+    assert [w['lag_ms'] for w in monitor.report()['worst']] == [400, 120, 80]
+    assert monitor.report()['samples'] == 7
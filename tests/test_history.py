@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+处理耗时预测测试：定长记录只追加、忽略写到一半的记录、超出上限时重写、分组回归和退回、
+预计剩余时间、调度按预测耗时排序、处理文档时记录历史和预测误差
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from niquests import AsyncSession
+
+from mineru_async import MinerUAsyncClient, MinerUAsyncProcessor
+from mineru_history import HistoryStore, JobEstimate, Predictor, Run
+from mineru_metrics import PREDICTION_ERROR, REGISTRY
+from mineru_scheduling import Scheduler
+from conftest import make_pdf
+
+
+def runs(count: int, format: str = 'pdf', per_page: float = 0.5, formula: bool = True):
+    return [Run(format=format, model='vlm', formula=formula, pages=pages, size=pages * 100_000,
+                seconds=2 + per_page * pages) for pages in range(1, count + 1)]
+
+
+def test_store_appends_fixed_size_records(tmp_path):
+    path = tmp_path / 'history.bin'
+    store = HistoryStore(str(path))
+    for run in runs(3):
+        store.append(run)
+    record = HistoryStore.RECORD.size
+    assert record == 24 and path.stat().st_size == HistoryStore.HEADER.size + 3 * record
+
+    loaded = HistoryStore(str(path)).runs
+    assert [(r.format, r.model, r.pages, r.size, r.seconds) for r in loaded] == \
+        [('pdf', 'vlm', p, p * 100_000, 2 + 0.5 * p) for p in (1, 2, 3)]
+    assert loaded[0].formula and loaded[0].table and not loaded[0].is_url and loaded[0].timestamp > 0
+
+    # 写到一半的记录：加载时忽略，下次写入前去掉
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * 10)
+    store = HistoryStore(str(path))
+    assert len(store) == 3 and store.repair
+    store.append(Run(format='html', model='MinerU-HTML', pages=1, seconds=1.0))
+    assert path.stat().st_size == HistoryStore.HEADER.size + 4 * record
+    assert HistoryStore(str(path)).runs[-1].format == 'html'
+
+    # 其他版本的文件：重新开始
+    path.write_bytes(b'not a history file')
+    store = HistoryStore(str(path))
+    assert len(store) == 0
+    store.append(runs(1)[0])
+    assert len(HistoryStore(str(path))) == 1
+
+
+def test_store_keeps_recent_records(tmp_path):
+    path = tmp_path / 'history.bin'
+    store = HistoryStore(str(path), max_records=5)
+    for run in runs(12):
+        store.append(run)
+    assert len(store) == 5
+    assert path.stat().st_size <= HistoryStore.HEADER.size + 10 * HistoryStore.RECORD.size
+    assert [r.pages for r in HistoryStore(str(path), max_records=5).runs] == [8, 9, 10, 11, 12]
+
+
+def test_predictor_fits_groups_and_falls_back():
+    predictor = Predictor()
+    assert predictor.predict({'format': 'pdf', 'pages': 10}) is None and not predictor.ready()
+
+    for run in runs(20) + runs(20, 'docx', per_page=2.0) + runs(10, formula=False, per_page=0.1):
+        predictor.record(run)
+    assert predictor.ready() and predictor.samples == 50
+
+    pdf = predictor.predict({'format': 'pdf', 'pages': 40, 'size': 4_000_000})
+    assert abs(pdf - 22) < 0.5
+    fast = predictor.predict({'format': 'pdf', 'pages': 40, 'size': 4_000_000}, {'enable_formula': False})
+    assert abs(fast - 6) < 0.5
+    docx = predictor.predict({'format': 'docx', 'pages': 40, 'size': 4_000_000})
+    assert abs(docx - 82) < 1
+
+    # 没有记录的格式退回同一模型的全部记录；页数未知时按大小估算
+    assert predictor.predict({'format': 'pptx', 'pages': 10}) is not None
+    assert predictor.predict({'format': 'pdf', 'size': 1_000_000}) == predictor.predict({'format': 'pdf', 'pages': 10,
+                                                                                        'size': 1_000_000})
+
+    report = predictor.evaluate()
+    assert report['test'] == 10
+    assert report['model']['mape'] < report['baseline_mean']['mape']
+
+
+def test_eta_blends_prediction_with_observed_rate():
+    job = JobEstimate('a.pdf', predicted=100.0, submitted=0.0)
+    assert job.eta(now=30.0) == 70.0
+    job.running_since, job.extracted, job.total = 30.0, 5, 10
+    assert job.eta(now=40.0) == 0.5 * 10 + 0.5 * 60    # 一半进度：实际速度和预测各占一半
+    assert JobEstimate('b.pdf').eta() is None
+
+
+def test_scheduler_orders_by_predicted_seconds():
+    predictor = Predictor()
+    for run in runs(10) + runs(10, 'docx', per_page=5.0):
+        predictor.record(run)
+    infos = [{'name': 'docx', 'format': 'docx', 'pages': 5}, {'name': 'pdf', 'format': 'pdf', 'pages': 8}]
+    # 按页数 pdf 更大，按历史 docx 每页慢得多
+    assert [i['name'] for i in Scheduler('sjf').order(infos)] == ['docx', 'pdf']
+    assert [i['name'] for i in Scheduler('sjf', predictor=predictor).order(infos)] == ['pdf', 'docx']
+    assert Scheduler('lpt', predictor=Predictor()).priority({'pages': 3}) == -3
+
+
+def test_scheduler_cost_unit_stable_across_readiness():
+    """历史足够前后都以秒为单位：队列中先后入队的文档可以直接比较"""
+    predictor = Predictor()
+    scheduler = Scheduler('sjf', predictor=predictor)
+    info = {'format': 'pdf', 'pages': 20, 'is_url': True}
+    samples = runs(5, per_page=5.0)    # 每页约5秒
+    for run in samples[:4]:
+        predictor.record(run)
+    assert not predictor.ready()
+    before = scheduler.cost(info)
+    assert before == 20 * sum(r.seconds for r in samples[:4]) / sum(r.pages for r in samples[:4])
+
+    predictor.record(samples[4])
+    after = scheduler.cost(info)
+    assert predictor.ready() and 0.5 < after / before < 2
+
+
+def test_processing_records_history(tmp_path, tokens_file, server, monkeypatch):
+    history = tmp_path / 'history.bin'
+    monkeypatch.setenv('MINERU_HISTORY', str(history))
+    monkeypatch.setattr(REGISTRY, 'enabled', True)
+    monkeypatch.setattr(Predictor, '_shared', {})
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=i + 1)) for i in range(6)]
+
+    processor = MinerUAsyncProcessor(max_workers=3, base_url=server.base_url, tokens_file=tokens_file)
+
+    async def main():
+        return await asyncio.gather(*[processor.process_file(f) for f in files])
+
+    assert all(asyncio.run(main()))
+    assert not processor.client.jobs
+    store = HistoryStore(str(history))
+    assert sorted(r.pages for r in store.runs) == [1, 2, 3, 4, 5, 6]
+    assert all(r.format == 'pdf' and r.model == 'vlm' and r.seconds > 0 for r in store.runs)
+
+    # 之后的任务有预测，轮询时可得到预计剩余时间，完成后记录预测误差
+    client = MinerUAsyncClient(tokens_file, base_url=server.base_url)
+    assert client.predictor is processor.client.predictor
+    statuses = []
+    observed = sum(PREDICTION_ERROR.labels('pdf').counts)
+
+    async def track():
+        async with AsyncSession() as session:
+            batch_id = await client.upload_file(session, files[-1], 6, model_version='vlm')
+            return await client.wait_for_completion(
+                session, batch_id, on_progress=lambda job: statuses.extend(client.jobs_status()))
+
+    assert asyncio.run(track())[0]['state'] == 'done'
+    assert statuses and statuses[0]['predicted'] > 0 and statuses[0]['eta'] is not None
+    assert len(HistoryStore(str(history))) == 7
+    assert sum(PREDICTION_ERROR.labels('pdf').counts) == observed + 1
+    assert 'mineru_prediction_error_ratio_count{format="pdf"}' in REGISTRY.render()
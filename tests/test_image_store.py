@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+内容寻址图片存储测试：跨文档去重、导入到目标目录、gc、登记只加载一次、统计只读、分片合并使用存储
+"""
+import json
+import shutil
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_image_store import ImageStore, MANIFEST_NAME
+from mineru_merge import ChunkMerger
+
+
+def make_images(directory: Path, files: dict) -> Path:
+    directory.mkdir(parents=True)
+    for name, data in files.items():
+        (directory / name).write_bytes(data)
+    return directory
+
+
+def test_ingest_deduplicates_across_documents(tmp_path):
+    """相同图片跨文档只存一份，文档目录中为硬链接"""
+    store = ImageStore(str(tmp_path / 'store'))
+    logo = b'LOGO' * 256
+
+    doc1 = make_images(tmp_path / 'doc1_images', {'logo.png': logo, 'fig1.jpg': b'FIG1'})
+    doc2 = make_images(tmp_path / 'doc2_images', {'header.png': logo})
+
+    first = store.ingest_dir(str(doc1))
+    second = store.ingest_dir(str(doc2))
+
+    assert first == {'files': 2, 'new_blobs': 2, 'deduplicated': 0, 'bytes_saved': 0}
+    assert second == {'files': 1, 'new_blobs': 0, 'deduplicated': 1, 'bytes_saved': len(logo)}
+    assert (doc1 / 'logo.png').stat().st_ino == (doc2 / 'header.png').stat().st_ino
+    assert (doc2 / 'header.png').read_bytes() == logo
+
+    manifest = json.loads((doc2 / MANIFEST_NAME).read_text(encoding='utf-8'))
+    assert manifest['images']['header.png']['sha256'] == ImageStore.file_hash(doc1 / 'logo.png')
+
+    stats = store.stats()
+    assert stats['blobs'] == 2
+    assert stats['references'] == 3
+    assert stats['bytes_saved'] == len(logo)
+
+
+def test_ingest_into_destination_dir(tmp_path):
+    """从解压目录直接导入到文档图片目录"""
+    store = ImageStore(str(tmp_path / 'store'))
+    source = make_images(tmp_path / 'result' / 'images', {'a.jpg': b'AAA'})
+
+    store.ingest_dir(str(source), str(tmp_path / 'doc_images'))
+
+    assert (tmp_path / 'doc_images' / 'a.jpg').read_bytes() == b'AAA'
+    assert (tmp_path / 'doc_images' / MANIFEST_NAME).exists()
+
+
+def test_gc_removes_only_unreferenced_blobs(tmp_path):
+    """删除文档后，gc只回收不再被引用的图片"""
+    store = ImageStore(str(tmp_path / 'store'))
+    doc1 = make_images(tmp_path / 'doc1_images', {'logo.png': b'LOGO', 'only1.png': b'ONLY1'})
+    doc2 = make_images(tmp_path / 'doc2_images', {'logo.png': b'LOGO'})
+    store.ingest_dir(str(doc1))
+    store.ingest_dir(str(doc2))
+
+    shutil.rmtree(doc1)
+
+    preview = store.gc(dry_run=True)
+    assert preview == {'removed': 1, 'freed_bytes': 5, 'dry_run': True}
+    assert store.stats()['blobs'] == 2
+
+    assert store.gc()['removed'] == 1
+    assert store.stats()['blobs'] == 1
+    assert (doc2 / 'logo.png').read_bytes() == b'LOGO'
+
+    shutil.rmtree(doc2)
+    assert store.gc()['removed'] == 1
+    assert store.stats()['blobs'] == 0
+
+
+def test_registry_loaded_once_and_stats_read_only(tmp_path, monkeypatch):
+    """导入多个目录只读取一次登记文件；stats 和 gc --dry-run 不修改登记文件"""
+    store = ImageStore(str(tmp_path / 'store'))
+    loads = []
+    registered_dirs = store._registered_dirs
+    monkeypatch.setattr(store, '_registered_dirs', lambda: loads.append(1) or registered_dirs())
+
+    docs = [make_images(tmp_path / f'doc{i}_images', {'a.png': bytes([i])}) for i in range(5)]
+    for doc in docs:
+        store.ingest_dir(str(doc))
+    store.ingest_dir(str(docs[0]))
+    assert len(loads) == 1
+    assert len(store.registry_file.read_text().splitlines()) == 5
+
+    shutil.rmtree(docs[0])
+    before = store.registry_file.read_text()
+    assert store.stats()['references'] == 4
+    store.gc(dry_run=True)
+    assert store.registry_file.read_text() == before
+
+    store.gc()
+    assert len(store.registry_file.read_text().splitlines()) == 4
+    store.ingest_dir(str(make_images(tmp_path / 'doc0_images', {'a.png': b'\x00'})))
+    assert len(store.registry_file.read_text().splitlines()) == 5
+
+
+def test_chunk_merger_ingests_merged_images(tmp_path):
+    """分片合并时启用图片存储：合并后的图片目录登记到存储并去重"""
+    store = ImageStore(str(tmp_path / 'store'))
+    chunks = []
+    for i in (1, 2):
+        chunk = tmp_path / f'chunk_{i}'
+        make_images(chunk / 'images', {'logo.png': b'LOGO'})
+        (chunk / 'full.md').write_text('![](images/logo.png)\n', encoding='utf-8')
+        chunks.append(str(chunk))
+
+    ChunkMerger(image_store=store).merge(chunks, str(tmp_path / 'out'), 'doc')
+
+    stats = store.stats()
+    assert stats['blobs'] == 1 and stats['references'] == 2
+    assert (tmp_path / 'out' / 'images' / MANIFEST_NAME).exists()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+日志配置测试：级别解析、后台写入、按模块级别、安静模式不做格式化
+"""
+import logging
+import logging.handlers
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+import mineru_logging
+from mineru_logging import parse_levels, setup_logging
+
+
+class CountingArg:
+    """记录被格式化的次数"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    mineru_logging.shutdown()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    logging.getLogger('mineru_async').setLevel(logging.NOTSET)
+
+
+def test_parse_levels():
+    assert parse_levels('INFO,mineru_async=debug') == ('INFO', {'mineru_async': 'DEBUG'})
+    assert parse_levels('') == (None, {})
+
+
+def test_queue_handler_writes_in_background(tmp_path):
+    log_file = tmp_path / 'mineru.log'
+    listener = setup_logging('INFO,mineru_async=DEBUG', log_file=str(log_file), quiet=False, console=False)
+    assert listener is not None
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers)
+
+    logging.getLogger('mineru_async').debug('上传成功: %s', 'batch-1')
+    logging.getLogger('other').debug('不输出')
+    logging.getLogger('other').info('输出')
+    mineru_logging.shutdown()
+
+    text = log_file.read_text(encoding='utf-8')
+    assert 'mineru_async: 上传成功: batch-1' in text
+    assert 'other: 输出' in text
+    assert '不输出' not in text
+
+
+def test_quiet_mode_skips_formatting(tmp_path):
+    log_file = tmp_path / 'mineru.log'
+    setup_logging('DEBUG', log_file=str(log_file), quiet=True, console=False)
+
+    arg = CountingArg()
+    logger = logging.getLogger('mineru_async')
+    logger.info('进度: %s', arg)
+    logger.debug('进度: %s', arg)
+    logger.warning('警告: %s', 'x')
+    mineru_logging.shutdown()
+
+    assert arg.formatted == 0
+    assert log_file.read_text(encoding='utf-8').strip().endswith('警告: x')
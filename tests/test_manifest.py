@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+增量处理清单测试
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_manifest import ChangeManifest
+
+OPTIONS = {'model_version': 'vlm', 'enable_formula': True, 'enable_table': True}
+
+
+def make_doc(directory: Path, name: str, data: bytes) -> str:
+    path = directory / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def record_processed(manifest: ChangeManifest, path: str):
+    md_file = Path(path).with_suffix('.md')
+    md_file.write_text('# done', encoding='utf-8')
+    manifest.record(path, OPTIONS, {'markdown': str(md_file)})
+
+
+def test_plan_skips_unchanged_and_picks_up_new(tmp_path):
+    """未变化的文件跳过，新文件和修改过的文件需要处理"""
+    a = make_doc(tmp_path, 'a.pdf', b'%PDF-a')
+    b = make_doc(tmp_path, 'b.pdf', b'%PDF-b')
+
+    manifest = ChangeManifest.for_directory(str(tmp_path))
+    record_processed(manifest, a)
+    record_processed(manifest, b)
+    manifest.save()
+
+    c = make_doc(tmp_path, 'c.pdf', b'%PDF-c')
+    make_doc(tmp_path, 'b.pdf', b'%PDF-b-modified')
+
+    reloaded = ChangeManifest.for_directory(str(tmp_path))
+    changed, unchanged = reloaded.plan([a, b, c], OPTIONS)
+
+    assert unchanged == [a]
+    assert sorted(changed) == sorted([b, c])
+
+
+def test_touched_file_with_same_content_is_skipped(tmp_path):
+    """mtime变化但内容相同，按哈希确认后跳过"""
+    a = make_doc(tmp_path, 'a.pdf', b'%PDF-a')
+    manifest = ChangeManifest.for_directory(str(tmp_path))
+    record_processed(manifest, a)
+
+    st = os.stat(a)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    assert manifest.plan([a], OPTIONS) == ([], [a])
+
+
+def test_changed_options_or_missing_output_reprocess(tmp_path):
+    """处理选项变化或输出被删除时重新处理"""
+    a = make_doc(tmp_path, 'a.pdf', b'%PDF-a')
+    manifest = ChangeManifest.for_directory(str(tmp_path))
+    record_processed(manifest, a)
+
+    assert manifest.plan([a], {**OPTIONS, 'model_version': 'pipeline'}) == ([a], [])
+
+    Path(a).with_suffix('.md').unlink()
+    assert manifest.plan([a], OPTIONS) == ([a], [])
+
+
+def test_prune_removes_outputs_of_deleted_sources(tmp_path):
+    """源文件删除后清理记录和输出"""
+    a = make_doc(tmp_path, 'a.pdf', b'%PDF-a')
+    b = make_doc(tmp_path, 'b.pdf', b'%PDF-b')
+    manifest = ChangeManifest.for_directory(str(tmp_path))
+    record_processed(manifest, a)
+    record_processed(manifest, b)
+
+    os.remove(b)
+    removed = manifest.prune([a], root=str(tmp_path), remove_outputs=True)
+
+    assert removed == [os.path.abspath(b)]
+    assert not Path(b).with_suffix('.md').exists()
+    assert Path(a).with_suffix('.md').exists()
+    assert manifest.plan([a], OPTIONS) == ([], [a])
+
+
+def test_streaming_prune_keeps_only_recorded_paths(tmp_path, monkeypatch):
+    """流式扫描时只在清单已有的记录上标记，不保存扫描到的全部路径；扫描结束后清理未见到的记录"""
+    import mineru_batch_async
+
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    a = make_doc(docs, 'a.pdf', b'%PDF-a')
+    b = make_doc(docs, 'b.pdf', b'%PDF-b')
+    manifest = ChangeManifest.for_directory(str(docs))
+    record_processed(manifest, a)
+    record_processed(manifest, b)
+    os.remove(b)
+    new = [make_doc(docs, f'new{i}.pdf', b'%PDF-' + bytes([i])) for i in range(20)]
+
+    marked = []
+    mark_seen = manifest.mark_seen
+
+    def spy(item):
+        mark_seen(item)
+        marked.append(len(manifest._seen))
+
+    monkeypatch.setattr(manifest, 'mark_seen', spy)
+    monkeypatch.setattr(mineru_batch_async, 'MinerUAsyncClient', lambda *args, **kwargs: None)
+    processor = mineru_batch_async.BatchAsyncProcessor(max_concurrent=2)
+
+    async def fake_run_task(task, progress, task_id, manifest=None):
+        manifest.record(task.file_path, processor.upload_options, {})
+        task.status = 'done'
+        return task
+
+    monkeypatch.setattr(processor, '_run_task', fake_run_task)
+    processor.upload_options = OPTIONS
+    results, stats = asyncio.run(processor.process_stream(iter([a] + new), manifest=manifest, prune_root=str(docs)))
+
+    assert len(marked) == 21 and max(marked) == 1    # 只有 a 在清单中
+    assert stats['pruned'] == [os.path.abspath(b)] and manifest._seen is None
+    assert set(manifest.entries) == {os.path.abspath(p) for p in [a] + new}
+
+
+def test_record_during_save_is_not_lost(tmp_path, monkeypatch):
+    """事件循环记录时扫描线程正在保存：记录等保存完成后写入，下次保存时落盘"""
+    import mineru_manifest
+
+    a = make_doc(tmp_path, 'a.pdf', b'%PDF-a')
+    b = make_doc(tmp_path, 'b.pdf', b'%PDF-b')
+    manifest = ChangeManifest.for_directory(str(tmp_path))
+    record_processed(manifest, a)
+
+    replace = os.replace
+    recorder = threading.Thread(target=record_processed, args=(manifest, b))
+
+    def replace_while_recording(*args):
+        if recorder.ident is None:
+            recorder.start()
+            recorder.join(0.2)     # 清单已序列化；有锁时记录会等待保存完成
+        return replace(*args)
+
+    monkeypatch.setattr(mineru_manifest.os, 'replace', replace_while_recording)
+    manifest.save()
+    recorder.join()
+    manifest.save()
+
+    saved = json.loads(Path(manifest.manifest_file).read_text(encoding='utf-8'))['files']
+    assert set(saved) == {os.path.abspath(a), os.path.abspath(b)}
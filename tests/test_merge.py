@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+分片结果合并引擎测试 - 与 fixtures/merge/expected 中的已知正确输出对比
+"""
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_merge import ChunkMerger, ChunkResult, natural_sort_key
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'merge'
+CHUNKS = [str(FIXTURES / 'chunk_1'), str(FIXTURES / 'chunk_2')]
+EXPECTED = FIXTURES / 'expected'
+
+
+def test_merge_matches_expected(tmp_path):
+    """合并输出与已知正确结果逐字节一致"""
+    result = ChunkMerger().merge(CHUNKS, str(tmp_path), 'doc')
+
+    assert result['pages'] == 3
+    assert result['images'] == 3
+    assert result['page_offsets'] == [0, 2]
+
+    for name in ('doc.md', 'doc_content_list.json', 'doc_middle.json'):
+        assert (tmp_path / name).read_text(encoding='utf-8') == (EXPECTED / name).read_text(encoding='utf-8')
+
+    for image in (EXPECTED / 'images').iterdir():
+        assert (tmp_path / 'images' / image.name).read_bytes() == image.read_bytes()
+
+
+def test_merged_image_references_resolve(tmp_path):
+    """合并后Markdown和content_list中的图片引用全部指向存在的文件"""
+    ChunkMerger().merge(CHUNKS, str(tmp_path), 'doc')
+
+    markdown = (tmp_path / 'doc.md').read_text(encoding='utf-8')
+    assert '# 分片' not in markdown
+    for line in markdown.splitlines():
+        if 'images/' in line:
+            ref = line.split('images/', 1)[1].split(')')[0].split('"')[0]
+            assert (tmp_path / 'images' / ref).exists()
+
+    items = json.loads((tmp_path / 'doc_content_list.json').read_text(encoding='utf-8'))
+    for item in items:
+        if item.get('img_path'):
+            assert (tmp_path / item['img_path']).exists()
+
+
+def test_explicit_page_offsets_reorder_chunks(tmp_path):
+    """显式页码偏移决定合并顺序"""
+    result = ChunkMerger().merge(list(reversed(CHUNKS)), str(tmp_path), 'doc', page_offsets=[600, 0])
+
+    assert result['page_offsets'] == [0, 600]
+    middle = json.loads((tmp_path / 'doc_middle.json').read_text(encoding='utf-8'))
+    assert [page['page_idx'] for page in middle['pdf_info']] == [0, 1, 600]
+
+
+def test_failed_chunk_keeps_planned_offsets(tmp_path):
+    """拆分计划给出序号和起始页：失败的分片标记缺页，后续分片的页码和图片名不前移"""
+    chunks = [ChunkResult(1, 0, CHUNKS[0]), ChunkResult(2, 600), ChunkResult(3, 1200, CHUNKS[1])]
+    result = ChunkMerger().merge(chunks, str(tmp_path), 'doc')
+
+    assert result['page_offsets'] == [0, 600, 1200]
+    assert result['missing_chunks'] == [2]
+    assert '缺少第 601-1200 页' in (tmp_path / 'doc.md').read_text(encoding='utf-8')
+    assert (tmp_path / 'images' / 'chunk_3_fig_a.jpg').exists()
+    assert not (tmp_path / 'images' / 'chunk_2_fig_a.jpg').exists()
+
+    items = json.loads((tmp_path / 'doc_content_list.json').read_text(encoding='utf-8'))
+    assert {item['page_idx'] for item in items} == {0, 1, 1200}
+    assert 'images/chunk_3_fig_a.jpg' in {item.get('img_path') for item in items}
+
+    # 分片1只有2页结果（其余为空白页），不影响分片3的起始页；失败分片的每一页写入占位页
+    pages = json.loads((tmp_path / 'doc_middle.json').read_text(encoding='utf-8'))['pdf_info']
+    assert [p['page_idx'] for p in pages] == [0, 1] + list(range(600, 1200)) + [1200]
+    assert all(p.get('missing') for p in pages[2:-1])
+
+
+def test_last_failed_chunk_uses_total_pages(tmp_path):
+    chunks = [ChunkResult(1, 0, CHUNKS[0]), ChunkResult(2, 2)]
+    result = ChunkMerger().merge(chunks, str(tmp_path), 'doc', total_pages=5)
+    assert result['pages'] == 5 and result['missing_chunks'] == [2]
+    assert '缺少第 3-5 页' in (tmp_path / 'doc.md').read_text(encoding='utf-8')
+
+    # 没有计划起始页时按上一个分片的结果页数接续
+    assert [c.start_page for c in ChunkMerger().resolve([CHUNKS[0], ChunkResult(2, chunk_dir=CHUNKS[1])])] == [0, 2]
+
+
+def test_natural_sort_key():
+    """chunk_2 排在 chunk_10 之前"""
+    assert sorted(['chunk_10', 'chunk_2', 'chunk_1'], key=natural_sort_key) == ['chunk_1', 'chunk_2', 'chunk_10']
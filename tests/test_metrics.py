@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+指标测试：Prometheus 文本格式、关闭时无开销、批量处理埋点
+"""
+import asyncio
+import sys
+import urllib.request
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_metrics import MetricsRegistry, REGISTRY
+from conftest import make_pdf
+
+
+def test_render_prometheus_text():
+    """计数、仪表、直方图的文本格式"""
+    registry = MetricsRegistry(enabled=True)
+    counter = registry.counter('demo_bytes_total', '字节数', ['account'])
+    gauge = registry.gauge('demo_inflight', '进行中')
+    histogram = registry.histogram('demo_seconds', '耗时', ['stage'], buckets=(0.5, 1))
+
+    counter.labels('a@example.com').inc(100)
+    gauge.inc()
+    histogram.labels('upload').observe(0.3)
+    histogram.labels('upload').observe(0.8)
+
+    text = registry.render()
+    assert 'demo_bytes_total{account="a@example.com"} 100' in text
+    assert 'demo_inflight 1' in text
+    assert 'demo_seconds_bucket{stage="upload",le="0.5"} 1' in text
+    assert 'demo_seconds_bucket{stage="upload",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{stage="upload"} 2' in text
+    assert '# TYPE demo_seconds histogram' in text
+
+
+def test_disabled_registry_records_nothing():
+    """关闭时不创建子指标、不累计"""
+    registry = MetricsRegistry()
+    counter = registry.counter('demo_total', '计数', ['account'])
+    counter.labels('a').inc(5)
+    assert counter._children == {}
+    assert counter.value == 0
+
+
+def test_http_endpoint():
+    registry = MetricsRegistry()
+    counter = registry.counter('demo_total', '计数')
+    httpd = registry.start_http_server(0)
+    counter.inc()
+    try:
+        port = httpd.server_address[1]
+        body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+        assert 'demo_total 1' in body
+    finally:
+        httpd.shutdown()
+
+
+def test_batch_pipeline_is_instrumented(tmp_path, tokens_file, server, monkeypatch):
+    """批量处理记录各阶段耗时、字节数、轮询次数和结果计数"""
+    from mineru_batch_async import BatchAsyncProcessor
+
+    monkeypatch.setattr(REGISTRY, 'enabled', True)
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=2)) for i in range(2)]
+
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+    assert all(r.status == 'done' for r in results)
+
+    text = REGISTRY.render()
+    for stage in ('validate', 'get_upload_url', 'put', 'upload', 'process', 'download', 'extract', 'organize'):
+        assert f'mineru_stage_duration_seconds_count{{stage="{stage}"}}' in text, stage
+    assert 'mineru_upload_bytes_total{account="mock@example.com"}' in text
+    assert 'mineru_polls_total{account="mock@example.com"}' in text
+    assert 'mineru_documents_total{status="done"}' in text
+    assert 'mineru_inflight_jobs 0' in text
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+端到端测试 - 针对本地模拟服务器，不需要真实Token和网络
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+from niquests import AsyncSession
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root / 'tools'))
+
+from mineru_async import MinerUAsyncClient, ResultProcessor
+from mineru_batch_async import BatchAsyncProcessor
+from mineru_retry import DEFAULT_POLICIES
+from conftest import make_pdf
+
+
+def test_batch_processing_end_to_end(tmp_path, tokens_file, server):
+    """批量处理：上传 → 轮询 → 下载 → 整理输出"""
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=i + 2)) for i in range(3)]
+
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+
+    assert [r.status for r in results] == ['done'] * 3
+    for i, task in enumerate(results):
+        markdown = Path(task.result['markdown']).read_text(encoding='utf-8')
+        assert markdown.count('Page ') == i + 2
+        assert task.result['image_count'] == 1
+
+    assert server.stats['requests']['file-urls/batch'] == 3
+    assert server.stats['requests']['upload'] == 3
+    assert server.stats['requests']['download'] == 3
+
+
+def test_injected_failures_surface_as_failed_tasks(tmp_path, tokens_file, server):
+    """持续429（重试用尽）和处理失败被报告为失败，不会卡住"""
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=1)) for i in range(2)]
+
+    server.config.rate_limit_rate = 1.0
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+    assert [r.status for r in results] == ['failed', 'failed']
+    assert server.stats['rate_limited'] == 2 * DEFAULT_POLICIES['get_upload_url'].attempts
+    assert server.stats['requests'].get('upload', 0) == 0
+
+    server.config.rate_limit_rate = 0.0
+    server.config.fail_rate = 1.0
+    results = asyncio.run(processor.process_files_parallel(files))
+    assert all(r.status == 'failed' for r in results)
+
+
+def test_url_task_and_ranged_download(tmp_path, tokens_file, server):
+    """URL任务接口和Range下载"""
+    url = server.add_document('remote.pdf', make_pdf(tmp_path / 'remote.pdf', pages=4).read_bytes())
+    client = MinerUAsyncClient(tokens_file, base_url=server.base_url)
+
+    async def run():
+        headers = {'authorization': 'Bearer mock-token'}
+        async with AsyncSession() as session:
+            response = await session.post(f"{server.base_url}/extract/task", headers=headers, json={'url': url})
+            task_id = response.json()['data']['task_id']
+
+            while True:
+                data = (await session.get(f"{server.base_url}/extract/task/{task_id}", headers=headers)).json()['data']
+                if data['state'] == 'done':
+                    break
+                await asyncio.sleep(client.poll_interval)
+
+            partial = await session.get(data['full_zip_url'], headers={'Range': 'bytes=0-9'})
+            assert partial.status_code == 206
+            assert len(partial.content) == 10
+
+            output = tmp_path / 'remote_result'
+            output.mkdir()
+            return await ResultProcessor.download_and_extract(session, data['full_zip_url'], str(output))
+
+    extracted = asyncio.run(run())
+    assert (Path(extracted) / 'full.md').read_text(encoding='utf-8').count('Page ') == 4
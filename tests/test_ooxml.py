@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+OOXML 页数读取测试：幻灯片计数、app.xml 统计是否可信、document.xml 估算、损坏文件
+"""
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from pptx import Presentation
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_async import FileValidator
+from mineru_ooxml import page_count
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def make_report(path: Path, sections: int, paragraphs: int = 10) -> Path:
+    doc = Document()
+    for i in range(sections * paragraphs):
+        paragraph = doc.add_paragraph(f"Paragraph {i + 1}")
+        if i % paragraphs == paragraphs - 1 and i < sections * paragraphs - 1:
+            paragraph.runs[0].add_break(WD_BREAK.PAGE)
+    doc.save(str(path))
+    return path
+
+
+def rewrite_part(path: Path, part: str, edit) -> Path:
+    """复制包并修改其中一个部件"""
+    items = {}
+    with zipfile.ZipFile(path) as zf:
+        for name in zf.namelist():
+            items[name] = zf.read(name)
+    items[part] = edit(items[part].decode('utf-8')).encode('utf-8')
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in items.items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_slides_are_counted_from_presentation_part(tmp_path):
+    """python-pptx 生成的 app.xml 中 Slides=0，以 sldIdLst 为准"""
+    path = tmp_path / 'deck.pptx'
+    prs = Presentation()
+    for _ in range(7):
+        prs.slides.add_slide(prs.slide_layouts[6])
+    prs.save(str(path))
+    assert page_count(str(path), 'pptx') == len(Presentation(str(path)).slides) == 7
+
+
+def test_docx_uses_app_pages_only_when_word_wrote_statistics(tmp_path):
+    path = make_report(tmp_path / 'report.docx', sections=4)
+    # 模板中的 Pages=1、Words=0 不可信，按手动分页估算
+    assert page_count(str(path), 'docx') == 4
+
+    rewrite_part(path, 'docProps/app.xml',
+                 lambda xml: re.sub(r'<Words>\d+</Words>', '<Words>4200</Words>',
+                                    re.sub(r'<Pages>\d+</Pages>', '<Pages>12</Pages>', xml)))
+    assert page_count(str(path), 'docx') == 12
+    assert FileValidator.validate_file(str(path))[2]['pages'] == 12
+
+
+def test_docx_without_metadata_falls_back_to_document_scan(tmp_path):
+    """没有 _rels/.rels 和 app.xml 时读默认位置；有 Word 记录的分页时按它计数；长文本按行数折页"""
+    def write(name, body):
+        path = tmp_path / name
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('word/document.xml', f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+        return str(path)
+
+    rendered = '<w:p><w:r><w:lastRenderedPageBreak/><w:t>x</w:t></w:r></w:p>' * 5
+    assert page_count(write('rendered.docx', rendered), 'docx') == 6
+
+    long_text = '<w:p><w:r><w:t xml:space="preserve">' + '文' * 450 + '</w:t></w:r></w:p>'
+    assert page_count(write('long.docx', long_text * 20), 'docx') == 5  # 20段 × 10行 / 每页45行
+
+    assert page_count(write('empty.docx', ''), 'docx') == 1
+
+
+def test_invalid_files_return_none(tmp_path):
+    legacy = tmp_path / 'old.doc'
+    legacy.write_bytes(b'\xd0\xcf\x11\xe0' + b'\0' * 512)
+    assert page_count(str(legacy), 'doc') is None
+    broken = tmp_path / 'broken.pptx'
+    broken.write_bytes(b'PK\x03\x04 not really a zip')
+    assert page_count(str(broken), 'pptx') is None
+    assert FileValidator.validate_file(str(broken))[2]['pages'] is None
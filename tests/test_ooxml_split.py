@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+OOXML 包层面拆分测试：PPTX 幻灯片内容/图片/备注保留、分片不含多余部件、大小限制；DOCX 按正文元素切分、保留结构
+"""
+import io
+import random
+import re
+import struct
+import sys
+import zipfile
+import zlib
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from pptx import Presentation
+from pptx.util import Inches
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_ooxml import page_count
+from mineru_ooxml_split import split_docx, split_pptx
+
+
+def make_png(seed: int, side: int = 16) -> bytes:
+    rng = random.Random(seed)
+    raw = b''.join(b'\0' + rng.randbytes(side * 3) for _ in range(side))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', side, side, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def make_deck(path: Path, slides: int, side: int = 16) -> Path:
+    """每张幻灯片：标题、一张独有图片、一张共用图片；偶数页有备注；第1页链接到最后一页"""
+    prs = Presentation()
+    shared = make_png(10_000)
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.shapes.add_picture(io.BytesIO(make_png(i, side)), Inches(1), Inches(2))
+        slide.shapes.add_picture(io.BytesIO(shared), Inches(4), Inches(2))
+        if i % 2:
+            slide.notes_slide.notes_text_frame.text = f"Note {i + 1}"
+    link = prs.slides[0].shapes.add_textbox(Inches(1), Inches(5), Inches(2), Inches(1))
+    link.text_frame.text = 'last slide'
+    link.click_action.target_slide = prs.slides[-1]
+    prs.save(str(path))
+    return path
+
+
+def test_chunks_keep_slide_content_in_order(tmp_path):
+    deck = make_deck(tmp_path / 'deck.pptx', slides=7)
+    chunks = split_pptx(str(deck), str(tmp_path / 'chunks'), max_slides=3)
+    assert [Path(c).name for c in chunks] == ['deck_chunk_1.pptx', 'deck_chunk_2.pptx', 'deck_chunk_3.pptx']
+
+    titles, notes = [], []
+    for chunk in chunks:
+        prs = Presentation(chunk)
+        for slide in prs.slides:
+            titles.append(slide.shapes.title.text)
+            assert sum(1 for shape in slide.shapes if shape.shape_type == 13) == 2
+            notes.append(slide.notes_slide.notes_text_frame.text if slide.has_notes_slide else None)
+    assert titles == [f"Slide {i + 1}" for i in range(7)]
+    assert notes == [f"Note {i + 1}" if i % 2 else None for i in range(7)]
+
+
+def test_chunks_contain_only_their_own_parts(tmp_path):
+    deck = make_deck(tmp_path / 'deck.pptx', slides=7)
+    first = split_pptx(str(deck), str(tmp_path / 'chunks'), max_slides=3)[0]
+    with zipfile.ZipFile(first) as zf:
+        names = set(zf.namelist())
+        content_types = zf.read('[Content_Types].xml')
+        links = zf.read('ppt/slides/_rels/slide1.xml.rels')
+
+    assert sorted(n for n in names if n.startswith('ppt/slides/slide')) == [
+        'ppt/slides/slide1.xml', 'ppt/slides/slide2.xml', 'ppt/slides/slide3.xml']
+    assert len([n for n in names if n.startswith('ppt/media/')]) == 4  # 3张独有 + 1张共用
+    assert len([n for n in names if n.startswith('ppt/notesSlides/notesSlide')]) == 1
+    # 内容类型中没有指向不存在部件的条目；链接到其他分片中幻灯片的关系已删除
+    assert all(p.decode() in names for p in re.findall(rb'PartName="/([^"]+)"', content_types))
+    assert b'slide7.xml' not in links
+
+
+def test_size_limit_and_small_decks(tmp_path):
+    deck = make_deck(tmp_path / 'deck.pptx', slides=6, side=96)  # 每张独有图片约27KB
+    limit = deck.stat().st_size // 2
+    chunks = split_pptx(str(deck), str(tmp_path / 'chunks'), max_bytes=limit)
+    assert len(chunks) >= 2
+    assert all(Path(c).stat().st_size <= limit for c in chunks)
+    assert sum(len(Presentation(c).slides) for c in chunks) == 6
+
+    assert split_pptx(str(deck), str(tmp_path / 'none')) == [str(deck)]
+    legacy = tmp_path / 'old.ppt'
+    legacy.write_bytes(b'\xd0\xcf\x11\xe0' + b'\0' * 512)
+    assert split_pptx(str(legacy), str(tmp_path / 'none')) == [str(legacy)]
+
+
+def make_report(path: Path, pages: int, breaks: bool = True, side: int = 16) -> Path:
+    """每页：标题、编号列表、表格、图片，以分页符结束；页眉在最后的节属性中"""
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = 'Quarterly report'
+    for i in range(pages):
+        doc.add_heading(f"Section {i + 1}", 1)
+        doc.add_paragraph(f"Item {i + 1}", style='List Number')
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = f"Table {i + 1}"
+        doc.add_picture(io.BytesIO(make_png(i, side)), width=Inches(1))
+        paragraph = doc.add_paragraph('End of section')
+        if breaks:
+            paragraph.runs[0].add_break(WD_BREAK.PAGE)
+    doc.save(str(path))
+    return path
+
+
+def test_docx_chunks_preserve_structure_and_cut_at_page_breaks(tmp_path):
+    report = make_report(tmp_path / 'report.docx', pages=30)
+    chunks = split_docx(str(report), str(tmp_path / 'chunks'), max_pages=10)
+    assert len(chunks) >= 3
+
+    headings, tables, pictures = [], 0, 0
+    for chunk in chunks:
+        doc = Document(chunk)
+        chunk_headings = [p.text for p in doc.paragraphs if p.style.name == 'Heading 1']
+        # 在分页符处切开：每个分片从一节的标题开始，以该节结尾的段落结束
+        assert doc.paragraphs[0].text == chunk_headings[0]
+        assert doc.paragraphs[-1].text == 'End of section'
+        assert 'List Number' in {p.style.name for p in doc.paragraphs}
+        assert doc.sections[0].header.paragraphs[0].text == 'Quarterly report'
+        assert page_count(chunk, 'docx') <= 10
+        headings += chunk_headings
+        tables += len(doc.tables)
+        pictures += len(doc.inline_shapes)
+        with zipfile.ZipFile(chunk) as zf:
+            # 只包含本分片用到的图片
+            assert len([n for n in zf.namelist() if n.startswith('word/media/')]) == len(doc.inline_shapes)
+    assert headings == [f"Section {i + 1}" for i in range(30)]
+    assert tables == pictures == 30
+
+
+def test_docx_without_breaks_is_cut_between_body_elements(tmp_path):
+    report = make_report(tmp_path / 'report.docx', pages=12, breaks=False, side=96)
+    limit = report.stat().st_size // 2
+    chunks = split_docx(str(report), str(tmp_path / 'chunks'), max_bytes=limit)
+    assert len(chunks) >= 2
+    assert all(Path(c).stat().st_size <= limit for c in chunks)
+    assert sum(len(Document(c).tables) for c in chunks) == 12
+
+    assert split_docx(str(report), str(tmp_path / 'none')) == [str(report)]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+每日页数额度测试：预记/更正/失败不计、按北京时间换日、多进程合并（并发保存不丢失）、按剩余额度选择账户、
+处理流程计入实际页数
+"""
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_accounts import AccountPool
+from mineru_async import MinerUAsyncProcessor
+from mineru_quota import QuotaLedger
+from conftest import Clock, make_pdf, token_info
+
+# 2026-01-01 00:00 北京时间
+MIDNIGHT = 1767196800
+
+
+def test_ledger_reserves_settles_and_resets_daily(tmp_path):
+    clock = Clock()
+    clock.now = MIDNIGHT - 60
+    ledger = QuotaLedger(str(tmp_path / 'quota.json'), daily_pages=100, clock=clock)
+
+    ledger.reserve('a', 'job1', 30)
+    ledger.reserve('a', 'job2', None)   # 页数未知按1页预记
+    ledger.settle('job2', 12)           # 服务端报告的实际页数
+    ledger.reserve('a', 'job3', 40)
+    ledger.release('job3')              # 处理失败
+    assert ledger.used('a') == 42 and ledger.remaining('a') == 58
+
+    # 另一个进程看到同一份账本，并与之合并
+    other = QuotaLedger(str(tmp_path / 'quota.json'), daily_pages=100, clock=clock)
+    other.reserve('a', 'job4', 50)
+    assert ledger.used('a') == 92
+    ledger.reserve('b', 'job5', 5)
+    assert json.loads((tmp_path / 'quota.json').read_text())['days']['2025-12-31']['a'] == {
+        'job1': 30, 'job2': 12, 'job4': 50}
+
+    # 北京时间零点重置
+    clock.now = MIDNIGHT + 60
+    assert ledger.used('a') == 0 and ledger.remaining('a') == 100
+
+
+def test_concurrent_saves_keep_every_reservation(tmp_path):
+    """多个账本实例（各自打开锁文件，相当于多个进程）同时保存，彼此的记录都不丢失"""
+    path = str(tmp_path / 'quota.json')
+
+    def work(worker: int):
+        ledger = QuotaLedger(path, daily_pages=10_000)
+        for i in range(25):
+            ledger.reserve('a', f'job{worker}-{i}', 1)
+            ledger.finish(f'job{worker}-{i}')
+        assert not ledger.jobs and not ledger.touched
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert QuotaLedger(path).used('a') == 100
+
+
+def test_pool_routes_big_documents_to_accounts_with_quota():
+    quota = QuotaLedger(daily_pages=100)
+    pool = AccountPool({'a': token_info('ta'), 'b': token_info('tb'), 'c': token_info('tc')},
+                       seed=1, quota=quota)
+    quota.reserve('a', 'job1', 90)
+    quota.reserve('b', 'job2', 40)
+
+    assert {pool.pick(pages=50)[0] for _ in range(50)} == {'b', 'c'}
+    assert {pool.pick(pages=80)[0] for _ in range(50)} == {'c'}
+    # 都不够时选剩余最多的账户
+    assert pool.pick(pages=500)[0] == 'c'
+    status = {s['email']: s for s in pool.status()}
+    assert status['a']['pages_today'] == 90 and status['a']['quota_remaining'] == 10
+
+
+def test_processed_pages_are_charged_to_the_submitting_account(tmp_path, server, tokens_file):
+    ledger_file = tmp_path / 'quota.json'
+    pool = AccountPool.shared(tokens_file, json.loads(Path(tokens_file).read_text()))
+    pool.quota = QuotaLedger(str(ledger_file))
+
+    processor = MinerUAsyncProcessor(base_url=server.base_url, tokens_file=tokens_file)
+    result = asyncio.run(processor.process_file(str(make_pdf(tmp_path / 'doc.pdf', pages=7)), str(tmp_path)))
+
+    assert result is not None
+    assert QuotaLedger(str(ledger_file)).used('mock@example.com') == 7
+    assert not pool.quota.jobs    # 已结束的任务不再跟踪
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Token 后台续期测试：提前续期并热更新、缺少Cookie时退避、续期不影响进行中的任务
+"""
+import asyncio
+import base64
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_accounts import AccountPool
+from mineru_batch_async import BatchAsyncProcessor
+from mineru_renewer import TokenRenewer, cookie_expiry, write_json_atomic
+from conftest import make_pdf
+
+
+def fake_jwt(expires_in: float) -> str:
+    def part(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    return f"{part({'alg': 'none'})}.{part({'exp': int(time.time() + expires_in)})}.sig"
+
+
+def setup_account(tmp_path, server, days_left: float, cookies: bool = True):
+    """Token 文件、Cookie 文件，以及模拟服务器上对应的旧 Token"""
+    expired_at = (datetime.now(timezone.utc) + timedelta(days=days_left)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    server.api_tokens['old'] = {'id': 'old', 'token_name': 'token-old', 'token': 'old-token',
+                                'expired_at': expired_at}
+    tokens_file = tmp_path / 'all_tokens.json'
+    write_json_atomic(tokens_file, {'a@example.com': {
+        'name': 'a', 'token_name': 'token-old', 'token': 'old-token',
+        'created_at': '2026-01-01 00:00:00', 'expired_at': expired_at
+    }})
+    cookies_file = tmp_path / 'all_cookies.json'
+    if cookies:
+        write_json_atomic(cookies_file, {'a@example.com': {'uaa-token': fake_jwt(86400)}})
+    return TokenRenewer(tokens_file, cookies_file, base_url=server.base_url, delete_grace=0)
+
+
+def test_renews_ahead_of_expiry_and_hot_swaps(tmp_path, server):
+    renewer = setup_account(tmp_path, server, days_left=2)
+    pool = AccountPool.shared(str(renewer.tokens_file), json.loads(renewer.tokens_file.read_text()))
+
+    async def run():
+        outcome = await renewer.run_once()
+        await asyncio.gather(*renewer.pending)
+        return outcome
+
+    assert asyncio.run(run()) == {'a@example.com': 'renewed'}
+    info = json.loads(renewer.tokens_file.read_text())['a@example.com']
+    assert info['token'] != 'old-token' and info['name'] == 'a'
+    assert not renewer.due(info)
+    assert pool.token('a@example.com') == info['token']
+    # 先创建后删除：只剩新 Token
+    assert [t['token_name'] for t in server.api_tokens.values()] == [info['token_name']]
+    assert not list(tmp_path.glob('.*.tmp'))
+
+    # 还没到期时不续期
+    assert asyncio.run(renewer.run_once()) == {}
+
+
+def test_missing_cookies_backs_off(tmp_path, server):
+    renewer = setup_account(tmp_path, server, days_left=-1, cookies=False)
+    before = renewer.tokens_file.read_text()
+
+    assert asyncio.run(renewer.run_once()) == {'a@example.com': 'no_cookies'}
+    assert asyncio.run(renewer.run_once()) == {}  # check_interval 内不重试
+    assert renewer.next_check(json.loads(before)) > 60
+    assert renewer.tokens_file.read_text() == before
+    assert cookie_expiry(fake_jwt(-10)) < datetime.now(timezone.utc)
+
+
+def test_renewal_during_processing_does_not_fail_jobs(tmp_path, server):
+    """处理进行中续期并删除旧 Token：轮询自动改用新 Token，任务全部成功"""
+    renewer = setup_account(tmp_path, server, days_left=1)
+    server.config.base_latency = 0.5
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=1)) for i in range(4)]
+    processor = BatchAsyncProcessor(max_concurrent=4, base_url=server.base_url,
+                                    tokens_file=str(renewer.tokens_file))
+
+    async def run():
+        job = asyncio.create_task(processor.process_files_parallel(files))
+        await asyncio.sleep(0.3)
+        assert await renewer.run_once() == {'a@example.com': 'renewed'}
+        await asyncio.gather(*renewer.pending)
+        return await job
+
+    results = asyncio.run(run())
+    assert [r.status for r in results] == ['done'] * len(files)
+    assert 'old-token' in server.config.revoked_tokens
+    assert server.stats['tokens'].get('old-token', 0) >= len(files)
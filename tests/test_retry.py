@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+重试引擎测试：错误分类、退避预算、只重试失败的阶段、下载断点续传、非幂等请求丢失响应时不重复提交
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from niquests import AsyncSession
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_retry import RetryEngine, RetryPolicy, RetryableError, is_retryable
+from mineru_async import ResultProcessor
+from mineru_batch_async import BatchAsyncProcessor
+from conftest import make_pdf
+
+
+def test_classification():
+    assert is_retryable(RetryableError('HTTP 502'))
+    assert is_retryable(ConnectionResetError())
+    assert is_retryable(asyncio.TimeoutError())
+    assert not is_retryable(ValueError('bad request'))
+
+    # 非幂等请求：只重试服务端确定未处理的
+    assert is_retryable(RetryableError('HTTP 429', status=429), idempotent=False)
+    assert is_retryable(RetryableError('HTTP 503', status=503), idempotent=False)
+    assert is_retryable(ConnectionRefusedError(), idempotent=False)
+    assert not is_retryable(RetryableError('HTTP 500', status=500), idempotent=False)
+    assert not is_retryable(RetryableError('HTTP 502: 响应不是JSON', status=502), idempotent=False)
+    assert not is_retryable(ConnectionResetError(), idempotent=False)
+    assert not is_retryable(asyncio.TimeoutError(), idempotent=False)
+
+
+def test_engine_retries_until_success_and_stops_on_permanent_errors():
+    engine = RetryEngine({'poll': RetryPolicy(attempts=4, base_delay=0.01)}, seed=1)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RetryableError('HTTP 503')
+        return 'ok'
+
+    assert asyncio.run(engine.call('poll', flaky)) == 'ok'
+    assert len(calls) == 3
+
+    async def permanent():
+        calls.append(1)
+        raise ValueError('HTTP 400')
+
+    calls.clear()
+    with pytest.raises(ValueError):
+        asyncio.run(engine.call('poll', permanent))
+    assert len(calls) == 1
+
+
+def test_engine_respects_attempts_and_budget():
+    calls = []
+
+    async def always_down():
+        calls.append(1)
+        raise RetryableError('HTTP 503', retry_after=5)
+
+    engine = RetryEngine({'put': RetryPolicy(attempts=3, base_delay=0.01)}, delay_scale=0.001)
+    with pytest.raises(RetryableError):
+        asyncio.run(engine.call('put', always_down))
+    assert len(calls) == 3
+
+    # Retry-After 超过预算时立即放弃
+    calls.clear()
+    engine = RetryEngine({'put': RetryPolicy(attempts=10, base_delay=0.01, budget=1)}, delay_scale=0.001)
+    with pytest.raises(RetryableError):
+        asyncio.run(engine.call('put', always_down))
+    assert len(calls) == 1
+
+
+def test_download_resumes_with_range(tmp_path, server):
+    """连接中途断开后从已收到的位置续传"""
+    data = bytes(range(256)) * 4096  # 1MB
+    url = server.add_document('big.bin', data)
+    server.config.disconnect_rate = 0.5
+
+    async def run():
+        async with AsyncSession() as session:
+            return await ResultProcessor.download(session, url, tmp_path / 'big.bin', RetryEngine(seed=3))
+
+    assert asyncio.run(run()) == len(data)
+    assert (tmp_path / 'big.bin').read_bytes() == data
+    assert server.stats['disconnects'] >= 1
+    # 续传只补发缺失部分：总发送量小于 (断开次数 + 1) 个完整文件
+    assert server.stats['bytes_out'] < len(data) * (server.stats['disconnects'] + 1)
+
+
+def test_flaky_network_batch_succeeds_without_reuploading(tmp_path, tokens_file, server):
+    """502网关页、500、PUT失败、下载断开都只重试失败的阶段；提交遇到500/502不重试（可能已创建任务）"""
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=2)) for i in range(8)]
+    server.config.error_rate = 0.1
+    server.config.gateway_error_rate = 0.1
+    server.config.upload_error_rate = 0.2
+    server.config.disconnect_rate = 0.3
+
+    processor = BatchAsyncProcessor(max_concurrent=4, base_url=server.base_url, tokens_file=tokens_file)
+    # 小文件断开时收不到任何字节，每次重试都从头下载：放宽次数，避免连续断开用尽重试导致偶发失败
+    processor.client.retry = RetryEngine({stage: RetryPolicy(attempts=12, base_delay=1.0, budget=1000)
+                                          for stage in ('put', 'poll', 'download')})
+    results = asyncio.run(processor.process_files_parallel(files))
+
+    stats = server.stats
+    assert stats['injected_errors'] + stats['gateway_errors'] + stats['upload_errors'] + stats['disconnects'] > 0
+    # 每个文档只申请一次上传链接；申请失败的文档直接失败，其余全部成功
+    assert stats['requests']['file-urls/batch'] == len(files)
+    failed = [r for r in results if r.status != 'done']
+    assert all(r.error == '上传失败' for r in failed)
+    assert len(failed) <= stats['injected_errors'] + stats['gateway_errors']
+    # PUT 次数 = 拿到上传链接的文档数 + 上传失败次数
+    assert stats['requests']['upload'] == len(files) - len(failed) + stats['upload_errors']
+
+
+def test_submit_not_repeated_when_response_lost(tmp_path, tokens_file, server):
+    """服务端已创建任务但响应丢失：不重试提交（否则重复创建任务、重复扣额度），500同样不重试"""
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=2)) for i in range(2)]
+    server.config.drop_response_rate = 1.0
+
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+
+    assert [r.status for r in results] == ['failed'] * len(files)
+    assert server.stats['dropped_responses'] == len(files)
+    assert server.stats['requests']['file-urls/batch'] == len(server.batches) == len(files)
+
+
+def test_rejected_submission_is_retried(tmp_path, tokens_file, server):
+    """明确拒绝（429）的提交照常重试：每个Token只能有1个未完成任务，第二个文档等第一个完成后提交成功"""
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=2)) for i in range(2)]
+    server.config.max_active_per_token = 1
+
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+
+    assert [r.status for r in results] == ['done'] * len(files)
+    assert server.stats['rate_limited'] > 0
+    assert len(server.batches) == len(files)
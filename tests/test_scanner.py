@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+目录扫描与流式批量处理测试
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+import mineru_batch_async
+from mineru_scanner import scan_files, split_patterns
+
+
+def make_tree(root: Path):
+    """构造测试目录树"""
+    for rel in ('a.pdf', 'b.PDF', 'c.docx', 'notes.txt',
+                'sub/d.pdf', 'sub/deep/e.pdf', 'skip/f.pdf',
+                '.hidden/g.pdf', 'a_result/h.pdf', 'a_images/i.pdf'):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'%PDF-1.4')
+
+
+def names(entries):
+    return [Path(e.path).name for e in entries]
+
+
+def test_split_patterns():
+    """逗号或空格分隔的多个模式"""
+    assert split_patterns('*.pdf,*.docx') == ['*.pdf', '*.docx']
+    assert split_patterns('*.pdf *.docx') == ['*.pdf', '*.docx']
+    assert split_patterns(['*.pdf', '*.png,*.jpg']) == ['*.pdf', '*.png', '*.jpg']
+    assert split_patterns(None) == []
+
+
+def test_scan_non_recursive(tmp_path):
+    """默认只扫描顶层，模式不区分大小写"""
+    make_tree(tmp_path)
+    assert names(scan_files(str(tmp_path), '*.pdf')) == ['a.pdf', 'b.PDF']
+
+
+def test_scan_recursive_with_excludes(tmp_path):
+    """递归扫描跳过隐藏目录、输出目录和排除模式"""
+    make_tree(tmp_path)
+
+    found = names(scan_files(str(tmp_path), '*.pdf,*.docx', excludes='skip', recursive=True))
+    assert found == ['a.pdf', 'b.PDF', 'c.docx', 'd.pdf', 'e.pdf']
+
+    # "**/" 前缀隐含递归
+    assert names(scan_files(str(tmp_path), '**/*.pdf', excludes='skip')) == ['a.pdf', 'b.PDF', 'd.pdf', 'e.pdf']
+
+
+def test_process_stream_honors_max_workers(tmp_path, monkeypatch):
+    """流式处理：所有文件被处理，且并行度不超过 max_workers"""
+    make_tree(tmp_path)
+    monkeypatch.setattr(mineru_batch_async, 'MinerUAsyncClient', lambda *args, **kwargs: None)
+    processor = mineru_batch_async.BatchAsyncProcessor(max_concurrent=5)
+
+    active = 0
+    peak = 0
+
+    async def fake_run_task(task, progress, task_id, manifest=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        task.status = 'done'
+        task.result = {'image_count': 0}
+        return task
+
+    monkeypatch.setattr(processor, '_run_task', fake_run_task)
+
+    files = scan_files(str(tmp_path), '*.pdf', recursive=True)
+    results, stats = asyncio.run(processor.process_stream(files, max_workers=2))
+
+    assert stats['scanned'] == 5
+    assert sorted(Path(r.file_path).name for r in results) == ['a.pdf', 'b.PDF', 'd.pdf', 'e.pdf', 'f.pdf']
+    assert peak <= 2
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+调度策略测试：任务大小估算、fifo/lpt/sjf 排序、按优先级分配空位、批量和流式处理按策略顺序开始
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_batch_async import BatchAsyncProcessor
+from mineru_concurrency import AimdLimiter
+from mineru_scheduling import Scheduler, estimate_pages, job_cost
+from conftest import make_pdf
+
+
+def test_job_size_estimate():
+    assert estimate_pages({'pages': 12, 'format': 'pdf', 'size': 10}) == 12
+    assert estimate_pages({'format': 'png', 'size': 5_000_000}) == 1
+    assert estimate_pages({'format': 'pdf', 'size': 1_000_000}) == 10
+    assert estimate_pages({'format': 'pptx', 'size': 1_000_000}) == 5
+    assert estimate_pages({'is_url': True}) == 10
+    # 本地文件加上传字节折算，URL 由服务端下载
+    assert job_cost({'pages': 3, 'size': 2_000_000}) == 5
+    assert job_cost({'pages': 3, 'size': 2_000_000, 'is_url': True}) == 3
+
+
+def test_policies_order_by_size(monkeypatch):
+    infos = [{'name': 'a', 'pages': 5}, {'name': 'b', 'pages': 50}, {'name': 'c', 'pages': 1},
+             {'name': 'd', 'pages': 5}]
+    names = lambda policy: [i['name'] for i in Scheduler(policy).order(infos)]
+    assert names('fifo') == ['a', 'b', 'c', 'd']
+    assert names('lpt') == ['b', 'a', 'd', 'c']
+    assert names('sjf') == ['c', 'a', 'd', 'b']
+
+    monkeypatch.setenv('MINERU_SCHEDULE', 'SJF')
+    assert Scheduler().policy == 'sjf' and Scheduler('lpt').policy == 'lpt'
+    with pytest.raises(ValueError):
+        Scheduler('random')
+
+
+def test_waiters_get_slots_by_priority():
+    limiter = AimdLimiter('document', initial=1, adaptive=False)
+    started = []
+
+    async def job(name, priority):
+        async with limiter.slot(priority):
+            started.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        first = await limiter.acquire()
+        jobs = [asyncio.create_task(job(name, priority))
+                for name, priority in (('big', 5), ('small', 1), ('mid', 3), ('small2', 1))]
+        await asyncio.sleep(0)
+        # 已有人排队时，即使有空位新来的也排在后面
+        limiter.release(first)
+        late = asyncio.create_task(job('late', 0))
+        await asyncio.gather(*jobs, late)
+
+    asyncio.run(main())
+    assert started == ['small', 'late', 'small2', 'mid', 'big']
+
+
+def start_order(results):
+    return [Path(r.file_path).stem for r in sorted(results, key=lambda r: r.start_time)]
+
+
+def test_batch_starts_longest_first(tmp_path, tokens_file, server):
+    files = [str(make_pdf(tmp_path / f'{name}.pdf', pages)) for name, pages in
+             (('a_small', 1), ('b_mid', 8), ('c_big', 20))]
+
+    processor = BatchAsyncProcessor(max_concurrent=1, base_url=server.base_url, tokens_file=tokens_file)
+    assert processor.scheduler.policy == 'lpt'
+    results = asyncio.run(processor.process_files_parallel(files, max_concurrent=1))
+    assert [r.file_path for r in results] == files   # 结果保持输入顺序
+    assert all(r.status == 'done' for r in results)
+    assert start_order(results) == ['c_big', 'b_mid', 'a_small']
+
+
+def test_stream_picks_shortest_waiting_file(tmp_path, tokens_file, server):
+    files = [str(make_pdf(tmp_path / f'{name}.pdf', pages)) for name, pages in
+             (('a_first', 5), ('b_big', 20), ('c_mid', 8), ('d_small', 1))]
+
+    processor = BatchAsyncProcessor(max_concurrent=1, base_url=server.base_url, tokens_file=tokens_file,
+                                    policy='sjf')
+    results, _ = asyncio.run(processor.process_stream(iter(files), max_workers=1))
+    assert all(r.status == 'done' for r in results)
+    # 最先验证完的文件立即开始，其余已验证的文件按大小从小到大
+    order = start_order(results)
+    assert order[1:] == [name for name in ('d_small', 'a_first', 'c_mid', 'b_big') if name != order[0]]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+链路追踪测试：OTLP JSON 格式、父子关系、批量处理埋点
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_tracing import Tracer, TRACER, NOOP_SPAN
+from conftest import make_pdf
+
+
+def load_spans(path):
+    spans = []
+    for line in Path(path).read_text(encoding='utf-8').splitlines():
+        for resource in json.loads(line)['resourceSpans']:
+            for scope in resource['scopeSpans']:
+                spans.extend(scope['spans'])
+    return spans
+
+
+def attributes(span):
+    return {a['key']: list(a['value'].values())[0] for a in span['attributes']}
+
+
+def test_disabled_tracer_returns_noop():
+    tracer = Tracer()
+    assert tracer.start_span('document') is NOOP_SPAN
+    with tracer.span('validate') as span:
+        span.set_attribute('batch_id', 'x')
+    assert tracer.current_span() is NOOP_SPAN
+
+
+def test_nested_spans_export_otlp_json(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    tracer = Tracer()
+    tracer.configure(str(path), flush_interval=60)
+
+    with tracer.span('document', {'file.size': 1024}) as root:
+        with tracer.span('put', {'account': 'a@example.com'}):
+            pass
+        tracer.record_span('server_queue', 100.0, 101.5, {'batch_id': 'b1'})
+        try:
+            with tracer.span('download'):
+                raise RuntimeError('boom')
+        except RuntimeError:
+            pass
+    tracer.shutdown()
+
+    spans = {s['name']: s for s in load_spans(path)}
+    assert set(spans) == {'document', 'put', 'server_queue', 'download'}
+    assert 'parentSpanId' not in spans['document']
+    for name in ('put', 'server_queue', 'download'):
+        assert spans[name]['traceId'] == root.trace_id
+        assert spans[name]['parentSpanId'] == root.span_id
+    assert spans['document']['attributes'] == [{'key': 'file.size', 'value': {'intValue': '1024'}}]
+    assert spans['server_queue']['startTimeUnixNano'] == str(100 * 10 ** 9)
+    assert spans['server_queue']['endTimeUnixNano'] == str(101500 * 10 ** 6)
+    assert spans['download']['status'] == {'code': 2, 'message': 'RuntimeError: boom'}
+    assert spans['put']['status'] == {'code': 1}
+
+
+def test_batch_pipeline_is_traced(tmp_path, tokens_file, server, monkeypatch):
+    """每个文档一条 trace，包含全部阶段和 batch_id/账户/大小/页数属性"""
+    from mineru_batch_async import BatchAsyncProcessor
+
+    path = tmp_path / 'traces.jsonl'
+    tracer = Tracer()
+    tracer.configure(str(path), flush_interval=60)
+    monkeypatch.setattr(TRACER, 'exporter', tracer.exporter)
+    server.config.latency_per_page = 0.1  # 轮询能观察到 running 状态
+
+    files = [str(make_pdf(tmp_path / f'doc{i}.pdf', pages=3)) for i in range(2)]
+    processor = BatchAsyncProcessor(max_concurrent=2, base_url=server.base_url, tokens_file=tokens_file)
+    results = asyncio.run(processor.process_files_parallel(files))
+    assert all(r.status == 'done' for r in results)
+    tracer.shutdown()
+
+    spans = load_spans(path)
+    documents = [s for s in spans if s['name'] == 'document']
+    assert len(documents) == 2
+
+    for document, task in zip(sorted(documents, key=lambda s: attributes(s)['file.name']), results):
+        attrs = attributes(document)
+        assert attrs['batch_id'] == task.batch_id
+        assert attrs['account'] == 'mock@example.com'
+        assert attrs['file.pages'] == '3'
+        assert attrs['status'] == 'done'
+
+        children = {s['name']: s for s in spans if s.get('parentSpanId') == document['spanId']}
+        assert {'validate', 'get_upload_url', 'put', 'server_queue', 'server_running',
+                'download', 'extract', 'organize'} <= set(children)
+        assert attributes(children['put'])['batch_id'] == task.batch_id
+        assert all(s['traceId'] == document['traceId'] for s in children.values())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+URL 验证测试：条件请求复用缓存、按主机限制并发、未变化的URL不重新处理
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+from niquests import AsyncSession
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_async import FileValidator
+from mineru_batch_async import BatchAsyncProcessor
+from mineru_manifest import ChangeManifest
+from mineru_url_cache import HostLimiter, UrlCache
+from conftest import make_pdf
+
+
+def validate(url, cache_file):
+    """一次运行：加载缓存、验证、保存"""
+    cache = UrlCache(str(cache_file))
+
+    async def run():
+        async with AsyncSession() as session:
+            return await FileValidator.validate_url(session, url, cache)
+    result = asyncio.run(run())
+    cache.save()
+    return result
+
+
+def test_repeat_validation_uses_conditional_request(tmp_path, server):
+    """第二次运行发 If-None-Match，304 直接使用缓存；内容变化后重新读取"""
+    url = server.add_document('doc.pdf', make_pdf(tmp_path / 'doc.pdf', pages=2).read_bytes())
+    cache_file = tmp_path / 'url_cache.json'
+
+    ok, _, first = validate(url, cache_file)
+    assert ok and first['etag']
+
+    ok, _, second = validate(url, cache_file)
+    assert ok and second == first
+    assert server.stats['requests']['not_modified'] == 1
+
+    server.add_document('doc.pdf', make_pdf(tmp_path / 'doc.pdf', pages=5).read_bytes())
+    ok, _, third = validate(url, cache_file)
+    assert ok and third['etag'] != first['etag']
+    assert server.stats['requests']['not_modified'] == 1
+
+
+def test_host_limiter_caps_per_host_concurrency():
+    limiter = HostLimiter(per_host=2, total=10)
+    active = {}
+    peak = {}
+
+    async def fetch(url):
+        host = url.split('/')[2]
+        async with limiter.limit(url):
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    async def run():
+        urls = [f'https://{h}.example.com/{i}.pdf' for h in 'ab' for i in range(6)]
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*[fetch(u) for u in urls])
+        return asyncio.get_running_loop().time() - start
+
+    elapsed = asyncio.run(run())
+    assert peak == {'a.example.com': 2, 'b.example.com': 2}
+    assert elapsed < 0.06 * 2  # 两个主机并行，每个主机3轮
+
+
+def test_unchanged_urls_are_not_reprocessed(tmp_path, tokens_file, server, monkeypatch):
+    """清单 + URL缓存：未变化的URL只发条件HEAD，不提交任务、不下载"""
+    monkeypatch.setenv('MINERU_URL_CACHE', str(tmp_path / 'url_cache.json'))
+    urls = [server.add_document(f'doc{i}.pdf', make_pdf(tmp_path / f'doc{i}.pdf', pages=1).read_bytes())
+            for i in range(3)]
+    manifest = ChangeManifest(str(tmp_path / 'manifest.json'))
+
+    def run():
+        processor = BatchAsyncProcessor(max_concurrent=3, base_url=server.base_url, tokens_file=tokens_file,
+                                        output_dir=str(tmp_path / 'out'))
+        return asyncio.run(processor.process_files_parallel(urls, manifest=manifest))
+
+    assert [r.status for r in run()] == ['done'] * 3
+    assert (tmp_path / 'out' / 'doc0.md').exists()
+    submitted = server.stats['requests']['extract/task']
+    bytes_out = server.stats['bytes_out']
+
+    assert run() == []
+    assert server.stats['requests']['extract/task'] == submitted
+    assert server.stats['requests']['not_modified'] == 3
+    assert server.stats['bytes_out'] == bytes_out  # 304 没有响应体
+
+    server.add_document('doc1.pdf', make_pdf(tmp_path / 'doc1.pdf', pages=3).read_bytes())
+    assert [r.file_path for r in run()] == [urls[1]]
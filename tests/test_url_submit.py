@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+URL 直接提交测试：不经本机上传、服务端无法访问时回退为下载再上传、其他处理失败不回退、内网地址判断
+"""
+import asyncio
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from mineru_async import URL_FETCH_ERROR, FileValidator, MinerUAsyncProcessor
+from conftest import make_pdf
+
+
+def process(server, tokens_file, url, output_dir):
+    processor = MinerUAsyncProcessor(base_url=server.base_url, tokens_file=tokens_file)
+    return asyncio.run(processor.process_file(url, str(output_dir)))
+
+
+def test_url_is_submitted_directly(tmp_path, tokens_file, server):
+    """URL 由服务端下载：不申请上传链接、不PUT，本机只发一次 HEAD 验证"""
+    url = server.add_document('remote.pdf', make_pdf(tmp_path / 'remote.pdf', pages=3).read_bytes())
+
+    result = process(server, tokens_file, url, tmp_path / 'out')
+    assert result and result['source'] == url
+    assert 'submit' in result['timings'] and 'upload' not in result['timings']
+    requests = server.stats['requests']
+    assert requests['extract/task'] == 1 and requests['files'] == 1
+    assert 'file-urls/batch' not in requests and 'upload' not in requests
+    assert server.stats['bytes_in'] < 1024
+    assert (tmp_path / 'out' / 'remote.md').read_text().count('Page ') == 3
+
+
+def test_unreachable_url_falls_back_to_upload(tmp_path, tokens_file, server):
+    """服务端报告无法下载时，本机下载后上传，结果与直接提交一致"""
+    data = make_pdf(tmp_path / 'remote.pdf', pages=2).read_bytes()
+    url = server.add_document('remote.pdf', data)
+    server.config.unreachable_hosts = {urlparse(server.url).netloc}
+
+    result = process(server, tokens_file, url, tmp_path / 'out')
+    assert result
+    assert {'submit', 'fetch', 'upload', 'process'} <= set(result['timings'])
+    requests = server.stats['requests']
+    assert requests['extract/task'] == 1 and requests['file-urls/batch'] == 1 and requests['upload'] == 1
+    assert server.stats['bytes_in'] >= len(data)
+    assert (tmp_path / 'out' / 'remote.md').exists()
+
+
+def test_processing_failure_is_not_reuploaded(tmp_path, tokens_file, server):
+    """处理失败但不是无法获取文件（如解析出错）：不回退为下载再上传，避免重复扣额度"""
+    url = server.add_document('remote.pdf', make_pdf(tmp_path / 'remote.pdf', pages=1).read_bytes())
+    server.config.fail_rate = 1.0
+    server.config.fail_message = 'failed to read page 3: invalid url in annotation, 访问 layout model timed out'
+
+    assert process(server, tokens_file, url, tmp_path / 'out') is None
+    requests = server.stats['requests']
+    assert requests['extract/task'] == 1
+    assert 'file-urls/batch' not in requests and 'upload' not in requests
+
+
+def test_url_fetch_error_messages():
+    for message in ('failed to download file from url', '文件读取失败', 'code -60008: 文件读取超时',
+                    'Failed to fetch the file', 'file download timed out'):
+        assert URL_FETCH_ERROR.search(message), message
+    for message in ('read error in layout model', 'invalid url parameter', '访问受限', 'timed out while parsing',
+                    'injected processing failure', '下载结果失败', 'error -600031'):
+        assert not URL_FETCH_ERROR.search(message), message
+
+
+def test_upload_mode_skips_direct_submission(tmp_path, tokens_file, server, monkeypatch):
+    monkeypatch.setenv('MINERU_URL_MODE', 'upload')
+    url = server.add_document('remote.pdf', make_pdf(tmp_path / 'remote.pdf', pages=1).read_bytes())
+
+    assert process(server, tokens_file, url, tmp_path / 'out')
+    assert 'extract/task' not in server.stats['requests']
+    assert server.stats['requests']['upload'] == 1
+
+
+def test_unlisted_local_host_is_uploaded(tmp_path, tokens_file, server, monkeypatch):
+    """未在 MINERU_URL_ALLOW_HOSTS 中列出的本机地址：本机下载后上传，不直接提交"""
+    monkeypatch.delenv('MINERU_URL_ALLOW_HOSTS')
+    url = server.add_document('remote.pdf', make_pdf(tmp_path / 'remote.pdf', pages=1).read_bytes())
+
+    assert process(server, tokens_file, url, tmp_path / 'out')
+    assert 'extract/task' not in server.stats['requests']
+    assert server.stats['requests']['upload'] == 1
+
+
+def test_private_hosts_are_not_submitted():
+    assert FileValidator.is_public_url('https://example.com/a.pdf')
+    assert FileValidator.is_public_url('http://8.8.8.8/a.pdf')
+    assert not FileValidator.is_public_url('http://10.0.0.5/a.pdf')
+    assert not FileValidator.is_public_url('http://localhost:8000/a.pdf')
+    assert not FileValidator.is_public_url('http://[::1]/a.pdf')
+    assert not FileValidator.is_public_url('http://127.0.0.1:9000/a.pdf')    # 本地模拟服务器默认也不直接提交
+    # MINERU_URL_ALLOW_HOSTS 中的主机服务端可以访问
+    assert FileValidator.is_public_url('http://127.0.0.1:9000/a.pdf', {'127.0.0.1'})
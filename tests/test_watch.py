@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+目录监听模式测试：持久化队列、写入完成检测、事件源、完成即落盘清单、
+输出目录不触发重扫且失败的文件未变化时不重新提交
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+import mineru_batch_async
+from mineru_watch import DirectoryWatcher, InotifyWatcher, PersistentQueue, StabilityTracker
+
+
+def test_persistent_queue_replay_and_compact(tmp_path):
+    """重启后恢复未完成的文件，压缩后日志只保留未完成记录"""
+    journal = tmp_path / 'queue.jsonl'
+    queue = PersistentQueue(str(journal))
+    assert queue.add('/a.pdf')
+    assert queue.add('/b.pdf')
+    assert not queue.add('/a.pdf')
+    queue.done('/a.pdf')
+
+    # 模拟崩溃时写了一半的行
+    with open(journal, 'a') as f:
+        f.write('{"op": "ad')
+
+    restored = PersistentQueue(str(journal))
+    assert restored.items() == ['/b.pdf']
+
+    restored.COMPACT_THRESHOLD = 1
+    restored.add('/c.pdf')
+    restored.done('/c.pdf')
+    assert len(journal.read_text().splitlines()) == 1
+    assert PersistentQueue(str(journal)).items() == ['/b.pdf']
+
+    # 失败文件的大小和mtime在压缩后保留
+    restored.add('/d.pdf')
+    restored.done('/d.pdf', 'failed', (3, 4))
+    compacted = PersistentQueue(str(journal))
+    assert compacted.items() == ['/b.pdf']
+    assert compacted.failed_unchanged('/d.pdf', (3, 4)) and not compacted.failed_unchanged('/d.pdf', (3, 5))
+
+
+def test_stability_tracker_waits_for_writes(tmp_path):
+    """文件仍在写入时不产出，大小稳定后产出"""
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(b'%PDF')
+    tracker = StabilityTracker(settle_seconds=0.2)
+    tracker.observe(str(path))
+
+    assert tracker.ready() == []
+    time.sleep(0.1)
+    with open(path, 'ab') as f:
+        f.write(b'-more')
+    assert tracker.ready() == []
+
+    time.sleep(0.25)
+    assert tracker.ready() == [str(path)]
+    assert len(tracker) == 0
+
+
+def collect(watcher: DirectoryWatcher, expected: int, timeout: float = 10):
+    """在后台线程中迭代 iter_ready，收集 expected 个文件后停止"""
+    found = []
+
+    def run():
+        for path in watcher.iter_ready():
+            found.append(Path(path).name)
+            if len(found) >= expected:
+                watcher.stop()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, found
+
+
+@pytest.mark.parametrize('force_polling', [True, False])
+def test_watcher_picks_up_existing_and_new_files(tmp_path, force_polling):
+    """已有文件和新落入的文件都被产出并持久化入队，子目录和其他格式被忽略"""
+    if not force_polling:
+        try:
+            InotifyWatcher(str(tmp_path)).close()
+        except OSError:
+            pytest.skip('inotify 不可用')
+
+    (tmp_path / 'old.pdf').write_bytes(b'%PDF-old')
+    (tmp_path / 'sub').mkdir()
+
+    watcher = DirectoryWatcher(str(tmp_path), '*.pdf', settle_seconds=0.2,
+                               poll_interval=0.1, force_polling=force_polling)
+    thread, found = collect(watcher, expected=2)
+
+    time.sleep(0.3)
+    (tmp_path / 'notes.txt').write_text('x')
+    (tmp_path / 'sub' / 'nested.pdf').write_bytes(b'%PDF-nested')
+    (tmp_path / 'new.pdf').write_bytes(b'%PDF-new')
+
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert sorted(found) == ['new.pdf', 'old.pdf']
+    assert watcher.mode == ('polling' if force_polling else 'inotify')
+    assert len(watcher.queue) == 2
+
+
+def test_watcher_saves_manifest_before_dequeue(tmp_path, monkeypatch):
+    """每个文件完成时先落盘清单再出队（进程被杀也不会重新处理），监听模式不累积处理结果"""
+    for name in ('a.pdf', 'b.pdf'):
+        (tmp_path / name).write_bytes(b'%PDF-1.4')
+    monkeypatch.setattr(mineru_batch_async, 'MinerUAsyncClient', lambda *args, **kwargs: None)
+    processor = mineru_batch_async.BatchAsyncProcessor(max_concurrent=2)
+
+    async def fake_run_task(task, progress, task_id, manifest=None):
+        manifest.record(task.file_path, processor.upload_options, {})
+        task.status = 'done'
+        return task
+
+    monkeypatch.setattr(processor, '_run_task', fake_run_task)
+
+    watcher = DirectoryWatcher(str(tmp_path), '*.pdf', settle_seconds=0.1, poll_interval=0.05, force_polling=True)
+    dequeued = []
+    done = watcher.queue.done
+
+    def checked_done(path, status, signature=None):
+        with open(watcher.manifest.manifest_file, encoding='utf-8') as f:
+            assert path in json.load(f)['files']
+        done(path, status, signature)
+        dequeued.append(Path(path).name)
+        if len(dequeued) == 2:
+            watcher.stop()
+
+    monkeypatch.setattr(watcher.queue, 'done', checked_done)
+    results, stats = asyncio.run(asyncio.wait_for(watcher.run(processor, max_workers=2), 10))
+
+    assert sorted(dequeued) == ['a.pdf', 'b.pdf'] and len(watcher.queue) == 0
+    assert results == [] and stats['processed'] == 2 and stats['failed'] == 0
+
+
+def test_recursive_watch_does_not_resubmit_failed_file(tmp_path, monkeypatch):
+    """
+    递归监听：处理产生的 *_result/*_images 目录不触发全量重扫；一直失败的文件只提交一次，
+    文件修改后重新提交，重启后仍记得失败的文件
+    """
+    try:
+        InotifyWatcher(str(tmp_path)).close()
+    except OSError:
+        pytest.skip('inotify 不可用')
+
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-broken')
+    monkeypatch.setattr(mineru_batch_async, 'MinerUAsyncClient', lambda *args, **kwargs: None)
+    processor = mineru_batch_async.BatchAsyncProcessor(max_concurrent=1)
+    submitted = []
+
+    async def fake_run_task(task, progress, task_id, manifest=None):
+        name = Path(task.file_path).name
+        submitted.append(name)
+        if name == 'a.pdf':
+            (tmp_path / f'a_{len(submitted)}_result').mkdir()    # 输出目录出现在监听目录中
+            (tmp_path / f'a_{len(submitted)}_images').mkdir()
+            task.status = 'failed'
+        else:
+            manifest.record(task.file_path, processor.upload_options, {})
+            task.status = 'done'
+        return task
+
+    monkeypatch.setattr(processor, '_run_task', fake_run_task)
+
+    def watch(expected):
+        watcher = DirectoryWatcher(str(tmp_path), '*.pdf', recursive=True, settle_seconds=0.1, poll_interval=0.05)
+        rescans = []
+        rescan = watcher._rescan
+        monkeypatch.setattr(watcher, '_rescan', lambda: rescans.append(1) or rescan())
+        on_done = watcher._on_done
+
+        def stop_after(path, status):
+            on_done(path, status)
+            if len(submitted) >= expected:
+                time.sleep(0.5)    # 给重复入队留出时间
+                watcher.stop()
+
+        monkeypatch.setattr(watcher, '_on_done', stop_after)
+        asyncio.run(asyncio.wait_for(watcher.run(processor, max_workers=1), 10))
+        return rescans
+
+    def create_later(delay, path, data):
+        def run():
+            time.sleep(delay)
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(data)
+        threading.Thread(target=run, daemon=True).start()
+
+    create_later(0.5, tmp_path / 'sub' / 'b.pdf', b'%PDF-b')
+    rescans = watch(expected=2)
+    assert sorted(submitted) == ['a.pdf', 'b.pdf']
+    assert len(rescans) == 2       # 启动一次，新建 sub 一次；输出目录不重扫
+
+    # 重启后仍跳过未变化的失败文件；修改后重新提交
+    time.sleep(0.01)
+    create_later(0.5, tmp_path / 'a.pdf', b'%PDF-fixed')
+    watch(expected=3)
+    assert sorted(submitted) == ['a.pdf', 'a.pdf', 'b.pdf']
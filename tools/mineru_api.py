@@ -4,6 +4,7 @@ MinerU API 完整封装 - 支持所有官方API
 包含：智能解析、文档抽取、批量处理、负载均衡
 """
 import json
+import os
 import niquests as requests
 import random
 import time
@@ -18,7 +19,7 @@ class MinerUAPI:
         self.tokens_file = tokens_file
         self.auto_refresh = auto_refresh
         self.tokens = self._load_tokens()
-        self.base_url = 'https://mineru.net/api/v4'
+        self.base_url = os.environ.get('MINERU_BASE_URL', 'https://mineru.net/api/v4').rstrip('/')
         
         if not self.tokens:
             raise ValueError("未找到Token，请先运行 batch_login.py")
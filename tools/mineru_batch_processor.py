@@ -4,21 +4,28 @@ MinerU 批量处理器 - 生产级方案
 支持：并行处理、文件拆分、结果合并、进度监控
 """
 import json
+import os
 import asyncio
 import aiohttp
 import random
+import sys
 from pathlib import Path
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Tuple
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import time
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from mineru_image_store import ImageStore
+from mineru_merge import ChunkMerger, ChunkResult
+from mineru_ooxml import page_count
+from mineru_ooxml_split import split_docx, split_pptx
+
 try:
     from PyPDF2 import PdfReader, PdfWriter
-    from pptx import Presentation
-    from docx import Document
 except ImportError:
-    print("❌ 请安装依赖: uv pip install PyPDF2 python-pptx python-docx")
+    print("❌ 请安装依赖: uv pip install PyPDF2")
     exit(1)
 
 
@@ -64,78 +71,18 @@ class FileChunker:
     
     @staticmethod
     def split_pptx(file_path: str, output_dir: str) -> List[str]:
-        """拆分PPTX"""
-        prs = Presentation(file_path)
-        total_slides = len(prs.slides)
-        
-        if total_slides <= FileChunker.MAX_PAGES:
-            return [file_path]
-        
-        chunks = []
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
-        
-        file_name = Path(file_path).stem
-        chunk_count = (total_slides + FileChunker.MAX_PAGES - 1) // FileChunker.MAX_PAGES
-        
-        print(f"📊 拆分PPTX: {total_slides}页 → {chunk_count}个文件")
-        
-        for i in range(chunk_count):
-            start = i * FileChunker.MAX_PAGES
-            end = min((i + 1) * FileChunker.MAX_PAGES, total_slides)
-            
-            new_prs = Presentation()
-            new_prs.slide_width = prs.slide_width
-            new_prs.slide_height = prs.slide_height
-            
-            for slide_num in range(start, end):
-                slide = prs.slides[slide_num]
-                new_prs.slides.add_slide(slide.slide_layout)
-            
-            chunk_path = output_path / f"{file_name}_chunk_{i+1}.pptx"
-            new_prs.save(str(chunk_path))
-            
-            chunks.append(str(chunk_path))
-            print(f"  ✅ 分片 {i+1}/{chunk_count}: {end-start}页")
-        
+        """拆分PPTX（在ZIP包层面复制幻灯片及其图片、备注等部件，分片并行写入）"""
+        chunks = split_pptx(file_path, output_dir, max_slides=FileChunker.MAX_PAGES)
+        if len(chunks) > 1:
+            print(f"📊 拆分PPTX: {Path(file_path).name} → {len(chunks)}个文件")
         return chunks
     
     @staticmethod
     def split_docx(file_path: str, output_dir: str) -> List[str]:
-        """拆分DOCX（按段落估算）"""
-        doc = Document(file_path)
-        total_paragraphs = len(doc.paragraphs)
-        
-        # 估算：每页约5段落
-        estimated_pages = total_paragraphs // 5
-        
-        if estimated_pages <= FileChunker.MAX_PAGES:
-            return [file_path]
-        
-        chunks = []
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
-        
-        file_name = Path(file_path).stem
-        paras_per_chunk = FileChunker.MAX_PAGES * 5
-        chunk_count = (total_paragraphs + paras_per_chunk - 1) // paras_per_chunk
-        
-        print(f"📝 拆分DOCX: ~{estimated_pages}页 → {chunk_count}个文件")
-        
-        for i in range(chunk_count):
-            start = i * paras_per_chunk
-            end = min((i + 1) * paras_per_chunk, total_paragraphs)
-            
-            new_doc = Document()
-            for para_num in range(start, end):
-                new_doc.add_paragraph(doc.paragraphs[para_num].text)
-            
-            chunk_path = output_path / f"{file_name}_chunk_{i+1}.docx"
-            new_doc.save(str(chunk_path))
-            
-            chunks.append(str(chunk_path))
-            print(f"  ✅ 分片 {i+1}/{chunk_count}")
-        
+        """拆分DOCX（在正文元素之间、优先在分页/分节处切分，保留表格、图片、样式和编号）"""
+        chunks = split_docx(file_path, output_dir, max_pages=FileChunker.MAX_PAGES)
+        if len(chunks) > 1:
+            print(f"📝 拆分DOCX: {Path(file_path).name} → {len(chunks)}个文件")
         return chunks
     
     @staticmethod
@@ -151,6 +98,29 @@ class FileChunker:
             return FileChunker.split_docx(file_path, output_dir)
         else:
             return [file_path]
+    
+    @staticmethod
+    def page_plan(chunks: List[str]) -> Tuple[List[Optional[int]], Optional[int]]:
+        """
+        拆分计划：每个分片的全局起始页（0开始）和总页数，合并时按计划偏移页码，不依赖分片结果统计
+        
+        DOCX 分片的页数由服务端排版决定，无法预知：其后分片的起始页和总页数为 None（合并时按结果统计）
+        """
+        starts = []
+        total = 0
+        for chunk in chunks:
+            starts.append(total)
+            if total is None:
+                continue
+            suffix = Path(chunk).suffix.lower()
+            if suffix == '.pdf':
+                pages = len(PdfReader(chunk).pages)
+            elif suffix == '.pptx':
+                pages = page_count(chunk, 'pptx')
+            else:
+                pages = None
+            total = total + pages if pages is not None else None
+        return starts, total
 
 
 class ResultMerger:
@@ -225,47 +195,46 @@ class ResultMerger:
         return extracted_results
     
     @staticmethod
-    def merge_markdown_files(extracted_results: List[Dict], output_file: str):
-        """合并Markdown内容"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for i, result in enumerate(extracted_results, 1):
-                if i > 1:
-                    f.write("\n\n" + "="*60 + "\n\n")
-                
-                f.write(f"# 分片 {i}\n\n")
-                
-                if result['md_content']:
+    def chunk_results(extracted_results: List[Dict], starts: List[Optional[int]],
+                      total_pages: Optional[int] = None) -> List[ChunkResult]:
+        """按拆分计划列出所有分片：序号和起始页来自计划，失败的分片 chunk_dir 为 None（合并时标记缺页）"""
+        dirs = {result['chunk_id']: result['chunk_dir'] for result in extracted_results}
+        chunks = [ChunkResult(i, start, dirs.get(i)) for i, start in enumerate(starts, 1)]
+        return ChunkMerger().resolve(chunks, total_pages)
+    
+    @staticmethod
+    def merge_markdown_files(extracted_results: List[Dict], chunks: List[ChunkResult], output_file: str):
+        """合并Markdown内容（按页序，图片引用改写到 images/，失败的分片写入缺页说明）"""
+        for result in extracted_results:
+            chunk_dir = result['chunk_dir']
+            # 压缩包中没有Markdown时，使用单独下载的内容
+            if not ChunkMerger.find_markdown(chunk_dir) and result['md_content']:
+                with open(Path(chunk_dir) / "full.md", 'w', encoding='utf-8') as f:
                     f.write(result['md_content'])
-                else:
-                    f.write("*内容为空*\n")
         
-        print(f"✅ Markdown合并完成: {output_file}")
+        merged = ChunkMerger().merge_markdown(chunks, output_file)
+        print(f"✅ Markdown合并完成: {output_file} ({merged}个分片)")
     
     @staticmethod
-    def merge_images(extracted_results: List[Dict], output_dir: str):
-        """合并所有图片到统一目录"""
-        import shutil
-        
+    def merge_images(chunks: List[ChunkResult], output_dir: str, image_store: Optional[ImageStore] = None):
+        """合并所有图片到统一目录（启用图片存储时去重存放）"""
         images_dir = Path(output_dir) / "images"
-        images_dir.mkdir(exist_ok=True, parents=True)
+        image_count = ChunkMerger(image_store=image_store).merge_images(chunks, str(images_dir))
         
-        image_count = 0
+        print(f"✅ 图片合并完成: {image_count} 个文件 → {images_dir}")
+    
+    @staticmethod
+    def merge_structured_json(chunks: List[ChunkResult], output_dir: str, name: str) -> Dict:
+        """合并 content_list 和 middle JSON（page_idx 按拆分计划改为全局页码，失败分片的页写入占位页）"""
+        merger = ChunkMerger()
         
-        for result in extracted_results:
-            chunk_dir = Path(result['chunk_dir'])
-            
-            # 查找所有图片文件
-            for img_file in chunk_dir.rglob("*.png"):
-                new_name = f"chunk_{result['chunk_id']}_{img_file.name}"
-                shutil.copy(img_file, images_dir / new_name)
-                image_count += 1
-            
-            for img_file in chunk_dir.rglob("*.jpg"):
-                new_name = f"chunk_{result['chunk_id']}_{img_file.name}"
-                shutil.copy(img_file, images_dir / new_name)
-                image_count += 1
+        content_list_file = Path(output_dir) / f"{name}_content_list.json"
+        middle_file = Path(output_dir) / f"{name}_middle.json"
+        merger.merge_content_list(chunks, str(content_list_file))
+        pages = merger.merge_middle_json(chunks, str(middle_file))
         
-        print(f"✅ 图片合并完成: {image_count} 个文件 → {images_dir}")
+        print(f"✅ 结构化JSON合并完成: {pages}页")
+        return {'content_list': str(content_list_file), 'middle_json': str(middle_file)}
     
     @staticmethod
     def merge_json_metadata(extracted_results: List[Dict], output_file: str):
@@ -325,18 +294,20 @@ class ProgressMonitor:
 class MinerUBatchProcessor:
     """MinerU 批量处理器"""
     
-    def __init__(self, tokens_file='all_tokens.json', max_workers=10):
+    def __init__(self, tokens_file='all_tokens.json', max_workers=10, image_store: Optional[str] = None):
         """
         初始化
         
         Args:
             tokens_file: Token文件
             max_workers: 最大并行度
+            image_store: 内容寻址图片存储目录（默认读取环境变量 MINERU_IMAGE_STORE，未设置则不启用）
         """
         self.tokens_file = tokens_file
         self.max_workers = max_workers
+        self.image_store = ImageStore(image_store) if image_store else ImageStore.from_env()
         self.tokens = self._load_tokens()
-        self.base_url = 'https://mineru.net/api/v4'
+        self.base_url = os.environ.get('MINERU_BASE_URL', 'https://mineru.net/api/v4').rstrip('/')
         
         if not self.tokens:
             raise ValueError("未找到Token，请先运行 batch_login.py")
@@ -469,6 +440,7 @@ class MinerUBatchProcessor:
         
         # 1. 拆分文件
         chunks = FileChunker.split_file(file_path, "./chunks")
+        starts, total_pages = FileChunker.page_plan(chunks)
         print(f"📦 拆分完成: {len(chunks)} 个分片")
         
         if len(chunks) == 1:
@@ -498,13 +470,17 @@ class MinerUBatchProcessor:
         file_name = Path(file_path).stem
         
         print(f"\n🔗 合并结果...")
+        merged_chunks = ResultMerger.chunk_results(extracted_results, starts, total_pages)
         
         # 合并Markdown
         md_file = output_path / f"{file_name}_merged.md"
-        ResultMerger.merge_markdown_files(extracted_results, str(md_file))
+        ResultMerger.merge_markdown_files(extracted_results, merged_chunks, str(md_file))
         
         # 合并图片
-        ResultMerger.merge_images(extracted_results, output_dir)
+        ResultMerger.merge_images(merged_chunks, output_dir, self.image_store)
+        
+        # 合并结构化JSON
+        structured = ResultMerger.merge_structured_json(merged_chunks, output_dir, file_name)
         
         # 合并元数据
         json_file = output_path / f"{file_name}_metadata.json"
@@ -514,10 +490,12 @@ class MinerUBatchProcessor:
             'total_chunks': len(chunks),
             'success': len(extracted_results),
             'failed': len(results) - len(extracted_results),
+            'missing_chunks': [chunk.index for chunk in merged_chunks if chunk.failed],
             'output_files': {
                 'markdown': str(md_file),
                 'images': str(output_path / "images"),
-                'metadata': str(json_file)
+                'metadata': str(json_file),
+                **structured
             }
         }
 
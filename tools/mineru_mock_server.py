@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+"""
+MinerU API 本地模拟服务器
+用于离线、可复现的测试和性能基准，不需要Token和网络
+
+模拟的接口：
+- POST /api/v4/file-urls/batch            申请上传链接
+- PUT  /upload/{batch_id}/{index}         预签名上传
+- GET  /api/v4/extract-results/batch/{id} 查询批量任务
+- POST /api/v4/extract/task               URL直接提交
+- GET  /api/v4/extract/task/{id}          查询URL任务
+- GET  /download/{id}.zip                 下载结果ZIP（支持Range）
+- GET  /files/{name}                      静态文档（支持HEAD/Range/条件请求，供URL处理测试）
+- GET/POST /api/v4/tokens, DELETE /api/v4/tokens/{id}  Token管理（登录Cookie鉴权，供续期测试）
+
+可配置：每页处理延迟、错误/429/502网关错误注入、上传失败、下载中途断开、提交后丢失响应、带宽上限、失效Token、
+服务端无法访问的URL主机、服务端处理能力（超出时排队）、每个Token的未完成任务上限（超出时429）
+"""
+import hashlib
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+# 1x1 透明PNG
+PNG_PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+
+
+@dataclass
+class MockConfig:
+    """模拟服务器配置"""
+    latency_per_page: float = 0.05   # 每页处理耗时（秒）
+    base_latency: float = 0.1        # 每个任务的固定处理耗时（秒）
+    error_rate: float = 0.0          # API请求返回500的概率
+    rate_limit_rate: float = 0.0     # API请求返回429的概率
+    fail_rate: float = 0.0           # 任务处理失败（state=failed）的概率
+    fail_message: str = 'injected processing failure'  # 处理失败时的 err_msg
+    gateway_error_rate: float = 0.0  # API请求返回502 HTML网关错误页的概率
+    upload_error_rate: float = 0.0   # 上传PUT返回503的概率
+    disconnect_rate: float = 0.0     # 下载中途断开连接的概率
+    drop_response_rate: float = 0.0  # 提交类请求已创建任务、但断开连接不返回响应的概率
+    bandwidth: int = 0               # 上传/下载带宽上限（字节/秒，0为不限，按连接计）
+    result_size: int = 0             # 结果ZIP额外附带的图片字节数（模拟图片很多的大结果）
+    default_pages: int = 10          # 无法识别页数时的默认页数（如URL任务）
+    revoked_tokens: Set[str] = field(default_factory=set)  # 已失效的Token（返回401 A0202）
+    unreachable_hosts: Set[str] = field(default_factory=set)  # 服务端无法访问的URL主机（host:port），URL任务失败
+    token_days: int = 90             # 新建Token的有效天数
+    workers: int = 0                 # 服务端同时处理的任务数（超出时排队，state=pending；0为不限）
+    max_active_per_token: int = 0    # 每个Token未完成的任务数上限（超出时提交返回429；0为不限）
+    formula_latency: float = 0.0     # 开启公式识别（enable_formula）时每页额外耗时（秒）
+    table_latency: float = 0.0       # 开启表格识别（enable_table）时每页额外耗时（秒）
+    latency_per_mb: float = 0.0      # 每MB文件的额外处理耗时（秒）
+    latency_jitter: float = 0.0      # 处理耗时的随机波动（相对值，0.1为±10%）
+    seed: Optional[int] = None       # 随机种子（可复现的错误注入）
+
+
+@dataclass
+class MockTask:
+    """模拟任务"""
+    task_id: str
+    file_name: str
+    data_id: Optional[str] = None
+    pages: int = 0
+    size: int = 0
+    token: str = ''
+    uploaded_at: Optional[float] = None
+    started_at: Optional[float] = None  # 开始处理的时间（之前排队）
+    ready_at: Optional[float] = None
+    page_latency: float = 0.0           # 该任务每页处理耗时（随选项变化）
+    failed: bool = False
+    err_msg: str = 'injected processing failure'
+    options: Dict = field(default_factory=dict)
+
+
+def count_pages(data: bytes, default: int = 1) -> int:
+    """粗略统计PDF页数（其他格式按1页）"""
+    if data.startswith(b'%PDF'):
+        pages = len(re.findall(rb'/Type\s*/Page(?![a-zA-Z])', data))
+        return pages or default
+    return default
+
+
+class MockMinerUServer:
+    """MinerU API 模拟服务器"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.batches: Dict[str, list] = {}
+        self.tasks: Dict[str, MockTask] = {}
+        self.documents: Dict[str, bytes] = {}
+        self.zip_cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.api_tokens: Dict[str, Dict] = {}  # Token管理接口创建的Token：id → 信息
+        self.worker_free: list = [0.0] * self.config.workers  # 各处理槽位空闲的时间
+        self.stats = {'requests': {}, 'bytes_in': 0, 'bytes_out': 0, 'injected_errors': 0, 'rate_limited': 0,
+                      'gateway_errors': 0, 'upload_errors': 0, 'disconnects': 0, 'dropped_responses': 0,
+                      'tokens': {}}
+
+        handler = type('Handler', (_Handler,), {'mock': self})
+        self.httpd = _Server((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """客户端使用的 base_url"""
+        return f"{self.url}/api/v4"
+
+    def start(self) -> 'MockMinerUServer':
+        """后台线程启动"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def add_document(self, name: str, data: bytes) -> str:
+        """注册静态文档，返回可下载的URL"""
+        self.documents[name] = data
+        return f"{self.url}/files/{name}"
+
+    # ==================== 任务状态 ====================
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.stats['requests'][endpoint] = self.stats['requests'].get(endpoint, 0) + 1
+
+    def inject(self) -> Optional[Tuple[int, Dict]]:
+        """按概率注入429或500"""
+        with self.lock:
+            roll = self.random.random()
+            if roll < self.config.rate_limit_rate:
+                self.stats['rate_limited'] += 1
+                return 429, {'code': 429, 'msg': 'Too Many Requests'}
+            if roll < self.config.rate_limit_rate + self.config.error_rate:
+                self.stats['injected_errors'] += 1
+                return 500, {'code': 500, 'msg': 'injected error'}
+            if roll < self.config.rate_limit_rate + self.config.error_rate + self.config.gateway_error_rate:
+                self.stats['gateway_errors'] += 1
+                return 502, None
+        return None
+
+    def roll(self, rate: float, stat: str) -> bool:
+        """按概率触发一次故障并计数"""
+        if not rate:
+            return False
+        with self.lock:
+            if self.random.random() < rate:
+                self.stats[stat] += 1
+                return True
+        return False
+
+    def over_active_limit(self, token: str, new: int = 1) -> bool:
+        """Token的未完成任务数加上新任务是否超过上限"""
+        if not self.config.max_active_per_token:
+            return False
+        now = time.time()
+        with self.lock:
+            active = sum(1 for t in self.tasks.values()
+                         if t.token == token and (t.ready_at is None or now < t.ready_at))
+            if active + new > self.config.max_active_per_token:
+                self.stats['rate_limited'] += 1
+                return True
+        return False
+
+    def new_task(self, file_name: str, data_id: Optional[str] = None, options: Optional[Dict] = None,
+                 token: str = '') -> MockTask:
+        with self.lock:
+            task = MockTask(task_id=uuid.uuid4().hex, file_name=file_name, data_id=data_id, token=token,
+                            options=options or {}, failed=self.random.random() < self.config.fail_rate,
+                            err_msg=self.config.fail_message)
+            self.tasks[task.task_id] = task
+        return task
+
+    def start_processing(self, task: MockTask, pages: int, size: int = 0):
+        """文件就绪，开始计时（处理槽位都被占用时排队）"""
+        task.pages = pages
+        task.size = size
+        task.uploaded_at = time.time()
+        config = self.config
+        task.page_latency = (config.latency_per_page
+                             + config.formula_latency * bool(task.options.get('enable_formula'))
+                             + config.table_latency * bool(task.options.get('enable_table')))
+        duration = config.base_latency + pages * task.page_latency + size / 1_000_000 * config.latency_per_mb
+        with self.lock:
+            if config.latency_jitter:
+                duration *= 1 + self.random.uniform(-config.latency_jitter, config.latency_jitter)
+            if self.worker_free:
+                slot = min(range(len(self.worker_free)), key=self.worker_free.__getitem__)
+                task.started_at = max(task.uploaded_at, self.worker_free[slot])
+                self.worker_free[slot] = task.started_at + duration
+            else:
+                task.started_at = task.uploaded_at
+        task.ready_at = task.started_at + duration
+
+    def task_result(self, task: MockTask) -> Dict:
+        """任务当前状态（与真实API字段一致）"""
+        result = {'file_name': task.file_name, 'data_id': task.data_id, 'err_msg': ''}
+        now = time.time()
+
+        if task.uploaded_at is None:
+            result['state'] = 'waiting-file'
+        elif now < task.ready_at:
+            elapsed = now - task.started_at - self.config.base_latency
+            extracted = max(0, min(task.pages, int(elapsed / task.page_latency)
+                                   if task.page_latency else task.pages))
+            result['state'] = 'running' if elapsed > 0 else 'pending'
+            result['extract_progress'] = {
+                'extracted_pages': extracted,
+                'total_pages': task.pages,
+                'start_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(task.started_at))
+            }
+        elif task.failed:
+            result['state'] = 'failed'
+            result['err_msg'] = task.err_msg
+        else:
+            result['state'] = 'done'
+            result['full_zip_url'] = f"{self.url}/download/{task.task_id}.zip"
+        return result
+
+    def result_zip(self, task: MockTask) -> bytes:
+        """结果ZIP（缓存最近的几个，Range请求之间内容保持一致）"""
+        with self.lock:
+            data = self.zip_cache.get(task.task_id)
+        if data is None:
+            data = self.build_zip(task)
+            with self.lock:
+                self.zip_cache[task.task_id] = data
+                while len(self.zip_cache) > 8:
+                    self.zip_cache.popitem(last=False)
+        return data
+
+    def build_zip(self, task: MockTask) -> bytes:
+        """生成结果ZIP：full.md、content_list、layout 和图片"""
+        stem = task.file_name.rsplit('.', 1)[0]
+        markdown = [f"# {stem}", ""]
+        content_list = []
+        pdf_info = []
+        for page in range(task.pages):
+            text = f"Page {page + 1} of {task.file_name}"
+            markdown.extend([text, ""])
+            content_list.append({'type': 'text', 'text': text, 'page_idx': page})
+            pdf_info.append({'page_idx': page, 'para_blocks': []})
+        markdown.extend(["![](images/figure.png)", ""])
+        content_list.append({'type': 'image', 'img_path': 'images/figure.png', 'page_idx': 0})
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('full.md', '\n'.join(markdown))
+            zf.writestr(f'{task.task_id}_content_list.json', json.dumps(content_list, ensure_ascii=False))
+            zf.writestr('layout.json', json.dumps({'pdf_info': pdf_info}))
+            zf.writestr('images/figure.png', PNG_PIXEL)
+            if self.config.result_size:
+                # 不可压缩的确定性内容
+                padding = random.Random(task.task_id).randbytes(self.config.result_size)
+                zf.writestr('images/scan.bin', padding, compress_type=zipfile.ZIP_STORED)
+        return buffer.getvalue()
+
+
+class _Server(ThreadingHTTPServer):
+    """客户端断开（如取消并行下载）不打印堆栈；监听队列足够容纳上百个并发连接"""
+
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """请求处理（mock 属性由 MockMinerUServer 注入）"""
+
+    mock: MockMinerUServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # 保持测试/基准输出干净
+
+    # ==================== 响应工具 ====================
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.mock.stats['bytes_out'] += len(body)
+
+    def _send_html(self, status: int, html: str):
+        body = html.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _throttled_write(self, data: bytes):
+        """按带宽上限分块写出"""
+        bandwidth = self.mock.config.bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+        else:
+            block = max(bandwidth // 20, 1024)
+            for i in range(0, len(data), block):
+                self.wfile.write(data[i:i + block])
+                time.sleep(len(data[i:i + block]) / bandwidth)
+        self.mock.stats['bytes_out'] += len(data)
+
+    def _throttled_read(self, length: int) -> bytes:
+        """按带宽上限分块读取请求体"""
+        bandwidth = self.mock.config.bandwidth
+        chunks = []
+        remaining = length
+        block = max(bandwidth // 20, 1024) if bandwidth else 1024 * 1024
+        while remaining > 0:
+            chunk = self.rfile.read(min(block, remaining))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+        data = b''.join(chunks)
+        self.mock.stats['bytes_in'] += len(data)
+        return data
+
+    def _send_bytes(self, data: bytes, content_type: str, head: bool = False):
+        """发送二进制内容，支持单段Range、If-Range和If-None-Match（304）"""
+        status = 200
+        start, end = 0, len(data) - 1
+        etag = f'"{hashlib.md5(data).hexdigest().upper()}"'  # 与OSS一致：内容MD5
+        if self.headers.get('If-None-Match') == etag:
+            self.mock.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if match and data and (not if_range or if_range == etag):
+            if match.group(1):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else end
+            else:
+                start = max(len(data) - int(match.group(2) or 0), 0)
+            end = min(end, len(data) - 1)
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(data)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+
+        body = data[start:end + 1]
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        self.end_headers()
+        if head:
+            return
+        if len(body) > 1 and self.mock.roll(self.mock.config.disconnect_rate, 'disconnects'):
+            # 只发送一半后断开连接
+            self._throttled_write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self._throttled_write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length', 0))
+        data = self._throttled_read(length) if length else b''
+        return json.loads(data or b'{}')
+
+    def _token(self) -> str:
+        return self.headers.get('Authorization', '')[len('Bearer '):]
+
+    def _check_api(self, endpoint: str) -> bool:
+        """API请求：计数、鉴权、错误注入"""
+        self.mock.count(endpoint)
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            self._send_json(401, {'code': 401, 'msg': 'unauthorized'})
+            return False
+        token = self._token()
+        with self.mock.lock:
+            self.mock.stats['tokens'][token] = self.mock.stats['tokens'].get(token, 0) + 1
+        if token in self.mock.config.revoked_tokens:
+            length = int(self.headers.get('Content-Length', 0))
+            if length:
+                self.rfile.read(length)
+            self._send_json(401, {'code': 'A0202', 'msg': 'token error'})
+            return False
+        injected = self.mock.inject()
+        if injected:
+            # 请求体仍需读完，保持连接可复用
+            length = int(self.headers.get('Content-Length', 0))
+            if length:
+                self.rfile.read(length)
+            status, payload = injected
+            if payload is None:
+                self._send_html(status, '<html><body><h1>502 Bad Gateway</h1></body></html>')
+            else:
+                self._send_json(status, payload)
+            return False
+        return True
+
+    def _drop_response(self) -> bool:
+        """按概率丢弃响应：任务已创建，直接断开连接（模拟响应在网络上丢失）"""
+        if not self.mock.roll(self.mock.config.drop_response_rate, 'dropped_responses'):
+            return False
+        self.close_connection = True
+        return True
+
+    # ==================== 路由 ====================
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+
+        if path == '/api/v4/file-urls/batch':
+            if not self._check_api('file-urls/batch'):
+                return
+            payload = self._read_json()
+            if self.mock.over_active_limit(self._token(), len(payload.get('files', []))):
+                self._send_json(429, {'code': 429, 'msg': 'Too Many Requests'})
+                return
+            batch_id = uuid.uuid4().hex
+            options = {k: v for k, v in payload.items() if k != 'files'}
+            tasks = [self.mock.new_task(f['name'], f.get('data_id'), options, self._token())
+                     for f in payload.get('files', [])]
+            self.mock.batches[batch_id] = [t.task_id for t in tasks]
+            if self._drop_response():
+                return
+            urls = [f"{self.mock.url}/upload/{batch_id}/{i}" for i in range(len(tasks))]
+            self._send_json(200, {'code': 0, 'msg': 'ok', 'data': {'batch_id': batch_id, 'file_urls': urls}})
+
+        elif path == '/api/v4/extract/task':
+            if not self._check_api('extract/task'):
+                return
+            payload = self._read_json()
+            if self.mock.over_active_limit(self._token()):
+                self._send_json(429, {'code': 429, 'msg': 'Too Many Requests'})
+                return
+            url = payload.get('url', '')
+            name = urlparse(url).path.rsplit('/', 1)[-1] or 'document'
+            task = self.mock.new_task(name, payload.get('data_id'), payload, self._token())
+            if urlparse(url).netloc in self.mock.config.unreachable_hosts:
+                task.failed = True
+                task.err_msg = 'failed to download file from url'
+            document = self.mock.documents.get(name)
+            pages = count_pages(document, self.mock.config.default_pages) if document else self.mock.config.default_pages
+            self.mock.start_processing(task, pages, len(document or b''))
+            if self._drop_response():
+                return
+            self._send_json(200, {'code': 0, 'msg': 'ok', 'data': {'task_id': task.task_id}})
+
+        elif path == '/api/v4/tokens':
+            if not self._check_api('tokens'):
+                return
+            payload = self._read_json()
+            token_id = uuid.uuid4().hex[:8]
+            expired_at = time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                       time.gmtime(time.time() + self.mock.config.token_days * 86400))
+            info = {'id': token_id, 'token_name': payload.get('token_name', token_id),
+                    'token': f'tok-{uuid.uuid4().hex}', 'expired_at': expired_at}
+            with self.mock.lock:
+                self.mock.api_tokens[token_id] = info
+            self._send_json(200, {'code': 0, 'msg': 'ok', 'data': info})
+
+        else:
+            self._send_json(404, {'code': 404, 'msg': 'not found'})
+
+    def do_DELETE(self):
+        match = re.match(r'^/api/v4/tokens/(\w+)$', urlparse(self.path).path)
+        if not match:
+            self._send_json(404, {'code': 404, 'msg': 'not found'})
+            return
+        if not self._check_api('tokens/{id}'):
+            return
+        with self.mock.lock:
+            info = self.mock.api_tokens.pop(match.group(1), None)
+        if info is None:
+            self._send_json(404, {'code': 404, 'msg': 'not found'})
+            return
+        self.mock.config.revoked_tokens.add(info['token'])
+        self._send_json(200, {'code': 0, 'msg': 'ok'})
+
+    def do_PUT(self):
+        match = re.match(r'^/upload/(\w+)/(\d+)$', urlparse(self.path).path)
+        self.mock.count('upload')
+        if not match or match.group(1) not in self.mock.batches:
+            self._send_json(404, {'code': 404, 'msg': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        data = self._throttled_read(length)
+        if self.mock.roll(self.mock.config.upload_error_rate, 'upload_errors'):
+            self._send_json(503, {'code': 503, 'msg': 'Service Unavailable'})
+            return
+        task = self.mock.tasks[self.mock.batches[match.group(1)][int(match.group(2))]]
+        self.mock.start_processing(task, count_pages(data), len(data))
+
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head: bool = False):
+        path = urlparse(self.path).path
+
+        if path == '/api/v4/tokens':
+            if not self._check_api('tokens'):
+                return
+            with self.mock.lock:
+                tokens = [{k: v for k, v in t.items() if k != 'token'} for t in self.mock.api_tokens.values()]
+            self._send_json(200, {'code': 0, 'msg': 'ok', 'data': {'list': tokens}})
+            return
+
+        match = re.match(r'^/api/v4/extract-results/batch/(\w+)$', path)
+        if match:
+            if not self._check_api('extract-results/batch'):
+                return
+            task_ids = self.mock.batches.get(match.group(1))
+            if task_ids is None:
+                self._send_json(404, {'code': 404, 'msg': 'batch not found'})
+                return
+            results = [self.mock.task_result(self.mock.tasks[t]) for t in task_ids]
+            self._send_json(200, {'code': 0, 'msg': 'ok',
+                                  'data': {'batch_id': match.group(1), 'extract_result': results}})
+            return
+
+        match = re.match(r'^/api/v4/extract/task/(\w+)$', path)
+        if match:
+            if not self._check_api('extract/task/{id}'):
+                return
+            task = self.mock.tasks.get(match.group(1))
+            if task is None:
+                self._send_json(404, {'code': 404, 'msg': 'task not found'})
+                return
+            result = self.mock.task_result(task)
+            result['task_id'] = task.task_id
+            self._send_json(200, {'code': 0, 'msg': 'ok', 'data': result})
+            return
+
+        match = re.match(r'^/download/(\w+)\.zip$', path)
+        if match and match.group(1) in self.mock.tasks:
+            self.mock.count('download')
+            self._send_bytes(self.mock.result_zip(self.mock.tasks[match.group(1)]), 'application/zip', head)
+            return
+
+        match = re.match(r'^/files/(.+)$', path)
+        if match and match.group(1) in self.mock.documents:
+            self.mock.count('files')
+            self._send_bytes(self.mock.documents[match.group(1)], 'application/pdf', head)
+            return
+
+        self._send_json(404, {'code': 404, 'msg': 'not found'})
+
+
+# 使用示例
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='MinerU API 本地模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-per-page', type=float, default=0.05, help='每页处理耗时（秒）')
+    parser.add_argument('--base-latency', type=float, default=0.1, help='每个任务固定耗时（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='API返回500的概率')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='API返回429的概率')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='任务处理失败的概率')
+    parser.add_argument('--gateway-error-rate', type=float, default=0.0, help='API返回502网关错误页的概率')
+    parser.add_argument('--upload-error-rate', type=float, default=0.0, help='上传PUT返回503的概率')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0, help='下载中途断开的概率')
+    parser.add_argument('--drop-response-rate', type=float, default=0.0,
+                        help='提交请求已创建任务但不返回响应的概率')
+    parser.add_argument('--bandwidth', type=int, default=0, help='每个连接的带宽上限（字节/秒，0为不限）')
+    parser.add_argument('--result-size', type=int, default=0, help='结果ZIP额外附带的图片字节数')
+    parser.add_argument('--revoked-token', action='append', default=[], help='已失效的Token（可重复）')
+    parser.add_argument('--unreachable-host', action='append', default=[],
+                        help='服务端无法访问的URL主机 host:port（可重复）')
+    parser.add_argument('--files-dir', help='以 /files/<文件名> 提供该目录下的文档')
+    parser.add_argument('--workers', type=int, default=0, help='服务端同时处理的任务数（0为不限）')
+    parser.add_argument('--max-active-per-token', type=int, default=0,
+                        help='每个Token未完成的任务数上限，超出时返回429（0为不限）')
+    parser.add_argument('--formula-latency', type=float, default=0.0, help='开启公式识别时每页额外耗时')
+    parser.add_argument('--table-latency', type=float, default=0.0, help='开启表格识别时每页额外耗时')
+    parser.add_argument('--latency-per-mb', type=float, default=0.0, help='每MB文件的额外处理耗时')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='处理耗时的随机波动（相对值）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_per_page=args.latency_per_page, base_latency=args.base_latency,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        fail_rate=args.fail_rate, gateway_error_rate=args.gateway_error_rate,
+        upload_error_rate=args.upload_error_rate, disconnect_rate=args.disconnect_rate,
+        drop_response_rate=args.drop_response_rate,
+        bandwidth=args.bandwidth, result_size=args.result_size,
+        workers=args.workers, max_active_per_token=args.max_active_per_token,
+        formula_latency=args.formula_latency, table_latency=args.table_latency,
+        latency_per_mb=args.latency_per_mb, latency_jitter=args.latency_jitter,
+        revoked_tokens=set(args.revoked_token), unreachable_hosts=set(args.unreachable_host), seed=args.seed
+    )
+    server = MockMinerUServer(args.host, args.port, config)
+    if args.files_dir:
+        from pathlib import Path
+        for path in sorted(Path(args.files_dir).iterdir()):
+            if path.is_file():
+                server.add_document(path.name, path.read_bytes())
+    print(f"🧪 MinerU 模拟服务器: {server.base_url}", flush=True)
+    print(f"   export MINERU_BASE_URL={server.base_url}", flush=True)
+    print(f"   export MINERU_URL_ALLOW_HOSTS={args.host}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+        server.httpd.server_close()
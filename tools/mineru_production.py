@@ -5,17 +5,24 @@ MinerU 生产级客户端 - 完整解决方案
 直接使用API，不依赖官方SDK
 """
 import json
+import os
 import asyncio
 import aiohttp
 import random
 import time
 import zipfile
 import shutil
+import sys
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from mineru_image_store import ImageStore
+from mineru_merge import ChunkMerger, ChunkResult
+
 try:
     from PyPDF2 import PdfReader, PdfWriter
     from pptx import Presentation
@@ -192,6 +199,7 @@ class SmartChunker:
             chunks.append({
                 'file_path': file_info['path'],
                 'page_ranges': f"{start}-{end}",
+                'start_page': i,  # 全局起始页（0开始），合并时的页码偏移
                 'chunk_id': len(chunks) + 1,
                 'pages': end - start + 1
             })
@@ -215,7 +223,7 @@ class MinerUClient:
         
         self.tokens_file = str(tokens_file)
         self.tokens = self._load_tokens()
-        self.base_url = 'https://mineru.net/api/v4'
+        self.base_url = os.environ.get('MINERU_BASE_URL', 'https://mineru.net/api/v4').rstrip('/')
         
         if not self.tokens:
             raise ValueError(f"未找到Token文件: {self.tokens_file}")
@@ -447,50 +455,30 @@ class ResultProcessor:
     
     @staticmethod
     def merge_results(chunk_dirs: List[str], output_file: str):
-        """合并所有Markdown"""
-        with open(output_file, 'w', encoding='utf-8') as out:
-            for i, chunk_dir in enumerate(chunk_dirs, 1):
-                if i > 1:
-                    out.write("\n\n" + "="*60 + "\n\n")
-                
-                out.write(f"# 分片 {i}\n\n")
-                
-                md_file = ResultProcessor.find_markdown(chunk_dir)
-                if md_file:
-                    with open(md_file, 'r', encoding='utf-8') as f:
-                        out.write(f.read())
-                else:
-                    out.write("*内容为空*\n")
-        
-        print(f"✅ Markdown合并完成: {output_file}")
+        """合并所有Markdown（按页序，图片引用改写到 images/）"""
+        merged = ChunkMerger().merge_markdown(chunk_dirs, output_file)
+        print(f"✅ Markdown合并完成: {output_file} ({merged}个分片)")
     
     @staticmethod
     def merge_images(chunk_dirs: List[str], output_dir: str):
         """合并所有图片"""
         images_dir = Path(output_dir) / "images"
-        images_dir.mkdir(exist_ok=True, parents=True)
-        
-        count = 0
-        for i, chunk_dir in enumerate(chunk_dirs, 1):
-            for img in Path(chunk_dir).rglob("*.png"):
-                new_name = f"chunk_{i}_{img.name}"
-                shutil.copy(img, images_dir / new_name)
-                count += 1
-            
-            for img in Path(chunk_dir).rglob("*.jpg"):
-                new_name = f"chunk_{i}_{img.name}"
-                shutil.copy(img, images_dir / new_name)
-                count += 1
-        
+        count = ChunkMerger().merge_images(chunk_dirs, str(images_dir))
         print(f"✅ 图片合并完成: {count}个文件 → {images_dir}")
 
 
 class MinerUProcessor:
     """MinerU 完整处理器"""
     
-    def __init__(self, max_workers: int = 10):
+    def __init__(self, max_workers: int = 10, image_store: Optional[str] = None):
+        """
+        Args:
+            max_workers: 最大并行度
+            image_store: 内容寻址图片存储目录（默认读取环境变量 MINERU_IMAGE_STORE，未设置则不启用）
+        """
         self.client = MinerUClient()
         self.max_workers = max_workers
+        self.image_store = ImageStore(image_store) if image_store else ImageStore.from_env()
     
     async def process_file(self, file_path: str, output_dir: str = "./output",
                           **options) -> Optional[Dict]:
@@ -603,11 +591,12 @@ class MinerUProcessor:
                 
                 chunk_results = await asyncio.gather(*tasks)
                 
-                # 这里简化：只处理第一个分片的结果
                 success_results = [r for r in chunk_results if r]
                 if not success_results:
                     print("❌ 所有分片处理失败")
                     return None
+                if len(chunks) > 1:
+                    return await self._merge_chunks(file_path, file_info, chunks, chunk_results, output_dir)
                 
                 full_zip_url = success_results[0]['full_zip_url']
             
@@ -655,6 +644,9 @@ class MinerUProcessor:
             return {
                 'source': file_path,
                 'source_type': 'url' if file_info['is_url'] else 'file',
+                'total_chunks': 1,
+                'success': 1,
+                'failed': 0,
                 'output': {
                     'markdown': str(md_file),
                     'images': str(images_dir) if images_dir.exists() else None
@@ -666,6 +658,46 @@ class MinerUProcessor:
             print(f"❌ 处理失败: {e}")
             return None
     
+    async def _merge_chunks(self, file_path: str, file_info: Dict, chunks: List[Dict],
+                            chunk_results: List[Optional[Dict]], output_dir: str) -> Dict:
+        """
+        下载各分片结果，按拆分计划的起始页合并 Markdown、图片、content_list 和 middle JSON
+        
+        失败的分片不会让后续页码前移：Markdown 中写入缺页说明，middle JSON 中写入占位页
+        """
+        file_name = Path(file_path).stem
+        output_path = Path(output_dir)
+        work_dir = output_path / f"{file_name}_chunks"
+        
+        print(f"\n📥 下载并解压 {len(chunks)} 个分片结果...")
+        merged_chunks = []
+        for chunk, result in zip(chunks, chunk_results):
+            chunk_dir = None
+            if result and result.get('full_zip_url'):
+                target = work_dir / f"chunk_{chunk['chunk_id']}"
+                target.mkdir(parents=True, exist_ok=True)
+                chunk_dir = await ResultProcessor.download_and_extract(result['full_zip_url'], str(target))
+            merged_chunks.append(ChunkResult(chunk['chunk_id'], chunk['start_page'], chunk_dir, chunk['pages']))
+        
+        merged = ChunkMerger(images_prefix=f"{file_name}_images", image_store=self.image_store).merge(
+            merged_chunks, str(output_path), file_name, total_pages=file_info.get('pages')
+        )
+        shutil.rmtree(work_dir, ignore_errors=True)
+        
+        missing = merged['missing_chunks']
+        print(f"✅ 合并完成: {merged['pages']}页, {merged['images']}张图片")
+        if missing:
+            print(f"⚠️  失败的分片: {missing}（已在输出中标记缺页）")
+        
+        return {
+            'source': file_path,
+            'source_type': 'url' if file_info['is_url'] else 'file',
+            'total_chunks': len(chunks),
+            'success': len(chunks) - len(missing),
+            'failed': len(missing),
+            'output': merged['output_files']
+        }
+    
     async def _process_chunk(self, session: aiohttp.ClientSession,
                             file_url: str, chunk: Dict, options: Dict) -> Optional[Dict]:
         """处理单个分片"""
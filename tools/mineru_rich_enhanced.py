@@ -98,8 +98,8 @@ class EnhancedRichProcessor:
             padding=(1, 2)
         ))
     
-    def show_file_info(self, file_info: Dict):
-        """显示文件信息"""
+    def show_file_info(self, file_info: Dict, predicted: Optional[float] = None):
+        """显示文件信息（predicted 为按处理历史预测的服务端耗时）"""
         info_table = Table(show_header=False, box=box.SIMPLE, padding=(0, 2))
         info_table.add_column(style="cyan bold", width=12)
         info_table.add_column(style="white")
@@ -117,6 +117,9 @@ class EnhancedRichProcessor:
             elif file_info['pages'] > 600:
                 info_table.add_row("⚠️  提示", "[yellow]页数超过600页，将使用page_ranges[/yellow]")
         
+        if predicted is not None:
+            info_table.add_row("⏱️  预计处理", f"约 {predicted:.0f} 秒（{self.client.predictor.samples} 条处理历史）")
+        
         console.print(Panel(info_table, title="[bold]文件信息[/bold]", border_style="blue"))
     
     async def process_file_enhanced(self, file_path: str, **options) -> Optional[Dict]:
@@ -144,7 +147,16 @@ class EnhancedRichProcessor:
                     self.stats['errors'].append({'stage': '验证', 'error': error})
                     return None
             
-            self.show_file_info(file_info)
+            upload_options = {
+                'model_version': options.get('model_version', 'vlm'),
+                'enable_formula': options.get('enable_formula', True),
+                'enable_table': options.get('enable_table', True)
+            }
+            
+            if file_info['format'] == 'html':
+                upload_options['model_version'] = 'MinerU-HTML'
+            
+            self.show_file_info(file_info, self.client.predictor.predict(file_info, upload_options))
             
             # 2. 处理文件（带详细进度）
             progress = Progress(
@@ -169,15 +181,6 @@ class EnhancedRichProcessor:
                 async with AsyncSession() as session:
                     if not file_info['is_url']:
                         # 上传
-                        upload_options = {
-                            'model_version': options.get('model_version', 'vlm'),
-                            'enable_formula': options.get('enable_formula', True),
-                            'enable_table': options.get('enable_table', True)
-                        }
-                        
-                        if file_info['format'] == 'html':
-                            upload_options['model_version'] = 'MinerU-HTML'
-                        
                         batch_id = await self.client.upload_file(session, file_path, **upload_options)
                         
                         if not batch_id:
@@ -288,35 +291,16 @@ class EnhancedRichProcessor:
             return None
     
     async def _wait_with_progress(self, session, batch_id, progress, task_id):
-        """等待处理完成（带进度更新）"""
-        start_time = time.time()
-        max_wait = 600
-        
-        while time.time() - start_time < max_wait:
-            results = await self.client.get_batch_result(session, batch_id)
-            
-            if results:
-                all_done = True
-                for result in results:
-                    state = result.get('state')
-                    
-                    if state == 'failed':
-                        return None
-                    elif state in ['pending', 'running', 'waiting-file', 'converting']:
-                        all_done = False
-                        if state == 'running':
-                            prog = result.get('extract_progress', {})
-                            extracted = prog.get('extracted_pages', 0)
-                            total = prog.get('total_pages', 0)
-                            if total > 0:
-                                progress.update(task_id, completed=extracted, total=total)
-                
-                if all_done:
-                    return results
-            
-            await asyncio.sleep(2)
+        """等待处理完成（带页数进度和按处理历史预测的剩余时间）"""
+        def update(job):
+            eta = job.eta()
+            description = "[cyan]⚙️  处理中" + (f" [dim]（预计还需 {eta:.0f} 秒）[/dim]" if eta is not None else "")
+            if job.state == 'running' and job.total > 0:
+                progress.update(task_id, completed=job.extracted, total=job.total, description=description)
+            else:
+                progress.update(task_id, description=description)
         
-        return None
+        return await self.client.wait_for_completion(session, batch_id, on_progress=update)
     
     def show_result(self, md_file, images_dir, image_count, elapsed):
         """显示处理结果"""
@@ -346,7 +330,15 @@ class EnhancedRichProcessor:
             console.print(f"[yellow]未找到匹配的文件: {pattern}[/yellow]")
             return
         
-        console.print(f"[cyan]📁 找到 {len(files)} 个文件[/cyan]\n")
+        console.print(f"[cyan]📁 找到 {len(files)} 个文件[/cyan]")
+        
+        # 按处理历史预测服务端耗时（逐个处理，总和即为预计总时间）
+        predictor = self.client.predictor
+        if predictor.ready():
+            predicted = sum(predictor.predict({'format': f.suffix.lower().lstrip('.'), 'size': f.stat().st_size}) or 0
+                            for f in files)
+            console.print(f"[cyan]⏱️  预计服务端处理约 {predicted:.0f} 秒（{predictor.samples} 条处理历史）[/cyan]")
+        console.print()
         
         self.stats['total_files'] = len(files)
         batch_start_time = time.time()